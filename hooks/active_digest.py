@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Active Digest — precomputed goal/task summary for the injection hooks.
+
+mid_workflow_recall (every Write/Edit of a new file) spawned git, resolved
+the active task from tasks.json and re-parsed its context markdown;
+session_context re-parsed north-star.md and the same context file at every
+SessionStart. Both only print a handful of lines that change when the goal
+or the active task does.
+
+Storage: .ultra/cache/active-digest.json (derived — safe to delete)
+  version, built_ns
+  inputs      {rel path: "mtime_ns:size" or ""}  tasks.json, north-star.md
+              and the context file of every in_progress task
+  north_star  whether .ultra/north-star.md exists
+  goal, hard  its `## One-line` / `## Hard Constraints` sections
+  tasks       in_progress tasks in tasks.json order:
+              {id, title, ac_bullets (first 2), acceptance (section text)}
+
+load_digest() stats the recorded inputs and rebuilds only when one of them
+changed (or appeared/vanished), or when one was modified within
+RACY_WINDOW_NS of the build — a same-size edit in the same mtime tick cannot
+be told apart by stat, so such a digest is not trusted until it settles.
+Which in_progress task is "mine" is resolved at read time from the session
+and worktree bindings (task_binding.py), so one digest serves parallel
+sessions. Projects without .ultra/ never get a digest.
+
+  python3 hooks/active_digest.py [--root PATH] [--session ID]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import atomic_write_text
+from hook_utils import find_git_root, get_cache_dir
+from task_binding import resolve_active_task
+from task_store import find_in_progress
+
+DIGEST_NAME = "active-digest.json"
+DIGEST_VERSION = 1
+RACY_WINDOW_NS = 2_000_000_000
+MAX_AC_BULLETS = 2
+
+TASKS_JSON = ".ultra/tasks/tasks.json"
+NORTH_STAR = ".ultra/north-star.md"
+
+
+def _context_rel(tid) -> str:
+    return f".ultra/tasks/contexts/task-{tid}.md"
+
+
+def extract_md_section(content: str, header: str, max_chars: int = 300) -> str:
+    """Extract first non-placeholder content from a markdown section header to next `---`.
+
+    Properly handles multi-line HTML comments, blockquotes, and placeholder markers.
+    """
+    if header not in content:
+        return ""
+    section = content.split(header, 1)[1].split('\n---\n', 1)[0]
+    out = []
+    in_comment = False
+    for line in section.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        # Track multi-line HTML comments (line may contain both open and close)
+        if '<!--' in stripped and '-->' not in stripped:
+            in_comment = True
+            continue
+        if in_comment:
+            if '-->' in stripped:
+                in_comment = False
+            continue
+        # Single-line comment
+        if stripped.startswith('<!--') and stripped.endswith('-->'):
+            continue
+        if stripped.startswith('>'):
+            stripped = stripped[1:].strip()
+        if not stripped:
+            continue
+        # Skip placeholder markers like _(not yet defined)_ or _(criterion 1)_
+        if stripped.startswith('_(') and stripped.endswith(')_'):
+            continue
+        # Skip checklist markers without content
+        if stripped in ('- [ ]', '- [x]'):
+            continue
+        out.append(stripped)
+        if sum(len(s) for s in out) > max_chars:
+            break
+    result = ' '.join(out)
+    return result[:max_chars].strip()
+
+
+def first_ac_bullets(content: str, max_lines: int = MAX_AC_BULLETS) -> list:
+    """First acceptance-criteria bullets, skipping comments and placeholders."""
+    if '## Acceptance Criteria' not in content:
+        return []
+    section = content.split('## Acceptance Criteria', 1)[1]
+    section = section.split('\n---\n', 1)[0]
+    bullets = []
+    in_comment = False
+    for line in section.split('\n'):
+        s = line.strip()
+        if not s:
+            continue
+        if '<!--' in s and '-->' not in s:
+            in_comment = True
+            continue
+        if in_comment:
+            if '-->' in s:
+                in_comment = False
+            continue
+        if s.startswith('<!--') and s.endswith('-->'):
+            continue
+        if s.startswith('_(') and s.endswith(')_'):
+            continue
+        if s.startswith('- ') and len(s) > 4:
+            bullets.append(s[:120])
+            if len(bullets) >= max_lines:
+                break
+    return bullets
+
+
+def _stat_sig(path: Path) -> str:
+    try:
+        st = path.stat()
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def build_digest(root: Path) -> dict:
+    """Parse tasks, context files and north-star.md into a fresh digest."""
+    root = Path(root)
+    built_ns = time.time_ns()
+    inputs = {TASKS_JSON: _stat_sig(root / TASKS_JSON), NORTH_STAR: _stat_sig(root / NORTH_STAR)}
+    tasks = []
+    for t in find_in_progress(root):
+        tid = t.get("id", "?")
+        rel = _context_rel(tid)
+        inputs[rel] = _stat_sig(root / rel)
+        ctx = _read(root / rel)
+        tasks.append({
+            "id": tid,
+            "title": t.get("title", "?"),
+            "ac_bullets": first_ac_bullets(ctx),
+            "acceptance": extract_md_section(ctx, '## Acceptance Criteria', max_chars=300),
+        })
+    ns = _read(root / NORTH_STAR)
+    return {
+        "version": DIGEST_VERSION,
+        "built_ns": built_ns,
+        "inputs": inputs,
+        "north_star": bool(inputs[NORTH_STAR]),
+        "goal": extract_md_section(ns, '## One-line', max_chars=250),
+        "hard": extract_md_section(ns, '## Hard Constraints', max_chars=400),
+        "tasks": tasks,
+    }
+
+
+def is_fresh(root: Path, digest) -> bool:
+    """True if no recorded input changed and none is racy against the build."""
+    if not isinstance(digest, dict) or digest.get("version") != DIGEST_VERSION:
+        return False
+    inputs = digest.get("inputs")
+    if not isinstance(inputs, dict) or not isinstance(digest.get("tasks"), list):
+        return False
+    racy_after = digest.get("built_ns", 0) - RACY_WINDOW_NS
+    for rel, sig in inputs.items():
+        if _stat_sig(Path(root) / rel) != sig:
+            return False
+        if sig and int(sig.split(":", 1)[0]) >= racy_after:
+            return False
+    return True
+
+
+def load_digest(root: Path) -> dict | None:
+    """The project's digest, rebuilt and rewritten only when stale.
+
+    None outside an .ultra project or on unexpected errors. Never raises.
+    """
+    try:
+        root = Path(root)
+        if not (root / ".ultra").is_dir():
+            return None
+        path = root / ".ultra" / "cache" / DIGEST_NAME
+        try:
+            digest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            digest = None
+        if is_fresh(root, digest):
+            return digest
+        digest = build_digest(root)
+        try:
+            atomic_write_text(get_cache_dir(root) / DIGEST_NAME,
+                              json.dumps(digest, ensure_ascii=False))
+        except OSError:
+            pass
+        return digest
+    except Exception:
+        return None
+
+
+def active_task_entry(root: Path, digest, session_id: str = ""):
+    """This session's task entry of the digest (task_binding rules), or None."""
+    if not digest or not digest.get("tasks"):
+        return None
+    return resolve_active_task(root, session_id, tasks=digest["tasks"])
+
+
+def main(argv: list) -> int:
+    args = list(argv)
+    root, session_id = "", ""
+    while args:
+        arg = args.pop(0)
+        if arg == "--root" and args:
+            root = args.pop(0)
+        elif arg == "--session" and args:
+            session_id = args.pop(0)
+    root = Path(root) if root else find_git_root(Path.cwd())
+    digest = load_digest(root) if root else None
+    if digest is None:
+        print("active_digest: no .ultra project here", file=sys.stderr)
+        return 1
+    out = dict(digest, active=active_task_entry(root, digest, session_id))
+    print(json.dumps(out, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Atomic IO — crash- and concurrency-safe writes for .ultra artifacts.
+
+With agent teams / tmux teammate mode several sessions write the same
+files at once (relations.json, wiki pages, progress snapshots, context and
+orphan trails, reviews/index.json). Plain write_text truncates in place, so
+readers can see torn files and concurrent read-modify-write cycles drop
+each other's changes. Everything here is stdlib-only and never leaves a
+partial file behind:
+
+  atomic_write_text / atomic_write_bytes
+      Write to a unique temp file in the same directory, then os.replace —
+      readers see the old or the new content, never a mix.
+
+  file_lock(path, timeout)
+      fcntl advisory lock (exclusive, or shared=True) guarding `path`, with
+      a timeout (LockTimeout). Lock files live in .ultra/cache/locks/ for
+      paths under .ultra, next to the file otherwise. A no-op without fcntl.
+
+  update_text / update_json
+      Read-modify-write with optimistic retry: fn runs on a snapshot without
+      holding the lock; the result is written only if the file still has
+      the snapshot's signature (mtime, size, inode), checked under the lock.
+      On conflict fn re-runs on the new content; the last attempt runs
+      entirely under the lock, so every call makes progress.
+
+Stress benchmark: python3 hooks/tests/bench_atomic_io.py
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover — non-POSIX: atomic writes, no locking
+    fcntl = None
+
+LOCK_TIMEOUT_S = 5.0
+RMW_RETRIES = 4
+_POLL_S = 0.005
+_POLL_MAX_S = 0.05
+
+
+class LockTimeout(TimeoutError):
+    """file_lock could not acquire the lock within its timeout."""
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def atomic_write_bytes(path, data: bytes, durable: bool = False, mtime_ns: int = None) -> None:
+    """Replace `path` with `data` atomically (temp file + os.replace).
+
+    durable=True also fsyncs the file before the rename. mtime_ns stamps the
+    temp file before it becomes visible, so no reader sees the new content
+    with the write-time mtime. Raises OSError.
+    """
+    path = Path(path)
+    tmp = _tmp_path(path)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        if mtime_ns is not None:
+            os.utime(tmp, ns=(mtime_ns, mtime_ns))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path, text: str, durable: bool = False, mtime_ns: int = None) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"), durable, mtime_ns)
+
+
+def lock_path(path) -> Path:
+    """Lock file guarding `path`: .ultra/cache/locks/<hash>.lock under .ultra."""
+    path = Path(os.path.abspath(path))
+    for parent in path.parents:
+        if parent.name == ".ultra":
+            key = hashlib.sha1(str(path.relative_to(parent)).encode("utf-8")).hexdigest()[:16]
+            return parent / "cache" / "locks" / f"{path.name}.{key}.lock"
+    return path.with_name(f".{path.name}.lock")
+
+
+@contextmanager
+def file_lock(path, timeout: float = LOCK_TIMEOUT_S, shared: bool = False):
+    """Hold an advisory lock on `path` (not on the file itself, which gets
+    replaced). Raises LockTimeout after `timeout` seconds."""
+    if fcntl is None:
+        yield
+        return
+    lpath = lock_path(path)
+    lpath.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lpath), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        mode = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+        deadline = time.monotonic() + max(0.0, timeout)
+        delay = _POLL_S
+        while True:
+            try:
+                fcntl.flock(fd, mode)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"lock on {path} not acquired in {timeout}s")
+                time.sleep(delay)
+                delay = min(delay * 2, _POLL_MAX_S)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _signature(path: Path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read(path: Path):
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def update_text(path, fn, timeout: float = LOCK_TIMEOUT_S, retries: int = RMW_RETRIES):
+    """Atomically replace `path`'s text with fn(text) (text is None if the
+    file is missing). fn returning None or the same text writes nothing.
+
+    Returns the text now on disk (as written or as left). Raises OSError or
+    LockTimeout; callers in hooks treat both as "skip this write".
+    """
+    path = Path(path)
+    for attempt in range(max(1, retries)):
+        last = attempt == max(1, retries) - 1
+        if last:
+            with file_lock(path, timeout):
+                text = _read(path)
+                new = fn(text)
+                if new is None or new == text:
+                    return text
+                atomic_write_text(path, new)
+                return new
+        sig = _signature(path)
+        text = _read(path)
+        new = fn(text)
+        if new is None or new == text:
+            if _signature(path) == sig:
+                return text
+            continue
+        with file_lock(path, timeout):
+            if _signature(path) != sig:
+                continue  # someone else wrote in between: recompute
+            atomic_write_text(path, new)
+            return new
+    return _read(path)  # pragma: no cover — the last attempt always returns
+
+
+def update_json(path, fn, default=None, indent=2, timeout: float = LOCK_TIMEOUT_S,
+                retries: int = RMW_RETRIES, strict: bool = False):
+    """update_text for JSON documents: fn(data) → new data (None = unchanged).
+
+    Missing files start from a copy of `default`. Unparseable files do too
+    unless strict=True, which raises json.JSONDecodeError and leaves the
+    file alone — use it for committed artifacts; the default suits derived
+    files that are safe to regenerate. fn may mutate its argument in place
+    and return it.
+    """
+    def apply(text):
+        try:
+            data = json.loads(text) if text is not None else None
+        except ValueError:
+            if strict:
+                raise
+            data = None
+        if data is None:
+            data = json.loads(json.dumps(default))
+        new = fn(data)
+        if new is None:
+            return None
+        return json.dumps(new, indent=indent, ensure_ascii=False) + ("\n" if indent else "")
+
+    text = update_text(path, apply, timeout, retries)
+    try:
+        return json.loads(text) if text is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Commit Index — path → last commit map for the `[Trace] (no task)` line.
+
+post_edit_guard's git context fallback used to run `git rev-parse` and
+`git log -1 -- <path>` on every edit to an unowned file; on a long history
+the path-limited log walks commits for seconds. This map is built once from
+a single `git log --name-only` pass and extended from the last indexed HEAD,
+so the common case (HEAD unchanged) is a file read and a dict lookup.
+
+Storage: .ultra/cache/last-commit.json (derived — safe to delete)
+  {"version", "head": <indexed HEAD sha>, "complete": <history fully walked>,
+   "walked": <commits indexed, counted back from head>,
+   "paths": {"<repo-relative path>": ["<short sha>", <commit ts>, "<subject>"]}}
+
+HEAD is read from the git dir (hook_utils.read_git_head), not via git. Git
+runs only when HEAD moved: `git log <old>..<new>` when the old head is an
+ancestor, a full rebuild otherwise (rebase, reset). The hook runs under a
+5s budget, so each log pass is time-boxed to GIT_LOG_TIMEOUT, or to what is
+left of post_edit_guard's run deadline (none left → the worker below syncs
+instead): a rebuild that runs out of time (or reaches MAX_COMMITS) keeps
+the newest commits it read and is saved with complete=False. Lookups never run git: a path missing
+from an incomplete map reads as "not indexed yet" and starts a detached
+worker (`commit_index.py --extend-worker <root>`, single-flight via
+atomic_io.file_lock) that walks the older history EXTEND_COMMITS at a time
+(`git log --skip=<walked>`) until the map is complete. A path-limited
+`git log -1 -- <path>` for a new file would walk the whole history.
+
+Relative ages ("3 days ago") are rendered at lookup from the commit time,
+so a cached entry never goes stale.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import LockTimeout, atomic_write_text, file_lock
+from hook_utils import get_cache_dir, read_git_head, time_left
+
+INDEX_VERSION = 2
+MAX_COMMITS = 5000
+GIT_LOG_TIMEOUT = 2
+MIN_GIT_S = 0.2
+EXTEND_COMMITS = 20000
+EXTEND_TIMEOUT = 60
+SUBJECT_MAX = 100
+_HEADER = "\x00"
+
+
+def _git(root: Path, args, timeout=GIT_LOG_TIMEOUT):
+    """(returncode, stdout); (-1, '') on timeout or missing git."""
+    try:
+        result = subprocess.run(
+            ["git", "-c", "core.quotePath=false", *args],
+            capture_output=True, text=True, timeout=timeout,
+            cwd=str(root), errors="replace",
+        )
+        return result.returncode, result.stdout
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return -1, ""
+
+
+def parse_log(output: str):
+    """Parse `git log --name-only --format=%x00%h%x09%ct%x09%s` (newest first).
+
+    Returns ({path: [short, ts, subject]}, commit_count); each path keeps the
+    newest commit that touched it.
+    """
+    paths = {}
+    commits = 0
+    current = None
+    for line in output.splitlines():
+        if line.startswith(_HEADER):
+            parts = line[1:].split("\t", 2)
+            if len(parts) < 2:
+                current = None
+                continue
+            commits += 1
+            try:
+                ts = int(parts[1])
+            except ValueError:
+                ts = 0
+            subject = parts[2] if len(parts) > 2 else ""
+            current = [parts[0], ts, subject[:SUBJECT_MAX]]
+        elif line and current is not None and line not in paths:
+            paths[line] = current
+    return paths, commits
+
+
+def _log(root: Path, rev: str, max_count: int, timeout: float = GIT_LOG_TIMEOUT, skip: int = 0):
+    """parse_log() of one time-boxed log pass, plus whether it timed out.
+
+    (paths, commits, timed_out); None if git failed. On timeout the output
+    read so far is kept up to its last complete line: the log is newest
+    first, so every path in it already maps to its newest commit — but the
+    last commit's file list may be cut, so it does not count as walked.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-c", "core.quotePath=false", "log", "--name-only", "--no-renames",
+             "--format=%x00%h%x09%ct%x09%s", f"--max-count={max_count}", f"--skip={skip}", rev],
+            capture_output=True, timeout=timeout, cwd=str(root),
+        )
+    except subprocess.TimeoutExpired as exc:
+        out = (exc.stdout or b"").decode("utf-8", "replace")
+        paths, commits = parse_log(out[:out.rfind("\n") + 1])
+        return paths, commits, True
+    except (FileNotFoundError, OSError):
+        return None
+    if result.returncode != 0:
+        return None
+    paths, commits = parse_log(result.stdout.decode("utf-8", "replace"))
+    return paths, commits, False
+
+
+def _ago(n: int, unit: str) -> str:
+    return f"{n} {unit} ago" if n == 1 else f"{n} {unit}s ago"
+
+
+def relative_age(ts: int, now: float = None) -> str:
+    """git's %cr wording ("5 minutes ago", "3 weeks ago") from a unix time."""
+    now = time.time() if now is None else now
+    diff = max(0, int(now - ts))
+    if diff < 90:
+        return _ago(diff, "second")
+    minutes = (diff + 30) // 60
+    if minutes < 90:
+        return _ago(minutes, "minute")
+    hours = (minutes + 30) // 60
+    if hours < 36:
+        return _ago(hours, "hour")
+    days = (hours + 12) // 24
+    if days < 14:
+        return _ago(days, "day")
+    if days < 70:
+        return _ago((days + 3) // 7, "week")
+    if days < 365:
+        return _ago((days + 15) // 30, "month")
+    return _ago(days // 365, "year")
+
+
+class CommitIndex:
+    """Last-commit map for one checkout, synced to its current HEAD."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.head = ""
+        self.complete = False
+        self.walked = 0
+        self.paths: dict = {}
+        try:
+            self.path = get_cache_dir(self.root) / "last-commit.json"
+        except OSError:
+            self.path = None
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.head = data.get("head") or ""
+        self.complete = bool(data.get("complete"))
+        self.walked = int(data.get("walked") or 0)
+        self.paths = data.get("paths") or {}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            atomic_write_text(self.path, json.dumps({
+                "version": INDEX_VERSION,
+                "head": self.head,
+                "complete": self.complete,
+                "walked": self.walked,
+                "paths": self.paths,
+            }))
+        except OSError:
+            pass
+
+    def _is_ancestor(self, old: str, new: str, timeout: float = GIT_LOG_TIMEOUT) -> bool:
+        code, _out = _git(self.root, ["merge-base", "--is-ancestor", old, new], timeout=timeout)
+        return code == 0
+
+    def rebuild(self, head: str, deadline=None) -> bool:
+        timeout = time_left(deadline, GIT_LOG_TIMEOUT)
+        if timeout < MIN_GIT_S:
+            return False
+        parsed = _log(self.root, head, MAX_COMMITS, timeout=timeout)
+        if parsed is None:
+            return False
+        self.paths, commits, timed_out = parsed
+        self.complete = not timed_out and commits < MAX_COMMITS
+        self.walked = max(0, commits - 1) if timed_out else commits
+        self.head = head
+        self._save()
+        return True
+
+    def sync(self, head: str, deadline=None) -> bool:
+        """Bring the map up to `head`. False if git failed or `deadline`
+        left no time for it (map left as is)."""
+        if not head or head == self.head:
+            return bool(head)
+        if time_left(deadline, GIT_LOG_TIMEOUT) < MIN_GIT_S:
+            return False
+        if self.head and self._is_ancestor(self.head, head, time_left(deadline, GIT_LOG_TIMEOUT)):
+            parsed = _log(self.root, f"{self.head}..{head}", MAX_COMMITS,
+                          timeout=max(MIN_GIT_S, time_left(deadline, GIT_LOG_TIMEOUT)))
+            if parsed is not None and not parsed[2] and parsed[1] < MAX_COMMITS:
+                newer, commits, _timed_out = parsed
+                self.paths.update(newer)
+                self.walked += commits
+                self.head = head
+                self._save()
+                return True
+        return self.rebuild(head, deadline)
+
+    def extend(self, max_count: int = EXTEND_COMMITS, timeout: float = EXTEND_TIMEOUT) -> bool:
+        """Index the next max_count commits below the walked window (worker
+        only — this is the slow part). False if git failed or made no progress."""
+        if self.complete or not self.head:
+            return False
+        parsed = _log(self.root, self.head, max_count, timeout=timeout, skip=self.walked)
+        if parsed is None:
+            return False
+        older, commits, timed_out = parsed
+        walked = commits - 1 if timed_out else commits
+        if timed_out and walked <= 0:
+            return False
+        for path, entry in older.items():
+            self.paths.setdefault(path, entry)
+        self.walked += walked
+        self.complete = not timed_out and commits < max_count
+        self._save()
+        return True
+
+    def lookup(self, rel_path: str):
+        """[short, ts, subject] of the newest commit touching rel_path, or None.
+        Never runs git; see `complete` for whether None means "no history"."""
+        return self.paths.get(rel_path)
+
+
+def _worker_lock(root: Path) -> Path:
+    return get_cache_dir(root) / "last-commit.worker"
+
+
+def _spawn_extend(root: Path) -> None:
+    try:
+        with file_lock(_worker_lock(root), timeout=0):
+            pass
+    except (LockTimeout, OSError):
+        return  # a worker is already walking the history
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--extend-worker", str(root)],
+            cwd=str(root), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def extend_worker(root: Path) -> int:
+    """Walk the rest of the history into the map; one worker per checkout."""
+    root = Path(root)
+    try:
+        with file_lock(_worker_lock(root), timeout=0):
+            while True:
+                _branch, head = read_git_head(root)
+                index = CommitIndex(root)
+                if not head or not index.sync(head) or index.complete:
+                    return 0
+                if not index.extend():
+                    return 1
+    except (LockTimeout, OSError):
+        return 0
+
+
+def describe_last_commit(toplevel: str, rel_path: str, deadline=None):
+    """(branch, "<short> <subject> (<age>)") for post_edit_guard.
+
+    last is '' when the path has no history, None when the map does not
+    reach back far enough yet or HEAD moved and `deadline` left no time to
+    catch up (a worker is extending it).
+    """
+    root = Path(toplevel)
+    branch, head = read_git_head(root)
+    if not head:
+        return branch, ""
+    index = CommitIndex(root)
+    if not index.sync(head, deadline):
+        if deadline is not None and time_left(deadline, MIN_GIT_S) < MIN_GIT_S:
+            _spawn_extend(root)
+            return branch, None
+        return branch, ""
+    entry = index.lookup(rel_path)
+    if not entry:
+        if index.complete:
+            return branch, ""
+        _spawn_extend(root)
+        return branch, None
+    short, ts, subject = entry
+    return branch, f"{short} {subject} ({relative_age(ts)})"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--extend-worker":
+        sys.exit(extend_worker(Path(sys.argv[2])))
+    print("usage: commit_index.py --extend-worker <root>", file=sys.stderr)
+    sys.exit(2)
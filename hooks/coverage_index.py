@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Coverage Index — line → covering-test lookup for post_edit_guard's [Test] line.
+
+The name-based reminder (pairing_index.py) guesses which tests matter. When
+the project already has per-test coverage data, the edited lines say exactly
+which tests execute them:
+
+  .coverage     coverage.py SQLite with dynamic contexts
+                (`pytest --cov --cov-context=test`) → pytest node ids
+  lcov.info     lcov records with a TN: test name → jest/vitest test names
+                (coverage/lcov.info, lcov.info)
+
+Storage: .ultra/cache/coverage-index.db (derived — safe to delete)
+  tests(id, name)           one row per test context
+  cov(file, test_id, bits)  repo-relative file, lines as coverage.py numbits
+  meta(key, value)          source path/mtime/size, kind
+
+Rebuilt lazily: only when the coverage file's (path, mtime_ns, size) differs
+from the one recorded in meta. A rebuild reads the whole coverage file and
+has no useful time bound, so inside post_edit_guard (a `deadline` is given)
+it is deferred to a detached `coverage_index.py --build-worker <root>`
+(single-flight via atomic_io.file_lock) and the hook keeps the name-based
+reminder for that edit. A lookup is one indexed query per edited file plus
+an integer AND per covering test.
+
+Line sets use coverage.py's numbits layout (byte j, bit n → line 8j+n), so
+`int.from_bytes(bits, "little")` turns a row into a plain bitmask.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import LockTimeout, file_lock
+from hook_utils import get_cache_dir
+
+DB_NAME = "coverage-index.db"
+INDEX_VERSION = "1"
+LCOV_CANDIDATES = ("coverage/lcov.info", "lcov.info")
+# pytest-cov appends the phase to each context: "tests/test_x.py::test_a|run"
+_CONTEXT_PHASES = ("|run", "|setup", "|teardown")
+
+
+# -- Numbits --
+
+def lines_to_mask(lines) -> int:
+    mask = 0
+    for line in lines:
+        if line > 0:
+            mask |= 1 << line
+    return mask
+
+
+def mask_to_numbits(mask: int) -> bytes:
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def numbits_to_mask(bits: bytes) -> int:
+    return int.from_bytes(bits, "little")
+
+
+# -- Sources --
+
+def find_coverage_file(root: Path):
+    """(path, kind) of the project's coverage data, or None. kind: 'coveragepy' | 'lcov'."""
+    env = os.environ.get("COVERAGE_FILE")
+    candidates = [(Path(env) if os.path.isabs(env) else root / env, "coveragepy")] if env else []
+    candidates.append((root / ".coverage", "coveragepy"))
+    candidates.extend((root / rel, "lcov") for rel in LCOV_CANDIDATES)
+    for path, kind in candidates:
+        if path.is_file():
+            return path, kind
+    return None
+
+
+def _rel(root: Path, path: str):
+    p = Path(path)
+    if not p.is_absolute():
+        return p.as_posix()
+    try:
+        return p.resolve().relative_to(root.resolve()).as_posix()
+    except (ValueError, OSError):
+        return None
+
+
+def _test_name(context: str) -> str:
+    for phase in _CONTEXT_PHASES:
+        if context.endswith(phase):
+            return context[:-len(phase)]
+    return context
+
+
+def read_coveragepy(path: Path, root: Path):
+    """Yield (rel_path, test_name, mask) from a coverage.py data file.
+
+    Rows for the empty context (no dynamic contexts recorded) carry no test
+    identity and are skipped.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT file.path, context.context, line_bits.numbits FROM line_bits "
+            "JOIN file ON file.id = line_bits.file_id "
+            "JOIN context ON context.id = line_bits.context_id"
+        )
+        for fpath, context, bits in rows:
+            rel = _rel(root, fpath)
+            if rel is None or not context:
+                continue
+            yield rel, _test_name(context), numbits_to_mask(bits)
+    finally:
+        conn.close()
+
+
+def read_lcov(path: Path, root: Path):
+    """Yield (rel_path, test_name, mask) from an lcov tracefile (hit lines only)."""
+    test, rel, mask = "", None, 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.strip()
+            if line.startswith("TN:"):
+                test = line[3:]
+            elif line.startswith("SF:"):
+                rel, mask = _rel(root, line[3:]), 0
+            elif line.startswith("DA:"):
+                parts = line[3:].split(",")
+                try:
+                    if len(parts) >= 2 and int(parts[1]) > 0:
+                        mask |= 1 << int(parts[0])
+                except ValueError:
+                    continue
+            elif line == "end_of_record":
+                if test and rel and mask:
+                    yield rel, test, mask
+                rel, mask = None, 0
+
+
+# -- Touched lines --
+
+def touched_lines_from_patch(hunks) -> set:
+    """Pre-edit line numbers an Edit/Write changed, from tool_response.structuredPatch.
+
+    Coverage was recorded against the old file, so removed lines count as
+    themselves and an insertion counts as the old lines on either side of it.
+    """
+    touched = set()
+    for hunk in hunks or []:
+        if not isinstance(hunk, dict):
+            continue
+        old = hunk.get("oldStart") or 1
+        for line in hunk.get("lines") or []:
+            if line.startswith("-"):
+                touched.add(old)
+                old += 1
+            elif line.startswith("+"):
+                touched.update((max(old - 1, 1), old))
+            else:
+                old += 1
+    return touched
+
+
+def touched_lines(tool_input: dict, tool_response, content=None) -> set:
+    """Lines an edit touched: structuredPatch when present, else locate new_string.
+
+    content is the edited file as str or bytes.
+    """
+    if isinstance(tool_response, dict) and tool_response.get("structuredPatch"):
+        return touched_lines_from_patch(tool_response["structuredPatch"])
+    new_string = (tool_input or {}).get("new_string")
+    if new_string and content:
+        if isinstance(content, bytes):
+            needle, newline = new_string.encode("utf-8"), b"\n"
+        else:
+            needle, newline = new_string, "\n"
+        pos = content.find(needle)
+        if pos >= 0:
+            start = content.count(newline, 0, pos) + 1
+            return set(range(start, start + needle.count(newline) + 1))
+    return set()
+
+
+# -- Index --
+
+class CoverageIndex:
+    """SQLite line → test index derived from one coverage file."""
+
+    def __init__(self, root: Path, db_path: Path = None):
+        self.root = Path(root)
+        self.db_path = Path(db_path) if db_path else get_cache_dir(self.root) / DB_NAME
+        self.kind = None
+
+    def _source_sig(self, path: Path) -> str:
+        st = path.stat()
+        return f"{path}:{st.st_mtime_ns}:{st.st_size}"
+
+    def _current_sig(self):
+        if not self.db_path.exists():
+            return None
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta"))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        if meta.get("version") != INDEX_VERSION:
+            return None
+        self.kind = meta.get("kind")
+        return meta.get("source")
+
+    def ensure(self, build: bool = True) -> bool:
+        """Rebuild if the coverage file changed. False when there is no coverage
+        data, or it changed and build=False (the caller defers the rebuild)."""
+        found = find_coverage_file(self.root)
+        if found is None:
+            return False
+        path, kind = found
+        try:
+            sig = self._source_sig(path)
+        except OSError:
+            return False
+        if self._current_sig() == sig:
+            return True
+        if not build:
+            return False
+        try:
+            self.build(path, kind, sig)
+        except (sqlite3.Error, OSError):
+            return False
+        return True
+
+    def build(self, path: Path, kind: str, sig: str) -> None:
+        reader = read_coveragepy if kind == "coveragepy" else read_lcov
+        tmp = self.db_path.with_name(self.db_path.name + f".{os.getpid()}.tmp")
+        if tmp.exists():
+            tmp.unlink()
+        conn = sqlite3.connect(str(tmp))
+        try:
+            conn.executescript(
+                "CREATE TABLE tests (id INTEGER PRIMARY KEY, name TEXT UNIQUE);"
+                "CREATE TABLE cov (file TEXT, test_id INTEGER, bits BLOB);"
+                "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);"
+            )
+            test_ids = {}
+            merged = {}
+            for rel, test, mask in reader(path, self.root):
+                tid = test_ids.get(test)
+                if tid is None:
+                    tid = test_ids[test] = len(test_ids) + 1
+                merged[(rel, tid)] = merged.get((rel, tid), 0) | mask
+            conn.executemany("INSERT INTO tests VALUES (?, ?)",
+                             ((tid, name) for name, tid in test_ids.items()))
+            conn.executemany("INSERT INTO cov VALUES (?, ?, ?)",
+                             ((rel, tid, mask_to_numbits(mask)) for (rel, tid), mask in merged.items()))
+            conn.execute("CREATE INDEX cov_file ON cov(file)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", INDEX_VERSION), ("source", sig), ("kind", kind),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp, self.db_path)
+        self.kind = kind
+
+    def tests_covering(self, rel_path: str, lines) -> list:
+        """Sorted test names whose recorded coverage hits any of `lines`."""
+        mask = lines_to_mask(lines)
+        if not mask or not self.db_path.exists():
+            return []
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            rows = conn.execute(
+                "SELECT tests.name, cov.bits FROM cov JOIN tests ON tests.id = cov.test_id "
+                "WHERE cov.file = ?", (rel_path,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return sorted(name for name, bits in rows if numbits_to_mask(bits) & mask)
+
+
+def _worker_lock(root: Path) -> Path:
+    return get_cache_dir(root) / "coverage-index.worker"
+
+
+def _spawn_build(root: Path) -> None:
+    try:
+        with file_lock(_worker_lock(root), timeout=0):
+            pass
+    except (LockTimeout, OSError):
+        return  # a worker is already building
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--build-worker", str(root)],
+            cwd=str(root), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def build_worker(root: Path) -> int:
+    """Bring the index up to date with the coverage file; one worker per checkout."""
+    root = Path(root)
+    try:
+        with file_lock(_worker_lock(root), timeout=0):
+            return 0 if CoverageIndex(root).ensure() else 1
+    except (LockTimeout, OSError, sqlite3.Error):
+        return 0
+
+
+def covering_tests(toplevel: str, file_path: str, lines, deadline=None):
+    """post_edit_guard entry point: (kind, test names) covering the edited lines.
+
+    None when there is no usable coverage data or no touched lines, so the
+    caller keeps the name-based reminder. An empty list means the coverage
+    data has no test hitting these lines. With a `deadline` a stale index is
+    rebuilt by a background worker instead (None for this call).
+    """
+    if not lines:
+        return None
+    root = Path(toplevel)
+    rel = _rel(root, str(Path(file_path).resolve()))
+    if rel is None:
+        return None
+    try:
+        index = CoverageIndex(root)
+        if not index.ensure(build=deadline is None):
+            if deadline is not None and find_coverage_file(root) is not None:
+                _spawn_build(root)
+            return None
+        return index.kind, index.tests_covering(rel, lines)
+    except (sqlite3.Error, OSError):
+        return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--build-worker":
+        sys.exit(build_worker(Path(sys.argv[2])))
+    print("usage: coverage_index.py --build-worker <root>", file=sys.stderr)
+    sys.exit(2)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""FS Watch — directory change notification for long-running index watchers.
+
+Linux: inotify through ctypes (no third-party dependency); watches each
+directory tree recursively, adding watches for subdirectories as they are
+created. Elsewhere, or when inotify is unavailable (container limits,
+exhausted max_user_watches), falls back to polling a cheap stat signature
+of the trees.
+
+    watcher = open_watcher([root / ".ultra" / "specs", root / ".ultra" / "tasks"])
+    while True:
+        if watcher.wait(0.5):   # True once something changed
+            ...
+
+Directories missing at start are picked up when they appear. Temp and
+editor swap files (*.tmp, *.swp, *~) are ignored, so atomic writes via
+tmp + os.replace report once, on the rename.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+POLL_INTERVAL_S = 0.25
+_RESCAN_S = 1.0
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+def _ignored_name(name: str) -> bool:
+    return name.endswith((".tmp", ".swp", "~")) or name.startswith(".#")
+
+
+class PollWatcher:
+    """Stat-signature polling: (path, mtime_ns, size) of every file in the trees."""
+
+    backend = "poll"
+
+    def __init__(self, dirs):
+        self.dirs = [Path(d) for d in dirs]
+        self._sig = self._signature()
+
+    def _signature(self) -> frozenset:
+        entries = set()
+        for top in self.dirs:
+            for dirpath, _dirnames, filenames in os.walk(top):
+                for name in filenames:
+                    if _ignored_name(name):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(dirpath, name))
+                    except OSError:
+                        continue
+                    entries.add((dirpath, name, st.st_mtime_ns, st.st_size))
+        return frozenset(entries)
+
+    def wait(self, timeout: float) -> bool:
+        end = time.monotonic() + timeout
+        while True:
+            sig = self._signature()
+            if sig != self._sig:
+                self._sig = sig
+                return True
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(POLL_INTERVAL_S, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over a set of directory trees."""
+
+    backend = "inotify"
+
+    def __init__(self, dirs):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = [Path(d) for d in dirs]
+        self._wds: dict = {}   # wd → directory path
+        self._watched: set = set()
+        self._next_rescan = 0.0
+        self._rescan()
+
+    def _add(self, path: str) -> bool:
+        if path in self._watched:
+            return False
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == 28:  # ENOSPC: max_user_watches exhausted
+                raise OSError(err, "inotify watch limit reached")
+            return False
+        self._wds[wd] = path
+        self._watched.add(path)
+        return True
+
+    def _add_tree(self, top: str) -> bool:
+        added = False
+        for dirpath, _dirnames, _files in os.walk(top):
+            added = self._add(dirpath) or added
+        return added
+
+    def _rescan(self) -> bool:
+        """Watch trees that did not exist yet. True if any appeared."""
+        self._next_rescan = time.monotonic() + _RESCAN_S
+        added = False
+        for top in self.dirs:
+            if top.is_dir() and str(top) not in self._watched:
+                added = self._add_tree(str(top)) or added
+        return added
+
+    def _drain(self) -> bool:
+        changed = False
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed
+            except OSError:
+                return changed
+            if not buf:
+                return changed
+            off = 0
+            while off + _EVENT.size <= len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, off)
+                raw = buf[off + _EVENT.size: off + _EVENT.size + length]
+                off += _EVENT.size + length
+                name = os.fsdecode(raw.rstrip(b"\0"))
+                if mask & IN_Q_OVERFLOW:
+                    changed = True
+                    continue
+                if mask & IN_IGNORED:
+                    path = self._wds.pop(wd, None)
+                    self._watched.discard(path)
+                    continue
+                parent = self._wds.get(wd)
+                if parent is None:
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(os.path.join(parent, name))
+                    changed = True
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    changed = True
+                elif name and not _ignored_name(name):
+                    changed = True
+
+    def wait(self, timeout: float) -> bool:
+        end = time.monotonic() + timeout
+        while True:
+            if time.monotonic() >= self._next_rescan and self._rescan():
+                return True
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _w, _x = select.select([self.fd], [], [], min(remaining, _RESCAN_S))
+            if ready and self._drain():
+                return True
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def open_watcher(dirs, force_poll: bool = False):
+    """InotifyWatcher when the platform supports it, else PollWatcher."""
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher(dirs)
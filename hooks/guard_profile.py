@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Guard Profile — per-checker / per-rule timing and uncapped findings for post_edit_guard.
+
+Opt-in via ULTRA_GUARD_PROFILE=json|sarif. With it set, each post_edit_guard
+run records:
+  - wall time per checker (code_quality, security, task_trace, ...)
+  - wall time, call count and raw match count per regex rule
+    ("SEC_CRITICAL/3" = 4th entry of SEC_CRITICAL_PATTERNS)
+  - every finding, without the 5-per-section caps of the stderr text
+
+Output (.ultra/debug/, falling back to ~/.claude/debug/ outside git):
+  guard-profile.jsonl   one {"type": "run"} timing record per scanned file;
+                        in json mode also one {"type": "finding"} per finding
+  guard-findings.sarif  sarif mode: SARIF 2.1.0, one run; each scan replaces
+                        the results for its file, so the document holds the
+                        current findings of every file edited while profiling
+
+Session report (top-N slowest rules):
+  python3 post_edit_guard.py --profile-report [--top N] [--session ID]
+Without --session, the most recent session in the log is reported.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import update_json, update_text
+
+PROFILE_ENV = "ULTRA_GUARD_PROFILE"
+PROFILE_LOG = "guard-profile.jsonl"
+SARIF_FILE = "guard-findings.sarif"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+MAX_LOG_LINES = 20000
+MAX_LOG_BYTES = 8 * 1024 * 1024
+
+_LEVELS = {"error", "warning", "note"}
+
+
+def profile_format():
+    """'json' | 'sarif' when profiling is enabled, else None."""
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in ("sarif",):
+        return "sarif"
+    if value in ("json", "jsonl", "1", "true", "yes", "on"):
+        return "json"
+    return None
+
+
+def get_log_dir(toplevel: str) -> Path:
+    """.ultra/debug/ under the git toplevel; ~/.claude/debug/ outside git."""
+    if toplevel:
+        return Path(toplevel) / ".ultra" / "debug"
+    return Path.home() / ".claude" / "debug"
+
+
+class GuardProfile:
+    """Accumulates timings and findings for one post_edit_guard run."""
+
+    def __init__(self, fmt: str, session_id: str = ""):
+        self.fmt = fmt
+        self.session_id = session_id or ""
+        self.checkers: dict = {}
+        self.rules: dict = {}
+        self.findings: list = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def checker(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            self.checkers[name] = self.checkers.get(name, 0.0) + elapsed
+
+    def time_rule(self, rule: str, elapsed_ms: float, matches: int) -> None:
+        stat = self.rules.setdefault(rule, {"ms": 0.0, "calls": 0, "matches": 0})
+        stat["ms"] += elapsed_ms
+        stat["calls"] += 1
+        stat["matches"] += matches
+
+    def add_finding(self, rule: str, level: str, file_path: str, line: int,
+                    message: str, code: str = "") -> None:
+        self.findings.append({
+            "rule": rule,
+            "level": level if level in _LEVELS else "warning",
+            "file": file_path,
+            "line": line,
+            "message": message,
+            "code": code,
+        })
+
+    # -- Output --
+
+    def flush(self, log_dir: Path, file_path: str, toplevel: str = "") -> None:
+        """Append the run record (and findings) to the log dir. Never raises."""
+        try:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            ts = datetime.now(timezone.utc).isoformat()
+            total = (time.perf_counter() - self._start) * 1000
+            records = [{
+                "type": "run",
+                "ts": ts,
+                "session_id": self.session_id,
+                "file": file_path,
+                "total_ms": round(total, 3),
+                "checkers": {k: round(v, 3) for k, v in self.checkers.items()},
+                "rules": {
+                    k: {"ms": round(v["ms"], 3), "calls": v["calls"], "matches": v["matches"]}
+                    for k, v in self.rules.items()
+                },
+                "findings": len(self.findings),
+            }]
+            if self.fmt == "json":
+                records.extend(
+                    {"type": "finding", "ts": ts, "session_id": self.session_id, **f}
+                    for f in self.findings
+                )
+            log_file = log_dir / PROFILE_LOG
+            with open(log_file, "a", encoding="utf-8") as f:
+                for rec in records:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            _rotate(log_file)
+            if self.fmt == "sarif":
+                write_sarif(log_dir / SARIF_FILE, file_path, self.findings, toplevel)
+        except (OSError, TypeError, ValueError):
+            pass
+
+
+def _rotate(log_file: Path) -> None:
+    """Trim the log once it passes MAX_LOG_BYTES to its newest lines (at most
+    MAX_LOG_LINES, half of MAX_LOG_BYTES), so a run normally costs one stat
+    and the whole log is read only once per MAX_LOG_BYTES / 2 appended."""
+    try:
+        if log_file.stat().st_size <= MAX_LOG_BYTES:
+            return
+        update_text(log_file, _trim_log)
+    except OSError:
+        pass
+
+
+def _trim_log(text):
+    if text is None:
+        return None
+    kept, size = [], 0
+    for line in reversed(text.splitlines(keepends=True)[-MAX_LOG_LINES:]):
+        size += len(line.encode("utf-8"))
+        if size > MAX_LOG_BYTES // 2:
+            break
+        kept.append(line)
+    return "".join(reversed(kept))
+
+
+def _sarif_uri(file_path: str, toplevel: str) -> str:
+    if toplevel:
+        try:
+            return Path(file_path).resolve().relative_to(Path(toplevel).resolve()).as_posix()
+        except (ValueError, OSError):
+            pass
+    return Path(file_path).as_posix()
+
+
+def _sarif_result(finding: dict, uri: str) -> dict:
+    region = {"startLine": max(1, int(finding.get("line") or 1))}
+    if finding.get("code"):
+        region["snippet"] = {"text": finding["code"]}
+    return {
+        "ruleId": finding["rule"],
+        "level": finding["level"],
+        "message": {"text": finding["message"]},
+        "locations": [{
+            "physicalLocation": {
+                "artifactLocation": {"uri": uri},
+                "region": region,
+            },
+        }],
+    }
+
+
+def write_sarif(sarif_path: Path, file_path: str, findings: list, toplevel: str = "") -> None:
+    """Replace file_path's results in the SARIF 2.1.0 document at sarif_path.
+
+    Read-merge-write under atomic_io's lock, so parallel post_edit_guard runs
+    never drop each other's results. Raises OSError (incl. LockTimeout) like
+    update_json; flush() swallows it.
+    """
+    uri = _sarif_uri(file_path, toplevel)
+
+    def merge(doc):
+        try:
+            doc["runs"][0]["results"]
+        except (KeyError, IndexError, TypeError):
+            doc = _empty_sarif()
+        run = doc["runs"][0]
+        run["results"] = [
+            r for r in run["results"]
+            if r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] != uri
+        ] + [_sarif_result(f, uri) for f in findings]
+
+        driver = run["tool"]["driver"]
+        known = {r["id"] for r in driver.get("rules", [])}
+        for f in findings:
+            if f["rule"] not in known:
+                known.add(f["rule"])
+                driver.setdefault("rules", []).append({
+                    "id": f["rule"],
+                    "shortDescription": {"text": f["message"]},
+                })
+        return doc
+
+    update_json(sarif_path, merge, default=_empty_sarif())
+
+
+def _empty_sarif() -> dict:
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {"name": "post_edit_guard", "rules": []}},
+            "results": [],
+        }],
+    }
+
+
+# -- Session Report --
+
+def load_runs(log_file: Path, session_id: str = None) -> list:
+    """Run records for session_id (default: the session of the newest run)."""
+    runs = []
+    try:
+        with open(log_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if rec.get("type") == "run":
+                    runs.append(rec)
+    except OSError:
+        return []
+    if not runs:
+        return []
+    if session_id is None:
+        session_id = runs[-1].get("session_id", "")
+    return [r for r in runs if r.get("session_id", "") == session_id]
+
+
+def format_report(runs: list, top: int = 10) -> str:
+    """Top-N slowest rules and checker totals across the given runs."""
+    if not runs:
+        return "No profiled post_edit_guard runs found."
+    rules: dict = {}
+    checkers: dict = {}
+    for run in runs:
+        for name, ms in (run.get("checkers") or {}).items():
+            checkers[name] = checkers.get(name, 0.0) + ms
+        for rule, stat in (run.get("rules") or {}).items():
+            agg = rules.setdefault(rule, {"ms": 0.0, "calls": 0, "matches": 0})
+            agg["ms"] += stat.get("ms", 0.0)
+            agg["calls"] += stat.get("calls", 0)
+            agg["matches"] += stat.get("matches", 0)
+
+    total = sum(r.get("total_ms", 0.0) for r in runs)
+    session = runs[-1].get("session_id") or "(no session id)"
+    out = [
+        f"post_edit_guard profile — session {session}: "
+        f"{len(runs)} run(s), {total:.1f} ms total",
+        "",
+        f"Top {min(top, len(rules))} rules by total time:",
+        f"  {'rule':<24} {'total ms':>10} {'calls':>7} {'mean ms':>9} {'matches':>8}",
+    ]
+    ranked = sorted(rules.items(), key=lambda kv: kv[1]["ms"], reverse=True)[:top]
+    for rule, stat in ranked:
+        mean = stat["ms"] / stat["calls"] if stat["calls"] else 0.0
+        out.append(
+            f"  {rule:<24} {stat['ms']:>10.2f} {stat['calls']:>7} {mean:>9.3f} {stat['matches']:>8}"
+        )
+    out += ["", "Checkers by total time:"]
+    for name, ms in sorted(checkers.items(), key=lambda kv: kv[1], reverse=True):
+        out.append(f"  {name:<24} {ms:>10.2f}")
+    return "\n".join(out)
+
+
+def main_report(argv: list, toplevel: str = "") -> int:
+    """CLI: --profile-report [--top N] [--session ID]."""
+    top, session = 10, None
+    args = list(argv)
+    try:
+        if "--top" in args:
+            top = int(args[args.index("--top") + 1])
+        if "--session" in args:
+            session = args[args.index("--session") + 1]
+    except (IndexError, ValueError):
+        print("usage: post_edit_guard.py --profile-report [--top N] [--session ID]",
+              file=sys.stderr)
+        return 2
+    runs = load_runs(get_log_dir(toplevel) / PROFILE_LOG, session)
+    print(format_report(runs, top))
+    return 0
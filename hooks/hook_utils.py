@@ -6,14 +6,22 @@ Provides common functions to avoid duplication across hook files:
 - Project-level path resolution
 - Workflow state management
 - v7: north-star + task progress (Goal-Always-Present + Incremental Validation)
+- Derived-index cache dir (.ultra/cache/) + cached tracked-file listing
+- HEAD/branch read straight from the git dir (no subprocess)
+- Acceptance-criteria bullet extraction from task context markdown
+- GitHub-flavored heading anchors (spec anchors, search sections)
 """
 
+import hashlib
 import json
 import os
+import re
 import subprocess
-from datetime import datetime, timezone
+import time
 from pathlib import Path
 
+from atomic_io import atomic_write_text
+
 GIT_TIMEOUT = 3
 
 # v7 evidence dimensions tracked by progress.json
@@ -27,6 +35,22 @@ EVIDENCE_DIMENSIONS = (
 )
 MAX_ADVISORIES_PER_TASK = 50
 
+# git ls-files is re-run when the index changes, or after this many seconds
+# so that new untracked files show up without a `git add`.
+TRACKED_FILES_TTL_S = 60
+LS_FILES_TIMEOUT = 10
+
+
+def time_left(deadline, cap: float) -> float:
+    """Seconds until `deadline` (time.monotonic()), at most cap; cap if None.
+
+    post_edit_guard sets one deadline per run and every index it consults
+    sizes its work (git timeouts, sweep budgets) from it.
+    """
+    if deadline is None:
+        return cap
+    return max(0.0, min(cap, deadline - time.monotonic()))
+
 
 def get_git_toplevel() -> str:
     """Get git repository root, or empty string if not in a repo."""
@@ -43,6 +67,16 @@ def get_git_toplevel() -> str:
     return ""
 
 
+def find_git_root(start) -> Path | None:
+    """Nearest ancestor of start (or start itself) holding a `.git` — the
+    checkout's toplevel without spawning git. None outside git."""
+    p = Path(os.path.abspath(start))
+    for d in (p, *p.parents):
+        if (d / ".git").exists():
+            return d
+    return None
+
+
 def run_git(*args, timeout: int = GIT_TIMEOUT) -> str:
     """Run git command, return stdout or empty string."""
     try:
@@ -69,6 +103,169 @@ def get_project_path(subpath: str, fallback_base: str = "~/.claude") -> Path:
     return Path(fallback_base).expanduser() / subpath
 
 
+def get_git_dir(root: Path) -> Path | None:
+    """Resolve the git dir of a checkout without spawning git.
+
+    Handles linked worktrees, where `.git` is a file holding `gitdir: <path>`.
+    """
+    dotgit = Path(root) / ".git"
+    if dotgit.is_dir():
+        return dotgit
+    try:
+        text = dotgit.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not text.startswith("gitdir:"):
+        return None
+    git_dir = Path(text[len("gitdir:"):].strip())
+    if not git_dir.is_absolute():
+        git_dir = (Path(root) / git_dir).resolve()
+    return git_dir
+
+
+def get_git_common_dir(root: Path) -> Path | None:
+    """The git dir shared by all worktrees of a checkout (no subprocess).
+
+    Same as get_git_dir for the main worktree; for a linked worktree the
+    directory its `commondir` file points to.
+    """
+    git_dir = get_git_dir(root)
+    if git_dir is None:
+        return None
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    return (git_dir / common).resolve()
+
+
+def _resolve_ref(git_dir: Path, ref: str) -> str:
+    """sha of a ref from loose refs or packed-refs ('' if unresolved)."""
+    dirs = [git_dir]
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+        dirs.append((git_dir / common).resolve())
+    except OSError:
+        pass
+    for d in dirs:
+        try:
+            return (d / ref).read_text(encoding="utf-8").strip()
+        except OSError:
+            pass
+    for d in dirs:
+        try:
+            with open(d / "packed-refs", "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+    return ""
+
+
+def read_git_head(root: Path) -> tuple[str, str]:
+    """(branch, sha) of HEAD read straight from the git dir, no subprocess.
+
+    branch is "HEAD" when detached (as `git rev-parse --abbrev-ref HEAD`
+    prints it); sha is '' for an unborn branch. ("", "") outside git.
+    """
+    git_dir = get_git_dir(root)
+    if git_dir is None:
+        return "", ""
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return "", ""
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+        return branch, _resolve_ref(git_dir, ref)
+    return "HEAD", head
+
+
+def get_cache_dir(root: Path) -> Path:
+    """{root}/.ultra/cache/ — derived, rebuildable indexes. Safe to delete.
+
+    Creates the directory; raises OSError if that fails.
+    """
+    path = Path(root) / ".ultra" / "cache"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_shared_cache_dir(root: Path) -> Path:
+    """<git common dir>/ultra/cache/ — caches shared by every worktree.
+
+    Only content-addressed data belongs here (results keyed by what they were
+    computed from, never by checkout path). Falls back to get_cache_dir(root)
+    outside git. Creates the directory; raises OSError if that fails.
+    """
+    common = get_git_common_dir(root)
+    if common is None:
+        return get_cache_dir(root)
+    path = common / "ultra" / "cache"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def load_tracked_files(root: Path, timeout: float = LS_FILES_TIMEOUT) -> tuple[str, list]:
+    """Repo-relative paths from `git ls-files` (tracked + untracked, not ignored).
+
+    Returns (signature, files). The signature is a hash of the sorted file set,
+    so callers can cheaply tell whether files were added or deleted since they
+    last looked. Cached in .ultra/cache/tracked-files.json keyed by the git
+    index mtime; `.ultra/cache/` itself is never listed. ("", []) outside git
+    or when git failed or ran out of `timeout` — callers must then treat the
+    file set as unknown, not empty.
+    """
+    root = Path(root)
+    git_dir = get_git_dir(root)
+    if git_dir is None:
+        return "", []
+    try:
+        index_mtime = (git_dir / "index").stat().st_mtime_ns
+    except OSError:
+        index_mtime = 0
+
+    try:
+        cache_path = get_cache_dir(root) / "tracked-files.json"
+    except OSError:
+        cache_path = None
+    now = time.time()
+    if cache_path is not None and cache_path.exists():
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if (cached.get("index_mtime") == index_mtime
+                    and now - cached.get("listed_at", 0) < TRACKED_FILES_TTL_S):
+                return cached.get("sig", ""), cached.get("files", [])
+        except (json.JSONDecodeError, OSError, AttributeError):
+            pass
+
+    if timeout <= 0:
+        return "", []
+    out = run_git("-C", str(root), "ls-files", "-z", "--cached", "--others",
+                  "--exclude-standard", timeout=timeout)
+    if not out:
+        return "", []
+    files = sorted({
+        f for f in out.split("\0")
+        if f and not f.startswith(".ultra/cache/")
+    })
+    sig = hashlib.sha1("\0".join(files).encode("utf-8")).hexdigest()
+    if cache_path is not None and files:
+        try:
+            atomic_write_text(cache_path, json.dumps({
+                "index_mtime": index_mtime,
+                "listed_at": now,
+                "sig": sig,
+                "files": files,
+            }))
+        except OSError:
+            pass
+    return sig, files
+
+
 def get_snapshot_path() -> Path:
     """Get compact snapshot path (.ultra/compact-snapshot.md)."""
     toplevel = get_git_toplevel()
@@ -90,11 +287,23 @@ def get_workflow_state() -> dict | None:
 
 # -- v7: Goal-Always-Present + Incremental Validation helpers --
 
-def get_active_task() -> dict | None:
-    """Return the in_progress task dict from .ultra/tasks/tasks.json (or None)."""
+def get_active_task(session_id: str = "") -> dict | None:
+    """Return this session's in_progress task from .ultra/tasks/tasks.json (or None).
+
+    With parallel agents several tasks can be in_progress; the task bound to
+    session_id, else to this worktree (task_binding.py), wins over the first
+    unclaimed one. Served from the indexed task store without parsing the
+    JSON; falls back to scanning tasks.json when both are unavailable.
+    """
     toplevel = get_git_toplevel()
     if not toplevel:
         return None
+    try:
+        from task_binding import resolve_active_task
+    except Exception:  # pragma: no cover — never block hook on import error
+        resolve_active_task = None
+    if resolve_active_task is not None:
+        return resolve_active_task(Path(toplevel), session_id)
     tasks_path = Path(toplevel) / ".ultra" / "tasks" / "tasks.json"
     if not tasks_path.exists():
         return None
@@ -108,108 +317,56 @@ def get_active_task() -> dict | None:
     return None
 
 
-def _init_progress(task_id: str) -> dict:
-    """Initial progress.json shape. evidence_score 0-100 per dimension."""
-    return {
-        "task_id": task_id,
-        "evidence_score": {dim: 0 for dim in EVIDENCE_DIMENSIONS},
-        "files_touched": [],
-        "advisories": [],
-        "last_updated": datetime.now(timezone.utc).isoformat(),
-    }
+def update_task_progress(file_path: str, advisories: list | None = None,
+                         session_id: str = "") -> None:
+    """v7 Incremental Validation: record an edit in the active task's progress.
 
-
-def get_progress_path(task_id: str) -> Path | None:
-    """Path to .ultra/tasks/progress/task-<id>.json (creates parent dir if needed)."""
-    toplevel = get_git_toplevel()
-    if not toplevel:
-        return None
-    path = Path(toplevel) / ".ultra" / "tasks" / "progress" / f"task-{task_id}.json"
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-    except OSError:
-        return None
-    return path
-
-
-def update_task_progress(file_path: str, advisories: list | None = None) -> None:
-    """v7 Incremental Validation: maintain progress.json on PostToolUse.
-
-    Best-effort: silent on any error. Looks up the in_progress task, appends the
-    edited file to files_touched, and records advisory entries (capped).
+    Best-effort: silent on any error. Looks up the session's in_progress task
+    (get_active_task) and appends one event (edited file + advisories) to its progress journal
+    (progress_journal.py) — an O(1) append instead of rewriting progress.json,
+    so concurrent hooks never lose each other's updates.
 
     Evidence dimension scores are not auto-derived here — they are updated by
     purpose-built sensors (test runner, persistence detector, etc.) which will
     be added incrementally. This helper just keeps the file fresh + tracks
     surface signal so agent and user can read 'how far from done' anytime.
     """
-    task = get_active_task()
+    task = get_active_task(session_id)
     if not task:
         return
     tid = task.get("id")
     if not tid:
         return
-    progress_path = get_progress_path(tid)
-    if progress_path is None:
-        return
-
-    if progress_path.exists():
-        try:
-            progress = json.loads(progress_path.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
-            progress = _init_progress(tid)
-    else:
-        progress = _init_progress(tid)
-
-    # Heal missing dimensions from older runs
-    progress.setdefault("evidence_score", {})
-    for dim in EVIDENCE_DIMENSIONS:
-        progress["evidence_score"].setdefault(dim, 0)
-    progress.setdefault("files_touched", [])
-    progress.setdefault("advisories", [])
-
-    # Touch tracking
     toplevel = get_git_toplevel()
-    if toplevel:
-        try:
-            rel = os.path.relpath(file_path, toplevel)
-        except ValueError:
-            rel = file_path
-    else:
+    if not toplevel:
+        return
+    try:
+        rel = os.path.relpath(file_path, toplevel)
+    except ValueError:
         rel = file_path
-    if rel not in progress["files_touched"]:
-        progress["files_touched"].append(rel)
-
-    # Advisory log (capped)
-    if advisories:
-        now = datetime.now(timezone.utc).isoformat()
-        for msg in advisories:
-            progress["advisories"].append({
-                "at": now,
-                "file": rel,
-                "msg": str(msg)[:240],
-            })
-        progress["advisories"] = progress["advisories"][-MAX_ADVISORIES_PER_TASK:]
-
-    progress["last_updated"] = datetime.now(timezone.utc).isoformat()
+    try:
+        from progress_journal import append_event
+    except Exception:  # pragma: no cover — never block hook on import error
+        return
+    append_event(Path(toplevel), tid, file=rel, advisories=advisories)
+
 
+def load_task_progress(task_id: str) -> dict | None:
+    """Current progress dict of a task in this repo (journal folded in), or None."""
+    toplevel = get_git_toplevel()
+    if not toplevel:
+        return None
     try:
-        progress_path.write_text(
-            json.dumps(progress, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
-    except OSError:
-        pass
+        from progress_journal import load_progress
+    except Exception:  # pragma: no cover — never block hook on import error
+        return None
+    return load_progress(Path(toplevel), task_id)
 
 
 def get_distance_to_done(task_id: str) -> str:
     """Human-readable summary of evidence_score for advisory injection."""
-    progress_path = get_progress_path(task_id)
-    if progress_path is None or not progress_path.exists():
-        return ""
-    try:
-        progress = json.loads(progress_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
+    progress = load_task_progress(task_id)
+    if not progress:
         return ""
     scores = progress.get("evidence_score", {})
     completed = sum(1 for v in scores.values() if v >= 80)
@@ -219,3 +376,48 @@ def get_distance_to_done(task_id: str) -> str:
     if pending:
         parts.append(f"pending: {', '.join(pending[:3])}")
     return "; ".join(parts)
+
+
+def extract_ac_bullets(text: str, max_lines: int = 2) -> list:
+    """First N acceptance criteria bullets from task context markdown text.
+
+    Skips html comments (<!-- ... -->) which the template uses for hidden notes.
+    Shared by post_edit_guard (live read) and relations_sync (sidecar index).
+    """
+    if "## Acceptance Criteria" not in text:
+        return []
+
+    section = text.split("## Acceptance Criteria", 1)[1]
+    section = section.split("\n## ", 1)[0]
+
+    bullets = []
+    in_comment = False
+    for line in section.split("\n"):
+        s = line.strip()
+        if not s:
+            continue
+        if "<!--" in s and "-->" not in s:
+            in_comment = True
+            continue
+        if in_comment:
+            if "-->" in s:
+                in_comment = False
+            continue
+        if s.startswith("<!--") and s.endswith("-->"):
+            continue
+        if s.startswith("- ") and len(s) > 4:
+            bullets.append(s[:140])
+            if len(bullets) >= max_lines:
+                break
+    return bullets
+
+
+def slugify_heading(heading: str) -> str:
+    """Convert '## Foo Bar (Baz)' to 'foo-bar-baz' (GitHub-flavored anchor).
+
+    Shared by relations_sync (spec anchors) and ultra_search (section
+    anchors), so a search hit links to the anchor trace_to refers to.
+    """
+    cleaned = heading.lstrip("#").strip().lower()
+    cleaned = re.sub(r"[^\w\s-]", "", cleaned)
+    return re.sub(r"[\s_]+", "-", cleaned).strip("-")
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""Import Graph — project-wide reverse dependency index for blast radius.
+
+Backs post_edit_guard's [Impact] line. Replaces the old same-directory,
+first-5KB regex scan with an incrementally maintained graph covering:
+
+  - Python: `import` / `from ... import` via ast (relative + package-qualified)
+  - TS/JS:  import / export-from / require() / import() with relative-path
+            resolution (extension and index-file aware)
+  - Go:     import specs resolved against the nearest go.mod module path
+
+Storage: .ultra/cache/import-graph.db (SQLite, derived — safe to delete)
+  files(path, mtime_ns, size, sha1)  parse state per source file
+  edges(src, dst)                    src imports dst-key (indexed on dst)
+  fanin(path, direct, transitive)    memoized counts, cleared when edges change
+  meta(key, value)                   sweep bookkeeping
+
+Edges point at *import keys*, not resolved paths: `py:pkg.mod`, `js:src/a/foo`
+(extension stripped), `go:example.com/m/pkg`. A file's dependents are the
+sources of edges whose dst is one of the file's own keys — one indexed lookup —
+and adding or deleting a file never forces re-resolution of everyone else's
+imports.
+
+Parsed imports are also memoized in the shared cache (shared_cache.py,
+namespace `imports`, keyed by path + sha1), so a fresh worktree of the same
+repository only stats and hashes files its siblings already parsed; this db
+keeps the per-worktree layer (path → sha1, edges, fan-in).
+
+Refresh is incremental: the edited file is always re-checked; the rest of the
+tree is stat-swept only when the tracked file set changes or every
+SWEEP_INTERVAL_S, and a file is re-parsed only if its mtime/size moved AND its
+sha1 differs. Sweeps are time-budgeted so a cold 50k-file repo warms up over a
+few edits instead of blowing the hook timeout. import_impact() also takes
+post_edit_guard's run deadline: the sweep budget, the `git ls-files` timeout
+and the transitive fan-in walk all shrink to the time left, and a fan-in
+cut short is reported as incomplete and not memoized. Full build in one go:
+
+  python3 import_graph.py [project_root]
+
+The hook entry point, import_impact(), is best-effort: it returns None on any
+storage error so post_edit_guard can fall back to its directory scan.
+"""
+
+import ast
+import hashlib
+import os
+import posixpath
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_utils import LS_FILES_TIMEOUT, get_cache_dir, load_tracked_files, time_left
+from shared_cache import code_version, content_key, open_shared
+
+PY_EXT = {'.py'}
+JS_EXT = {'.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs'}
+GO_EXT = {'.go'}
+GRAPH_EXT = PY_EXT | JS_EXT | GO_EXT
+
+# Non-package dirs commonly placed on sys.path (src layout, monorepo libs)
+PY_SOURCE_ROOTS = {'src', 'lib', 'python', 'app', 'pkg'}
+
+MAX_PARSE_BYTES = 1_000_000
+SWEEP_INTERVAL_S = 300
+SWEEP_BUDGET_S = 1.5
+TRANSITIVE_CAP = 10_000
+DB_NAME = "import-graph.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT
+);
+CREATE TABLE IF NOT EXISTS edges (src TEXT NOT NULL, dst TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS edges_dst ON edges(dst);
+CREATE INDEX IF NOT EXISTS edges_src ON edges(src);
+CREATE TABLE IF NOT EXISTS fanin (
+    path TEXT PRIMARY KEY, direct INTEGER, transitive INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+# -- Parsers: source text → set of import keys --
+
+def parse_python_imports(source: str, rel_path: str) -> set:
+    """Dotted module keys imported by a Python file (relative ones absolutized)."""
+    pkg_parts = rel_path.split('/')[:-1]
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return _parse_python_imports_fallback(source)
+
+    keys = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                keys.add(f"py:{alias.name}")
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                if node.level - 1 > len(pkg_parts):
+                    continue
+                base = pkg_parts[:len(pkg_parts) - (node.level - 1)]
+                prefix = base + (node.module.split('.') if node.module else [])
+            else:
+                prefix = node.module.split('.') if node.module else []
+            if prefix:
+                keys.add("py:" + ".".join(prefix))
+            for alias in node.names:
+                if alias.name != '*':
+                    keys.add("py:" + ".".join(prefix + [alias.name]))
+    return keys
+
+
+_PY_IMPORT_LINE_RE = re.compile(
+    r'^\s*(?:from\s+([\w.]+)\s+import\b|import\s+([\w.]+(?:\s*,\s*[\w.]+)*))', re.M
+)
+
+
+def _parse_python_imports_fallback(source: str) -> set:
+    """Line-regex import scan for files ast cannot parse (mid-edit syntax errors)."""
+    keys = set()
+    for m in _PY_IMPORT_LINE_RE.finditer(source):
+        if m.group(1):
+            keys.add(f"py:{m.group(1)}")
+        else:
+            for name in m.group(2).split(','):
+                keys.add(f"py:{name.strip()}")
+    return keys
+
+
+_JS_IMPORT_RE = re.compile(
+    r'''(?:\bimport\s+(?:[\w*{}\s,$]+?\s+from\s+)?'''
+    r'''|\bexport\s+[\w*{}\s,$]+?\s+from\s+'''
+    r'''|\brequire\s*\(\s*'''
+    r'''|\bimport\s*\(\s*)'''
+    r'''['"]([^'"\n]+)['"]'''
+)
+
+
+def _strip_js_ext(path: str) -> str:
+    root, ext = posixpath.splitext(path)
+    return root if ext in JS_EXT else path
+
+
+def parse_js_imports(source: str, rel_path: str) -> set:
+    """Relative import/require specifiers, resolved to repo-relative keys.
+
+    Bare specifiers (packages, tsconfig aliases) are ignored — they never
+    point at a file in this repo by relative path.
+    """
+    base_dir = posixpath.dirname(rel_path)
+    keys = set()
+    for m in _JS_IMPORT_RE.finditer(source):
+        spec = m.group(1)
+        if not (spec.startswith('./') or spec.startswith('../')):
+            continue
+        target = posixpath.normpath(posixpath.join(base_dir, spec))
+        if target.startswith('..'):
+            continue
+        keys.add("js:" + _strip_js_ext(target))
+    return keys
+
+
+_GO_IMPORT_BLOCK_RE = re.compile(r'^import\s*\((.*?)\)', re.S | re.M)
+_GO_IMPORT_LINE_RE = re.compile(r'^import\s+(?:[\w.]+\s+)?"([^"]+)"', re.M)
+_GO_SPEC_RE = re.compile(r'"([^"]+)"')
+
+
+def parse_go_imports(source: str) -> set:
+    keys = {f"go:{m.group(1)}" for m in _GO_IMPORT_LINE_RE.finditer(source)}
+    for block in _GO_IMPORT_BLOCK_RE.finditer(source):
+        for m in _GO_SPEC_RE.finditer(block.group(1)):
+            keys.add(f"go:{m.group(1)}")
+    return keys
+
+
+def parse_imports(source: str, rel_path: str) -> set:
+    ext = posixpath.splitext(rel_path)[1].lower()
+    if ext in PY_EXT:
+        return parse_python_imports(source, rel_path)
+    if ext in JS_EXT:
+        return parse_js_imports(source, rel_path)
+    if ext in GO_EXT:
+        return parse_go_imports(source)
+    return set()
+
+
+# -- Keys a file answers to --
+
+_GO_MODULE_RE = re.compile(r'^module\s+(\S+)', re.M)
+
+
+class ImportGraph:
+    """SQLite-backed reverse import index for one project root."""
+
+    def __init__(self, root: Path, db_path: Path | None = None, shared=True):
+        self.root = Path(root)
+        if db_path is None:
+            db_path = get_cache_dir(self.root) / DB_NAME
+        self.conn = sqlite3.connect(str(db_path), timeout=2)
+        self.conn.executescript(_SCHEMA)
+        self.shared = open_shared(self.root) if shared else None
+        self._go_modules: dict = {}
+        self._is_package: dict = {}
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
+        self.conn.close()
+
+    def _commit(self) -> None:
+        self.conn.commit()
+        if self.shared is not None:
+            self.shared.commit()
+
+    # -- meta --
+
+    def _meta(self, key: str, default: str = "") -> str:
+        row = self.conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    # -- key derivation --
+
+    def _package_dir(self, rel_dir: str) -> bool:
+        """True if rel_dir is a Python package (has __init__.py)."""
+        if rel_dir not in self._is_package:
+            self._is_package[rel_dir] = (self.root / rel_dir / "__init__.py").exists() if rel_dir else False
+        return self._is_package[rel_dir]
+
+    def _go_module_for(self, rel_dir: str):
+        """(module_path, module_dir) of the nearest go.mod at or above rel_dir."""
+        if rel_dir in self._go_modules:
+            return self._go_modules[rel_dir]
+        found = None
+        probe = rel_dir
+        while True:
+            gomod = self.root / probe / "go.mod"
+            if gomod.is_file():
+                try:
+                    m = _GO_MODULE_RE.search(gomod.read_text(encoding="utf-8"))
+                except OSError:
+                    m = None
+                if m:
+                    found = (m.group(1), probe)
+                break
+            if not probe:
+                break
+            probe = posixpath.dirname(probe)
+        self._go_modules[rel_dir] = found
+        return found
+
+    def file_keys(self, rel_path: str) -> list:
+        """[(key, sys_path_root_or_None)] that importers of rel_path would use.
+
+        Python files answer to every dotted suffix of their path; a suffix only
+        counts for importers that could have its root on sys.path (see
+        _accepts), which keeps `import utils` from matching every utils.py.
+        """
+        stem, ext = posixpath.splitext(rel_path)
+        ext = ext.lower()
+        keys = []
+        if ext in PY_EXT:
+            parts = stem.split('/')
+            if parts[-1] == '__init__':
+                parts = parts[:-1]
+            for i in range(len(parts)):
+                keys.append(("py:" + ".".join(parts[i:]), "/".join(parts[:i])))
+        elif ext in JS_EXT:
+            keys.append(("js:" + stem, None))
+            if posixpath.basename(stem) == 'index':
+                keys.append(("js:" + posixpath.dirname(stem), None))
+        elif ext in GO_EXT:
+            rel_dir = posixpath.dirname(rel_path)
+            mod = self._go_module_for(rel_dir)
+            if mod:
+                module_path, module_dir = mod
+                sub = posixpath.relpath(rel_dir or '.', module_dir or '.')
+                keys.append(("go:" + (module_path if sub == '.' else f"{module_path}/{sub}"), None))
+        return keys
+
+    def _accepts(self, importer: str, sys_root) -> bool:
+        """Could `importer` resolve a module rooted at sys_root?
+
+        Yes for the repo root, for scripts living in sys_root itself, and for
+        non-package roots that either contain the importer or are conventional
+        source roots (src/, lib/, ...) that tooling puts on sys.path.
+        """
+        if sys_root is None or sys_root == "":
+            return True
+        if posixpath.dirname(importer) == sys_root:
+            return True
+        if self._package_dir(sys_root):
+            return False
+        return (importer.startswith(sys_root + "/")
+                or posixpath.basename(sys_root) in PY_SOURCE_ROOTS)
+
+    # -- queries --
+
+    def dependents(self, rel_path: str) -> list:
+        """Sorted repo-relative paths of files that directly import rel_path."""
+        keys = self.file_keys(rel_path)
+        if not keys:
+            return []
+        roots = {}
+        for key, sys_root in keys:
+            roots.setdefault(key, []).append(sys_root)
+        placeholders = ",".join("?" * len(roots))
+        rows = self.conn.execute(
+            f"SELECT src, dst FROM edges WHERE dst IN ({placeholders})", list(roots)
+        ).fetchall()
+        out = set()
+        for src, dst in rows:
+            if src == rel_path:
+                continue
+            if any(self._accepts(src, r) for r in roots[dst]):
+                out.add(src)
+        return sorted(out)
+
+    def _transitive(self, rel_path: str, deadline=None) -> tuple:
+        """(count, finished): the BFS stops early past `deadline`."""
+        seen = {rel_path}
+        frontier = [rel_path]
+        while frontier and len(seen) <= TRANSITIVE_CAP:
+            nxt = []
+            for node in frontier:
+                if deadline is not None and time.monotonic() > deadline:
+                    return len(seen) - 1, False
+                for dep in self.dependents(node):
+                    if dep not in seen:
+                        seen.add(dep)
+                        nxt.append(dep)
+            frontier = nxt
+        return len(seen) - 1, True
+
+    def transitive_count(self, rel_path: str) -> int:
+        """Number of files that import rel_path directly or transitively (capped)."""
+        return self._transitive(rel_path)[0]
+
+    def fan_in(self, rel_path: str, deadline=None) -> tuple:
+        """(direct_dependents, transitive_count, finished), memoized until edges
+        change. A walk cut short by `deadline` is a lower bound, not memoized."""
+        direct = self.dependents(rel_path)
+        row = self.conn.execute(
+            "SELECT direct, transitive FROM fanin WHERE path=?", (rel_path,)
+        ).fetchone()
+        if row and row[0] == len(direct):
+            return direct, row[1], True
+        transitive, finished = self._transitive(rel_path, deadline)
+        if finished:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fanin(path, direct, transitive) VALUES (?, ?, ?)",
+                (rel_path, len(direct), transitive),
+            )
+            self.conn.commit()
+        return direct, transitive, finished
+
+    # -- maintenance --
+
+    def _drop(self, rel_path: str) -> bool:
+        cur = self.conn.execute("DELETE FROM edges WHERE src=?", (rel_path,))
+        self.conn.execute("DELETE FROM files WHERE path=?", (rel_path,))
+        return cur.rowcount > 0
+
+    def refresh_file(self, rel_path: str, known=None) -> bool:
+        """Re-index one file if its content changed. Returns True if edges changed."""
+        full = self.root / rel_path
+        try:
+            st = full.stat()
+        except OSError:
+            return self._drop(rel_path)
+        if known is None:
+            known = self.conn.execute(
+                "SELECT mtime_ns, size, sha1 FROM files WHERE path=?", (rel_path,)
+            ).fetchone()
+        if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            return False
+
+        try:
+            data = full.read_bytes() if st.st_size <= MAX_PARSE_BYTES else b""
+        except OSError:
+            return self._drop(rel_path)
+        sha1 = hashlib.sha1(data).hexdigest()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files(path, mtime_ns, size, sha1) VALUES (?, ?, ?, ?)",
+            (rel_path, st.st_mtime_ns, st.st_size, sha1),
+        )
+        if known and known[2] == sha1:
+            return False
+
+        new_keys = self._parsed_keys(rel_path, sha1, data)
+        old_keys = {r[0] for r in self.conn.execute(
+            "SELECT dst FROM edges WHERE src=?", (rel_path,)
+        )}
+        if new_keys == old_keys:
+            return False
+        self.conn.execute("DELETE FROM edges WHERE src=?", (rel_path,))
+        self.conn.executemany(
+            "INSERT INTO edges(src, dst) VALUES (?, ?)",
+            [(rel_path, k) for k in sorted(new_keys)],
+        )
+        return True
+
+    def _parsed_keys(self, rel_path: str, sha1: str, data: bytes) -> set:
+        """parse_imports, memoized across worktrees by (path, content)."""
+        if self.shared is None:
+            return parse_imports(data.decode("utf-8", errors="replace"), rel_path)
+        key = content_key(code_version(__file__), rel_path, sha1)
+        cached = self.shared.get("imports", key)
+        if isinstance(cached, list):
+            return set(cached)
+        keys = parse_imports(data.decode("utf-8", errors="replace"), rel_path)
+        self.shared.put("imports", key, sorted(keys))
+        return keys
+
+    def sweep(self, budget_s: float | None = SWEEP_BUDGET_S) -> bool:
+        """Stat-check every tracked source file; re-index the changed ones.
+
+        Returns True when the sweep finished within budget. An unfinished sweep
+        leaves `sweep_complete=0`, so the next refresh() resumes it (files
+        already re-indexed are skipped by their unchanged mtime).
+        """
+        deadline = time.monotonic() + budget_s if budget_s is not None else None
+        sig, files = load_tracked_files(self.root, timeout=time_left(deadline, LS_FILES_TIMEOUT))
+        if not sig:
+            return False  # file set unknown: never mistake it for "all deleted"
+        code = [f for f in files if posixpath.splitext(f)[1].lower() in GRAPH_EXT]
+        code_set = set(code)
+        known = {
+            row[0]: row[1:] for row in
+            self.conn.execute("SELECT path, mtime_ns, size, sha1 FROM files")
+        }
+        changed = False
+        for gone in set(known) - code_set:
+            changed |= self._drop(gone)
+
+        complete = True
+        for i, rel in enumerate(code):
+            if deadline is not None and i % 64 == 0 and time.monotonic() > deadline:
+                complete = False
+                break
+            changed |= self.refresh_file(rel, known.get(rel))
+
+        if changed:
+            self.conn.execute("DELETE FROM fanin")
+        self._set_meta("sweep_sig", sig)
+        self._set_meta("sweep_complete", int(complete))
+        if complete:
+            self._set_meta("last_sweep", time.time())
+        self._commit()
+        return complete
+
+    def refresh(self, touched=(), budget_s: float = SWEEP_BUDGET_S, deadline=None) -> bool:
+        """Incremental update: re-check `touched`, sweep the rest if due.
+
+        Returns True if the graph is complete (no sweep left pending). Past
+        `deadline` only `touched` is re-checked; the due check waits.
+        """
+        changed = False
+        for rel in touched:
+            changed |= self.refresh_file(rel)
+        if changed:
+            self.conn.execute("DELETE FROM fanin")
+        self._commit()
+
+        timeout = time_left(deadline, LS_FILES_TIMEOUT)
+        sig, _files = load_tracked_files(self.root, timeout=timeout) if timeout > 0 else ("", [])
+        if not sig:
+            return self._meta("sweep_complete") == "1"
+        due = (
+            self._meta("sweep_complete") != "1"
+            or self._meta("sweep_sig") != sig
+            or time.time() - float(self._meta("last_sweep", "0") or 0) > SWEEP_INTERVAL_S
+        )
+        if due:
+            return self.sweep(time_left(deadline, budget_s))
+        return True
+
+
+def import_impact(toplevel: str, file_path: str, deadline=None):
+    """post_edit_guard entry point: (direct_dependents, transitive_count, complete).
+
+    Direct dependents are repo-relative paths; `complete` is False while a
+    sweep is pending or the fan-in walk ran out of time before `deadline`.
+    Returns None when the graph cannot be opened (no .ultra/cache write
+    access, corrupt db, ...).
+    """
+    try:
+        rel = os.path.relpath(file_path, toplevel)
+    except ValueError:
+        return None
+    if rel.startswith('..') or posixpath.splitext(rel)[1].lower() not in GRAPH_EXT:
+        return None
+    rel = rel.replace(os.sep, '/')
+    try:
+        graph = ImportGraph(Path(toplevel))
+    except (OSError, sqlite3.Error):
+        return None
+    try:
+        complete = graph.refresh(touched=[rel], deadline=deadline)
+        direct, transitive, finished = graph.fan_in(rel, deadline)
+        return direct, transitive, complete and finished
+    except sqlite3.Error:
+        return None
+    finally:
+        graph.close()
+
+
+if __name__ == "__main__":
+    root_arg = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
+    g = ImportGraph(root_arg)
+    t0 = time.monotonic()
+    g.sweep(budget_s=None)
+    n_files = g.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    n_edges = g.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+    g.close()
+    print(f"import graph: {n_files} files, {n_edges} edges in {time.monotonic() - t0:.2f}s")
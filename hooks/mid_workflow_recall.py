@@ -5,7 +5,9 @@ Injects concise context via stderr at key decision points:
   Write|Edit: active task acceptance criteria (Goal-Always-Present substrate) —
               keeps the goal in view mid-session to prevent drift.
   Grep:       symbol-query advisory pointing at code-review-graph MCP if the
-              pattern looks like a symbol lookup. Sensor only — never blocks.
+              pattern looks like a symbol lookup; a Grep scoped to .ultra/ or
+              docs/research gets a pointer to the ranked ultra_search.py index
+              instead. Sensor only — never blocks.
 
 Memory归位 (2026-06-02): cross-session memory recall (past test failures, edit
 history, learned lessons from memory.db) was removed — memory.db is gone and
@@ -20,13 +22,26 @@ Rate-limited: once per file per session, max 10 injections per session
 import json
 import os
 import re
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+try:
+    from active_digest import active_task_entry, load_digest
+    from hook_utils import find_git_root
+except Exception:  # pragma: no cover — never block hook on import error
+    def find_git_root(start):  # type: ignore[no-redef]
+        p = Path(os.path.abspath(start))
+        return next((d for d in (p, *p.parents) if (d / '.git').exists()), None)
+
+    def load_digest(_root):  # type: ignore[no-redef]
+        return None
+
+    def active_task_entry(_root, _digest, _session_id=''):  # type: ignore[no-redef]
+        return None
+
 MAX_INJECTIONS = 10
-GIT_TIMEOUT = 3
 
 SOURCE_EXTENSIONS = {
     '.ts', '.tsx', '.js', '.jsx', '.py', '.go', '.rs', '.java',
@@ -78,10 +93,19 @@ def _looks_like_symbol_query(pattern: str) -> bool:
     return bool(_SYMBOL_PATTERN.search(p) or _CAMEL_OR_PASCAL.match(p))
 
 
+def _is_knowledge_grep(tool_input: dict) -> bool:
+    """Grep aimed at .ultra/ knowledge artifacts (specs, contexts, trails, research)."""
+    target = (tool_input.get("path") or "").replace("\\", "/")
+    return "/.ultra" in f"/{target}" or "docs/research" in target
+
+
 def handle_grep_advisory(tool_input: dict, session_id: str) -> None:
     """v7: Grep symbol-query advisory. Sensor only — never blocks."""
     pattern = tool_input.get("pattern", "")
-    if not pattern or not _looks_like_symbol_query(pattern):
+    if not pattern:
+        return
+    knowledge = _is_knowledge_grep(tool_input)
+    if not knowledge and not _looks_like_symbol_query(pattern):
         return
 
     if session_id:
@@ -91,6 +115,16 @@ def handle_grep_advisory(tool_input: dict, session_id: str) -> None:
             return
         mark_recalled(session_id, token)
 
+    if knowledge:
+        query = " ".join(re.sub(r"[^\w\s-]+", " ", pattern).split())[:60]
+        print(
+            f"[Grep advisory] ranked section hits over specs, task contexts, trails,\n"
+            f"  research and review summaries (BM25, anchors included):\n"
+            f"    python3 ~/.claude/hooks/ultra_search.py \"{query}\"",
+            file=sys.stderr,
+        )
+        return
+
     print(
         f"[Grep advisory] '{pattern[:60]}' looks like a symbol query.\n"
         f"  If project has code-review-graph MCP, prefer:\n"
@@ -100,67 +134,40 @@ def handle_grep_advisory(tool_input: dict, session_id: str) -> None:
     )
 
 
-def _get_active_task_acceptance() -> list:
-    """v7 Goal-Always-Present: read in_progress task's acceptance criteria.
+def _first_in_progress(root: Path):
+    """Degraded path without a digest: first in_progress task of tasks.json."""
+    try:
+        data = json.loads((root / '.ultra' / 'tasks' / 'tasks.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    tasks = data.get('tasks', []) if isinstance(data, dict) else data
+    return next((t for t in tasks if isinstance(t, dict) and t.get('status') == 'in_progress'),
+                None) if isinstance(tasks, list) else None
+
+
+def _get_active_task_acceptance(session_id: str = '') -> list:
+    """v7 Goal-Always-Present: read this session's in_progress task's AC.
 
     Returns up to ~3 lines for stderr injection. Empty list if no .ultra/ or no
-    in_progress task.
+    in_progress task. One read of .ultra/cache/active-digest.json (plus stats)
+    in the common case — active_digest.py re-parses only on change. Without a
+    digest (import failure, unwritable cache) falls back to the first
+    in_progress task of tasks.json, title only.
     """
     try:
-        proc = subprocess.run(
-            ['git', 'rev-parse', '--show-toplevel'],
-            capture_output=True, text=True, timeout=GIT_TIMEOUT,
-            cwd=os.getcwd()
-        )
-        if proc.returncode != 0 or not proc.stdout.strip():
-            return []
-        root = Path(proc.stdout.strip())
-        tasks_path = root / '.ultra' / 'tasks' / 'tasks.json'
-        if not tasks_path.exists():
+        root = find_git_root(os.getcwd())
+        if root is None or not (root / '.ultra' / 'tasks' / 'tasks.json').exists():
             return []
-
-        tasks_data = json.loads(tasks_path.read_text(encoding='utf-8'))
-        in_progress = [
-            t for t in tasks_data.get('tasks', [])
-            if t.get('status') == 'in_progress'
-        ]
-        if not in_progress:
+        digest = load_digest(root)
+        if digest is None:
+            t = _first_in_progress(root)
+        else:
+            t = active_task_entry(root, digest, session_id)
+        if not t:
             return []
-        t = in_progress[0]
-        tid = t.get('id', '?')
-        title = t.get('title', '?')
-        out = [f"  Active task {tid}: {title[:80]}"]
-
-        ctx_file = root / '.ultra' / 'tasks' / 'contexts' / f"task-{tid}.md"
-        if ctx_file.exists():
-            content = ctx_file.read_text(encoding='utf-8')
-            if '## Acceptance Criteria' in content:
-                section = content.split('## Acceptance Criteria', 1)[1]
-                section = section.split('\n---\n', 1)[0]
-                # Take first 2 non-comment, non-placeholder bullet lines
-                bullets = []
-                in_comment = False
-                for line in section.split('\n'):
-                    s = line.strip()
-                    if not s:
-                        continue
-                    if '<!--' in s and '-->' not in s:
-                        in_comment = True
-                        continue
-                    if in_comment:
-                        if '-->' in s:
-                            in_comment = False
-                        continue
-                    if s.startswith('<!--') and s.endswith('-->'):
-                        continue
-                    if s.startswith('_(') and s.endswith(')_'):
-                        continue
-                    if s.startswith('- ') and len(s) > 4:
-                        bullets.append(s[:120])
-                        if len(bullets) >= 2:
-                            break
-                for b in bullets:
-                    out.append(f"    {b}")
+        out = [f"  Active task {t.get('id', '?')}: {t.get('title', '?')[:80]}"]
+        for b in t.get('ac_bullets') or []:
+            out.append(f"    {b}")
         return out
     except Exception:
         return []
@@ -206,7 +213,7 @@ def main():
             return
 
     # v7 Goal-Always-Present: inject active task acceptance criteria
-    ac_lines = _get_active_task_acceptance()
+    ac_lines = _get_active_task_acceptance(session_id)
     if not ac_lines:
         print(json.dumps({}))
         return
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Pairing Index — source → test file pairing from the tracked file list.
+
+Backs post_edit_guard's [TDD] pairing check and [Test] reminder. Replaces
+per-edit probing of a few dozen os.path.exists/isdir candidates (which still
+missed `tests/unit/foo/test_bar.py`-style layouts) with one index built from
+`git ls-files` and looked up with a dict access.
+
+Naming rules come from the caller (post_edit_guard._TEST_PATTERNS) so there is
+one source of truth: `.test.ts`/`.spec.ts` suffixes, `test_` prefix for
+Python, `Test.java`, and so on.
+
+Directory matching — a test pairs with a source when, after dropping neutral
+directory names (test/, tests/, __tests__/, spec/, unit/, integration/, src/,
+main/, ...), the test's directory path is a suffix of the source's:
+
+  src/foo/bar.py            ← tests/unit/foo/test_bar.py   (mirrored)
+  src/foo/bar.ts            ← src/foo/__tests__/bar.test.ts (co-located)
+  src/main/java/x/Bar.java  ← src/test/java/x/BarTest.java  (maven)
+  lib/bar.py                ← tests/test_bar.py             (flat tests dir)
+
+Storage: .ultra/cache/test-index.json (derived — safe to delete)
+  {"version", "rules": <hash of naming rules>, "sig": <tracked-set signature>,
+   "tests": {"<src_ext>:<stem>": [test paths]}}
+
+Only test files are stored; a source's pairs are computed at lookup from its
+(ext, stem) bucket. When the tracked set changes, the new test-file set is
+diffed against the stored one and only added/removed tests are patched in.
+"""
+
+import hashlib
+import json
+import posixpath
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import atomic_write_text
+from hook_utils import LS_FILES_TIMEOUT, get_cache_dir, load_tracked_files, time_left
+
+INDEX_VERSION = 1
+TEST_DIR_NAMES = {'test', 'tests', '__tests__', 'spec', 'specs'}
+NEUTRAL_DIRS = TEST_DIR_NAMES | {'unit', 'integration', 'e2e', 'functional', 'src', 'main'}
+
+
+def _rules_hash(patterns: dict) -> str:
+    blob = json.dumps(patterns, sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def pairing_keys(rel_path: str, patterns: dict) -> list:
+    """Bucket keys ("<src_ext>:<stem>") a file answers to *as a test*. [] if not a test."""
+    base = posixpath.basename(rel_path)
+    keys = []
+    for src_ext, pats in patterns.items():
+        for pat in pats:
+            if pat == 'test_':
+                if base.startswith('test_') and base.endswith(src_ext) and len(base) > 5 + len(src_ext):
+                    keys.append(f"{src_ext}:{base[5:-len(src_ext)]}")
+            elif base.endswith(pat) and len(base) > len(pat):
+                keys.append(f"{src_ext}:{base[:-len(pat)]}")
+    return list(dict.fromkeys(keys))
+
+
+def source_key(rel_path: str) -> str:
+    stem, ext = posixpath.splitext(posixpath.basename(rel_path))
+    return f"{ext.lower()}:{stem}"
+
+
+def _dir_tail(rel_path: str) -> tuple:
+    return tuple(
+        p for p in rel_path.split('/')[:-1]
+        if p.lower() not in NEUTRAL_DIRS
+    )
+
+
+def dirs_match(source_rel: str, test_rel: str) -> bool:
+    """True if the test's non-neutral dir path is a suffix of the source's."""
+    src_dirs = _dir_tail(source_rel)
+    test_dirs = _dir_tail(test_rel)
+    if len(test_dirs) > len(src_dirs):
+        return False
+    return not test_dirs or src_dirs[-len(test_dirs):] == test_dirs
+
+
+class PairingIndex:
+    """Test-file buckets for one project root, refreshed from load_tracked_files."""
+
+    def __init__(self, root: Path, patterns: dict):
+        self.root = Path(root)
+        self.patterns = patterns
+        self.rules = _rules_hash(patterns)
+        self.tests: dict = {}
+        self.sig = ""
+        try:
+            self.path = get_cache_dir(self.root) / "test-index.json"
+        except OSError:
+            self.path = None
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("rules") != self.rules:
+            return
+        self.tests = data.get("tests") or {}
+        self.sig = data.get("sig") or ""
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            atomic_write_text(self.path, json.dumps({
+                "version": INDEX_VERSION,
+                "rules": self.rules,
+                "sig": self.sig,
+                "tests": self.tests,
+            }))
+        except OSError:
+            pass
+
+    def _add(self, rel_path: str) -> bool:
+        added = False
+        for key in pairing_keys(rel_path, self.patterns):
+            bucket = self.tests.setdefault(key, [])
+            if rel_path not in bucket:
+                bucket.append(rel_path)
+                bucket.sort()
+                added = True
+        return added
+
+    def _remove(self, rel_path: str) -> None:
+        for key in pairing_keys(rel_path, self.patterns):
+            bucket = self.tests.get(key)
+            if bucket and rel_path in bucket:
+                bucket.remove(rel_path)
+                if not bucket:
+                    del self.tests[key]
+
+    def all_tests(self) -> set:
+        return {t for bucket in self.tests.values() for t in bucket}
+
+    def refresh(self, timeout: float = LS_FILES_TIMEOUT) -> None:
+        """Sync with the tracked file list; patches only added/removed tests.
+        A listing that fails or exceeds `timeout` keeps the saved index."""
+        sig, files = load_tracked_files(self.root, timeout=timeout)
+        if not sig or sig == self.sig:
+            return
+        current = {f for f in files if pairing_keys(f, self.patterns)}
+        known = self.all_tests()
+        for gone in known - current:
+            self._remove(gone)
+        for new in current - known:
+            self._add(new)
+        self.sig = sig
+        self._save()
+
+    def note(self, rel_path: str) -> None:
+        """Register a just-written test file the cached listing may not show yet."""
+        if self._add(rel_path):
+            self._save()
+
+    def tests_for(self, source_rel: str) -> list:
+        """Every indexed test file that pairs with source_rel (sorted)."""
+        return [
+            t for t in self.tests.get(source_key(source_rel), [])
+            if t != source_rel and dirs_match(source_rel, t)
+        ]
+
+
+def find_test_files(toplevel: str, file_path: str, patterns: dict, deadline=None):
+    """post_edit_guard entry point: repo-relative tests paired with file_path.
+
+    Returns None when no index can be used (outside the repo, no listing), so
+    the caller can fall back to filesystem probing. `deadline` caps the
+    `git ls-files` refresh; past it the saved index answers as is.
+    """
+    try:
+        rel = Path(file_path).resolve().relative_to(Path(toplevel).resolve()).as_posix()
+    except (ValueError, OSError):
+        return None
+    index = PairingIndex(Path(toplevel), patterns)
+    index.refresh(timeout=time_left(deadline, LS_FILES_TIMEOUT))
+    if not index.sig:
+        return None
+    if pairing_keys(rel, patterns):
+        index.note(rel)
+    return index.tests_for(rel)
@@ -14,31 +14,196 @@ Decision policy:
 v7.0 rationale: post-edit blocks for recoverable patterns triggered the
 over-correction loop (agent edits to escape, drifts from north-star). Sensor
 mode preserves signal without forcing agents into reactive-fix spirals.
+
+Profiling: ULTRA_GUARD_PROFILE=json|sarif records per-checker and per-rule
+timings plus uncapped findings under .ultra/debug/ (guard_profile.py);
+`--profile-report [--top N]` prints the slowest rules of the session.
 """
 
 import sys
 import json
 import re
 import os
-import subprocess
+import tempfile
+import time
+import codecs
+from array import array
+from bisect import bisect_right
+from contextlib import nullcontext
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # v7: progress.json maintenance helper
 sys.path.insert(0, str(Path(__file__).parent))
 try:
-    from hook_utils import update_task_progress, get_git_toplevel
+    from hook_utils import update_task_progress, get_git_toplevel, extract_ac_bullets, find_git_root
 except Exception:  # pragma: no cover — never block hook on import error
     def update_task_progress(*_args, **_kwargs):  # type: ignore[no-redef]
         return
     def get_git_toplevel() -> str:  # type: ignore[no-redef]
         return ""
+    def find_git_root(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
+    def extract_ac_bullets(*_args, **_kwargs):  # type: ignore[no-redef]
+        return []
+try:
+    from import_graph import import_impact
+except Exception:  # pragma: no cover — never block hook on import error
+    def import_impact(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
+try:
+    from commit_index import describe_last_commit
+except Exception:  # pragma: no cover — never block hook on import error
+    def describe_last_commit(*_args, **_kwargs):  # type: ignore[no-redef]
+        return "", ""
+try:
+    from coverage_index import covering_tests, touched_lines
+except Exception:  # pragma: no cover — never block hook on import error
+    def covering_tests(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
+    def touched_lines(*_args, **_kwargs):  # type: ignore[no-redef]
+        return set()
+try:
+    from guard_profile import GuardProfile, get_log_dir, main_report, profile_format
+except Exception:  # pragma: no cover — never block hook on import error
+    GuardProfile = None  # type: ignore[assignment,misc]
+    def profile_format():  # type: ignore[no-redef]
+        return None
+    def main_report(*_args, **_kwargs):  # type: ignore[no-redef]
+        print("guard_profile.py unavailable", file=sys.stderr)
+        return 1
+try:
+    from relations_index import load_cold_files, lookup_owners, relations_pending
+except Exception:  # pragma: no cover — never block hook on import error
+    def load_cold_files(*_args, **_kwargs):  # type: ignore[no-redef]
+        return {}
+    def lookup_owners(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
+    def relations_pending(*_args, **_kwargs):  # type: ignore[no-redef]
+        return False
+try:
+    from pairing_index import find_test_files
+except Exception:  # pragma: no cover — never block hook on import error
+    def find_test_files(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
+try:
+    from shared_cache import cached, code_version, content_key
+except Exception:  # pragma: no cover — never block hook on import error
+    cached = None  # type: ignore[assignment]
+try:
+    from session_ledger import record_edit
+except Exception:  # pragma: no cover — never block hook on import error
+    def record_edit(*_args, **_kwargs):  # type: ignore[no-redef]
+        return
 
 
 # -- Shared Utilities --
 
-def get_line_number(content, match_pos):
-    """Get 1-based line number from character position."""
-    return content[:match_pos].count('\n') + 1
+class SourceText:
+    """An edited file held as raw bytes.
+
+    Checkers scan `data` with bytes regexes; a finding asks for its line
+    number (bisect over a newline-offset index, built on first use) and the
+    text of that one line. Nothing else is ever decoded, so a file costs its
+    size once instead of str + split-lines copies.
+    """
+
+    __slots__ = ('data', '_starts')
+
+    def __init__(self, data):
+        self.data = data
+        self._starts = None
+
+    def _index(self):
+        if self._starts is None:
+            starts = array('q', [0])
+            starts.extend(m.end() for m in re.finditer(b'\n', self.data))
+            self._starts = starts
+        return self._starts
+
+    def line_count(self):
+        return len(self._index())
+
+    def line_number(self, pos):
+        """1-based line number of byte offset pos."""
+        return bisect_right(self._index(), pos)
+
+    def line(self, line_num):
+        """Decoded text of 1-based line line_num ('' when out of range)."""
+        starts = self._index()
+        if not 1 <= line_num <= len(starts):
+            return ''
+        start = starts[line_num - 1]
+        end = starts[line_num] - 1 if line_num < len(starts) else len(self.data)
+        return self.data[start:end].decode('utf-8', 'replace')
+
+    def head(self, n):
+        """First n lines, decoded."""
+        end = 0
+        for _ in range(n):
+            nl = self.data.find(b'\n', end)
+            if nl == -1:
+                end = len(self.data)
+                break
+            end = nl + 1
+        return self.data[:end].decode('utf-8', 'replace')
+
+
+@lru_cache(maxsize=None)
+def _bytes_re(pattern, flags=0):
+    """Compile a (str) rule pattern for scanning bytes; compiled patterns pass through.
+
+    Bytes patterns are ASCII-only: \\w, \\b and IGNORECASE see every non-ASCII
+    byte as a non-word character. For keyword rules (\\bplaceholder\\b) that is
+    intended (a keyword next to CJK text still matches); a rule that spans an
+    identifier, which Python and JS allow to be non-ASCII, uses IDENT instead.
+    """
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern.encode('utf-8'), flags)
+
+
+# A word character of an identifier in a bytes pattern: ASCII \w or any byte
+# of a multi-byte UTF-8 sequence.
+IDENT = r'[\w\x80-\xff]'
+
+
+# -- Run deadline --
+# settings.json gives this hook 5s. main() sets one deadline for the whole run
+# and every index it consults (pairing, import graph, coverage, commit map)
+# sizes its git calls and sweeps from what is left, deferring cold builds to
+# their background workers rather than overrunning.
+HOOK_BUDGET_S = 3.5
+_DEADLINE = None
+
+# -- Profiling (ULTRA_GUARD_PROFILE=json|sarif, see guard_profile.py) --
+
+_PROFILE = None
+
+
+def _finditer(rule, pattern, data, flags=0):
+    """Bytes-regex finditer over data, timed per rule when profiling is on."""
+    regex = _bytes_re(pattern, flags)
+    if _PROFILE is None:
+        return regex.finditer(data)
+    t0 = time.perf_counter()
+    matches = list(regex.finditer(data))
+    _PROFILE.time_rule(rule, (time.perf_counter() - t0) * 1000, len(matches))
+    return matches
+
+
+def _timed(checker):
+    """Context manager timing one checker; no-op unless profiling."""
+    return _PROFILE.checker(checker) if _PROFILE is not None else nullcontext()
+
+
+def _record_findings(level, file_path, findings, message_key='message'):
+    if _PROFILE is None:
+        return
+    for f in findings:
+        _PROFILE.add_finding(f.get('rule', '?'), level, file_path, f['line'],
+                             f[message_key], f.get('code', ''))
 
 
 def is_test_file(file_path):
@@ -165,9 +330,9 @@ MOCK_FORBIDDEN_PATTERNS = [
     (r'\.mockResolvedValue\s*\(', '.mockResolvedValue() - Use real async behavior'),
     (r'\.mockReturnValue\s*\(', '.mockReturnValue() - Use real return values'),
     (r'\.mockImplementation\s*\(', '.mockImplementation() - Use real implementation'),
-    (r'\bclass\s+InMemory\w*Repository', 'InMemoryRepository class - Use Testcontainers'),
-    (r'\bclass\s+Mock\w+', 'Mock class - Use real implementation'),
-    (r'\bclass\s+Fake\w+', 'Fake class - Use real implementation'),
+    (rf'\bclass\s+InMemory{IDENT}*Repository', 'InMemoryRepository class - Use Testcontainers'),
+    (rf'\bclass\s+Mock{IDENT}+', 'Mock class - Use real implementation'),
+    (rf'\bclass\s+Fake{IDENT}+', 'Fake class - Use real implementation'),
     (r'\bsinon\.stub\s*\(', 'sinon.stub() - Use real implementation'),
     (r'\bsinon\.spy\s*\(', 'sinon.spy() - Use real implementation'),
     (r'\bsinon\.mock\s*\(', 'sinon.mock() - Use real implementation'),
@@ -232,7 +397,7 @@ SEC_RECOVERABLE_PATTERNS = [
     (r'catch\s*\([^)]*\)\s*\{\s*console\.log\s*\([^)]*\)\s*;?\s*\}',
      'catch with only console.log - Logging without handling'),
     (r'except\s*:\s*pass\s*$', 'Bare except with pass - Never silently swallow errors'),
-    (r'except\s+\w+\s*:\s*pass\s*$', 'Exception swallowed with pass - Log or re-raise'),
+    (rf'except\s+{IDENT}+\s*:\s*pass\s*$', 'Exception swallowed with pass - Log or re-raise'),
     (r'throw\s+new\s+Error\s*\(\s*[\'"](?:Error|error|ERROR)[\'"]',
      'Generic Error message - Include what failed, why, and input'),
     (r'throw\s+new\s+Error\s*\(\s*[\'"][\'"]',
@@ -257,16 +422,17 @@ SEC_HIGH_PATTERNS = [
 
 # -- Checker: Code Quality --
 
-def check_code_quality(_file_path, content, lines):
+def check_code_quality(_file_path, src):
     """Returns (blocks, warnings). WARN patterns deferred to review-code agent."""
     blocks = []
 
-    for pattern, message in CQ_BLOCK_PATTERNS:
-        for match in re.finditer(pattern, content, re.IGNORECASE):
-            line_num = get_line_number(content, match.start())
-            line_content = lines[line_num - 1].strip() if line_num <= len(lines) else ''
+    for idx, (pattern, message) in enumerate(CQ_BLOCK_PATTERNS):
+        for match in _finditer(f'CQ_BLOCK/{idx}', pattern, src.data, re.IGNORECASE):
+            line_num = src.line_number(match.start())
+            line_content = src.line(line_num).strip()
             # All TODO/FIXME/XXX/HACK are forbidden per CLAUDE.md - no exceptions
-            blocks.append({'line': line_num, 'message': message, 'code': line_content[:80]})
+            blocks.append({'line': line_num, 'message': message, 'code': line_content[:80],
+                           'rule': f'CQ_BLOCK/{idx}'})
 
     # WARN patterns deferred to review-code agent (reduces PostToolUse noise)
     return blocks, []
@@ -274,7 +440,7 @@ def check_code_quality(_file_path, content, lines):
 
 # -- Checker: Scope Reduction Detection --
 
-def check_scope_reduction(file_path, content, lines):
+def check_scope_reduction(file_path, src):
     """Detect scope reduction language in non-test source files. Returns warnings list."""
     if is_test_file(file_path) or is_config_file(file_path):
         return []
@@ -284,25 +450,27 @@ def check_scope_reduction(file_path, content, lines):
         return []
 
     warnings = []
-    for pattern, message in SCOPE_REDUCTION_PATTERNS:
-        for match in re.finditer(pattern, content, re.IGNORECASE):
-            line_num = get_line_number(content, match.start())
-            line_content = lines[line_num - 1].strip() if line_num <= len(lines) else ''
+    for idx, (pattern, message) in enumerate(SCOPE_REDUCTION_PATTERNS):
+        for match in _finditer(f'SCOPE/{idx}', pattern, src.data, re.IGNORECASE):
+            line_num = src.line_number(match.start())
+            line_content = src.line(line_num).strip()
+            phrase = match.group(0).decode('utf-8', 'replace')[:20]
             # Only flag if the pattern appears in comments or string literals
             # (scope reduction language is typically in code comments, not variable names)
-            if is_in_comment(line_content) or re.search(r'["\'].*' + re.escape(match.group(0)[:20]) + r'.*["\']', line_content):
-                warnings.append({'line': line_num, 'message': message, 'code': line_content[:80]})
+            if is_in_comment(line_content) or re.search(r'["\'].*' + re.escape(phrase) + r'.*["\']', line_content):
+                warnings.append({'line': line_num, 'message': message, 'code': line_content[:80],
+                                 'rule': f'SCOPE/{idx}'})
     return warnings
 
 
 # -- Checker: Mock Detector --
 
-def _has_rationale_comment(lines, match_line_idx):
+def _has_rationale_comment(src, line_num):
     """Check for Test Double rationale comment near violation (5 before, 2 after)."""
-    start = max(0, match_line_idx - 5)
-    end = min(len(lines), match_line_idx + 3)
-    for i in range(start, end):
-        if re.search(MOCK_RATIONALE_RE, lines[i], re.IGNORECASE):
+    start = max(1, line_num - 5)
+    end = min(src.line_count(), line_num + 2)
+    for n in range(start, end + 1):
+        if re.search(MOCK_RATIONALE_RE, src.line(n), re.IGNORECASE):
             return True
     return False
 
@@ -311,33 +479,33 @@ def _is_allowed_mock_context(line_content):
     return any(re.search(p, line_content) for p in MOCK_ALLOWED_CONTEXTS)
 
 
-def check_mocks(_file_path, content, lines):
+def check_mocks(_file_path, src):
     """Returns list of violations. Only called for test files."""
     violations = []
 
     # Skip if global rationale in first 20 lines
-    first_lines = '\n'.join(lines[:20])
-    if re.search(MOCK_RATIONALE_RE, first_lines, re.IGNORECASE):
+    if re.search(MOCK_RATIONALE_RE, src.head(20), re.IGNORECASE):
         return violations
 
-    for pattern, message in MOCK_FORBIDDEN_PATTERNS:
-        for match in re.finditer(pattern, content):
-            line_num = get_line_number(content, match.start())
-            line_content = lines[line_num - 1].strip() if line_num <= len(lines) else ''
+    for idx, (pattern, message) in enumerate(MOCK_FORBIDDEN_PATTERNS):
+        for match in _finditer(f'MOCK/{idx}', pattern, src.data):
+            line_num = src.line_number(match.start())
+            line_content = src.line(line_num).strip()
 
-            if _has_rationale_comment(lines, line_num - 1):
+            if _has_rationale_comment(src, line_num):
                 continue
             if _is_allowed_mock_context(line_content):
                 continue
 
-            violations.append({'line': line_num, 'pattern': message, 'code': line_content[:80]})
+            violations.append({'line': line_num, 'pattern': message, 'code': line_content[:80],
+                               'rule': f'MOCK/{idx}'})
 
     return violations
 
 
 # -- Checker: Security Scan --
 
-def check_security(file_path, content, lines):
+def check_security(file_path, src):
     """Returns (critical, recoverable, high).
 
     - critical: irreversible patterns (secrets, SQL injection, eval-with-user-input).
@@ -351,26 +519,28 @@ def check_security(file_path, content, lines):
     _is_test = is_test_file(file_path)
     _is_example = is_example_or_docs(file_path)
 
-    for pattern, message in SEC_CRITICAL_PATTERNS:
-        for match in re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE):
-            line_num = get_line_number(content, match.start())
-            line_content = lines[line_num - 1].strip() if line_num <= len(lines) else ''
+    for idx, (pattern, message) in enumerate(SEC_CRITICAL_PATTERNS):
+        for match in _finditer(f'SEC_CRITICAL/{idx}', pattern, src.data, re.IGNORECASE | re.MULTILINE):
+            line_num = src.line_number(match.start())
+            line_content = src.line(line_num).strip()
 
             if _is_example and 'Hardcoded' in message:
                 continue
 
-            critical.append({'line': line_num, 'message': message, 'code': line_content[:80]})
+            critical.append({'line': line_num, 'message': message, 'code': line_content[:80],
+                             'rule': f'SEC_CRITICAL/{idx}'})
 
-    for pattern, message in SEC_RECOVERABLE_PATTERNS:
-        for match in re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE):
-            line_num = get_line_number(content, match.start())
-            line_content = lines[line_num - 1].strip() if line_num <= len(lines) else ''
+    for idx, (pattern, message) in enumerate(SEC_RECOVERABLE_PATTERNS):
+        for match in _finditer(f'SEC_RECOVERABLE/{idx}', pattern, src.data, re.IGNORECASE | re.MULTILINE):
+            line_num = src.line_number(match.start())
+            line_content = src.line(line_num).strip()
 
             # Tests legitimately catch-and-rethrow, skip noisy false positives
             if _is_test and 'catch' in message.lower():
                 continue
 
-            recoverable.append({'line': line_num, 'message': message, 'code': line_content[:80]})
+            recoverable.append({'line': line_num, 'message': message, 'code': line_content[:80],
+                                'rule': f'SEC_RECOVERABLE/{idx}'})
 
     return critical, recoverable, []
 
@@ -394,27 +564,32 @@ _TEST_PATTERNS = {
 }
 
 
-def check_test_file_exists(file_path):
-    """Check if a source file has a corresponding test file. Returns warning string or None."""
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext not in TDD_SOURCE_EXT:
-        return None
+_paired_tests_cache = {}
 
-    # Skip test files, config files, generated files, hook files
-    if is_test_file(file_path) or is_config_file(file_path):
-        return None
-    if is_generated_file(file_path) or is_hook_file(file_path):
-        return None
 
-    # Skip files not in recognizable source directories
-    path_parts = file_path.replace('\\', '/').lower().split('/')
-    if not any(d in path_parts for d in _SOURCE_DIRS):
-        return None
+def find_paired_tests(file_path):
+    """Every test file paired with file_path, from the pairing index.
+
+    One dict lookup in pairing_index.py (built from `git ls-files`, cached in
+    .ultra/cache/test-index.json). Memoized per process — the [TDD] check and
+    the [Test] reminder share the answer. Returns None outside a git repo so
+    callers fall back to probing the filesystem.
+    """
+    if file_path in _paired_tests_cache:
+        return _paired_tests_cache[file_path]
+    tests = None
+    toplevel = get_git_toplevel()
+    if toplevel:
+        rels = find_test_files(toplevel, file_path, _TEST_PATTERNS, deadline=_DEADLINE)
+        if rels is not None:
+            tests = [os.path.join(toplevel, r) for r in rels]
+    _paired_tests_cache[file_path] = tests
+    return tests
 
-    # Rust uses inline tests - skip
-    if ext == '.rs':
-        return None
 
+def _probe_test_files(file_path):
+    """Outside git: look for a test file next to the source or in test dir siblings."""
+    ext = os.path.splitext(file_path)[1].lower()
     basename = os.path.splitext(os.path.basename(file_path))[0]
     dirpath = os.path.dirname(file_path)
     patterns = _TEST_PATTERNS.get(ext, [])
@@ -432,6 +607,7 @@ def check_test_file_exists(file_path):
         if os.path.isdir(candidate_mirror):
             search_dirs.append(candidate_mirror)
 
+    found = []
     for search_dir in search_dirs:
         for pat in patterns:
             if ext == '.py' and pat == 'test_':
@@ -440,8 +616,37 @@ def check_test_file_exists(file_path):
                 test_path = os.path.join(search_dir, f"{basename}Test.java")
             else:
                 test_path = os.path.join(search_dir, f"{basename}{pat}")
-            if os.path.exists(test_path):
-                return None
+            if os.path.exists(test_path) and test_path not in found:
+                found.append(test_path)
+    return found
+
+
+def check_test_file_exists(file_path):
+    """Check if a source file has a corresponding test file. Returns warning string or None."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in TDD_SOURCE_EXT:
+        return None
+
+    # Skip test files, config files, generated files, hook files
+    if is_test_file(file_path) or is_config_file(file_path):
+        return None
+    if is_generated_file(file_path) or is_hook_file(file_path):
+        return None
+
+    # Skip files not in recognizable source directories
+    path_parts = file_path.replace('\\', '/').lower().split('/')
+    if not any(d in path_parts for d in _SOURCE_DIRS):
+        return None
+
+    # Rust uses inline tests - skip
+    if ext == '.rs':
+        return None
+
+    tests = find_paired_tests(file_path)
+    if tests is None:
+        tests = _probe_test_files(file_path)
+    if tests:
+        return None
 
     fname = os.path.basename(file_path)
     return f"[TDD] No test file found for {fname}"
@@ -450,36 +655,35 @@ def check_test_file_exists(file_path):
 # -- Checker: Silent Catch Detection --
 
 SILENT_CATCH_PATTERN = re.compile(
-    r'except\s*(?:\([^)]*\)|[\w.,\s]*)?\s*(?:as\s+\w+)?\s*:\s*\n'
-    r'\s+(?:pass|return\s*$|return\s+None|\.\.\.)',
+    rb'except\s*(?:\([^)]*\)|[\w\x80-\xff.,\s]*)?\s*(?:as\s+[\w\x80-\xff]+)?\s*:\s*\n'
+    rb'\s+(?:pass|return\s*$|return\s+None|\.\.\.)',
     re.MULTILINE
 )
 
 
-def check_silent_catches(file_path, content, lines):
+def check_silent_catches(file_path, src):
     """Detect except blocks that swallow errors silently."""
     if is_hook_file(file_path) or is_test_file(file_path):
         return []
 
     violations = []
-    for match in SILENT_CATCH_PATTERN.finditer(content):
-        line_num = get_line_number(content, match.start())
-        snippet = match.group(0).strip().split('\n')[0][:80]
+    for match in _finditer('SILENT_CATCH/0', SILENT_CATCH_PATTERN, src.data):
+        line_num = src.line_number(match.start())
+        snippet = match.group(0).decode('utf-8', 'replace').strip().split('\n')[0][:80]
         violations.append((line_num, snippet))
     return violations
 
 
 # -- Checker: Blast Radius --
 
-def check_blast_radius(file_path):
-    """Find files that import/reference the edited file. Returns list of dependent paths."""
+def _blast_radius_dir_scan(file_path):
+    """Outside git: Python siblings in the same directory that import the file."""
     basename = os.path.basename(file_path)
     module_name = os.path.splitext(basename)[0]
 
     if not module_name or module_name.startswith('.'):
         return []
 
-    # Only check for Python files in hooks dir or source files in project
     parent_dir = os.path.dirname(file_path)
     if not parent_dir:
         return []
@@ -506,18 +710,39 @@ def check_blast_radius(file_path):
     return dependents
 
 
+def check_blast_radius(file_path):
+    """Files that import the edited file.
+
+    Returns (dependents, transitive_count, complete). Inside a git repo the
+    answer comes from the project-wide import graph (import_graph.py) — Python,
+    TS/JS and Go, direct + transitive fan-in. `complete` is False while a cold
+    graph is still warming up. Outside git, falls back to a same-directory scan.
+    """
+    toplevel = get_git_toplevel()
+    if toplevel:
+        impact = import_impact(toplevel, file_path, deadline=_DEADLINE)
+        if impact is not None:
+            return impact
+    dependents = _blast_radius_dir_scan(file_path)
+    return dependents, len(dependents), True
+
+
 # -- Checker: Test File Reminder --
 
 def check_test_reminder(file_path):
-    """If edited file has a corresponding test file, remind to run it."""
+    """If edited file has corresponding test files, return them all (else None)."""
     if is_test_file(file_path) or is_config_file(file_path):
         return None
 
+    tests = find_paired_tests(file_path)
+    if tests is not None:
+        return tests or None
+
     basename = os.path.basename(file_path)
     name_no_ext = os.path.splitext(basename)[0]
     parent = os.path.dirname(file_path)
 
-    # Check common test file locations
+    # Outside git: check common test file locations
     candidates = [
         os.path.join(parent, 'tests', f'test_{basename}'),
         os.path.join(parent, 'tests', f'test_{name_no_ext}.py'),
@@ -525,67 +750,54 @@ def check_test_reminder(file_path):
         os.path.join(parent, f'{name_no_ext}.spec.ts'),
         os.path.join(parent, '__tests__', f'{name_no_ext}.test.ts'),
     ]
+    return [c for c in candidates if os.path.exists(c)] or None
 
-    for candidate in candidates:
-        if os.path.exists(candidate):
-            return candidate
-    return None
 
+def format_test_reminder(test_files, limit=8):
+    """One [Test] line: pytest command for Python tests, plain list for the rest."""
+    rel = [os.path.relpath(t) for t in test_files]
+    shown = rel[:limit]
+    extra = f" +{len(rel) - limit} more" if len(rel) > limit else ""
+    if all(t.endswith('.py') for t in shown):
+        return f"[Test] Run: pytest {' '.join(shown)}{extra}"
+    return f"[Test] Related tests: {', '.join(shown)}{extra}"
 
-# -- Checker: Task Trace (file → task reverse lookup via relations.json) --
 
-def _extract_ac_bullets(ctx_path, max_lines=2):
-    """First N acceptance criteria bullets from a task context md.
+def check_covering_tests(file_path, tool_input, tool_response, content, limit=10):
+    """Tests whose recorded coverage hits the edited lines, as one [Test] line.
 
-    Skips html comments (<!-- ... -->) which the template uses for hidden notes.
+    Uses coverage_index.py (coverage.py dynamic contexts or lcov TN records).
+    Returns None when there is no per-test coverage data or nothing covers the
+    touched lines — the caller then falls back to the name-based reminder.
     """
+    if is_test_file(file_path):
+        return None
+    toplevel = get_git_toplevel()
+    if not toplevel:
+        return None
+    lines = touched_lines(tool_input, tool_response, content)
+    result = covering_tests(toplevel, file_path, lines, deadline=_DEADLINE)
+    if not result or not result[1]:
+        return None
+    _kind, tests = result
+    shown = tests[:limit]
+    extra = f" +{len(tests) - limit} more" if len(tests) > limit else ""
+    if all('::' in t for t in shown):
+        return f"[Test] Run: pytest {' '.join(shown)}{extra} (covers edited lines)"
+    return f"[Test] Covering tests: {', '.join(shown)}{extra}"
+
+
+# -- Checker: Task Trace (file → task reverse lookup via relations.json) --
+
+def _extract_ac_bullets(ctx_path, max_lines=2):
+    """First N acceptance criteria bullets from a task context md (legacy path)."""
     if not ctx_path.exists():
         return []
     try:
         text = ctx_path.read_text(encoding="utf-8")
     except OSError:
         return []
-    if "## Acceptance Criteria" not in text:
-        return []
-
-    section = text.split("## Acceptance Criteria", 1)[1]
-    section = section.split("\n## ", 1)[0]
-
-    bullets = []
-    in_comment = False
-    for line in section.split("\n"):
-        s = line.strip()
-        if not s:
-            continue
-        if "<!--" in s and "-->" not in s:
-            in_comment = True
-            continue
-        if in_comment:
-            if "-->" in s:
-                in_comment = False
-            continue
-        if s.startswith("<!--") and s.endswith("-->"):
-            continue
-        if s.startswith("- ") and len(s) > 4:
-            bullets.append(s[:140])
-            if len(bullets) >= max_lines:
-                break
-    return bullets
-
-
-def _git_short(args, cwd):
-    """Run git with timeout; return stdout stripped, '' on any failure."""
-    try:
-        result = subprocess.run(
-            ["git", *args],
-            capture_output=True, text=True, timeout=2,
-            cwd=str(cwd),
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-        pass
-    return ""
+    return extract_ac_bullets(text, max_lines)
 
 
 def _git_context_fallback(file_path, toplevel):
@@ -593,23 +805,63 @@ def _git_context_fallback(file_path, toplevel):
 
     Triggered only when the project IS an Ultra project (relations.json
     exists) but the edited file is not in the file→task index. Stays quiet
-    in non-Ultra projects to avoid global noise.
+    in non-Ultra projects to avoid global noise. Branch and last commit come
+    from commit_index.py (HEAD read from .git, cached path → commit map), so
+    no git process runs unless HEAD moved since the last edit; on a history
+    longer than the indexed window a miss reads as "still indexing".
     """
     fname = os.path.basename(file_path)
-    branch = _git_short(["rev-parse", "--abbrev-ref", "HEAD"], cwd=toplevel) or "?"
     try:
-        rel_fp = os.path.relpath(file_path, toplevel)
+        rel_fp = Path(os.path.relpath(file_path, toplevel)).as_posix()
     except ValueError:
         rel_fp = file_path
-    last = _git_short(
-        ["log", "-1", "--pretty=format:%h %s (%cr)", "--", rel_fp],
-        cwd=toplevel,
-    )
+    branch, last = describe_last_commit(toplevel, rel_fp, deadline=_DEADLINE)
+    branch = branch or "?"
     if last:
         return [f"[Trace] (no task) {fname} on branch {branch}; last: {last[:80]}"]
+    if last is None:
+        return [f"[Trace] (no task) {fname} on branch {branch}; history still indexing"]
     return [f"[Trace] (no task) {fname} on branch {branch}; uncommitted (no history)"]
 
 
+def _owners_from_relations_json(root, rel_fp):
+    """Legacy lookup: parse relations.json; AC read from context files.
+
+    On a hot miss, consults the cold archive (relations-archive.json.gz).
+    """
+    relations_path = root / ".ultra" / "relations.json"
+    if not relations_path.exists():
+        return None
+    try:
+        rel_data = json.loads(relations_path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return None
+
+    files_index = rel_data.get("files") or {}
+    entry = files_index.get(rel_fp) if files_index else None
+    tier = "hot"
+    if not entry:
+        tier = "cold"
+        entry = load_cold_files(root).get(rel_fp)
+    if not entry:
+        return {}
+
+    tasks_meta = rel_data.get("tasks") or {}
+    owners = []
+    for tid in (entry.get("tasks") or [])[:3]:
+        meta = tasks_meta.get(str(tid), {})
+        ac = []
+        ctx_rel = meta.get("context_file", "")
+        if ctx_rel:
+            ac = _extract_ac_bullets(root / ".ultra" / "tasks" / ctx_rel, max_lines=2)
+        owners.append({"id": str(tid), "title": meta.get("title") or "",
+                       "status": meta.get("status") or "", "ac": ac})
+    found = {"from": entry.get("from") or [], "tasks": owners}
+    if tier == "cold":
+        found["tier"] = "cold"
+    return found
+
+
 def check_task_trace(file_path):
     """v7+ reverse trace: file → task(s) → first AC bullets via relations.json.
 
@@ -617,57 +869,54 @@ def check_task_trace(file_path):
     not in an Ultra project (no relations.json) or any error (best-effort,
     never raises). For Ultra projects where the file is not in any task's
     file index, falls back to a single git-context line (Phase 5C).
+
+    Reads the indexed sidecar (.ultra/cache/relations.db, relations_index.py)
+    when it matches relations.json; otherwise parses the JSON itself. While a
+    debounced relations rebuild is queued, a note says ownership may lag.
+    Owners found only in the cold tier (long-completed tasks) are marked
+    "archived".
     """
     toplevel = get_git_toplevel()
     if not toplevel:
         return []
 
     root = Path(toplevel)
-    relations_path = root / ".ultra" / "relations.json"
-    if not relations_path.exists():
-        return []
-
-    try:
-        rel_data = json.loads(relations_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
-        return []
-
-    files_index = rel_data.get("files") or {}
-
     try:
         rel_fp = os.path.relpath(file_path, toplevel)
     except ValueError:
         return []
 
-    entry = files_index.get(rel_fp) if files_index else None
-    if not entry:
+    found = None
+    if (root / ".ultra" / "relations.json").exists():
+        found = lookup_owners(root, Path(rel_fp).as_posix())
+    if found is None:
+        found = _owners_from_relations_json(root, rel_fp)
+    if found is None:
+        return []
+
+    pending = (
+        ["[Trace] relations index rebuild pending — ownership may lag recent .ultra edits"]
+        if relations_pending(root) else []
+    )
+    owners = found.get("tasks") or []
+    if not owners:
         # Phase 5C: in an Ultra project but the file is not owned by any task.
         # Surface git context so the agent still gets situational awareness.
-        return _git_context_fallback(file_path, toplevel)
+        return _git_context_fallback(file_path, toplevel) + pending
 
-    task_ids = entry.get("tasks") or []
-    if not task_ids:
-        return _git_context_fallback(file_path, toplevel)
-
-    tasks_meta = rel_data.get("tasks") or {}
     out = []
     fname = os.path.basename(file_path)
+    sources = found.get("from") or []
+    src_hint = f" [{','.join(sources)}]" if sources else ""
+    archived = ", archived" if found.get("tier") == "cold" else ""
+    for owner in owners[:3]:
+        title = (owner.get("title") or "?")[:60]
+        status = (owner.get("status") or "?") + archived
+        out.append(f"[Trace]{src_hint} {fname} → task-{owner['id']} ({status}): {title}")
+        for ac in (owner.get("ac") or [])[:2]:
+            out.append(f"    AC: {ac}")
 
-    for tid in task_ids[:3]:
-        meta = tasks_meta.get(str(tid), {})
-        title = (meta.get("title") or "?")[:60]
-        status = meta.get("status") or "?"
-        sources = entry.get("from") or []
-        src_hint = f" [{','.join(sources)}]" if sources else ""
-        out.append(f"[Trace]{src_hint} {fname} → task-{tid} ({status}): {title}")
-
-        ctx_rel = meta.get("context_file", "")
-        if ctx_rel:
-            ctx_path = root / ".ultra" / "tasks" / ctx_rel
-            for ac in _extract_ac_bullets(ctx_path, max_lines=2):
-                out.append(f"    AC: {ac}")
-
-    return out
+    return out + pending
 
 
 # -- Output Formatting --
@@ -720,9 +969,355 @@ def _fmt_scope_reduction(file_path, warnings):
     return out
 
 
+# -- File Scan --
+
+MAX_SCAN_BYTES = 5_000_000
+SNIFF_BYTES = 8192
+
+
+def read_source(file_path):
+    """Return the raw bytes of a scannable file, or None.
+
+    None for missing files, files over MAX_SCAN_BYTES (regex scanning a huge
+    file risks OOM) and binaries: the first SNIFF_BYTES are checked for NUL
+    bytes and invalid UTF-8 before the rest of the file is read.
+    """
+    try:
+        if os.path.getsize(file_path) > MAX_SCAN_BYTES:
+            return None
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            if b'\x00' in head:
+                return None
+            try:
+                # final=False: a multi-byte char cut at the sniff boundary is fine
+                codecs.getincrementaldecoder('utf-8')().decode(head, final=len(head) < SNIFF_BYTES)
+            except UnicodeDecodeError:
+                return None
+            if len(head) < SNIFF_BYTES:
+                return head
+            f.seek(0)
+            return f.read(MAX_SCAN_BYTES + 1)
+    except OSError:
+        return None
+
+
+def _content_sections(file_path, ext, src):
+    """Advisory sections of the content checkers, in report order.
+
+    Returns (before_tdd, after_tdd, has_blocks): the code quality, mock,
+    security and scope sections, then the silent-catch section. These depend
+    only on the bytes and on the path classification, so scan_file can reuse
+    them from the shared cache.
+    """
+    before, after = [], []
+    has_blocks = False
+
+    # 1. Code quality (skip generated files including hook files)
+    if ext in CODE_QUALITY_EXT and not is_generated_file(file_path):
+        with _timed('code_quality'):
+            cq_blocks, cq_warnings = check_code_quality(file_path, src)
+        _record_findings('warning', file_path, cq_blocks)
+        before.append(_fmt_code_quality(file_path, cq_blocks, cq_warnings))
+        # v7: cq_blocks → advisory (was: has_blocks = True). Only SEC_CRITICAL still blocks.
+
+    # 2. Mock detector (test files only) — v7: advisory (was block)
+    if ext in MOCK_DETECTOR_EXT and is_test_file(file_path):
+        with _timed('mocks'):
+            mock_violations = check_mocks(file_path, src)
+        _record_findings('warning', file_path, mock_violations, message_key='pattern')
+        before.append(_fmt_mock_violations(file_path, mock_violations))
+        # v7: mocks → advisory; templates at .ultra/templates/testcontainer-*.{ts,py}
+
+    # 3. Security scan (skip hook files only) — v7: only IRREVERSIBLE patterns block
+    if ext in SECURITY_EXT and not is_hook_file(file_path):
+        with _timed('security'):
+            sec_critical, sec_recoverable, sec_high = check_security(file_path, src)
+        _record_findings('error', file_path, sec_critical)
+        _record_findings('warning', file_path, sec_recoverable)
+        before.append(_fmt_security(file_path, sec_critical, sec_recoverable, sec_high))
+        if sec_critical:
+            has_blocks = True
+
+    # 4. Scope reduction detection (source files only, warn not block)
+    if ext in CODE_QUALITY_EXT and not is_generated_file(file_path):
+        with _timed('scope_reduction'):
+            scope_warnings = check_scope_reduction(file_path, src)
+        _record_findings('warning', file_path, scope_warnings)
+        before.append(_fmt_scope_reduction(file_path, scope_warnings))
+
+    # 6. Silent catch detection — v7: advisory (was block)
+    if ext == '.py' and not is_hook_file(file_path):
+        with _timed('silent_catch'):
+            silent_violations = check_silent_catches(file_path, src)
+        _record_findings('warning', file_path, [
+            {'rule': 'SILENT_CATCH/0', 'line': ln, 'message': 'Silent exception handler', 'code': snippet}
+            for ln, snippet in silent_violations
+        ])
+        if silent_violations:
+            section = ["[SILENT-CATCH:ADVISORY] Silent exception handlers detected:"]
+            for line_num, snippet in silent_violations[:5]:
+                section.append(f"  L{line_num}: {snippet}")
+            section.append("  → Add logging or handle the error explicitly.")
+            after.append(section)
+            # v7: → advisory (was: has_blocks = True)
+
+    return before, after, has_blocks
+
+
+def _scan_cache_key(file_path, ext, content):
+    """Content address of _content_sections: the bytes, the basename (shown
+    in advisories), every path predicate a checker consults, and the rules."""
+    path_class = (is_test_file(file_path), is_config_file(file_path),
+                  is_generated_file(file_path), is_hook_file(file_path),
+                  is_example_or_docs(file_path))
+    return content_key(code_version(__file__), ext, os.path.basename(file_path),
+                       repr(path_class), content)
+
+
+def _cached_content_sections(file_path, ext, content):
+    """_content_sections via the worktree-shared cache (shared_cache.py).
+
+    Bypassed while profiling, which needs the checkers to actually run.
+    """
+    def compute():
+        return list(_content_sections(file_path, ext, SourceText(content)))
+
+    root = find_git_root(file_path) if cached is not None and _PROFILE is None else None
+    if root is None:
+        return compute()
+    try:
+        key = _scan_cache_key(file_path, ext, content)
+        return cached(root, 'scan', key, compute)
+    except Exception:
+        return compute()
+
+
+def scan_file(file_path, content=None):
+    """Run every content checker on one file.
+
+    content is the file's bytes (str is accepted and encoded); read from
+    disk when omitted. Returns (issues, has_blocks): formatted advisory
+    lines in report order, and whether any SEC_CRITICAL pattern matched.
+    Files that are not code or cannot be read yield ([], False).
+    Content-only results are shared across worktrees (_cached_content_sections);
+    the TDD pairing check looks at the tree and always runs.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in ALL_CODE_EXT:
+        return [], False
+    if content is None:
+        content = read_source(file_path)
+        if content is None:
+            return [], False
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    before, after, has_blocks = _cached_content_sections(file_path, ext, content)
+
+    # 5. TDD test file pairing (source files only, warn not block)
+    with _timed('tdd_pairing'):
+        tdd_warning = check_test_file_exists(file_path)
+    tdd = []
+    if tdd_warning:
+        _record_findings('note', file_path, [{'rule': 'TDD_PAIRING/0', 'line': 1, 'message': tdd_warning}])
+        tdd = [[tdd_warning]]
+
+    all_issues = []
+    for section in before + tdd + after:
+        if not section:
+            continue
+        if all_issues:
+            all_issues.append("")
+        all_issues.extend(section)
+    return all_issues, bool(has_blocks)
+
+
+# -- Subagent Batch Mode --
+#
+# Opt-in via ULTRA_SUBAGENT_BATCH_SCAN=1. When the edit comes from a subagent
+# (hook input carries agent_id) only the SEC_CRITICAL scan runs — secrets are
+# still blocked on the spot — and the path is appended to a per-agent ledger.
+# The SubagentStop hook (`post_edit_guard.py --subagent-stop`) scans every
+# recorded file in a process pool and returns ONE aggregated advisory to the
+# parent agent, instead of N per-edit advisories the parent never sees.
+
+BATCH_ENV = 'ULTRA_SUBAGENT_BATCH_SCAN'
+BATCH_MAX_WORKERS = 8
+BATCH_PARALLEL_MIN = 4      # below this, pool startup costs more than it saves
+BATCH_MAX_LINES = 60
+
+
+def batch_mode_enabled():
+    return os.environ.get(BATCH_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _batch_ledger_path(agent_id):
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', str(agent_id))[:80]
+    return os.path.join(tempfile.gettempdir(), f".claude_subagent_edits_{safe_id}")
+
+
+def record_batched_edit(agent_id, file_path):
+    ledger = _batch_ledger_path(agent_id)
+    try:
+        with open(ledger, 'a', encoding='utf-8') as f:
+            f.write(file_path + '\n')
+        os.chmod(ledger, 0o600)
+    except OSError:
+        pass
+
+
+def pop_batched_edits(agent_id):
+    """Return the de-duplicated paths recorded for agent_id and clear the ledger.
+
+    The ledger is renamed before reading so an edit racing the stop lands in
+    a fresh ledger instead of being dropped with the old one.
+    """
+    ledger = _batch_ledger_path(agent_id)
+    claimed = f"{ledger}.{os.getpid()}"
+    try:
+        os.replace(ledger, claimed)
+    except OSError:
+        return []
+    try:
+        with open(claimed, encoding='utf-8') as f:
+            raw = [line.strip() for line in f]
+    except OSError:
+        raw = []
+    try:
+        os.unlink(claimed)
+    except OSError:
+        pass
+    return list(dict.fromkeys(p for p in raw if p))
+
+
+def scan_critical(file_path):
+    """SEC_CRITICAL-only scan for batch mode. Returns formatted [SEC:CRIT] lines."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in SECURITY_EXT or is_hook_file(file_path):
+        return []
+    content = read_source(file_path)
+    if content is None:
+        return []
+    critical, _recoverable, _high = check_security(file_path, SourceText(content))
+    return _fmt_security(file_path, critical, [], [])
+
+
+def _scan_worker(file_path):
+    try:
+        issues, has_blocks = scan_file(file_path)
+    except Exception:
+        issues, has_blocks = [], False
+    return file_path, issues, has_blocks
+
+
+def scan_files_parallel(paths):
+    """scan_file over many paths. Returns [(path, issues, has_blocks)] in input order.
+
+    Uses a process pool once the batch is big enough to amortize startup;
+    falls back to a serial scan if the pool cannot start (sandboxed /dev/shm,
+    spawn failures) so a batch is never silently dropped.
+    """
+    if len(paths) < BATCH_PARALLEL_MIN:
+        return [_scan_worker(p) for p in paths]
+    workers = min(BATCH_MAX_WORKERS, os.cpu_count() or 1, len(paths))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_scan_worker, paths))
+    except Exception:
+        return [_scan_worker(p) for p in paths]
+
+
+def format_batch_advisory(agent_type, results):
+    """One advisory for the parent agent covering every scanned file."""
+    flagged = [(path, issues) for path, issues, _ in results if issues]
+    if not flagged:
+        return ''
+    blocked = sum(1 for _, _, has_blocks in results if has_blocks)
+    header = (
+        f"[Batch Scan] subagent {agent_type or '?'} edited {len(results)} file(s); "
+        f"{len(flagged)} with advisories"
+    )
+    if blocked:
+        header += f", {blocked} with SEC:CRIT findings"
+    lines = [header + ':']
+    for path, issues in flagged:
+        try:
+            shown = os.path.relpath(path)
+        except ValueError:
+            shown = path
+        lines.append(f"  {shown}")
+        lines.extend(f"    {issue}" for issue in issues if issue)
+    if len(lines) > BATCH_MAX_LINES:
+        hidden = len(lines) - BATCH_MAX_LINES
+        lines = lines[:BATCH_MAX_LINES] + [f"  ... +{hidden} more lines"]
+    return "\n".join(lines)
+
+
+def handle_batched_edit(agent_id, file_path, session_id=''):
+    """PostToolUse inside a subagent in batch mode: block secrets, defer the rest."""
+    critical = scan_critical(file_path)
+    if critical:
+        message = "\n".join(critical)
+        try:
+            update_task_progress(file_path, advisories=critical, session_id=session_id)
+        except Exception:
+            pass
+        print(json.dumps({
+            "decision": "block",
+            "reason": message,
+            "hookSpecificOutput": {
+                "hookEventName": "PostToolUse",
+                "additionalContext": message,
+            },
+        }))
+        return
+    record_batched_edit(agent_id, file_path)
+    print(json.dumps({}))
+
+
+def main_subagent_stop():
+    """SubagentStop: scan everything the subagent edited, advise the parent once."""
+    try:
+        raw = sys.stdin.read()
+        hook_input = json.loads(raw) if raw.strip() else {}
+        if not isinstance(hook_input, dict):
+            hook_input = {}
+    except (json.JSONDecodeError, EOFError):
+        hook_input = {}
+
+    agent_id = hook_input.get('agent_id', '')
+    paths = pop_batched_edits(agent_id) if agent_id else []
+    if not paths:
+        print(json.dumps({}))
+        return
+
+    results = scan_files_parallel(paths)
+    for path, issues, _ in results:
+        try:
+            update_task_progress(path, advisories=[i for i in issues if i] or None,
+                                 session_id=hook_input.get('session_id', ''))
+        except Exception:
+            pass
+
+    advisory = format_batch_advisory(hook_input.get('agent_type', ''), results)
+    if not advisory:
+        print(json.dumps({}))
+        return
+    print(advisory, file=sys.stderr)
+    print(json.dumps({
+        "hookSpecificOutput": {
+            "hookEventName": "SubagentStop",
+            "additionalContext": advisory,
+        }
+    }))
+
+
 # -- Main --
 
 def main():
+    global _DEADLINE
+    _DEADLINE = time.monotonic() + HOOK_BUDGET_S
     try:
         input_data = sys.stdin.read()
         hook_input = json.loads(input_data)
@@ -745,6 +1340,9 @@ def main():
     file_path = tool_input.get('file_path', '')
     ext = os.path.splitext(file_path)[1].lower()
 
+    # Per-session edit ledger for the Stop / PreCompact hooks (session_ledger.py)
+    record_edit(hook_input.get('session_id', ''), file_path)
+
     if ext not in ALL_CODE_EXT:
         print(json.dumps({}))
         return
@@ -753,108 +1351,65 @@ def main():
         print(json.dumps({}))
         return
 
-    # Skip very large files to avoid OOM on regex scanning
-    try:
-        if os.path.getsize(file_path) > 5_000_000:
-            print(json.dumps({}))
-            return
-    except OSError:
-        pass
+    agent_id = hook_input.get('agent_id')
+    if agent_id and batch_mode_enabled():
+        handle_batched_edit(agent_id, file_path, hook_input.get('session_id', ''))
+        return
 
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except Exception:
+    content = read_source(file_path)
+    if content is None:
         print(json.dumps({}))
         return
 
-    lines = content.split('\n')
-    all_issues = []
-    has_blocks = False
-
-    # 1. Code quality (skip generated files including hook files)
-    if ext in CODE_QUALITY_EXT and not is_generated_file(file_path):
-        cq_blocks, cq_warnings = check_code_quality(file_path, content, lines)
-        section = _fmt_code_quality(file_path, cq_blocks, cq_warnings)
-        if section:
-            all_issues.extend(section)
-        # v7: cq_blocks → advisory (was: has_blocks = True). Only SEC_CRITICAL still blocks.
+    global _PROFILE
+    fmt = profile_format()
+    if fmt and GuardProfile is not None:
+        _PROFILE = GuardProfile(fmt, hook_input.get('session_id', ''))
 
-    # 2. Mock detector (test files only) — v7: advisory (was block)
-    if ext in MOCK_DETECTOR_EXT and is_test_file(file_path):
-        mock_violations = check_mocks(file_path, content, lines)
-        section = _fmt_mock_violations(file_path, mock_violations)
-        if section:
-            if all_issues:
-                all_issues.append("")
-            all_issues.extend(section)
-            # v7: mocks → advisory; templates at .ultra/templates/testcontainer-*.{ts,py}
-
-    # 3. Security scan (skip hook files only) — v7: only IRREVERSIBLE patterns block
-    if ext in SECURITY_EXT and not is_hook_file(file_path):
-        sec_critical, sec_recoverable, sec_high = check_security(file_path, content, lines)
-        section = _fmt_security(file_path, sec_critical, sec_recoverable, sec_high)
-        if section:
-            if all_issues:
-                all_issues.append("")
-            all_issues.extend(section)
-        if sec_critical:
-            has_blocks = True
-
-    # 4. Scope reduction detection (source files only, warn not block)
-    if ext in CODE_QUALITY_EXT and not is_generated_file(file_path):
-        scope_warnings = check_scope_reduction(file_path, content, lines)
-        scope_section = _fmt_scope_reduction(file_path, scope_warnings)
-        if scope_section:
-            if all_issues:
-                all_issues.append("")
-            all_issues.extend(scope_section)
-
-    # 5. TDD test file pairing (source files only, warn not block)
-    tdd_warning = check_test_file_exists(file_path)
-    if tdd_warning:
-        if all_issues:
-            all_issues.append("")
-        all_issues.append(tdd_warning)
-
-    # 6. Silent catch detection — v7: advisory (was block)
-    if ext == '.py' and not is_hook_file(file_path):
-        silent_violations = check_silent_catches(file_path, content, lines)
-        if silent_violations:
-            if all_issues:
-                all_issues.append("")
-            all_issues.append("[SILENT-CATCH:ADVISORY] Silent exception handlers detected:")
-            for line_num, snippet in silent_violations[:5]:
-                all_issues.append(f"  L{line_num}: {snippet}")
-            all_issues.append("  → Add logging or handle the error explicitly.")
-            # v7: → advisory (was: has_blocks = True)
+    all_issues, has_blocks = scan_file(file_path, content)
 
     # 7. Task trace (info via stderr, never blocks) — file → owning task + AC
-    trace_lines = check_task_trace(file_path)
+    with _timed('task_trace'):
+        trace_lines = check_task_trace(file_path)
     if trace_lines:
         for line in trace_lines:
             print(line, file=sys.stderr)
 
     # 8. Blast radius (info via stderr, never blocks)
-    dependents = check_blast_radius(file_path)
+    with _timed('blast_radius'):
+        dependents, transitive, complete = check_blast_radius(file_path)
     if dependents:
         short = os.path.basename(file_path)
         dep_list = ", ".join(dependents[:8])
         extra = f" +{len(dependents)-8} more" if len(dependents) > 8 else ""
-        print(f"[Impact] {short} is imported by: {dep_list}{extra}", file=sys.stderr)
+        fan_in = f"fan-in {len(dependents)} direct, {transitive} transitive"
+        if not complete:
+            fan_in += ", graph warming"
+        print(f"[Impact] {short} is imported by: {dep_list}{extra} ({fan_in})", file=sys.stderr)
+
+    # 9. Test reminder (info via stderr, never blocks) — tests covering the
+    #    edited lines when per-test coverage exists, else name-paired tests
+    with _timed('test_reminder'):
+        covering = check_covering_tests(
+            file_path, tool_input, hook_input.get('tool_response'), content
+        )
+        test_files = None if covering else check_test_reminder(file_path)
+    if covering:
+        print(covering, file=sys.stderr)
+    elif test_files:
+        print(format_test_reminder(test_files), file=sys.stderr)
 
-    # 9. Test reminder (info via stderr, never blocks)
-    test_file = check_test_reminder(file_path)
-    if test_file:
-        rel_test = os.path.relpath(test_file)
-        print(f"[Test] Run: pytest {rel_test}", file=sys.stderr)
+    if _PROFILE is not None:
+        toplevel = get_git_toplevel()
+        _PROFILE.flush(get_log_dir(toplevel), file_path, toplevel)
 
     if all_issues:
         warning_message = "\n".join(all_issues)
 
         # v7 Incremental Validation: persist advisories to progress.json
         try:
-            update_task_progress(file_path, advisories=all_issues)
+            update_task_progress(file_path, advisories=all_issues,
+                                 session_id=hook_input.get('session_id', ''))
         except Exception:
             pass
 
@@ -878,11 +1433,16 @@ def main():
     else:
         # v7: still record file touch even when no advisories
         try:
-            update_task_progress(file_path)
+            update_task_progress(file_path, session_id=hook_input.get('session_id', ''))
         except Exception:
             pass
         print(json.dumps({}))
 
 
 if __name__ == '__main__':
-    main()
+    if '--subagent-stop' in sys.argv[1:]:
+        main_subagent_stop()
+    elif '--profile-report' in sys.argv[1:]:
+        sys.exit(main_report(sys.argv[1:], get_git_toplevel()))
+    else:
+        main()
@@ -17,7 +17,13 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from hook_utils import get_snapshot_path, get_workflow_state, run_git
+from atomic_io import atomic_write_text
+from hook_utils import find_git_root, get_snapshot_path, get_workflow_state, run_git
+try:
+    from session_ledger import format_short, session_status
+except Exception:  # pragma: no cover — fall back to a full git status
+    def session_status(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
 
 GIT_TIMEOUT = 3
 COMPACT_MARKER = f".claude_compact_ts_{os.getuid()}"
@@ -58,12 +64,21 @@ def get_active_subagents() -> list:
         return []
 
 
-def get_git_context():
-    """Get git state: branch, recent commits, modified files."""
+def get_git_context(session_id=""):
+    """Get git state: branch, recent commits, modified files.
+
+    Modified files are this session's (session_ledger.py) when it has an
+    edit ledger; otherwise the whole tree's `git status --short`.
+    """
     ctx = {}
     ctx["branch"] = run_git("branch", "--show-current")
     ctx["log"] = run_git("log", "--oneline", "-5")
-    ctx["status"] = run_git("status", "--short")
+    root = find_git_root(os.getcwd())
+    entries = session_status(root, session_id) if root is not None else None
+    if entries is not None:
+        ctx["status"] = format_short(entries)
+    else:
+        ctx["status"] = run_git("status", "--short")
     ctx["staged"] = run_git("diff", "--stat", "--cached")
     return {k: v for k, v in ctx.items() if v}
 
@@ -227,7 +242,7 @@ def main():
     timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
     snapshot_path = get_snapshot_path()
 
-    git_ctx = get_git_context()
+    git_ctx = get_git_context(hook_data.get("session_id", ""))
     ultra_tasks = get_task_context()
     native_tasks = get_native_tasks()
 
@@ -237,7 +252,7 @@ def main():
         snapshot += f"\n## Custom Instructions\n{custom_instructions}\n"
     try:
         snapshot_path.parent.mkdir(parents=True, exist_ok=True)
-        snapshot_path.write_text(snapshot, encoding="utf-8")
+        atomic_write_text(snapshot_path, snapshot)
     except OSError as e:
         print(f"[pre_compact] Failed to write snapshot: {e}", file=sys.stderr)
 
@@ -20,7 +20,14 @@ import sys
 import json
 import subprocess
 import os
+from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+try:
+    from session_ledger import session_status
+except Exception:  # pragma: no cover — never block hook on import error
+    def session_status(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
 
 GIT_TIMEOUT = 3
 
@@ -50,16 +57,27 @@ If ANY check fails → continue working. Stop ONLY when everything is verifiably
 """.strip()
 
 
-def get_changed_source_files() -> list[str]:
-    """Return source files with staged or unstaged changes."""
+def _is_changed_source(status: str, filepath: str) -> bool:
+    if status[0] in 'MADRC' or status[1] in 'MD':
+        return os.path.splitext(filepath)[1].lower() in SOURCE_EXTENSIONS
+    return False
+
+
+def get_changed_source_files(session_id: str = '') -> list[str]:
+    """Return source files with staged or unstaged changes.
+
+    Limited to the files this session edited when it has an edit ledger
+    (session_ledger.py) — no full-tree status, no other sessions' files.
+    """
     try:
-        proc = subprocess.run(
-            ['git', 'rev-parse', '--is-inside-work-tree'],
-            capture_output=True, text=True, timeout=GIT_TIMEOUT
-        )
-        if proc.returncode != 0:
+        toplevel = get_git_toplevel()
+        if not toplevel:
             return []
 
+        entries = session_status(toplevel, session_id)
+        if entries is not None:
+            return [path for status, path in entries if _is_changed_source(status, path)]
+
         proc = subprocess.run(
             ['git', 'status', '--porcelain'],
             capture_output=True, text=True, timeout=GIT_TIMEOUT
@@ -73,10 +91,8 @@ def get_changed_source_files() -> list[str]:
                 continue
             status = line[:2]
             filepath = line[3:]
-            if status[0] in 'MADRC' or status[1] in 'MD':
-                ext = os.path.splitext(filepath)[1].lower()
-                if ext in SOURCE_EXTENSIONS:
-                    files.append(filepath)
+            if _is_changed_source(status, filepath):
+                files.append(filepath)
         return files
 
     except (subprocess.TimeoutExpired, Exception):
@@ -144,7 +160,7 @@ def main():
     advisories = []
 
     # Layer 1: Source files changed → advisory (was: block)
-    source_files = get_changed_source_files()
+    source_files = get_changed_source_files(hook_data.get("session_id", ""))
     if source_files:
         lines = [f"[Pre-Stop Advisory] {len(source_files)} source file(s) changed but not reviewed:"]
         for f in source_files[:8]:
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Progress Journal — append-only task progress with compacted snapshots.
+
+update_task_progress used to read, mutate and rewrite all of
+progress/task-<id>.json (indent=2) on every Edit: O(file) per edit, an O(n)
+`files_touched` membership scan, and concurrent writers (post_edit_guard,
+subagent_verify) silently dropping each other's updates. Advisories were
+truncated to the last 50, so the history was gone.
+
+Storage (.ultra/tasks/progress/):
+  task-<id>.jsonl   append-only event log, one JSON object per line:
+                      {"at": iso, "file": rel, "adv": [msg, ...],
+                       "score": {dimension: 0-100}}   (all but "at" optional)
+                    Each update is one O_APPEND write — O(1), and concurrent
+                    writers never lose each other's events.
+  task-<id>.json    materialized snapshot in the existing progress.json shape
+                    (evidence_score, files_touched, last MAX_ADVISORIES_PER_TASK
+                    advisories, last_updated) plus `advisories_total` and
+                    `journal_offset` — the journal bytes already folded in.
+                    Readers that parse it directly keep working.
+
+Compaction folds the journal tail (bytes past journal_offset) into the
+snapshot and replaces it atomically. It runs when an append crosses a
+COMPACT_BYTES boundary and whenever load_progress() finds a tail, so
+snapshots are never far behind. The snapshot's mtime is set to the journal
+mtime it has seen: a journal at least as new as its snapshot may have a
+tail, an older one cannot, so has_tail() only reads the snapshot then.
+
+The journal is never truncated; it is the complete advisory history:
+  python3 hooks/progress_journal.py <task_id> [--advisories] [--root PATH]
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import atomic_write_text
+from hook_utils import EVIDENCE_DIMENSIONS, MAX_ADVISORIES_PER_TASK, get_git_toplevel
+
+COMPACT_BYTES = 16 * 1024
+MAX_MSG_CHARS = 240
+
+
+def progress_dir(root: Path) -> Path:
+    return Path(root) / ".ultra" / "tasks" / "progress"
+
+
+def snapshot_path(root: Path, task_id) -> Path:
+    return progress_dir(root) / f"task-{task_id}.json"
+
+
+def journal_path(root: Path, task_id) -> Path:
+    return progress_dir(root) / f"task-{task_id}.jsonl"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def new_progress(task_id) -> dict:
+    """Initial progress.json shape. evidence_score 0-100 per dimension."""
+    return {
+        "task_id": task_id,
+        "evidence_score": {dim: 0 for dim in EVIDENCE_DIMENSIONS},
+        "files_touched": [],
+        "advisories": [],
+        "advisories_total": 0,
+        "last_updated": _now(),
+        "journal_offset": 0,
+    }
+
+
+def _read_snapshot(root: Path, task_id, default=True):
+    """Snapshot dict with missing fields healed. Unreadable → new_progress(),
+    or None when default=False."""
+    try:
+        progress = json.loads(snapshot_path(root, task_id).read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        progress = None
+    if not isinstance(progress, dict):
+        return new_progress(task_id) if default else None
+    # Heal missing fields from older runs
+    progress.setdefault("task_id", task_id)
+    scores = progress.setdefault("evidence_score", {})
+    for dim in EVIDENCE_DIMENSIONS:
+        scores.setdefault(dim, 0)
+    progress.setdefault("files_touched", [])
+    progress.setdefault("advisories", [])
+    progress.setdefault("advisories_total", len(progress["advisories"]))
+    progress.setdefault("journal_offset", 0)
+    return progress
+
+
+def _read_tail(path: Path, offset: int):
+    """(complete lines past offset, new offset). Restarts at 0 if the journal
+    shrank (replaced or truncated); a torn last line is left for later."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < offset:
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    return data[:end].splitlines(), offset + end
+
+
+def _events(lines):
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(event, dict):
+            yield event
+
+
+def _apply(progress: dict, events, touched: set, keep_all: bool = False) -> None:
+    """Fold journal events into a snapshot dict (in place)."""
+    advisories = progress["advisories"]
+    for event in events:
+        at = event.get("at") or ""
+        rel = event.get("file")
+        if rel and rel not in touched:
+            touched.add(rel)
+            progress["files_touched"].append(rel)
+        for msg in event.get("adv") or ():
+            advisories.append({"at": at, "file": rel or "", "msg": str(msg)[:MAX_MSG_CHARS]})
+            progress["advisories_total"] += 1
+        for dim, value in (event.get("score") or {}).items():
+            progress["evidence_score"][dim] = value
+        if at:
+            progress["last_updated"] = at
+        if not keep_all and len(advisories) > 2 * MAX_ADVISORIES_PER_TASK:
+            del advisories[:-MAX_ADVISORIES_PER_TASK]
+    if not keep_all:
+        del advisories[:-MAX_ADVISORIES_PER_TASK]
+
+
+def append_event(root: Path, task_id, file: str = "", advisories=None, scores=None) -> bool:
+    """Append one progress event (O(1)); compacts when a COMPACT_BYTES boundary
+    is crossed. Best-effort: returns False on any I/O error."""
+    event: dict = {"at": _now()}
+    if file:
+        event["file"] = file
+    if advisories:
+        event["adv"] = [str(m)[:MAX_MSG_CHARS] for m in advisories if m]
+    if scores:
+        event["score"] = dict(scores)
+    line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+    path = journal_path(root, task_id)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            end = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+    except OSError:
+        return False
+    if end // COMPACT_BYTES != (end - len(line)) // COMPACT_BYTES:
+        compact(root, task_id)
+    return True
+
+
+def has_tail(root: Path, task_id) -> bool:
+    """True if the journal has events the snapshot has not folded in yet."""
+    try:
+        jst = journal_path(root, task_id).stat()
+    except OSError:
+        return False
+    try:
+        sst = snapshot_path(root, task_id).stat()
+    except OSError:
+        return jst.st_size > 0
+    if jst.st_mtime_ns < sst.st_mtime_ns:
+        return False
+    return _read_snapshot(root, task_id)["journal_offset"] != jst.st_size
+
+
+def _materialize(root: Path, task_id, full_history: bool = False):
+    """(snapshot + journal tail, journal mtime_ns seen or None)."""
+    progress = _read_snapshot(root, task_id)
+    path = journal_path(root, task_id)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return progress, None
+    offset = progress["journal_offset"]
+    lines, end = _read_tail(path, offset)
+    if end < offset:  # journal replaced or truncated: rebuild from it alone
+        progress = new_progress(task_id)
+    _apply(progress, _events(lines), set(progress["files_touched"]))
+    progress["journal_offset"] = end
+    if full_history:
+        everything = {"advisories": [], "advisories_total": 0, "files_touched": [],
+                      "evidence_score": {}}
+        _apply(everything, _events(_read_tail(path, 0)[0]), set(), keep_all=True)
+        if everything["advisories"]:
+            progress["advisories"] = everything["advisories"]
+    return progress, mtime_ns
+
+
+def compact(root: Path, task_id) -> bool:
+    """Fold the journal tail into the snapshot (atomic replace). Best-effort."""
+    progress, mtime_ns = _materialize(root, task_id)
+    if mtime_ns is None:
+        return False
+    try:
+        atomic_write_text(snapshot_path(root, task_id),
+                          json.dumps(progress, indent=2, ensure_ascii=False), mtime_ns=mtime_ns)
+    except OSError:
+        return False
+    return True
+
+
+def refresh(root: Path, task_id) -> bool:
+    """Compact if the journal has a tail. Returns True if it compacted."""
+    return has_tail(root, task_id) and compact(root, task_id)
+
+
+def load_progress(root: Path, task_id, full_history: bool = False):
+    """Current progress dict for a task, or None if it has none.
+
+    Shared loader for every reader of progress files. Folds (and persists)
+    any journal tail first. full_history=True returns every advisory ever
+    journaled instead of the last MAX_ADVISORIES_PER_TASK.
+    """
+    root = Path(root)
+    if not journal_path(root, task_id).exists():
+        return _read_snapshot(root, task_id, default=False)
+    if full_history:
+        return _materialize(root, task_id, full_history=True)[0]
+    refresh(root, task_id)
+    return _read_snapshot(root, task_id)
+
+
+def progress_task_ids(root: Path) -> set:
+    """Ids of tasks with a snapshot or a journal."""
+    ids = set()
+    try:
+        with os.scandir(progress_dir(root)) as it:
+            for entry in it:
+                name = entry.name
+                if not name.startswith("task-"):
+                    continue
+                for ext in (".json", ".jsonl"):
+                    if name.endswith(ext):
+                        ids.add(name[len("task-"):-len(ext)])
+    except OSError:
+        pass
+    return ids
+
+
+def main(argv: list) -> int:
+    args = list(argv)
+    root, task_id, advisories_only = "", "", False
+    while args:
+        arg = args.pop(0)
+        if arg == "--root" and args:
+            root = args.pop(0)
+        elif arg == "--advisories":
+            advisories_only = True
+        elif not task_id:
+            task_id = arg
+    root = root or get_git_toplevel()
+    progress = load_progress(Path(root), task_id, full_history=True) if root and task_id else None
+    if progress is None:
+        print("progress_journal: no progress for that task", file=sys.stderr)
+        print(json.dumps({}))
+        return 1
+    out = progress["advisories"] if advisories_only else progress
+    print(json.dumps(out, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Relations Index — indexed file → owning-task sidecar for relations.json.
+
+post_edit_guard's [Trace] line needs, for one edited path, the tasks that
+own it plus their title, status and first acceptance criteria. Reading that
+from relations.json means parsing the whole document (every tracked file)
+and then opening each owning task's context md. relations_sync writes this
+sidecar alongside relations.json, so the lookup is one primary-key read.
+
+Storage: .ultra/cache/relations.db (derived — safe to delete)
+  files(path, tasks, sources)              path PK; JSON arrays of task ids / sources
+  tasks(id, title, status, context_file, ac)  ac: JSON array of AC bullets
+  cold_files(path, tasks, sources)         cold tier (relations-archive.json.gz)
+  meta(key, value)                         version, stamp of relations.json
+
+The sidecar is trusted only while relations.json still has the
+(mtime_ns, size) recorded at write time; a hand edit or checkout of
+relations.json makes lookup_owners return None and callers fall back to
+parsing the JSON.
+
+Hot/cold tiering: entries owned only by long-completed tasks live in the gzip
+archive .ultra/relations-archive.json.gz rather than relations.json, and in
+cold_files here. lookup_owners reads cold_files only when files misses, and
+tags such results "tier": "cold".
+
+relations_pending() tells readers a debounced rebuild is queued
+(relations_sync.py coalesces burst writes), i.e. both relations.json and
+this sidecar may lag the latest .ultra edits.
+"""
+
+import gzip
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_utils import get_cache_dir
+
+DB_NAME = "relations.db"
+INDEX_VERSION = "2"
+PENDING_NAME = "relations-pending.json"
+ARCHIVE_NAME = "relations-archive.json.gz"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, tasks TEXT NOT NULL, sources TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cold_files (
+    path TEXT PRIMARY KEY, tasks TEXT NOT NULL, sources TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY, title TEXT, status TEXT, context_file TEXT, ac TEXT
+) WITHOUT ROWID;
+"""
+
+
+def relations_stamp(root: Path) -> str:
+    """'<mtime_ns>:<size>' of .ultra/relations.json, '' if missing."""
+    try:
+        st = (Path(root) / ".ultra" / "relations.json").stat()
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def relations_pending(root: Path) -> bool:
+    """True while relations_sync has a coalesced rebuild queued but not run."""
+    try:
+        return (Path(root) / ".ultra" / "cache" / PENDING_NAME).exists()
+    except OSError:
+        return False
+
+
+def load_cold_files(root: Path) -> dict:
+    """The cold files tier {path: entry} from the gzip archive, {} if none."""
+    try:
+        with gzip.open(Path(root) / ".ultra" / ARCHIVE_NAME, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+    except (OSError, EOFError, ValueError):
+        return {}
+    files = data.get("files") if isinstance(data, dict) else None
+    return files if isinstance(files, dict) else {}
+
+
+def _db_path(root: Path):
+    try:
+        return get_cache_dir(Path(root)) / DB_NAME
+    except OSError:
+        return None
+
+
+def _meta(conn, key: str) -> str:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else ""
+
+
+def is_current(root: Path) -> bool:
+    """True if the sidecar exists and matches relations.json on disk."""
+    path = _db_path(root)
+    if path is None or not path.exists():
+        return False
+    try:
+        conn = sqlite3.connect(str(path))
+        try:
+            return (_meta(conn, "version") == INDEX_VERSION
+                    and _meta(conn, "stamp") == relations_stamp(root) != "")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def _replace_rows(conn, table: str, entries: dict, paths) -> None:
+    if paths is None:
+        conn.execute(f"DELETE FROM {table}")
+        rows = entries.items()
+    else:
+        gone = [(p,) for p in paths if p not in entries]
+        conn.executemany(f"DELETE FROM {table} WHERE path = ?", gone)
+        rows = ((p, entries[p]) for p in paths if p in entries)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)",
+        ((p, json.dumps(e.get("tasks") or []), json.dumps(e.get("from") or []))
+         for p, e in rows),
+    )
+
+
+def write_index(root: Path, rel: dict, ac: dict, paths=None, cold=None) -> bool:
+    """Write the sidecar for `rel` (the relations.json document just written).
+
+    ac: {task_id: [AC bullets]}. paths: the files-index keys that changed
+    since the last write (in either tier), or None to replace the files
+    tables wholesale. cold: cold-tier entries among paths, or the whole cold
+    tier when paths is None (read from the archive if not given).
+    The tasks table is always replaced (one row per task). Never raises.
+    """
+    path = _db_path(root)
+    if path is None:
+        return False
+    files = rel.get("files") or {}
+    try:
+        conn = sqlite3.connect(str(path))
+        try:
+            conn.executescript(_SCHEMA)
+            if _meta(conn, "version") != INDEX_VERSION:
+                paths, cold = None, None
+            if paths is None and cold is None:
+                cold = load_cold_files(root)
+            with conn:
+                _replace_rows(conn, "files", files, paths)
+                _replace_rows(conn, "cold_files", cold or {}, paths)
+                conn.execute("DELETE FROM tasks")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)",
+                    ((tid, meta.get("title") or "", meta.get("status") or "",
+                      meta.get("context_file") or "", json.dumps(ac.get(tid) or []))
+                     for tid, meta in (rel.get("tasks") or {}).items()),
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("version", INDEX_VERSION), ("stamp", relations_stamp(root))],
+                )
+            return True
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError, TypeError, ValueError):
+        return False
+
+
+def lookup_owners(root: Path, rel_path: str, limit: int = 3):
+    """Owning tasks of rel_path from the sidecar.
+
+    Returns None when the sidecar is missing or stale (caller falls back to
+    relations.json), {} when the path has no owner, else
+    {"from": [...], "tasks": [{"id", "title", "status", "context_file", "ac"}]}
+    plus "tier": "cold" when the owner came from the cold tier.
+    """
+    path = _db_path(root)
+    if path is None or not path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            if (_meta(conn, "version") != INDEX_VERSION
+                    or _meta(conn, "stamp") != relations_stamp(root)):
+                return None
+            tier = "hot"
+            row = conn.execute(
+                "SELECT tasks, sources FROM files WHERE path = ?", (rel_path,)
+            ).fetchone()
+            if row is None:
+                tier = "cold"
+                row = conn.execute(
+                    "SELECT tasks, sources FROM cold_files WHERE path = ?", (rel_path,)
+                ).fetchone()
+            if row is None:
+                return {}
+            task_ids = json.loads(row[0])
+            owners = []
+            for tid in task_ids[:limit]:
+                t = conn.execute(
+                    "SELECT title, status, context_file, ac FROM tasks WHERE id = ?",
+                    (str(tid),),
+                ).fetchone()
+                title, status, ctx, ac = t if t else ("", "", "", "[]")
+                owners.append({"id": str(tid), "title": title, "status": status,
+                               "context_file": ctx, "ac": json.loads(ac)})
+            found = {"from": json.loads(row[1]), "tasks": owners}
+            if tier == "cold":
+                found["tier"] = "cold"
+            return found
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError, ValueError):
+        return None
@@ -11,6 +11,41 @@ Maintains:
                  task context md + files_touched in progress.json)
   - advisories: dangling trace_to references
 
+Incremental: .ultra/cache/relations-manifest.json records every source file
+(tasks.json, specs/*.md, task contexts, progress/task-*.json) with its
+mtime_ns, size and sha1 plus the facts parsed from it (anchors, Target
+Files, files_touched). A sync re-reads only sources whose stat changed and
+whose hash differs, then patches just the `files` entries of tasks whose
+contributions changed. Nothing changed → relations.json is not rewritten.
+
+Hot/cold tiering: files-index entries owned only by completed tasks with no
+activity for ULTRA_RELATIONS_COLD_DAYS (default 30; 0 disables) move from
+relations.json to the gzip archive .ultra/relations-archive.json.gz. Activity
+is the progress file's last_updated, else the context file's mtime. The hot
+index holds active, pending and recently completed work; readers consult the
+cold tier only when a hot lookup misses.
+
+Alongside relations.json it writes the indexed sidecar
+.ultra/cache/relations.db (relations_index.py): path → owning tasks with
+title, status and pre-extracted AC bullets, for post_edit_guard's [Trace].
+It then refreshes the BM25 knowledge index (ultra_search.py), if one has
+been built, so `ultra_search.py "query"` starts warm.
+
+Debounced: an edit after an idle period syncs at once (leading edge). Edits
+arriving while a sync ran recently or one is queued only record a dirty
+marker (.ultra/cache/relations-pending.json) and make sure a single-flight
+worker (`relations_sync.py --rebuild-worker`, fcntl lock) is running; it does
+one sync once writes go quiet, or when the oldest pending edit reaches the
+maximum staleness. So /ultra-plan writing 50 contexts costs a few syncs, not
+50. Windows (ms): ULTRA_RELATIONS_QUIET_MS (default 1500; 0 disables
+debouncing), ULTRA_RELATIONS_MAX_STALE_MS (default 10000).
+
+Watch mode: `relations_sync.py --watch [root]` stays running and syncs within
+a second of any change under .ultra/specs or .ultra/tasks (contexts,
+progress) that did not come through Edit/Write — git pull/checkout, manual
+edits, update_task_progress rewriting progress files. inotify on Linux,
+stat polling elsewhere (fs_watch.py); one watcher per project.
+
 Sensor only — never blocks. Reverse code→task index lets PreToolUse hooks
 inject "this file is owned by task X, AC: ..." when an agent edits source.
 
@@ -18,53 +53,73 @@ PHILOSOPHY: enables C4 (Incremental Validation) for the `spec_trace` evidence
 dimension, and supports Cognitive Coherence (specs/tasks/code/docs aligned).
 """
 
+import gzip
+import hashlib
 import json
+import os
 import re
+import subprocess
 import sys
+import time
+from collections import namedtuple
 from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from hook_utils import get_git_toplevel
+from atomic_io import atomic_write_bytes, atomic_write_text
+from hook_utils import extract_ac_bullets, get_cache_dir, get_git_toplevel, slugify_heading
 
 try:
     from wiki_generator import generate_wiki
 except Exception:  # pragma: no cover — never block hook on import error
     def generate_wiki(_root: Path) -> bool:  # type: ignore[no-redef]
         return False
+try:
+    import fcntl
+except ImportError:  # pragma: no cover — non-POSIX: no debouncing
+    fcntl = None
+try:
+    from ultra_search import update_index as update_search_index
+except Exception:  # pragma: no cover — never block hook on import error
+    def update_search_index(*_args, **_kwargs) -> int:  # type: ignore[no-redef]
+        return -1
+try:
+    from task_binding import observe as observe_task_bindings
+except Exception:  # pragma: no cover — never block hook on import error
+    observe_task_bindings = None
+try:
+    from progress_journal import refresh as refresh_progress
+except Exception:  # pragma: no cover — fall back to the snapshot files
+    refresh_progress = None
+try:
+    from relations_index import ARCHIVE_NAME, PENDING_NAME, is_current, load_cold_files, write_index
+except Exception:  # pragma: no cover — never block hook on import error
+    ARCHIVE_NAME = "relations-archive.json.gz"
+    PENDING_NAME = "relations-pending.json"
+    def load_cold_files(_root: Path) -> dict:  # type: ignore[no-redef]
+        return {}
+    def is_current(_root: Path) -> bool:  # type: ignore[no-redef]
+        return True
+    def write_index(*_args, **_kwargs) -> bool:  # type: ignore[no-redef]
+        return False
 
 
-def _slugify(heading: str) -> str:
-    """Convert '## Foo Bar (Baz)' to 'foo-bar-baz' (GitHub-flavored anchor)."""
-    cleaned = heading.lstrip("#").strip().lower()
-    cleaned = re.sub(r"[^\w\s-]", "", cleaned)
-    return re.sub(r"[\s_]+", "-", cleaned).strip("-")
-
-
-def index_spec_anchors(specs_dir: Path) -> dict:
-    """Walk .ultra/specs/*.md, index every heading as an anchor."""
+def spec_anchors_from_text(content: str, rel: str, file_rel: str) -> dict:
+    """Anchors of one spec file's text. rel is 'specs/x.md', file_rel '.ultra/specs/x.md'."""
     anchors: dict = {}
-    if not specs_dir.exists():
-        return anchors
-    for md in sorted(specs_dir.glob("*.md")):
-        try:
-            content = md.read_text(encoding="utf-8")
-        except OSError:
+    in_code_fence = False
+    for line in content.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code_fence = not in_code_fence
             continue
-        rel = f"specs/{md.name}"
-        in_code_fence = False
-        for line in content.split("\n"):
-            stripped = line.strip()
-            if stripped.startswith("```"):
-                in_code_fence = not in_code_fence
-                continue
-            if in_code_fence:
-                continue
-            if stripped.startswith("#"):
-                anchor = _slugify(stripped)
-                if anchor:
-                    key = f"{rel}#{anchor}"
-                    anchors.setdefault(key, {"file": str(md.relative_to(specs_dir.parent.parent)), "heading": stripped})
+        if in_code_fence:
+            continue
+        if stripped.startswith("#"):
+            anchor = slugify_heading(stripped)
+            if anchor:
+                key = f"{rel}#{anchor}"
+                anchors.setdefault(key, {"file": file_rel, "heading": stripped})
     return anchors
 
 
@@ -88,7 +143,11 @@ def parse_target_files(context_path: Path) -> list:
         text = context_path.read_text(encoding="utf-8")
     except OSError:
         return []
+    return parse_target_text(text)
+
 
+def parse_target_text(text: str) -> list:
+    """parse_target_files on already-read context text."""
     files: list = []
     in_section = False
     for raw in text.split("\n"):
@@ -108,19 +167,19 @@ def parse_target_files(context_path: Path) -> list:
     return files
 
 
-def index_files_to_tasks(tasks_data: dict, root: Path) -> dict:
-    """Build code→task reverse index.
+def _norm_path(rel_path: str) -> str:
+    return (rel_path or "").strip().lstrip("./")
+
 
-    Sources:
-      - Target Files in each task's context md (plan-stage intent)
-      - files_touched in progress.json (actual edit footprint)
+def files_index_from_contrib(contrib: dict) -> dict:
+    """Reverse index from per-task contributions {tid: [target_files, files_touched, ...]}.
 
-    Paths normalized to repo-relative form. Returns dict keyed by path.
+    Iterates tasks in contrib order (tasks.json order), so task lists come
+    out in the same order as a patch built entry by entry with files_entry.
     """
     files_index: dict = {}
 
-    def add(rel_path: str, task_id: str, source: str) -> None:
-        rel = (rel_path or "").strip().lstrip("./")
+    def add(rel: str, task_id: str, source: str) -> None:
         if not rel:
             return
         entry = files_index.setdefault(rel, {"tasks": [], "from": []})
@@ -129,69 +188,325 @@ def index_files_to_tasks(tasks_data: dict, root: Path) -> dict:
         if source not in entry["from"]:
             entry["from"].append(source)
 
-    for task in tasks_data.get("tasks", []) or []:
-        tid = task.get("id")
-        if tid is None or tid == "":
+    for tid, (targets, touched, *_tier) in contrib.items():
+        for fp in targets:
+            add(fp, tid, "target_files")
+        for fp in touched:
+            add(fp, tid, "files_touched")
+    return files_index
+
+
+def files_entry(rel: str, contrib: dict):
+    """The files-index entry for one path, or None if no task claims it."""
+    tasks: list = []
+    sources: list = []
+    for tid, (targets, touched, *_tier) in contrib.items():
+        for fps, source in ((targets, "target_files"), (touched, "files_touched")):
+            if rel in fps:
+                if tid not in tasks:
+                    tasks.append(tid)
+                if source not in sources:
+                    sources.append(source)
+    return {"tasks": tasks, "from": sources} if tasks else None
+
+
+# -- Incremental sync (source manifest) --
+
+MANIFEST_NAME = "relations-manifest.json"
+MANIFEST_VERSION = 3
+AC_BULLETS = 2
+# Files modified this close to the last manifest write are re-hashed even when
+# (mtime, size) match — guards against coarse filesystem timestamp granularity.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class SourceManifest:
+    """(mtime_ns, size, sha1) + parsed facts per .ultra source file."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.sources: dict = {}
+        self.contrib: dict = {}
+        self.written_ns = 0
+        self.changed = False
+        self.seen: set = set()
+        try:
+            self.path = get_cache_dir(root) / MANIFEST_NAME
+        except OSError:
+            self.path = None
+        self.valid = self._load()
+
+    def _load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return False
+        if data.get("version") != MANIFEST_VERSION:
+            return False
+        self.sources = data.get("sources") or {}
+        self.contrib = data.get("contrib") or {}
+        self.written_ns = data.get("written_ns") or 0
+        return True
+
+    def save(self, contrib: dict) -> None:
+        if self.path is None:
+            return
+        try:
+            atomic_write_text(self.path, json.dumps({
+                "version": MANIFEST_VERSION,
+                "written_ns": time.time_ns(),
+                "sources": self.sources,
+                "contrib": contrib,
+            }, ensure_ascii=False))
+        except OSError:
+            pass
+
+    def facts(self, rel: str, path: Path, parse):
+        """Parsed facts for one source, re-reading it only if it changed.
+
+        parse(text) → facts. Returns None for a missing file.
+        """
+        self.seen.add(rel)
+        entry = self.sources.get(rel)
+        try:
+            st = path.stat()
+        except OSError:
+            if entry is not None:
+                del self.sources[rel]
+                self.changed = True
+            return None
+        sig = [st.st_mtime_ns, st.st_size]
+        racy = st.st_mtime_ns >= self.written_ns - RACY_WINDOW_NS
+        if entry is not None and entry.get("stat") == sig and not racy:
+            return entry.get("facts")
+        try:
+            raw = path.read_bytes()
+        except OSError:
+            return entry.get("facts") if entry else None
+        sha = hashlib.sha1(raw).hexdigest()
+        if entry is not None and entry.get("sha1") == sha:
+            entry["stat"] = sig
+            return entry.get("facts")
+        facts = parse(raw.decode("utf-8", errors="replace"))
+        self.sources[rel] = {"stat": sig, "sha1": sha, "facts": facts}
+        self.changed = True
+        return facts
+
+    def mtime_ns(self, rel: str) -> int:
+        entry = self.sources.get(rel)
+        return entry["stat"][0] if entry else 0
+
+    def prune(self) -> None:
+        """Drop sources not visited this sync (deleted specs, removed tasks)."""
+        for rel in [r for r in self.sources if r not in self.seen]:
+            del self.sources[rel]
+            self.changed = True
+
+
+def _tasks_facts(text: str):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    out = []
+    for task in data.get("tasks", []) or []:
+        if not isinstance(task, dict):
             continue
-        tid = str(tid)
+        out.append({k: task.get(k) for k in ("id", "title", "status", "trace_to", "context_file")})
+    return out
 
-        ctx_rel = task.get("context_file", "")
-        if ctx_rel:
-            ctx_path = root / ".ultra" / "tasks" / ctx_rel
-            for fp in parse_target_files(ctx_path):
-                add(fp, tid, "target_files")
 
-        progress_path = root / ".ultra" / "tasks" / "progress" / f"task-{tid}.json"
-        if progress_path.exists():
-            try:
-                progress = json.loads(progress_path.read_text(encoding="utf-8"))
-                for fp in progress.get("files_touched", []) or []:
-                    add(fp, tid, "files_touched")
-            except (json.JSONDecodeError, OSError):
-                pass
+def _context_facts(text: str) -> dict:
+    return {
+        "targets": [_norm_path(fp) for fp in parse_target_text(text)],
+        "ac": extract_ac_bullets(text, AC_BULLETS),
+    }
 
-    return files_index
 
+def _progress_facts(text: str) -> dict:
+    try:
+        progress = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(progress, dict):
+        return {}
+    return {
+        "touched": [_norm_path(fp) for fp in progress.get("files_touched", []) or []],
+        "last": str(progress.get("last_updated") or ""),
+    }
 
-def main() -> None:
+
+def cold_days() -> float:
     try:
-        data = json.loads(sys.stdin.read())
-    except Exception:
-        print(json.dumps({}))
-        return
+        return max(0.0, float(os.environ.get("ULTRA_RELATIONS_COLD_DAYS", "30")))
+    except ValueError:
+        return 30.0
 
-    tool_input = data.get("tool_input", {})
-    file_path = tool_input.get("file_path", "") or ""
 
-    relevant = (
-        "/.ultra/specs/" in file_path
-        or file_path.endswith("/.ultra/tasks/tasks.json")
-        or "/.ultra/tasks/" in file_path
-    )
-    if not relevant:
-        print(json.dumps({}))
-        return
+def is_cold(status: str, last_iso: str, fallback_mtime_ns: int, now: float, days: float) -> bool:
+    """Completed and idle for more than `days` (last_iso, else file mtime)."""
+    if not days or status != "completed":
+        return False
+    ts = None
+    if last_iso:
+        try:
+            dt = datetime.fromisoformat(last_iso.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            ts = dt.timestamp()
+        except ValueError:
+            ts = None
+    if ts is None and fallback_mtime_ns:
+        ts = fallback_mtime_ns / 1e9
+    return ts is not None and now - ts > days * 86400
 
-    toplevel = get_git_toplevel()
-    if not toplevel:
-        print(json.dumps({}))
-        return
-    root = Path(toplevel)
 
-    tasks_path = root / ".ultra" / "tasks" / "tasks.json"
-    if not tasks_path.exists():
-        print(json.dumps({}))
-        return
+def _entry_is_cold(entry: dict, contrib: dict) -> bool:
+    return all(len(contrib.get(t, ())) > 2 and contrib[t][2] for t in entry["tasks"])
+
 
+def _write_archive(root: Path, cold: dict) -> None:
+    """gzip JSON of the cold files tier; removed when empty."""
+    path = root / ".ultra" / ARCHIVE_NAME
     try:
-        tasks_data = json.loads(tasks_path.read_text(encoding="utf-8"))
+        if not cold:
+            if path.exists():
+                path.unlink()
+            return
+        atomic_write_bytes(path, gzip.compress(json.dumps(
+            {"version": 1, "files": cold}, ensure_ascii=False, sort_keys=True,
+        ).encode("utf-8"), mtime=0))
+    except OSError:
+        pass
+
+
+def _load_relations(path: Path):
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
     except (json.JSONDecodeError, OSError):
-        print(json.dumps({}))
-        return
+        return None
+    return data if isinstance(data, dict) and isinstance(data.get("files"), dict) else None
+
+
+Synced = namedtuple("Synced", "rel changed paths ac cold")
+
+
+def sync_relations(root: Path):
+    """Incrementally derive relations.json content.
+
+    Returns Synced(rel, changed, paths, ac, cold), or None when tasks.json
+    is missing/unparseable. changed is False when no source changed since the
+    last sync and the existing relations.json can stand as is. paths is the
+    set of files-index keys patched in either tier (None after a full
+    rebuild); ac maps task id → first AC bullets of its context file; cold
+    holds the cold-tier entries — all of them after a full rebuild, else
+    those among paths.
+    """
+    ultra = root / ".ultra"
+    manifest = SourceManifest(root)
+    tasks = manifest.facts("tasks/tasks.json", ultra / "tasks" / "tasks.json", _tasks_facts)
+    if tasks is None:
+        return None
+
+    spec_anchors: dict = {}
+    specs_dir = ultra / "specs"
+    if specs_dir.exists():
+        for md in sorted(specs_dir.glob("*.md")):
+            rel_md = f"specs/{md.name}"
+            file_rel = str(md.relative_to(root))
+            anchors = manifest.facts(
+                rel_md, md, lambda text, r=rel_md, f=file_rel: spec_anchors_from_text(text, r, f)
+            ) or {}
+            for key, meta in anchors.items():
+                spec_anchors.setdefault(key, meta)
+
+    contrib: dict = {}
+    ac: dict = {}
+    now, days = time.time(), cold_days()
+    for task in tasks:
+        tid = task.get("id")
+        if tid is None or tid == "":
+            continue
+        tid = str(tid)
+        targets: list = []
+        ctx_rel = task.get("context_file") or ""
+        if ctx_rel:
+            ctx = manifest.facts(
+                f"tasks/{ctx_rel}", ultra / "tasks" / ctx_rel, _context_facts
+            ) or {}
+            targets = ctx.get("targets") or []
+            ac.setdefault(tid, ctx.get("ac") or [])
+        if refresh_progress is not None:
+            refresh_progress(root, tid)  # fold journal tail into the snapshot
+        progress = manifest.facts(
+            f"tasks/progress/task-{tid}.json",
+            ultra / "tasks" / "progress" / f"task-{tid}.json",
+            _progress_facts,
+        ) or {}
+        cold = is_cold(task.get("status") or "", progress.get("last", ""),
+                       manifest.mtime_ns(f"tasks/{ctx_rel}") if ctx_rel else 0, now, days)
+        contrib.setdefault(tid, [[], [], cold])
+        contrib[tid][0].extend(targets)
+        contrib[tid][1].extend(progress.get("touched") or [])
+    manifest.prune()
+
+    out_path = ultra / "relations.json"
+    previous = _load_relations(out_path) if manifest.valid else None
+    if previous is not None and not manifest.changed and contrib == manifest.contrib:
+        manifest.save(contrib)  # refresh racy-window stamps
+        return Synced(previous, False, None, ac, None)
+
+    affected = None
+    archive_lost = any(c[2] for c in manifest.contrib.values() if len(c) > 2) \
+        and not (ultra / ARCHIVE_NAME).exists()
+    if previous is None or archive_lost or list(contrib) != list(manifest.contrib):
+        files_index, cold_files = {}, {}
+        for path, entry in files_index_from_contrib(contrib).items():
+            (cold_files if _entry_is_cold(entry, contrib) else files_index)[path] = entry
+        _write_archive(root, cold_files)
+    else:
+        # Patch: only paths claimed or released by tasks whose contribution
+        # (files or tier) changed
+        files_index = previous["files"]
+        affected = set()
+        for tid, new in contrib.items():
+            old = manifest.contrib.get(tid)
+            if old != new:
+                affected.update(new[0], new[1])
+                if old:
+                    affected.update(old[0], old[1])
+        affected.discard("")
+        archive = load_cold_files(root) if affected else {}
+        cold_files = {}
+        archive_changed = False
+        for rel in affected:
+            entry = files_entry(rel, contrib)
+            was = archive.pop(rel, None)
+            was_cold = was is not None
+            files_index.pop(rel, None)
+            if entry is None:
+                archive_changed = archive_changed or was_cold
+            elif _entry_is_cold(entry, contrib):
+                cold_files[rel] = entry
+                archive_changed = archive_changed or was != entry
+            else:
+                files_index[rel] = entry
+                archive_changed = archive_changed or was_cold
+        if archive_changed:
+            archive.update(cold_files)
+            _write_archive(root, archive)
+
+    rel = build_relations(tasks, spec_anchors, files_index)
+    manifest.save(contrib)
+    return Synced(rel, True, affected, ac, cold_files)
 
-    spec_anchors = index_spec_anchors(root / ".ultra" / "specs")
-    files_index = index_files_to_tasks(tasks_data, root)
 
+def build_relations(tasks: list, spec_anchors: dict, files_index: dict) -> dict:
+    """Assemble relations.json (v2) from task facts, spec anchors and the files index."""
     rel = {
         "version": 2,
         "last_synced": datetime.now(timezone.utc).isoformat(),
@@ -202,7 +517,7 @@ def main() -> None:
         "advisories": [],
     }
 
-    for task in tasks_data.get("tasks", []) or []:
+    for task in tasks:
         tid = task.get("id")
         if not tid:
             continue
@@ -211,10 +526,10 @@ def main() -> None:
             raw_trace = [raw_trace]
         trace_to = [normalize_ref(r) for r in raw_trace]
         rel["tasks"][str(tid)] = {
-            "title": task.get("title", ""),
-            "status": task.get("status", ""),
+            "title": task.get("title") or "",
+            "status": task.get("status") or "",
             "trace_to": trace_to,
-            "context_file": task.get("context_file", ""),
+            "context_file": task.get("context_file") or "",
         }
         for ref in trace_to:
             if ref in rel["specs"]:
@@ -225,15 +540,27 @@ def main() -> None:
                     "task": str(tid),
                     "ref": ref,
                 })
+    return rel
+
+
+def run_sync(root: Path) -> None:
+    """One sync: relations.json, sidecar, advisories, wiki. Never raises."""
+    synced = sync_relations(root)
+    if synced is None:
+        return
+    rel = synced.rel
+    if not synced.changed:
+        # Sidecar missing or out of date (deleted cache, hand-edited JSON)
+        if not is_current(root):
+            write_index(root, rel, synced.ac)
+        return
 
     out_path = root / ".ultra" / "relations.json"
     try:
-        out_path.write_text(
-            json.dumps(rel, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        atomic_write_text(out_path, json.dumps(rel, indent=2, ensure_ascii=False))
     except OSError:
         pass
+    write_index(root, rel, synced.ac, synced.paths, synced.cold)
 
     if rel["advisories"]:
         for adv in rel["advisories"][:5]:
@@ -249,9 +576,301 @@ def main() -> None:
         generate_wiki(root)
     except Exception:
         pass
+    try:
+        update_search_index(root, create=False)
+    except Exception:
+        pass
+
+
+# -- Debounce (dirty marker + single-flight worker) --
+
+WORKER_LOCK = "relations-worker.lock"
+PENDING_LOCK = "relations-pending.lock"
+WORKER_MAX_S = 120
+_POLL_S = 0.1
+
+
+def _window_s(env: str, default_ms: int) -> float:
+    try:
+        return max(0, int(os.environ.get(env, default_ms))) / 1000
+    except ValueError:
+        return default_ms / 1000
+
+
+def quiet_window() -> float:
+    return _window_s("ULTRA_RELATIONS_QUIET_MS", 1500)
+
+
+def max_staleness() -> float:
+    return _window_s("ULTRA_RELATIONS_MAX_STALE_MS", 10000)
+
+
+def _try_lock(path: Path):
+    """Open + non-blocking exclusive flock; the fd, or None if held elsewhere."""
+    try:
+        fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+
+def _unlock(fd) -> None:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class _PendingLock:
+    """Blocking flock serializing marker read-modify-write."""
+
+    def __init__(self, cache: Path):
+        self.path = cache / PENDING_LOCK
+
+    def __enter__(self):
+        self.fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *_exc):
+        _unlock(self.fd)
+
+
+def _read_pending(cache: Path):
+    try:
+        data = json.loads((cache / PENDING_NAME).read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def mark_dirty(cache: Path) -> dict:
+    """Record a rebuild request; keeps the first-request time of the batch."""
+    now = time.time()
+    with _PendingLock(cache):
+        pending = _read_pending(cache) or {"first": now, "requests": 0}
+        pending["last"] = now
+        pending["requests"] = pending.get("requests", 0) + 1
+        atomic_write_text(cache / PENDING_NAME, json.dumps(pending))
+    return pending
+
+
+def _clear_if_unchanged(cache: Path, seen: dict) -> bool:
+    """Drop the marker unless a newer request arrived while we synced."""
+    with _PendingLock(cache):
+        if _read_pending(cache) != seen:
+            return False
+        try:
+            (cache / PENDING_NAME).unlink()
+        except OSError:
+            pass
+        return True
+
+
+def _last_sync_age(cache: Path) -> float:
+    try:
+        return time.time() - (cache / MANIFEST_NAME).stat().st_mtime
+    except OSError:
+        return float("inf")
+
+
+def _worker_running(cache: Path) -> bool:
+    fd = _try_lock(cache / WORKER_LOCK)
+    if fd is None:
+        return True
+    _unlock(fd)
+    return False
+
+
+def _spawn_worker(root: Path) -> None:
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--rebuild-worker", str(root)],
+            cwd=str(root), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+    except OSError:
+        pass
+
 
+def request_rebuild(root: Path) -> str:
+    """Hook entry: 'sync' if synced now, 'deferred' if left to the worker."""
+    quiet = quiet_window()
+    if fcntl is None or quiet <= 0:
+        run_sync(root)
+        return "sync"
+    try:
+        cache = get_cache_dir(root)
+    except OSError:
+        run_sync(root)
+        return "sync"
+
+    fd = _try_lock(cache / WORKER_LOCK)
+    if fd is not None:
+        try:
+            if _read_pending(cache) is None and _last_sync_age(cache) >= quiet:
+                run_sync(root)
+                return "sync"
+        finally:
+            _unlock(fd)
+
+    # Marker first, then the liveness check: a worker that is just exiting
+    # re-reads the marker after releasing its lock, so the request is never lost.
+    try:
+        mark_dirty(cache)
+    except OSError:
+        run_sync(root)
+        return "sync"
+    if not _worker_running(cache):
+        _spawn_worker(root)
+    return "deferred"
+
+
+def rebuild_worker(root: Path) -> int:
+    """Single-flight: wait for quiet (or max staleness), sync, repeat until clean."""
+    try:
+        cache = get_cache_dir(root)
+    except OSError:
+        return 1
+    quiet, stale = quiet_window(), max_staleness()
+    deadline = time.time() + WORKER_MAX_S
+    while time.time() < deadline:
+        fd = _try_lock(cache / WORKER_LOCK)
+        if fd is None:
+            return 0  # another worker owns the batch
+        try:
+            while time.time() < deadline:
+                pending = _read_pending(cache)
+                if pending is None:
+                    break
+                due = min(pending.get("last", 0) + quiet, pending.get("first", 0) + stale)
+                if time.time() < due:
+                    time.sleep(min(_POLL_S, max(0.0, due - time.time())))
+                    continue
+                run_sync(root)
+                _clear_if_unchanged(cache, pending)
+        finally:
+            _unlock(fd)
+        if _read_pending(cache) is None:
+            return 0
+    return 0
+
+
+def main() -> None:
+    try:
+        data = json.loads(sys.stdin.read())
+    except Exception:
+        print(json.dumps({}))
+        return
+
+    tool_input = data.get("tool_input", {})
+    file_path = tool_input.get("file_path", "") or ""
+
+    relevant = (
+        "/.ultra/specs/" in file_path
+        or file_path.endswith("/.ultra/tasks/tasks.json")
+        or "/.ultra/tasks/" in file_path
+    )
+    if not relevant:
+        print(json.dumps({}))
+        return
+
+    toplevel = get_git_toplevel()
+    if not toplevel:
+        print(json.dumps({}))
+        return
+
+    if file_path.endswith("/.ultra/tasks/tasks.json") and observe_task_bindings is not None:
+        # Bind tasks this session just moved to in_progress (parallel agents)
+        try:
+            observe_task_bindings(Path(toplevel), data.get("session_id", "") or "")
+        except Exception:
+            pass
+    request_rebuild(Path(toplevel))
     print(json.dumps({}))
 
 
+# -- Watch Mode --
+
+WATCH_LOCK = "relations-watch.lock"
+WATCH_SETTLE_S = 0.2
+WATCH_MAX_DELAY_S = 0.8
+
+
+def _sync_now(root: Path) -> None:
+    """Sync unless a debounce worker owns the batch; then queue behind it."""
+    if fcntl is None:
+        run_sync(root)
+        return
+    cache = get_cache_dir(root)
+    fd = _try_lock(cache / WORKER_LOCK)
+    if fd is not None:
+        try:
+            run_sync(root)
+        finally:
+            _unlock(fd)
+        return
+    mark_dirty(cache)
+    if not _worker_running(cache):
+        _spawn_worker(root)
+
+
+def watch(root: Path, stop=None, force_poll: bool = False) -> int:
+    """Keep relations.json, the sidecar and the wiki in step with .ultra/.
+
+    Runs until `stop` (a threading.Event) is set or the process is
+    interrupted. Returns 1 if another watcher already serves this project.
+    """
+    from fs_watch import open_watcher
+
+    root = Path(root)
+    cache = get_cache_dir(root)
+    lock_fd = _try_lock(cache / WATCH_LOCK) if fcntl is not None else None
+    if fcntl is not None and lock_fd is None:
+        print("[Relations] a watcher is already running for this project", file=sys.stderr)
+        return 1
+    dirs = [root / ".ultra" / "specs", root / ".ultra" / "tasks"]
+    watcher = open_watcher(dirs, force_poll=force_poll)
+    print(f"[Relations] watching .ultra/specs, .ultra/tasks ({watcher.backend})", file=sys.stderr)
+    try:
+        _sync_now(root)  # catch up with changes made while nobody watched
+        while stop is None or not stop.is_set():
+            try:
+                changed = watcher.wait(0.5)
+            except OSError:
+                # inotify limit hit mid-run (new subdirectories): degrade to polling
+                watcher.close()
+                watcher = open_watcher(dirs, force_poll=True)
+                changed = True
+            if not changed:
+                continue
+            # Let a burst (git checkout, plan writing many files) settle briefly
+            deadline = time.monotonic() + WATCH_MAX_DELAY_S
+            while time.monotonic() < deadline and watcher.wait(WATCH_SETTLE_S):
+                pass
+            _sync_now(root)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if lock_fd is not None:
+            _unlock(lock_fd)
+    return 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--rebuild-worker":
+        sys.exit(rebuild_worker(Path(sys.argv[2])))
+    if len(sys.argv) > 1 and sys.argv[1] == "--watch":
+        positional = [a for a in sys.argv[2:] if not a.startswith("--")]
+        target = positional[0] if positional else get_git_toplevel()
+        if not target:
+            print("usage: relations_sync.py --watch [--poll] [project root]", file=sys.stderr)
+            sys.exit(2)
+        sys.exit(watch(Path(target), force_poll="--poll" in sys.argv))
     main()
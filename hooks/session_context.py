@@ -25,6 +25,21 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+try:
+    from active_digest import active_task_entry, load_digest
+    from hook_utils import find_git_root
+except Exception:  # pragma: no cover — never block hook on import error
+    def find_git_root(start):  # type: ignore[no-redef]
+        p = Path(os.path.abspath(start))
+        return next((d for d in (p, *p.parents) if (d / '.git').exists()), None)
+
+    def load_digest(_root):  # type: ignore[no-redef]
+        return None
+
+    def active_task_entry(_root, _digest, _session_id=''):  # type: ignore[no-redef]
+        return None
+
 
 def run_cmd(cmd: list, cwd: str = '') -> str:
     """Run command and return output."""
@@ -105,48 +120,6 @@ def get_project_context() -> list:
     return context
 
 
-def _extract_md_section(content: str, header: str, max_chars: int = 300) -> str:
-    """Extract first non-placeholder content from a markdown section header to next `---`.
-
-    Properly handles multi-line HTML comments, blockquotes, and placeholder markers.
-    """
-    if header not in content:
-        return ""
-    section = content.split(header, 1)[1].split('\n---\n', 1)[0]
-    out = []
-    in_comment = False
-    for line in section.split('\n'):
-        stripped = line.strip()
-        if not stripped:
-            continue
-        # Track multi-line HTML comments (line may contain both open and close)
-        if '<!--' in stripped and '-->' not in stripped:
-            in_comment = True
-            continue
-        if in_comment:
-            if '-->' in stripped:
-                in_comment = False
-            continue
-        # Single-line comment
-        if stripped.startswith('<!--') and stripped.endswith('-->'):
-            continue
-        if stripped.startswith('>'):
-            stripped = stripped[1:].strip()
-        if not stripped:
-            continue
-        # Skip placeholder markers like _(not yet defined)_ or _(criterion 1)_
-        if stripped.startswith('_(') and stripped.endswith(')_'):
-            continue
-        # Skip checklist markers without content
-        if stripped in ('- [ ]', '- [x]'):
-            continue
-        out.append(stripped)
-        if sum(len(s) for s in out) > max_chars:
-            break
-    result = ' '.join(out)
-    return result[:max_chars].strip()
-
-
 def get_tools_status() -> list:
     """v7: report harness tool availability. Minimal — keep token cost low."""
     lines = []
@@ -170,52 +143,72 @@ def get_tools_status() -> list:
     return ["[Tools]"] + lines if lines else []
 
 
-def get_north_star_context() -> list:
-    """v7 Goal-Always-Present: inject project + active task north-star at SessionStart."""
+def _section_text(content: str, header: str, max_chars: int) -> str:
+    """Plain text of a markdown section up to the next `---` (degraded path)."""
+    if header not in content:
+        return ''
+    section = content.split(header, 1)[1].split('\n---\n', 1)[0]
+    out = []
+    for line in section.split('\n'):
+        s = line.strip().lstrip('>').strip()
+        if s and not s.startswith('<!--') and not (s.startswith('_(') and s.endswith(')_')):
+            out.append(s)
+    return ' '.join(out)[:max_chars].strip()
+
+
+def _direct_digest(root: Path):
+    """Degraded path without a digest: north-star.md and the first in_progress
+    task of tasks.json read directly, in the digest's shape (no AC)."""
+    try:
+        ns = (root / '.ultra' / 'north-star.md').read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError):
+        return None
+    task = None
+    try:
+        data = json.loads((root / '.ultra' / 'tasks' / 'tasks.json').read_text(encoding='utf-8'))
+        tasks = data.get('tasks', []) if isinstance(data, dict) else data
+        task = next((t for t in tasks if isinstance(t, dict) and t.get('status') == 'in_progress'),
+                    None)
+    except (OSError, ValueError, TypeError, AttributeError):
+        pass
+    return {
+        'north_star': True,
+        'goal': _section_text(ns, '## One-line', 250),
+        'hard': _section_text(ns, '## Hard Constraints', 400),
+        'task': task,
+    }
+
+
+def get_north_star_context(session_id: str = '') -> list:
+    """v7 Goal-Always-Present: inject project + active task north-star at SessionStart.
+
+    Served from .ultra/cache/active-digest.json (active_digest.py), which is
+    re-parsed only when tasks.json, north-star.md or the active context change.
+    Without a digest (import failure, unwritable cache) the goal, hard
+    constraints and first in_progress task are read from the files directly.
+    """
     lines = []
     try:
-        proc = subprocess.run(
-            ['git', 'rev-parse', '--show-toplevel'],
-            capture_output=True, text=True, timeout=1
-        )
-        if proc.returncode != 0 or not proc.stdout.strip():
+        root = find_git_root(os.getcwd())
+        if root is None:
             return []
-        root = Path(proc.stdout.strip())
-        ns_path = root / '.ultra' / 'north-star.md'
-        if not ns_path.exists():
+        digest = load_digest(root)
+        direct = _direct_digest(root) if digest is None else None
+        digest = digest or direct
+        if not digest or not digest.get('north_star'):
             return []
 
-        content = ns_path.read_text(encoding='utf-8')
-        one_line = _extract_md_section(content, '## One-line', max_chars=250)
-        hard = _extract_md_section(content, '## Hard Constraints', max_chars=400)
-
-        if one_line:
-            lines.append(f"  Goal: {one_line}")
-        if hard:
-            lines.append(f"  Hard constraints: {hard}")
+        if digest.get('goal'):
+            lines.append(f"  Goal: {digest['goal']}")
+        if digest.get('hard'):
+            lines.append(f"  Hard constraints: {digest['hard']}")
 
         # Active task acceptance criteria
-        tasks_path = root / '.ultra' / 'tasks' / 'tasks.json'
-        if tasks_path.exists():
-            try:
-                tasks_data = json.loads(tasks_path.read_text(encoding='utf-8'))
-                in_progress = [
-                    t for t in tasks_data.get('tasks', [])
-                    if t.get('status') == 'in_progress'
-                ]
-                if in_progress:
-                    t = in_progress[0]
-                    tid = t.get('id', '?')
-                    title = t.get('title', '?')
-                    lines.append(f"  Active task {tid}: {title}")
-                    ctx_file = root / '.ultra' / 'tasks' / 'contexts' / f"task-{tid}.md"
-                    if ctx_file.exists():
-                        ctx_md = ctx_file.read_text(encoding='utf-8')
-                        ac = _extract_md_section(ctx_md, '## Acceptance Criteria', max_chars=300)
-                        if ac:
-                            lines.append(f"  Acceptance: {ac}")
-            except Exception:
-                pass
+        t = direct['task'] if direct else active_task_entry(root, digest, session_id)
+        if t:
+            lines.append(f"  Active task {t.get('id', '?')}: {t.get('title', '?')}")
+            if t.get('acceptance'):
+                lines.append(f"  Acceptance: {t['acceptance']}")
     except Exception:
         pass
 
@@ -262,7 +255,7 @@ def main():
         context_lines.extend(tools_lines)
 
     # v7: north-star (Goal-Always-Present substrate — every session sees the goal)
-    ns_lines = get_north_star_context()
+    ns_lines = get_north_star_context(hook_input.get('session_id', ''))
     if ns_lines:
         context_lines.append("")
         context_lines.extend(ns_lines)
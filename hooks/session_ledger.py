@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Session Ledger — the files one session edited, for Stop / PreCompact.
+
+pre_stop_check ran `git status --porcelain` over the whole tree at every
+Stop, session_trail two `git diff --name-only` passes and pre_compact_context
+another `git status`. On large repos those were the slowest calls the hooks
+made, and they reported dirty files of every other session sharing the
+checkout.
+
+post_edit_guard now appends each Edit/Write path to a per-session ledger
+(<tmp>/.claude_session_edits_<session_id>, one O_APPEND line per edit, like
+the subagent batch ledger). At Stop / PreCompact the ledger paths under the
+project root are checked with one pathspec-limited `git status`, whose cost
+follows the ledger rather than the tree. A plain stat cannot tell an edited
+file from one the session has since committed, so git still confirms the
+path is dirty — but only for these paths.
+
+No ledger for the session (no session_id, hooks not installed, changes made
+only through Bash) → session_status() returns None and callers fall back to
+their full-tree scan. More than MAX_PATHSPEC paths → None as well.
+
+Ledgers are never truncated while their session may still Stop again (Stop
+fires after every turn). Instead, a session that creates its ledger prunes
+every ledger untouched for MAX_LEDGER_AGE_S; each append refreshes the
+mtime, so only sessions idle that long lose theirs (→ full-tree fallback).
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+GIT_TIMEOUT = 3
+MAX_PATHSPEC = 1000
+MAX_LEDGER_AGE_S = 7 * 86400
+LEDGER_PREFIX = ".claude_session_edits_"
+
+
+def ledger_path(session_id: str) -> str:
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', str(session_id))[:80]
+    return os.path.join(tempfile.gettempdir(), f"{LEDGER_PREFIX}{safe_id}")
+
+
+def record_edit(session_id: str, file_path: str) -> None:
+    """Append file_path (absolute) to the session's ledger. Never raises."""
+    if not session_id or not file_path:
+        return
+    line = (os.path.abspath(file_path) + '\n').encode('utf-8', 'surrogateescape')
+    path = ledger_path(session_id)
+    created = False
+    try:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o600)
+            created = True
+        except FileExistsError:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+    if created:
+        prune_ledgers()
+
+
+def prune_ledgers(max_age_s: float = MAX_LEDGER_AGE_S) -> int:
+    """Delete ledgers not appended to for max_age_s. Returns how many. Never raises."""
+    cutoff = time.time() - max_age_s
+    removed = 0
+    try:
+        with os.scandir(tempfile.gettempdir()) as it:
+            for entry in it:
+                if not entry.name.startswith(LEDGER_PREFIX):
+                    continue
+                try:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return removed
+
+
+def edited_paths(session_id: str):
+    """De-duplicated absolute paths in first-edit order; None without a ledger."""
+    if not session_id:
+        return None
+    try:
+        with open(ledger_path(session_id), encoding='utf-8', errors='surrogateescape') as f:
+            raw = [line.rstrip('\n') for line in f]
+    except OSError:
+        return None
+    return list(dict.fromkeys(p for p in raw if p))
+
+
+def _rel_under(root: Path, paths: list) -> list:
+    base = os.path.realpath(str(root))
+    out = []
+    for p in paths:
+        real = os.path.realpath(p)
+        if real == base or not real.startswith(base + os.sep):
+            continue
+        out.append(os.path.relpath(real, base).replace(os.sep, '/'))
+    return out
+
+
+def parse_porcelain_z(out: str) -> list:
+    """`git status --porcelain -z` → [(XY, path)]; renames report the new path."""
+    entries = []
+    fields = out.split('\0')
+    i = 0
+    while i < len(fields):
+        field = fields[i]
+        i += 1
+        if len(field) < 4:
+            continue
+        xy, path = field[:2], field[3:]
+        if xy[0] in 'RC':
+            i += 1  # the source path of a rename/copy follows
+        entries.append((xy, path))
+    return entries
+
+
+def session_status(root: Path, session_id: str):
+    """[(XY, repo-relative path)] for this session's files that git reports.
+
+    None when there is no ledger (callers fall back to a full-tree scan) or
+    git cannot answer. [] when the ledger has nothing dirty under root.
+    """
+    paths = edited_paths(session_id)
+    if paths is None:
+        return None
+    rels = _rel_under(Path(root), paths)
+    if not rels:
+        return []
+    if len(rels) > MAX_PATHSPEC:
+        return None
+    try:
+        proc = subprocess.run(
+            ['git', '--literal-pathspecs', 'status', '--porcelain', '-z', '--', *rels],
+            capture_output=True, text=True, timeout=GIT_TIMEOUT, cwd=str(root),
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    if proc.returncode != 0:
+        return None
+    return parse_porcelain_z(proc.stdout)
+
+
+def format_short(entries: list) -> str:
+    """entries as `git status --short` lines."""
+    return '\n'.join(f"{xy} {path}" for xy, path in entries)
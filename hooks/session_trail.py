@@ -37,9 +37,20 @@ try:
 except Exception:  # pragma: no cover — never block hook on import error
     def get_git_toplevel() -> str:  # type: ignore[no-redef]
         return ""
-    def get_active_task() -> dict | None:  # type: ignore[no-redef]
+    def get_active_task(session_id: str = "") -> dict | None:  # type: ignore[no-redef]
         return None
     EVIDENCE_DIMENSIONS = ()  # type: ignore[no-redef]
+from atomic_io import LockTimeout, update_text
+
+try:
+    from progress_journal import load_progress
+except Exception:  # pragma: no cover — fall back to the snapshot file
+    load_progress = None
+try:
+    from session_ledger import session_status
+except Exception:  # pragma: no cover — fall back to git diff
+    def session_status(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
 
 
 MAX_TRAIL_ENTRIES = 50
@@ -153,22 +164,28 @@ def _git(args: list, cwd: Path) -> str:
     return ""
 
 
-def collect_orphan_facts(root: Path) -> dict:
+def collect_orphan_facts(root: Path, session_id: str = "") -> dict:
     """Snapshot working state for an orphan session.
 
     Returns:
       branch:       current branch name
       dirty_files:  source files modified or staged (excludes untracked
-                    to avoid build artifacts)
+                    to avoid build artifacts) — only this session's files
+                    when it has an edit ledger (session_ledger.py)
       last_commit:  short hash + subject of HEAD
     """
     branch = _git(["rev-parse", "--abbrev-ref", "HEAD"], cwd=root) or "?"
 
-    diff_out = _git(["diff", "--name-only", "HEAD"], cwd=root)
-    cached_out = _git(["diff", "--cached", "--name-only"], cwd=root)
+    entries = session_status(root, session_id)
+    if entries is not None:
+        candidates = [path for xy, path in entries if xy != "??" and xy != "!!"]
+    else:
+        diff_out = _git(["diff", "--name-only", "HEAD"], cwd=root)
+        cached_out = _git(["diff", "--cached", "--name-only"], cwd=root)
+        candidates = (diff_out + "\n" + cached_out).split("\n")
     seen: set = set()
     dirty: list = []
-    for line in (diff_out + "\n" + cached_out).split("\n"):
+    for line in candidates:
         f = line.strip()
         if not f or f in seen:
             continue
@@ -237,7 +254,7 @@ def fold_orphan_trail(session_id: str, root: Path) -> bool:
     Returns True if a line was written. No-op (returns False) if no source
     file is dirty in the working tree.
     """
-    facts = collect_orphan_facts(root)
+    facts = collect_orphan_facts(root, session_id)
     if not facts.get("dirty_files"):
         return False
 
@@ -247,29 +264,25 @@ def fold_orphan_trail(session_id: str, root: Path) -> bool:
     except OSError:
         return False
     trail_path = sessions_dir / "orphan-trail.md"
-
-    if trail_path.exists():
-        try:
-            text = trail_path.read_text(encoding="utf-8")
-        except OSError:
-            text = ""
-    else:
-        text = (
-            "# Orphan Trail — Sessions without active task\n\n"
-            "_Auto-maintained by session_trail.py. Each line records a "
-            "session that edited code without an active task. Newest first._\n"
-        )
-
+    header = (
+        "# Orphan Trail — Sessions without active task\n\n"
+        "_Auto-maintained by session_trail.py. Each line records a "
+        "session that edited code without an active task. Newest first._\n"
+    )
     line = build_orphan_line(session_id, facts)
-    new_text = insert_orphan_line(text, line, session_id)
+    changed = [False]
 
-    if new_text == text:
-        return False
+    def fold(text):
+        new_text = insert_orphan_line(header if text is None else text, line, session_id)
+        changed[0] = new_text != text
+        return new_text
+
+    # Concurrent sessions fold into the same file: locked read-modify-write
     try:
-        trail_path.write_text(new_text, encoding="utf-8")
-    except OSError:
+        update_text(trail_path, fold)
+    except (OSError, LockTimeout):
         return False
-    return True
+    return changed[0]
 
 
 # -- Main dispatcher ----------------------------------------------------------
@@ -289,7 +302,7 @@ def main() -> None:
         return
     root = Path(toplevel)
 
-    task = get_active_task()
+    task = get_active_task(session_id)
     if not task:
         # Orphan path: no in_progress task, but session may have edited
         # source files. Fold facts into .ultra/sessions/orphan-trail.md.
@@ -311,12 +324,14 @@ def main() -> None:
     tid = str(tid)
 
     progress_path = root / ".ultra" / "tasks" / "progress" / f"task-{tid}.json"
-    if not progress_path.exists():
-        print(json.dumps({}))
-        return
     try:
-        progress = json.loads(progress_path.read_text(encoding="utf-8"))
+        if load_progress is not None:
+            progress = load_progress(root, tid)
+        else:
+            progress = json.loads(progress_path.read_text(encoding="utf-8"))
     except (json.JSONDecodeError, OSError):
+        progress = None
+    if not isinstance(progress, dict):
         print(json.dumps({}))
         return
 
@@ -334,20 +349,12 @@ def main() -> None:
         print(json.dumps({}))
         return
 
-    try:
-        text = ctx_path.read_text(encoding="utf-8")
-    except OSError:
-        print(json.dumps({}))
-        return
-
     line = build_trail_line(session_id, progress)
-    new_text = fold_into_context(text, line, session_id)
-
-    if new_text != text:
-        try:
-            ctx_path.write_text(new_text, encoding="utf-8")
-        except OSError:
-            pass
+    try:
+        update_text(ctx_path, lambda text: None if text is None
+                    else fold_into_context(text, line, session_id))
+    except (OSError, LockTimeout):
+        pass
 
     print(json.dumps({}))
 
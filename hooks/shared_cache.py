@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Shared Cache — content-addressed results shared by every git worktree.
+
+Every .ultra cache lives under the checkout's own toplevel, so each
+`EnterWorktree` checkout started cold: the import graph re-parsed every
+file, post_edit_guard re-scanned content it had already scanned in the main
+checkout, and subagent_verify re-requested URLs it had just verified. Most
+of that work depends only on *content*, which worktrees of one repository
+overwhelmingly share.
+
+Storage: <git common dir>/ultra/cache/shared.db (SQLite, WAL; derived — safe
+to delete; .ultra/cache/ outside git)
+  entries(ns, key, value, at)   value is JSON; at = unix time written
+
+Keys are content addresses: content_key() hashes everything a result was
+computed from (file bytes, the parts of the path a checker looks at, the
+version of the code that computed it) and never the checkout path, so a hit
+is valid in any worktree. Per-worktree state stays layered on top in
+.ultra/cache/: which path currently holds which sha1 (import-graph.db
+`files`), edges, memoized fan-in, tracked-file listings.
+
+Namespaces in use:
+  imports   import_graph.py     parsed import keys per (rel path, sha1)
+  scan      post_edit_guard.py  content-checker advisories per (content, path class)
+  url       subagent_verify.py  HEAD verdicts, URL_TTL_S there
+
+Writes are buffered in memory and flushed in one short transaction by
+commit(), so a long import-graph sweep never holds the shared write lock
+against other worktrees. Every method is best-effort: storage errors read
+as misses. Each namespace keeps its newest MAX_ENTRIES rows.
+
+ULTRA_SHARED_CACHE=0 disables the cache (every lookup misses, nothing is
+written).
+"""
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_utils import get_shared_cache_dir
+
+DB_NAME = "shared.db"
+MAX_ENTRIES = 50_000
+PRUNE_CHANCE = 0.02
+BUSY_TIMEOUT_S = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, at REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_age ON entries(ns, at);
+"""
+
+
+def shared_cache_enabled() -> bool:
+    return os.environ.get("ULTRA_SHARED_CACHE", "1").strip().lower() not in ("0", "false", "off")
+
+
+def content_key(*parts) -> str:
+    """sha1 over parts (bytes or str), NUL-separated."""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_version(path: str) -> str:
+    """Short sha1 of a source file: folded into keys so editing a checker or
+    parser invalidates the results it computed."""
+    try:
+        return hashlib.sha1(Path(path).read_bytes()).hexdigest()[:12]
+    except OSError:
+        return "0"
+
+
+class SharedCache:
+    """The shared cache of one repository. Never raises after construction."""
+
+    def __init__(self, root: Path, db_path: Path | None = None):
+        if db_path is None:
+            db_path = get_shared_cache_dir(Path(root)) / DB_NAME
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_S)
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+        except sqlite3.Error:
+            self.conn.close()
+            raise
+        self._pending: dict = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
+
+    def get(self, ns: str, key: str, max_age_s: float | None = None):
+        """Cached value, or None on a miss (expired, absent, unreadable)."""
+        if (ns, key) in self._pending:
+            return self._pending[(ns, key)][0]
+        try:
+            row = self.conn.execute(
+                "SELECT value, at FROM entries WHERE ns = ? AND key = ?", (ns, key)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or (max_age_s is not None and time.time() - row[1] > max_age_s):
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put(self, ns: str, key: str, value) -> None:
+        """Buffer value (JSON-serializable) until commit()."""
+        self._pending[(ns, key)] = (value, time.time())
+
+    def commit(self) -> bool:
+        """Flush buffered puts in one transaction. False if they were dropped."""
+        if not self._pending:
+            return True
+        rows = [(ns, key, json.dumps(value, separators=(",", ":")), at)
+                for (ns, key), (value, at) in self._pending.items()]
+        namespaces = {ns for ns, *_rest in rows}
+        self._pending.clear()
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO entries(ns, key, value, at) VALUES (?, ?, ?, ?)", rows
+                )
+                if random.random() < PRUNE_CHANCE:
+                    for ns in namespaces:
+                        self._prune(ns, MAX_ENTRIES)
+        except (sqlite3.Error, TypeError, ValueError):
+            return False
+        return True
+
+    def prune(self, ns: str, keep: int = MAX_ENTRIES) -> int:
+        """Drop all but the newest `keep` rows of ns. Returns rows deleted."""
+        try:
+            with self.conn:
+                return self._prune(ns, keep)
+        except sqlite3.Error:
+            return 0
+
+    def _prune(self, ns: str, keep: int) -> int:
+        cur = self.conn.execute(
+            "DELETE FROM entries WHERE ns = ? AND key NOT IN ("
+            "SELECT key FROM entries WHERE ns = ? ORDER BY at DESC LIMIT ?)",
+            (ns, ns, keep),
+        )
+        return cur.rowcount
+
+
+def open_shared(root: Path) -> SharedCache | None:
+    """The repository's SharedCache, or None if disabled or unusable."""
+    if root is None or not shared_cache_enabled():
+        return None
+    try:
+        return SharedCache(Path(root))
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def cached(root: Path, ns: str, key: str, compute, max_age_s: float | None = None,
+           keep=lambda _value: True):
+    """compute() memoized in the shared cache of root's repository.
+
+    Results for which keep(result) is false are returned but not stored
+    (e.g. "could not verify"). Falls back to plain compute() when the cache
+    is disabled or unusable.
+    """
+    cache = open_shared(root)
+    if cache is None:
+        return compute()
+    try:
+        value = cache.get(ns, key, max_age_s)
+        if value is None:
+            value = compute()
+            if value is not None and keep(value):
+                cache.put(ns, key, value)
+        return value
+    finally:
+        cache.close()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""Status Engine — deterministic backing for /ultra-status.
+
+/ultra-status had the model load tasks.json, test-report.json and
+delivery-report.json and work out statistics, stalled/overdue tasks, blocked
+dependencies and the workflow route by hand: many tool calls and thousands of
+tokens for something computable. This computes every phase:
+
+  stats     counts by status / priority, completion %, velocity and ETA
+  risks     cycles, missing dependencies, blocked tasks, stalled in-progress
+            tasks (no activity for STALLED_DAYS), overdue tasks (started_at
+            + estimated_days passed), complexity spikes in the ready set,
+            failing or stale test report, uncommitted changes
+  next      ranked ready tasks, waves and critical path (task_scheduler.py)
+  route     the /ultra-status workflow routing table, including the
+            test-report git_commit ≠ HEAD staleness check
+
+Cache: .ultra/cache/status.json, keyed by (mtime_ns, size) of every input,
+HEAD, the UTC date (stalled/overdue are day-granular) and the worker count.
+A repeat call with nothing changed is a handful of stats and one small JSON
+read. Only the uncommitted-changes check (`git status`) runs every time.
+
+CLI:
+  python3 hooks/status_engine.py [--json] [--workers N] [--task ID] [--root PATH]
+  (default output: rendered markdown summary; --json: compact JSON)
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import atomic_write_text
+from hook_utils import get_cache_dir, get_git_toplevel, read_git_head
+
+try:
+    from progress_journal import load_progress
+except Exception:  # pragma: no cover — fall back to the snapshot file
+    load_progress = None
+try:
+    from task_scheduler import schedule
+except Exception:  # pragma: no cover — never block on import error
+    schedule = None
+
+CACHE_NAME = "status.json"
+CACHE_VERSION = 1
+STALLED_DAYS = 3
+COMPLEX_THRESHOLD = 7
+GIT_TIMEOUT = 3
+INPUTS = (
+    "tasks/tasks.json",
+    "test-report.json",
+    "delivery-report.json",
+    "specs/product.md",
+    "relations.json",
+)
+ROUTE_LABELS = {
+    "ultra-init": "Initialize project structure",
+    "ultra-research": "Complete the specs",
+    "ultra-plan": "Plan tasks",
+    "ultra-dev": "Develop the next task",
+    "ultra-test": "Run quality gates",
+    "ultra-deliver": "Release",
+    "done": "Delivered — plan the next milestone",
+}
+
+
+def _read_json(path: Path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _parse_ts(value):
+    """Unix time of an ISO-8601 / 'YYYY-MM-DD HH:mm:ss' string, None if unparseable."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _sig(path: Path) -> list:
+    try:
+        st = path.stat()
+    except OSError:
+        return [0, -1]
+    return [st.st_mtime_ns, st.st_size]
+
+
+def input_key(root: Path, workers: int, now: float) -> str:
+    """Cache key: stat of every input + progress files, HEAD, UTC date, workers."""
+    ultra = Path(root) / ".ultra"
+    parts = [[rel, _sig(ultra / rel)] for rel in INPUTS]
+    try:
+        with os.scandir(ultra / "tasks" / "progress") as it:
+            parts.extend(sorted(
+                [e.name, [e.stat().st_mtime_ns, e.stat().st_size]]
+                for e in it if e.name.endswith((".json", ".jsonl"))
+            ))
+    except OSError:
+        pass
+    parts.append(list(read_git_head(root)))
+    parts.append(datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d"))
+    parts.append(workers)
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _last_activity(root: Path, tid: str):
+    """Progress last_updated of a task, else its progress file mtime (unix time)."""
+    path = Path(root) / ".ultra" / "tasks" / "progress" / f"task-{tid}.json"
+    progress = load_progress(root, tid) if load_progress else _read_json(path)
+    if isinstance(progress, dict):
+        ts = _parse_ts(progress.get("last_updated"))
+        if ts is not None:
+            return ts
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def _days(seconds: float) -> float:
+    return round(seconds / 86400, 1)
+
+
+def task_stats(tasks: list, created, now: float) -> dict:
+    by_status: dict = {}
+    by_priority: dict = {}
+    for t in tasks:
+        status = t.get("status") or "pending"
+        by_status[status] = by_status.get(status, 0) + 1
+        prio = str(t.get("priority") or "?")
+        by_priority[prio] = by_priority.get(prio, 0) + 1
+    total = len(tasks)
+    done = by_status.get("completed", 0)
+    stats = {
+        "total": total,
+        "by_status": by_status,
+        "by_priority": dict(sorted(by_priority.items())),
+        "completion_pct": round(100 * done / total, 1) if total else 0.0,
+        "velocity_per_day": None,
+        "eta_days": None,
+    }
+    if created is not None and done and now > created:
+        velocity = done / max((now - created) / 86400, 1)
+        stats["velocity_per_day"] = round(velocity, 2)
+        stats["eta_days"] = round((total - done) / velocity, 1)
+    return stats
+
+
+def detect_risks(root: Path, tasks: list, sched: dict, test, head: str, now: float) -> list:
+    """[{"level": red|orange|yellow, "kind", "message", ...}], most severe first."""
+    risks = []
+    for chain in sched.get("cycles") or []:
+        risks.append({"level": "red", "kind": "cycle", "tasks": chain,
+                      "message": "dependency cycle " + " → ".join(chain)})
+    for tid, deps in (sched.get("missing") or {}).items():
+        risks.append({"level": "orange", "kind": "missing_dependency", "task": tid,
+                      "message": f"task {tid} depends on unknown task(s) {', '.join(deps)}"})
+    for t in tasks:
+        if t.get("status") == "blocked":
+            risks.append({"level": "orange", "kind": "blocked", "task": str(t.get("id")),
+                          "message": f"task {t.get('id')} marked blocked"})
+        if (t.get("status") or "") != "in_progress":
+            continue
+        tid = str(t.get("id"))
+        last = _last_activity(root, tid)
+        if last is not None and now - last > STALLED_DAYS * 86400:
+            risks.append({"level": "yellow", "kind": "stalled", "task": tid,
+                          "message": f"task {tid} in progress, idle {_days(now - last)} days"})
+        started = _parse_ts(t.get("started_at"))
+        try:
+            estimate = float(t.get("estimated_days"))
+        except (TypeError, ValueError):
+            estimate = None
+        if started is not None and estimate and now - started > estimate * 86400:
+            risks.append({"level": "orange", "kind": "overdue", "task": tid,
+                          "message": f"task {tid} at {_days(now - started)} days "
+                                     f"vs {estimate:g} estimated"})
+    by_id = {str(t.get("id")): t for t in tasks}
+    complex_ready = [tid for tid in sched.get("ready") or []
+                     if _complexity(by_id.get(tid) or {}) >= COMPLEX_THRESHOLD]
+    if len(complex_ready) >= 2:
+        risks.append({"level": "yellow", "kind": "complexity_spike", "tasks": complex_ready,
+                      "message": f"{len(complex_ready)} ready tasks with complexity ≥ "
+                                 f"{COMPLEX_THRESHOLD}"})
+    if isinstance(test, dict):
+        if test.get("passed") is False:
+            issues = test.get("blocking_issues") or []
+            risks.append({"level": "orange", "kind": "tests_failing", "issues": issues[:5],
+                          "message": f"last /ultra-test failed ({len(issues)} blocking issue(s))"})
+        if _is_stale(test, head):
+            risks.append({"level": "yellow", "kind": "tests_stale",
+                          "message": "test-report.json git_commit ≠ HEAD"})
+    order = {"red": 0, "orange": 1, "yellow": 2}
+    return sorted(risks, key=lambda r: order[r["level"]])
+
+
+def _complexity(task: dict) -> float:
+    try:
+        return float(task.get("complexity") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _is_stale(report: dict, head: str) -> bool:
+    commit = str(report.get("git_commit") or "")
+    if not commit or not head:
+        return False
+    return not (head.startswith(commit) or commit.startswith(head))
+
+
+def route(root: Path, tasks, test, delivery, head: str) -> dict:
+    """The /ultra-status Phase 5 routing table, first matching row wins."""
+    ultra = Path(root) / ".ultra"
+
+    def hit(command, reason, **extra):
+        return {"command": command, "reason": reason,
+                "description": ROUTE_LABELS[command], **extra}
+
+    if not ultra.is_dir():
+        return hit("ultra-init", "no .ultra/ directory")
+    product = ultra / "specs" / "product.md"
+    try:
+        spec_text = product.read_text(encoding="utf-8")
+    except OSError:
+        return hit("ultra-research", "specs/product.md missing")
+    if "[NEEDS CLARIFICATION]" in spec_text:
+        return hit("ultra-research", "specs contain [NEEDS CLARIFICATION]")
+    if not tasks:
+        return hit("ultra-plan", "tasks.json missing or empty")
+    unfinished = [t for t in tasks if (t.get("status") or "pending") != "completed"]
+    if unfinished:
+        return hit("ultra-dev", f"{len(unfinished)} task(s) not completed")
+    if isinstance(delivery, dict) and delivery and not _is_stale(delivery, head):
+        return hit("done", "delivery-report.json matches HEAD")
+    if isinstance(test, dict) and test.get("passed") is True:
+        if _is_stale(test, head):
+            return hit("ultra-test", "tests stale: test-report git_commit ≠ HEAD")
+        return hit("ultra-deliver", "all tasks completed and tests passed")
+    if isinstance(test, dict) and test.get("passed") is False:
+        return hit("ultra-dev", "tests failed", blocking_issues=(test.get("blocking_issues") or [])[:5])
+    return hit("ultra-test", "all tasks completed")
+
+
+def compute_status(root: Path, workers: int = 3, now: float = None) -> dict:
+    """The full status report (uncached, without the git-dirty check)."""
+    root = Path(root)
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    ultra = root / ".ultra"
+    data = _read_json(ultra / "tasks" / "tasks.json")
+    tasks = data.get("tasks") if isinstance(data, dict) else data
+    tasks = [t for t in tasks if isinstance(t, dict)] if isinstance(tasks, list) else []
+    test = _read_json(ultra / "test-report.json")
+    delivery = _read_json(ultra / "delivery-report.json")
+    _branch, head = read_git_head(root)
+
+    files_by_task = {}
+    relations = _read_json(ultra / "relations.json")
+    if isinstance(relations, dict):
+        for path, entry in (relations.get("files") or {}).items():
+            if "target_files" in (entry.get("from") or []):
+                for tid in entry.get("tasks") or []:
+                    files_by_task.setdefault(str(tid), []).append(path)
+    sched = schedule(tasks, workers, files_by_task) if schedule and tasks else {}
+    created = _parse_ts(data.get("created")) if isinstance(data, dict) else None
+
+    report = {
+        "generated": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+        "head": head[:12],
+        "stats": task_stats(tasks, created, now),
+        "current": sched.get("in_progress", []),
+        "next": sched.get("next", []),
+        "ready": sched.get("ready", []),
+        "waves": len(sched.get("waves") or []),
+        "critical_path": sched.get("critical_path", {"tasks": [], "days": 0}),
+        "risks": detect_risks(root, tasks, sched, test, head, now),
+        "test": None,
+        "delivery": None,
+        "route": route(root, tasks, test, delivery, head),
+    }
+    if isinstance(test, dict):
+        report["test"] = {"passed": test.get("passed"), "run_count": test.get("run_count"),
+                          "git_commit": test.get("git_commit"), "stale": _is_stale(test, head),
+                          "blocking_issues": len(test.get("blocking_issues") or [])}
+    if isinstance(delivery, dict):
+        report["delivery"] = {k: delivery.get(k) for k in ("version", "git_tag", "pushed")}
+    report["level"] = report["risks"][0]["level"] if report["risks"] else "green"
+    return report
+
+
+def _git_dirty(root: Path):
+    """True/False for uncommitted tracked changes, None if git is unavailable."""
+    try:
+        result = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, timeout=GIT_TIMEOUT, cwd=str(root),
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return None
+    if result.returncode != 0:
+        return None
+    return bool(result.stdout.strip())
+
+
+def get_status(root: Path, workers: int = 3, now: float = None, use_cache: bool = True) -> dict:
+    """compute_status through the input-keyed cache, plus the git-dirty check."""
+    root = Path(root)
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    key = input_key(root, workers, now)
+    cache_path = None
+    report = None
+    try:
+        cache_path = get_cache_dir(root) / CACHE_NAME
+    except OSError:
+        pass
+    if use_cache and cache_path is not None:
+        cached = _read_json(cache_path)
+        if (isinstance(cached, dict) and cached.get("version") == CACHE_VERSION
+                and cached.get("key") == key):
+            report = cached.get("report")
+            report["cached"] = True
+    if report is None:
+        report = compute_status(root, workers, now)
+        if cache_path is not None:
+            try:
+                atomic_write_text(cache_path, json.dumps(
+                    {"version": CACHE_VERSION, "key": key, "report": report},
+                    ensure_ascii=False))
+            except OSError:
+                pass
+        report["cached"] = False
+    dirty = _git_dirty(root)
+    report["git_dirty"] = dirty
+    if dirty:
+        report["risks"].append({"level": "yellow", "kind": "uncommitted",
+                                "message": "uncommitted changes in the working tree"})
+        if report["level"] == "green":
+            report["level"] = "yellow"
+    return report
+
+
+LEVEL_ICONS = {"green": "🟢", "yellow": "🟡", "orange": "🟠", "red": "🔴"}
+
+
+def render(report: dict, task_id: str = "") -> str:
+    """Markdown summary of a status report (the /ultra-status console view)."""
+    stats = report["stats"]
+    by_status = stats["by_status"]
+    pct = stats["completion_pct"]
+    filled = int(pct // 5)
+    lines = [
+        f"## 📊 Status {LEVEL_ICONS.get(report['level'], '')}",
+        "",
+        f"[{'█' * filled}{'░' * (20 - filled)}] {pct}% — "
+        f"{by_status.get('completed', 0)}/{stats['total']} tasks",
+        "Tasks: " + ", ".join(f"{k} {v}" for k, v in sorted(by_status.items())),
+        "Priority: " + ", ".join(f"{k} {v}" for k, v in stats["by_priority"].items()),
+    ]
+    if stats["velocity_per_day"] is not None:
+        lines.append(f"Velocity: {stats['velocity_per_day']}/day, ETA {stats['eta_days']} days")
+    if report["current"]:
+        lines.append("In progress: " + ", ".join(f"#{t}" for t in report["current"]))
+    cp = report["critical_path"]
+    if cp.get("tasks"):
+        lines.append(f"Critical path ({cp['days']:g} days, {report['waves']} wave(s)): "
+                     + " → ".join(f"#{t}" for t in cp["tasks"]))
+    test = report.get("test")
+    if test:
+        state = "passed" if test["passed"] else "failed"
+        stale = " (stale: ≠ HEAD)" if test["stale"] else ""
+        lines.append(f"Test: {state}, run {test['run_count']}{stale}")
+    delivery = report.get("delivery")
+    if delivery:
+        lines.append(f"Delivery: {delivery.get('version')} pushed={delivery.get('pushed')}")
+    if task_id:
+        lines.append(f"Task #{task_id}: ready={task_id in report['ready']}, "
+                     f"in progress={task_id in report['current']}")
+    if report["risks"]:
+        lines.append("")
+        lines.append("⚠️ Risks:")
+        for risk in report["risks"][:10]:
+            lines.append(f"- {LEVEL_ICONS[risk['level']]} {risk['message']}")
+    if report["next"]:
+        lines.append("")
+        lines.append("📈 Next: " + "; ".join(
+            f"#{n['id']} {n['title']} ({n['priority'] or '?'}"
+            f"{', critical' if n['critical'] else ''})" for n in report["next"]))
+    r = report["route"]
+    lines += ["", "---", "## ▶ Next Up",
+              f"**/{r['command']}** — {r['description']} ({r['reason']})" if r["command"] != "done"
+              else f"**{r['description']}** ({r['reason']})",
+              "---"]
+    return "\n".join(lines)
+
+
+def main(argv: list) -> int:
+    args = list(argv)
+    workers, root, task_id, as_json = 3, "", "", False
+    while args:
+        arg = args.pop(0)
+        if arg == "--json":
+            as_json = True
+        elif arg == "--workers" and args:
+            try:
+                workers = max(1, int(args.pop(0)))
+            except ValueError:
+                pass
+        elif arg == "--root" and args:
+            root = args.pop(0)
+        elif arg == "--task" and args:
+            task_id = args.pop(0)
+    root = root or get_git_toplevel() or os.getcwd()
+    report = get_status(Path(root), workers)
+    if as_json:
+        print(json.dumps(report, ensure_ascii=False, separators=(",", ":")))
+    else:
+        print(render(report, task_id))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -30,14 +30,23 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 try:
-    from hook_utils import update_task_progress
+    from hook_utils import find_git_root, update_task_progress
 except Exception:  # pragma: no cover — never crash hook on import error
+    def find_git_root(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
     def update_task_progress(*_args, **_kwargs):  # type: ignore[no-redef]
         return
+try:
+    from shared_cache import open_shared
+except Exception:  # pragma: no cover — never crash hook on import error
+    def open_shared(*_args, **_kwargs):  # type: ignore[no-redef]
+        return None
 
 
 URL_TIMEOUT_S = 3
 URL_BUDGET_PER_RUN = 5
+# Definite HEAD verdicts are shared by all worktrees (shared_cache.py) this long
+URL_TTL_S = 6 * 3600
 
 
 # -- Claim extraction --
@@ -177,6 +186,32 @@ def verify_url(value):
         return None
 
 
+def verify_urls(values, root):
+    """verify_url over values; one result per value, in order.
+
+    Verdicts cached in root's shared cache (any worktree, younger than
+    URL_TTL_S) are reused without a request and do not count against
+    URL_BUDGET_PER_RUN; past the budget the rest are None (unverified).
+    Only True/False verdicts are cached — a flaky network is retried.
+    """
+    cache = open_shared(root) if root is not None else None
+    results = []
+    fetched = 0
+    try:
+        for value in values:
+            verdict = cache.get('url', value, URL_TTL_S) if cache is not None else None
+            if verdict is None and fetched < URL_BUDGET_PER_RUN:
+                fetched += 1
+                verdict = verify_url(value)
+                if verdict is not None and cache is not None:
+                    cache.put('url', value, verdict)
+            results.append(verdict)
+    finally:
+        if cache is not None:
+            cache.close()
+    return results
+
+
 def _load_settings_keys():
     """Recursively flatten ~/.claude/settings.json keys.
 
@@ -272,17 +307,14 @@ def main():
         return
 
     settings_keys = _load_settings_keys()
-    url_count = 0
+    urls = [c['value'] for c in claims if c['kind'] == 'url']
+    url_results = iter(verify_urls(urls, find_git_root(hook_input.get('cwd') or os.getcwd())))
     results = []
     for claim in claims:
         kind = claim['kind']
         value = claim['value']
         if kind == 'url':
-            if url_count >= URL_BUDGET_PER_RUN:
-                results.append(None)
-                continue
-            url_count += 1
-            results.append(verify_url(value))
+            results.append(next(url_results))
         elif kind == 'path':
             results.append(verify_path(value))
         elif kind == 'field':
@@ -294,7 +326,8 @@ def main():
     if advisory:
         print(advisory, file=sys.stderr)
         try:
-            update_task_progress('<subagent>', advisories=[advisory])
+            update_task_progress('<subagent>', advisories=[advisory],
+                                 session_id=hook_input.get('session_id', ''))
         except Exception:
             pass
         result = {
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Task Binding — which in_progress task belongs to which session / worktree.
+
+get_active_task used to take the first `in_progress` task. With several
+agents in parallel worktrees (or teammates in one checkout), each on its own
+task, progress, trails and goal reminders were credited to whichever task
+came first in tasks.json. Bindings record "my task" when a task moves to
+in_progress, so every hook resolves it from its session_id in O(1).
+
+Storage: <git common dir>/ultra/task-bindings.json — shared by all worktrees
+of the repository (.ultra/cache/ outside git). Written with
+atomic_io.update_json, so concurrent sessions never drop each other's
+bindings:
+
+  sessions   {session_id: {task, worktree, at}}   newest MAX_SESSIONS kept
+  worktrees  {worktree path: {task, session, at}}  last task bound there
+  seen       {worktree path: [in_progress ids]}    as of the last observe()
+
+Recording: observe() runs when a session's Edit/Write touches tasks.json
+(relations_sync hook). Tasks that became in_progress since the last
+observation in that worktree are bound to the editing session and the
+worktree; tasks that left in_progress are unbound. start() moves a task to
+in_progress through TaskStore.update_task (tasks.json rewritten atomically,
+store kept in sync) and binds it in one step, marking it seen so a later
+observe() by another session does not claim it. From the shell:
+  python3 hooks/task_binding.py start <task_id> [--session ID] [--root PATH]
+  python3 hooks/task_binding.py bind <task_id> [--session ID] [--root PATH]
+  python3 hooks/task_binding.py show [--root PATH]
+
+Resolution (resolve_active_task), among the worktree's in_progress tasks:
+  1. the task bound to session_id
+  2. the task last bound to this worktree
+  3. the first task not bound to another session or worktree
+A stale binding (task no longer in_progress here) is skipped.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from atomic_io import LockTimeout, update_json
+from hook_utils import get_git_common_dir, get_git_toplevel
+from task_store import TaskStore, find_in_progress
+
+BINDINGS_NAME = "task-bindings.json"
+BINDINGS_VERSION = 1
+MAX_SESSIONS = 200
+
+
+def bindings_path(root: Path) -> Path:
+    common = get_git_common_dir(root)
+    if common is not None:
+        return common / "ultra" / BINDINGS_NAME
+    return Path(root) / ".ultra" / "cache" / BINDINGS_NAME
+
+
+def worktree_key(root: Path) -> str:
+    return os.path.realpath(str(root))
+
+
+def _empty() -> dict:
+    return {"version": BINDINGS_VERSION, "sessions": {}, "worktrees": {}, "seen": {}}
+
+
+def load_bindings(root: Path) -> dict:
+    try:
+        doc = json.loads(bindings_path(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return _empty()
+    if not isinstance(doc, dict) or doc.get("version") != BINDINGS_VERSION:
+        return _empty()
+    for key in ("sessions", "worktrees", "seen"):
+        if not isinstance(doc.get(key), dict):
+            doc[key] = {}
+    return doc
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _bind(doc: dict, tid: str, session_id: str, wt: str, at: str) -> None:
+    if session_id:
+        doc["sessions"][session_id] = {"task": tid, "worktree": wt, "at": at}
+        if len(doc["sessions"]) > MAX_SESSIONS:
+            keep = sorted(doc["sessions"].items(), key=lambda kv: kv[1].get("at", ""))
+            doc["sessions"] = dict(keep[-MAX_SESSIONS:])
+    doc["worktrees"][wt] = {"task": tid, "session": session_id, "at": at}
+
+
+def _unbind(doc: dict, tid: str, wt: str) -> None:
+    for sid, b in list(doc["sessions"].items()):
+        if b.get("task") == tid and b.get("worktree") == wt:
+            del doc["sessions"][sid]
+    if doc["worktrees"].get(wt, {}).get("task") == tid:
+        del doc["worktrees"][wt]
+
+
+def _update(root: Path, fn) -> bool:
+    path = bindings_path(root)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        update_json(path, lambda doc: fn(doc if doc.get("version") == BINDINGS_VERSION
+                                         else _empty()),
+                    default=_empty(), indent=None)
+    except (OSError, LockTimeout):
+        return False
+    return True
+
+
+def bind(root: Path, task_id, session_id: str = "") -> bool:
+    """Bind task_id to session_id (if given) and to this worktree."""
+    tid, wt, at = str(task_id), worktree_key(root), _now()
+
+    def fn(doc):
+        _bind(doc, tid, session_id, wt, at)
+        return doc
+
+    return _update(root, fn)
+
+
+def start(root: Path, task_id, session_id: str = ""):
+    """Set task_id in_progress in tasks.json and bind it to session_id and
+    this worktree. Returns the updated task, or None if it does not exist or
+    tasks.json could not be written. Keeps an existing started_at."""
+    tid, wt, at = str(task_id), worktree_key(root), _now()
+    try:
+        with TaskStore(root) as store:
+            task = store.get(tid)
+            if task is None:
+                return None
+            task = store.update_task(tid, status="in_progress",
+                                     started_at=task.get("started_at") or at)
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+    if task is None:
+        return None
+
+    def fn(doc):
+        _bind(doc, tid, session_id, wt, at)
+        seen = list(doc["seen"].get(wt) or [])
+        if tid not in seen:
+            doc["seen"][wt] = seen + [tid]
+        return doc
+
+    _update(root, fn)
+    return task
+
+
+def observe(root: Path, session_id: str = "") -> list:
+    """Bind tasks newly in_progress in this worktree to session_id; unbind
+    tasks that left in_progress. Returns the newly bound task ids."""
+    current = [str(t.get("id")) for t in find_in_progress(root)]
+    wt, at = worktree_key(root), _now()
+    started: list = []
+
+    def fn(doc):
+        seen = set(doc["seen"].get(wt) or [])
+        started[:] = [tid for tid in current if tid not in seen]
+        for tid in seen - set(current):
+            _unbind(doc, tid, wt)
+        for tid in started:
+            _bind(doc, tid, session_id, wt, at)
+        doc["seen"][wt] = current
+        return doc
+
+    return list(started) if _update(root, fn) else []
+
+
+def resolve_active_task(root: Path, session_id: str = "", tasks=None):
+    """This session's in_progress task (see module docstring), or None.
+
+    tasks: the worktree's in_progress tasks (any dicts with an "id") when the
+    caller already has them, e.g. active_digest entries. Never raises.
+    """
+    try:
+        if tasks is None:
+            tasks = find_in_progress(root)
+        if not tasks:
+            return None
+        by_id = {str(t.get("id")): t for t in tasks}
+        doc = load_bindings(root)
+        wt = worktree_key(root)
+        mine = doc["sessions"].get(session_id) if session_id else None
+        if mine and mine.get("worktree") == wt and mine.get("task") in by_id:
+            return by_id[mine["task"]]
+        here = doc["worktrees"].get(wt)
+        if here and here.get("task") in by_id:
+            return by_id[here["task"]]
+        claimed = {b.get("task") for sid, b in doc["sessions"].items() if sid != session_id}
+        claimed |= {b.get("task") for key, b in doc["worktrees"].items() if key != wt}
+        for tid, task in by_id.items():
+            if tid not in claimed:
+                return task
+    except Exception:
+        return None
+    return None
+
+
+def main(argv: list) -> int:
+    args = list(argv)
+    root, session_id, positional = "", "", []
+    while args:
+        arg = args.pop(0)
+        if arg == "--root" and args:
+            root = args.pop(0)
+        elif arg == "--session" and args:
+            session_id = args.pop(0)
+        else:
+            positional.append(arg)
+    root = root or get_git_toplevel()
+    if not root or not positional or positional[0] not in ("start", "bind", "show"):
+        print("usage: task_binding.py start|bind <task_id> [--session ID] | show [--root PATH]",
+              file=sys.stderr)
+        return 1
+    if positional[0] == "start":
+        if len(positional) < 2 or start(Path(root), positional[1], session_id) is None:
+            print("task_binding: start failed (unknown task or unwritable tasks.json)",
+                  file=sys.stderr)
+            return 1
+    if positional[0] == "bind":
+        if len(positional) < 2 or not bind(Path(root), positional[1], session_id):
+            print("task_binding: bind failed", file=sys.stderr)
+            return 1
+    print(json.dumps(load_bindings(Path(root)), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""Task Scheduler — dependency DAG, critical path and parallel waves.
+
+/ultra-dev step 1 and /ultra-status phase 4 used to have the model re-read
+all of tasks.json to work out "what's ready next", and nothing said which
+tasks can run side by side under teammateMode. This builds the dependency
+graph from tasks.json once and answers both, in O(tasks + dependencies):
+
+  ready          pending tasks whose dependencies are all completed, best first
+  next           the best `--workers N` of them that can run concurrently
+                 (no two share a target file, per relations.json)
+  waves          topological layers of the remaining work; wave 0 is what
+                 can start now (plus tasks already in progress)
+  critical_path  longest chain of remaining work, weighted by estimated_days
+  cycles         dependency cycles (as exact chains); their tasks never become
+                 ready until the cycle is broken
+  missing        dependencies naming task ids that do not exist (ignored)
+
+Ranking of ready tasks: on the critical path first, then priority
+(P0 > P1 > P2 > P3), then the longest remaining chain behind the task, then
+the number of tasks it unblocks, then tasks.json order.
+
+CLI (JSON on stdout):
+  python3 hooks/task_scheduler.py [--workers N] [--root PATH]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_utils import get_git_toplevel
+
+DEFAULT_WORKERS = 1
+PRIORITY_RANK = {"P0": 0, "P1": 1, "P2": 2, "P3": 3}
+_EPS = 1e-9
+
+
+def _weight(task: dict) -> float:
+    """estimated_days, or 1 when missing/invalid."""
+    try:
+        days = float(task.get("estimated_days"))
+    except (TypeError, ValueError):
+        return 1.0
+    return days if days > 0 else 1.0
+
+
+class TaskGraph:
+    """Dependency graph over tasks.json entries (ids normalized to str)."""
+
+    def __init__(self, tasks: list):
+        self.order: list = []
+        self.tasks: dict = {}
+        for task in tasks:
+            if not isinstance(task, dict) or task.get("id") in (None, ""):
+                continue
+            tid = str(task["id"])
+            if tid not in self.tasks:
+                self.order.append(tid)
+            self.tasks[tid] = task
+        self.deps: dict = {}
+        self.dependents: dict = {tid: [] for tid in self.order}
+        self.missing: dict = {}
+        for tid in self.order:
+            deps = []
+            for dep in self.tasks[tid].get("dependencies") or []:
+                dep = str(dep)
+                if dep not in self.tasks:
+                    self.missing.setdefault(tid, []).append(dep)
+                elif dep not in deps:
+                    deps.append(dep)
+                    self.dependents[dep].append(tid)
+            self.deps[tid] = deps
+
+    def status(self, tid: str) -> str:
+        return self.tasks[tid].get("status") or "pending"
+
+    def done(self, tid: str) -> bool:
+        return self.status(tid) == "completed"
+
+    def topo_order(self):
+        """(topological order of acyclic tasks, set of tasks on/behind a cycle)."""
+        indegree = {tid: len(self.deps[tid]) for tid in self.order}
+        queue = [tid for tid in self.order if not indegree[tid]]
+        out = []
+        i = 0
+        while i < len(queue):
+            tid = queue[i]
+            i += 1
+            out.append(tid)
+            for nxt in self.dependents[tid]:
+                indegree[nxt] -= 1
+                if not indegree[nxt]:
+                    queue.append(nxt)
+        stuck = {tid for tid in self.order if indegree[tid]}
+        return out, stuck
+
+    def cycles(self, stuck: set) -> list:
+        """One exact chain [a, b, ..., a] per strongly connected cycle among `stuck`."""
+        index: dict = {}
+        low: dict = {}
+        on_stack: set = set()
+        stack: list = []
+        sccs = []
+        counter = 0
+        for root in self.order:
+            if root not in stuck or root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                tid, i = work.pop()
+                if i == 0:
+                    index[tid] = low[tid] = counter
+                    counter += 1
+                    stack.append(tid)
+                    on_stack.add(tid)
+                deps = [d for d in self.deps[tid] if d in stuck]
+                if i < len(deps):
+                    work.append((tid, i + 1))
+                    dep = deps[i]
+                    if dep not in index:
+                        work.append((dep, 0))
+                    elif dep in on_stack:
+                        low[tid] = min(low[tid], index[dep])
+                    continue
+                if work and work[-1][1] > 0:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[tid])
+                if low[tid] == index[tid]:
+                    comp = []
+                    while True:
+                        top = stack.pop()
+                        on_stack.discard(top)
+                        comp.append(top)
+                        if top == tid:
+                            break
+                    if len(comp) > 1 or tid in self.deps[tid]:
+                        sccs.append(set(comp))
+        chains = []
+        for comp in sccs:
+            start = next(t for t in self.order if t in comp)
+            chain, seen, tid = [start], {start}, start
+            while True:
+                tid = next(d for d in self.deps[tid] if d in comp)
+                if tid in seen:
+                    chains.append(chain[chain.index(tid):] + [tid])
+                    break
+                chain.append(tid)
+                seen.add(tid)
+        return chains
+
+
+def schedule(tasks: list, workers: int = DEFAULT_WORKERS, files_by_task=None) -> dict:
+    """Scheduling report for tasks.json's task list (see module docstring).
+
+    files_by_task: optional {task_id: [target paths]}; picks in `next` never
+    share a path, so parallel workers don't edit the same files.
+    """
+    g = TaskGraph(tasks)
+    order, stuck = g.topo_order()
+    remaining = [tid for tid in order if not g.done(tid)]
+    position = {tid: i for i, tid in enumerate(g.order)}
+
+    # Longest remaining chain ending at (head) / starting from (tail) each task
+    head: dict = {}
+    for tid in order:
+        w = 0.0 if g.done(tid) else _weight(g.tasks[tid])
+        head[tid] = w + max((head[d] for d in g.deps[tid]), default=0.0)
+    tail: dict = {}
+    for tid in reversed(order):
+        w = 0.0 if g.done(tid) else _weight(g.tasks[tid])
+        tail[tid] = w + max((tail[n] for n in g.dependents[tid] if n not in stuck), default=0.0)
+    total = max((head[t] for t in remaining), default=0.0)
+
+    critical = []
+    if remaining:
+        tid = max(remaining, key=lambda t: (head[t], -position[t]))
+        critical.append(tid)
+        while True:
+            prev = [d for d in g.deps[tid] if not g.done(d)
+                    and abs(head[d] - (head[tid] - _weight(g.tasks[tid]))) < _EPS]
+            if not prev:
+                break
+            tid = prev[0]
+            critical.append(tid)
+        critical.reverse()
+    on_critical = {t for t in remaining if total and abs(head[t] + tail[t]
+                   - _weight(g.tasks[t]) - total) < _EPS}
+
+    # Waves: layer = longest chain of unfinished dependencies before the task
+    level: dict = {}
+    waves: list = []
+    for tid in remaining:
+        lv = max((level[d] + 1 for d in g.deps[tid] if d in level), default=0)
+        level[tid] = lv
+        while len(waves) <= lv:
+            waves.append([])
+        waves[lv].append(tid)
+
+    def rank(tid):
+        prio = PRIORITY_RANK.get(str(g.tasks[tid].get("priority") or "").upper(), len(PRIORITY_RANK))
+        return (tid not in on_critical, prio, -tail[tid], -len(g.dependents[tid]), position[tid])
+
+    ready = sorted(
+        (tid for tid in waves[0] if g.status(tid) == "pending") if waves else (),
+        key=rank,
+    )
+    in_progress = [tid for tid in g.order if g.status(tid) == "in_progress"]
+
+    picks, deferred, claimed = [], [], {}
+    files_by_task = files_by_task or {}
+    for tid in in_progress:
+        for fp in files_by_task.get(tid, ()):
+            claimed.setdefault(fp, tid)
+    for tid in ready:
+        if len(picks) >= max(0, workers):
+            break
+        clash = sorted({claimed[fp] for fp in files_by_task.get(tid, ()) if fp in claimed})
+        if clash:
+            deferred.append({"id": tid, "conflicts_with": clash})
+            continue
+        picks.append(tid)
+        for fp in files_by_task.get(tid, ()):
+            claimed.setdefault(fp, tid)
+
+    def brief(tid):
+        t = g.tasks[tid]
+        return {"id": tid, "title": t.get("title") or "", "priority": t.get("priority") or "",
+                "complexity": t.get("complexity"), "estimated_days": t.get("estimated_days"),
+                "critical": tid in on_critical, "tail_days": round(tail[tid], 2),
+                "unblocks": len(g.dependents[tid])}
+
+    counts: dict = {"total": len(g.order)}
+    for tid in g.order:
+        counts[g.status(tid)] = counts.get(g.status(tid), 0) + 1
+    return {
+        "workers": workers,
+        "counts": counts,
+        "next": [brief(t) for t in picks],
+        "ready": ready,
+        "in_progress": in_progress,
+        "deferred": deferred,
+        "waves": waves,
+        "critical_path": {"tasks": critical, "days": round(total, 2)},
+        "cycles": g.cycles(stuck) if stuck else [],
+        "blocked_by_cycle": [t for t in g.order if t in stuck and not g.done(t)],
+        "missing": g.missing,
+    }
+
+
+def _files_by_task(root: Path) -> dict:
+    """{task_id: [paths]} from relations.json target files; {} if unavailable."""
+    try:
+        rel = json.loads((root / ".ultra" / "relations.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    by_task: dict = {}
+    for path, entry in (rel.get("files") or {}).items():
+        if "target_files" not in (entry.get("from") or []):
+            continue
+        for tid in entry.get("tasks") or []:
+            by_task.setdefault(str(tid), []).append(path)
+    return by_task
+
+
+def schedule_project(root: Path, workers: int = DEFAULT_WORKERS):
+    """schedule() for a project's .ultra/tasks/tasks.json; None if unreadable."""
+    root = Path(root)
+    try:
+        data = json.loads((root / ".ultra" / "tasks" / "tasks.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    tasks = data.get("tasks") if isinstance(data, dict) else data
+    if not isinstance(tasks, list):
+        return None
+    return schedule(tasks, workers, _files_by_task(root))
+
+
+def main(argv: list) -> int:
+    args = list(argv)
+    workers, root = DEFAULT_WORKERS, ""
+    while args:
+        arg = args.pop(0)
+        if arg == "--workers" and args:
+            try:
+                workers = max(1, int(args.pop(0)))
+            except ValueError:
+                pass
+        elif arg == "--root" and args:
+            root = args.pop(0)
+    root = root or get_git_toplevel()
+    report = schedule_project(Path(root), workers) if root else None
+    if report is None:
+        print("task_scheduler: no readable .ultra/tasks/tasks.json", file=sys.stderr)
+        print(json.dumps({}))
+        return 1
+    print(json.dumps(report, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Task Store — SQLite (WAL) mirror of tasks.json with an indexed active task.
+
+get_active_task, mid_workflow_recall and session_context each parsed all of
+tasks.json and scanned it for `in_progress`, several times per tool call.
+With thousands of tasks that is measurable on every Edit. This store keeps
+the same tasks in .ultra/tasks.db, indexed by id and (status, position), so
+the active task is one indexed row read.
+
+Storage: .ultra/tasks.db (WAL journal; not committed — tasks.json stays the
+committed, human-editable file)
+  tasks(id, seq, status, data)   id PK; seq = position in tasks.json;
+                                 data = the task object as JSON
+  meta(key, value)               version, sig/sha1 of the tasks.json last
+                                 imported or exported, its top-level keys
+
+Two-way consistency:
+  tasks.json → store   every read compares tasks.json's (mtime_ns, size) with
+                       the recorded sig (one stat + one row); on mismatch the
+                       file is re-imported once. Inside the racy window the
+                       sha1 decides, so same-size edits in the same mtime tick
+                       are not missed.
+  store → tasks.json   update_task() (used by task_binding.start) writes the
+                       row and re-exports tasks.json atomically in the same
+                       write transaction, recording the new sig — so hand
+                       edits and API edits never diverge.
+
+ULTRA_TASK_STORE=0 disables the store; find_active_task then parses the JSON.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from atomic_io import atomic_write_bytes
+
+DB_NAME = "tasks.db"
+STORE_VERSION = "1"
+RACY_WINDOW_NS = 2_000_000_000
+BUSY_TIMEOUT_S = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY, seq INTEGER NOT NULL, status TEXT, data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status, seq);
+"""
+
+
+def store_enabled() -> bool:
+    return os.environ.get("ULTRA_TASK_STORE", "1").strip().lower() not in ("0", "false", "off")
+
+
+def _tasks_json(root: Path) -> Path:
+    return Path(root) / ".ultra" / "tasks" / "tasks.json"
+
+
+def _sig(path: Path) -> str:
+    try:
+        st = path.stat()
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _meta(conn, key: str) -> str:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else ""
+
+
+def _set_meta(conn, **values) -> None:
+    conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", list(values.items()))
+
+
+class TaskStore:
+    """One project's task store. Methods never raise for missing files;
+    sqlite3.Error propagates so callers can fall back to tasks.json."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.json_path = _tasks_json(self.root)
+        self.db_path = self.root / ".ultra" / DB_NAME
+        self.conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_S,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    # -- tasks.json → store --
+
+    def _fresh(self) -> bool:
+        """True if the rows match tasks.json as it is on disk now."""
+        sig = _sig(self.json_path)
+        if _meta(self.conn, "version") != STORE_VERSION or sig != _meta(self.conn, "sig"):
+            return False
+        if not sig:
+            return True
+        mtime_ns = int(sig.split(":", 1)[0])
+        if mtime_ns < time.time_ns() - RACY_WINDOW_NS:
+            return True
+        try:
+            data = self.json_path.read_bytes()
+        except OSError:
+            return False
+        return hashlib.sha1(data).hexdigest() == _meta(self.conn, "sha1")
+
+    def _import(self) -> None:
+        """Replace all rows with tasks.json (caller holds the write lock)."""
+        sig = _sig(self.json_path)
+        tasks, extras, sha1, valid = [], {}, "", False
+        if sig:
+            try:
+                raw = self.json_path.read_bytes()
+                doc = json.loads(raw.decode("utf-8"))
+                sha1 = hashlib.sha1(raw).hexdigest()
+            except (OSError, ValueError):
+                doc = None
+            if isinstance(doc, dict) and isinstance(doc.get("tasks") or [], list):
+                tasks, valid = doc.get("tasks") or [], True
+                extras = {k: v for k, v in doc.items() if k != "tasks"}
+            elif isinstance(doc, list):
+                tasks, extras, valid = doc, None, True
+        self.conn.execute("DELETE FROM tasks")
+        rows, seen = [], set()
+        for seq, task in enumerate(tasks):
+            if not isinstance(task, dict) or task.get("id") in (None, ""):
+                continue
+            tid = str(task["id"])
+            if tid in seen:
+                continue
+            seen.add(tid)
+            rows.append((tid, seq, task.get("status") or "pending",
+                         json.dumps(task, ensure_ascii=False)))
+        self.conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?)", rows)
+        _set_meta(self.conn, version=STORE_VERSION, sig=sig, sha1=sha1,
+                  valid="1" if valid else "0",
+                  extras=json.dumps(extras, ensure_ascii=False))
+
+    def sync(self) -> bool:
+        """Re-import tasks.json if it changed. Returns True if it re-imported."""
+        if self._fresh():
+            return False
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._fresh():  # another process imported while we waited
+                self.conn.execute("COMMIT")
+                return False
+            self._import()
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    # -- reads --
+
+    def active_task(self):
+        """The first in_progress task (tasks.json order), or None."""
+        self.sync()
+        row = self.conn.execute(
+            "SELECT data FROM tasks WHERE status = 'in_progress' ORDER BY seq LIMIT 1"
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get(self, task_id):
+        self.sync()
+        row = self.conn.execute(
+            "SELECT data FROM tasks WHERE id = ?", (str(task_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def by_status(self, status: str) -> list:
+        self.sync()
+        return [json.loads(r[0]) for r in self.conn.execute(
+            "SELECT data FROM tasks WHERE status = ? ORDER BY seq", (status,))]
+
+    def all(self) -> list:
+        self.sync()
+        return [json.loads(r[0]) for r in self.conn.execute(
+            "SELECT data FROM tasks ORDER BY seq")]
+
+    # -- store → tasks.json --
+
+    def update_task(self, task_id, **fields):
+        """Merge `fields` into one task, persist to both the store and tasks.json.
+
+        Returns the updated task, or None if no such task exists. An
+        unparseable tasks.json is never overwritten (returns None).
+        """
+        tid = str(task_id)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._fresh():
+                self._import()  # never overwrite a hand edit we have not seen
+            row = self.conn.execute("SELECT data FROM tasks WHERE id = ?", (tid,)).fetchone()
+            if row is None or _meta(self.conn, "valid") != "1":
+                self.conn.execute("COMMIT")
+                return None
+            task = json.loads(row[0])
+            task.update(fields)
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, data = ? WHERE id = ?",
+                (task.get("status") or "pending", json.dumps(task, ensure_ascii=False), tid),
+            )
+            self._export()
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return task
+
+    def _export(self) -> None:
+        """Write tasks.json from the rows (atomic replace) and record its sig."""
+        tasks = [json.loads(r[0]) for r in self.conn.execute(
+            "SELECT data FROM tasks ORDER BY seq")]
+        extras = json.loads(_meta(self.conn, "extras") or "{}")
+        doc = tasks if extras is None else {**extras, "tasks": tasks}
+        raw = (json.dumps(doc, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+        self.json_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.json_path, raw)
+        _set_meta(self.conn, sig=_sig(self.json_path), sha1=hashlib.sha1(raw).hexdigest())
+
+
+def _scan_json(root: Path) -> list:
+    """Legacy path: parse tasks.json and return its in_progress tasks."""
+    try:
+        data = json.loads(_tasks_json(root).read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return []
+    tasks = data.get("tasks", []) if isinstance(data, dict) else data
+    return [t for t in (tasks if isinstance(tasks, list) else [])
+            if isinstance(t, dict) and t.get("status") == "in_progress"]
+
+
+def find_in_progress(root: Path) -> list:
+    """All in_progress tasks of the project at root, in tasks.json order.
+
+    Served from the indexed store when enabled; parses tasks.json otherwise
+    or when the store cannot be opened (read-only checkout, locked db).
+    Never raises.
+    """
+    root = Path(root)
+    if not _tasks_json(root).exists():
+        return []
+    if store_enabled():
+        try:
+            with TaskStore(root) as store:
+                return store.by_status("in_progress")
+        except (sqlite3.Error, OSError, ValueError):
+            pass
+    return _scan_json(root)
+
+
+def find_active_task(root: Path):
+    """The first in_progress task of the project at root, or None. Never raises.
+
+    Ignores session/worktree bindings — hooks resolve "my task" through
+    task_binding.resolve_active_task.
+    """
+    tasks = find_in_progress(root)
+    return tasks[0] if tasks else None
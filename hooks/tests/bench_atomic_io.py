@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Concurrency stress benchmark for atomic_io (not collected by pytest).
+
+    python3 hooks/tests/bench_atomic_io.py [--writers 8] [--updates 200] [--payload 20000]
+
+Writer processes each append their own keys to one shared .ultra JSON
+document (read-modify-write), while a reader process keeps parsing it.
+Runs the same load with plain read + write_text as the baseline, then with
+atomic_io.update_json, and reports throughput, lost updates and torn reads.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from atomic_io import update_json
+
+
+def _add_key(doc: dict, key: str, pad: str) -> dict:
+    doc.setdefault("entries", {})[key] = pad
+    return doc
+
+
+def _writer(path: str, wid: int, updates: int, payload: int, mode: str) -> None:
+    pad = "x" * (payload // max(1, updates))
+    for i in range(updates):
+        key = f"w{wid}-{i}"
+        if mode == "atomic":
+            update_json(path, lambda d: _add_key(d, key, pad), default={"entries": {}},
+                        indent=None, timeout=60)
+            continue
+        p = Path(path)
+        try:
+            doc = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            doc = {"entries": {}}
+        p.write_text(json.dumps(_add_key(doc, key, pad)), encoding="utf-8")
+
+
+def _reader(path: str, stop, torn, reads) -> None:
+    p = Path(path)
+    while not stop.is_set():
+        try:
+            text = p.read_text(encoding="utf-8")
+        except OSError:
+            continue
+        reads.value += 1
+        try:
+            json.loads(text)
+        except ValueError:
+            torn.value += 1
+
+
+def run(mode: str, writers: int, updates: int, payload: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / ".ultra" / "reviews" / "index.json"
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps({"entries": {}}), encoding="utf-8")
+        stop, torn, reads = mp.Event(), mp.Value("i", 0), mp.Value("i", 0)
+        reader = mp.Process(target=_reader, args=(str(path), stop, torn, reads))
+        reader.start()
+        t0 = time.perf_counter()
+        procs = [mp.Process(target=_writer, args=(str(path), w, updates, payload, mode))
+                 for w in range(writers)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        reader.join()
+        try:
+            kept = len(json.loads(path.read_text(encoding="utf-8")).get("entries", {}))
+        except ValueError:
+            kept = 0
+        total = writers * updates
+        return {"mode": mode, "seconds": elapsed, "ops_per_s": total / elapsed,
+                "lost": total - kept, "torn": torn.value, "reads": reads.value}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--payload", type=int, default=20000,
+                        help="bytes of padding each writer adds in total")
+    args = parser.parse_args()
+
+    total = args.writers * args.updates
+    print(f"{args.writers} writers x {args.updates} updates = {total} read-modify-writes")
+    failed = False
+    for mode in ("plain", "atomic"):
+        r = run(mode, args.writers, args.updates, args.payload)
+        print(f"  {r['mode']:<7} {r['seconds']:>7.2f} s  {r['ops_per_s']:>8.0f} ops/s  "
+              f"lost {r['lost']:>5}  torn reads {r['torn']:>5}/{r['reads']}")
+        failed |= mode == "atomic" and (r["lost"] or r["torn"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
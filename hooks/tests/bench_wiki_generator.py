@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark wiki_generator on a synthetic project (not collected by pytest).
+
+    python3 hooks/tests/bench_wiki_generator.py [--tasks 5000] [--files 100000]
+
+Builds relations.json, progress files for half the tasks and an orphan trail
+in a temp dir, then times each phase of one wiki regeneration.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from wiki_generator import (
+    WikiModel,
+    _load_relations,
+    build_index_md,
+    build_log_md,
+    generate_wiki,
+    shard_threshold,
+)
+
+STATUSES = ("pending", "in_progress", "completed", "blocked")
+
+
+def build_fixture(root: Path, n_tasks: int, n_files: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    ids = [str(i) for i in range(1, n_tasks + 1)]
+    tasks = {
+        tid: {"title": f"Task {tid}", "status": rng.choice(STATUSES),
+              "trace_to": [f"specs/product.md#s{int(tid) % 50}"],
+              "context_file": f"contexts/task-{tid}.md"}
+        for tid in ids
+    }
+    files = {
+        f"src/mod{j % 500}/file{j}.ts": {"tasks": rng.sample(ids, rng.randint(1, 2)),
+                                         "from": ["target_files"]}
+        for j in range(n_files)
+    }
+    specs = {f"specs/product.md#s{k}": {"file": ".ultra/specs/product.md", "heading": f"## S{k}",
+                                       "referenced_by": []} for k in range(50)}
+    ultra = root / ".ultra"
+    (ultra / "tasks" / "progress").mkdir(parents=True)
+    (ultra / "sessions").mkdir(parents=True)
+    (ultra / "relations.json").write_text(json.dumps({
+        "version": 2, "last_synced": now.isoformat(),
+        "tasks": tasks, "specs": specs, "files": files, "advisories": [],
+    }))
+    for tid in ids[::2]:
+        (ultra / "tasks" / "progress" / f"task-{tid}.json").write_text(json.dumps({
+            "last_updated": (now - timedelta(days=rng.randint(0, 90))).isoformat(),
+            "files_touched": [f"src/mod{rng.randint(0, 499)}/x.ts" for _ in range(rng.randint(0, 8))],
+            "advisories": [],
+        }))
+    (ultra / "sessions" / "orphan-trail.md").write_text("\n".join(
+        f"- {(now - timedelta(hours=h)).strftime('%Y-%m-%dT%H:%MZ')} [sid:abc]; branch:main; 1 files"
+        for h in range(0, 2000, 7)
+    ))
+
+
+def _timed(label: str, fn, results: list):
+    t0 = time.perf_counter()
+    value = fn()
+    results.append((label, (time.perf_counter() - t0) * 1000))
+    return value
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--files", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        t0 = time.perf_counter()
+        build_fixture(root, args.tasks, args.files)
+        print(f"fixture: {args.tasks} tasks, {args.files} files "
+              f"({(time.perf_counter() - t0):.1f}s to build)")
+
+        results: list = []
+        rel = _timed("parse relations.json", lambda: _load_relations(root), results)
+        model = _timed("load model (1 pass)", lambda: WikiModel(rel, root), results)
+        _timed("render index.md", lambda: build_index_md(rel, root, model), results)
+        _timed("render log.md", lambda: build_log_md(rel, root, model), results)
+        _timed("generate_wiki (cold cache)", lambda: generate_wiki(root), results)
+        _timed("generate_wiki (unchanged)", lambda: generate_wiki(root), results)
+        layout = "sharded" if args.tasks >= shard_threshold() else "single index.md"
+        print(f"  generate_wiki layout: {layout}")
+        for label, ms in results:
+            print(f"  {label:<28} {ms:>9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
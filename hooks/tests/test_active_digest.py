@@ -0,0 +1,162 @@
+"""Tests for active_digest.py — precomputed goal/task digest for injection hooks.
+
+The digest must be rebuilt exactly when tasks.json, an active context file
+or north-star.md changes, never trusted while an input is inside the racy
+mtime window, and give mid_workflow_recall / session_context the same lines
+they used to parse out of the markdown themselves.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import active_digest
+from active_digest import DIGEST_NAME, load_digest
+from mid_workflow_recall import _get_active_task_acceptance
+from session_context import get_north_star_context
+from task_binding import bind
+
+CONTEXT = """# Task 1
+
+## Acceptance Criteria
+<!-- hidden
+note -->
+_(criterion placeholder)_
+- Login returns a session token
+- Wrong password returns 401
+- Third bullet
+
+---
+"""
+
+NORTH_STAR = """# North Star
+
+## One-line
+> Ship passwordless login.
+
+---
+
+## Hard Constraints
+- No plaintext secrets
+
+---
+"""
+
+
+def _project(root: Path, statuses: dict) -> Path:
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    tasks = root / ".ultra" / "tasks"
+    (tasks / "contexts").mkdir(parents=True)
+    (tasks / "tasks.json").write_text(json.dumps({"tasks": [
+        {"id": tid, "title": f"Task {tid}", "status": st} for tid, st in statuses.items()]}))
+    for tid in statuses:
+        (tasks / "contexts" / f"task-{tid}.md").write_text(CONTEXT.replace("Login", f"Login{tid}"))
+    (root / ".ultra" / "north-star.md").write_text(NORTH_STAR)
+    _settle(root)
+    return root
+
+
+def _settle(root: Path) -> None:
+    """Move every .ultra input out of the racy window."""
+    old = 1_600_000_000_000_000_000
+    for path in (root / ".ultra").rglob("*.md"):
+        os.utime(path, ns=(old, old))
+    os.utime(root / ".ultra" / "tasks" / "tasks.json", ns=(old, old))
+
+
+def _no_rebuild(monkeypatch):
+    def boom(_root):
+        raise AssertionError("digest rebuilt although no input changed")
+    monkeypatch.setattr(active_digest, "build_digest", boom)
+
+
+class TestDigest:
+
+    def test_contents_and_reuse(self, tmp_path, monkeypatch):
+        root = _project(tmp_path, {"1": "in_progress", "2": "pending"})
+        digest = load_digest(root)
+        assert digest["goal"] == "Ship passwordless login."
+        assert digest["hard"] == "- No plaintext secrets"
+        assert digest["tasks"] == [{
+            "id": "1", "title": "Task 1",
+            "ac_bullets": ["- Login1 returns a session token", "- Wrong password returns 401"],
+            "acceptance": "- Login1 returns a session token - Wrong password returns 401 "
+                          "- Third bullet",
+        }]
+        assert (root / ".ultra" / "cache" / DIGEST_NAME).exists()
+        _no_rebuild(monkeypatch)
+        assert load_digest(root) == digest
+
+    def test_rebuilt_when_an_input_changes(self, tmp_path):
+        root = _project(tmp_path, {"1": "in_progress", "2": "pending"})
+        load_digest(root)
+        ctx = root / ".ultra" / "tasks" / "contexts" / "task-1.md"
+        ctx.write_text(CONTEXT.replace("Login", "Logout"))
+        assert load_digest(root)["tasks"][0]["ac_bullets"][0] == "- Logout returns a session token"
+        (root / ".ultra" / "north-star.md").write_text(NORTH_STAR.replace("passwordless", "magic-link"))
+        assert load_digest(root)["goal"] == "Ship magic-link login."
+        (root / ".ultra" / "tasks" / "tasks.json").write_text(json.dumps({"tasks": [
+            {"id": "1", "title": "Task 1", "status": "completed"},
+            {"id": "2", "title": "Task 2", "status": "in_progress"}]}))
+        assert [t["id"] for t in load_digest(root)["tasks"]] == ["2"]
+
+    def test_racy_input_not_trusted(self, tmp_path):
+        root = _project(tmp_path, {"1": "in_progress"})
+        ctx = root / ".ultra" / "tasks" / "contexts" / "task-1.md"
+        ctx.write_text(CONTEXT)
+        load_digest(root)
+        # Same size, same mtime — only the racy rule forces the re-parse
+        st = ctx.stat()
+        ctx.write_text(CONTEXT.replace("Login", "Lxgin"))
+        os.utime(ctx, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert load_digest(root)["tasks"][0]["ac_bullets"][0].startswith("- Lxgin")
+
+    def test_no_ultra_project(self, tmp_path):
+        assert load_digest(tmp_path) is None
+        assert not (tmp_path / ".ultra").exists()
+
+
+class TestHooks:
+
+    def test_goal_reminder_follows_session_binding(self, tmp_path, monkeypatch):
+        root = _project(tmp_path, {"1": "in_progress", "2": "in_progress"})
+        bind(root, "1", "sess-a")
+        bind(root, "2", "sess-b")
+        monkeypatch.chdir(root)
+        assert _get_active_task_acceptance("sess-a") == [
+            "  Active task 1: Task 1",
+            "    - Login1 returns a session token",
+            "    - Wrong password returns 401",
+        ]
+        assert _get_active_task_acceptance("sess-b")[0] == "  Active task 2: Task 2"
+
+    def test_goal_reminder_without_digest(self, tmp_path, monkeypatch):
+        import mid_workflow_recall
+        root = _project(tmp_path, {"1": "pending", "2": "in_progress"})
+        monkeypatch.chdir(root)
+        monkeypatch.setattr(mid_workflow_recall, "load_digest", lambda _root: None)
+        assert _get_active_task_acceptance("sess-a") == ["  Active task 2: Task 2"]
+
+    def test_north_star_context(self, tmp_path, monkeypatch):
+        root = _project(tmp_path, {"1": "in_progress"})
+        monkeypatch.chdir(root)
+        lines = get_north_star_context()
+        assert lines[:3] == ["[North Star]", "  Goal: Ship passwordless login.",
+                             "  Hard constraints: - No plaintext secrets"]
+        assert lines[3] == "  Active task 1: Task 1"
+        assert lines[4].startswith("  Acceptance: - Login1 returns")
+        (root / ".ultra" / "north-star.md").unlink()
+        assert get_north_star_context() == []
+
+    def test_north_star_context_without_digest(self, tmp_path, monkeypatch):
+        import session_context
+        root = _project(tmp_path, {"1": "pending", "2": "in_progress"})
+        monkeypatch.chdir(root)
+        monkeypatch.setattr(session_context, "load_digest", lambda _root: None)
+        assert get_north_star_context("sess-a") == [
+            "[North Star]", "  Goal: Ship passwordless login.",
+            "  Hard constraints: - No plaintext secrets", "  Active task 2: Task 2"]
+        (root / ".ultra" / "north-star.md").unlink()
+        assert get_north_star_context() == []
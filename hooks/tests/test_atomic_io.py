@@ -0,0 +1,146 @@
+"""Tests for atomic_io.py — atomic writes, advisory locks, RMW retry.
+
+Lock contention uses a second open file description in the same process
+(flock locks conflict across descriptions); the lost-update check runs real
+processes against one file.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import atomic_io
+from atomic_io import (
+    LockTimeout, atomic_write_text, file_lock, lock_path, update_json, update_text,
+)
+
+HOOKS = Path(__file__).parent.parent
+
+
+class TestAtomicWrite:
+
+    def test_replaces_without_leftovers(self, tmp_path):
+        path = tmp_path / "a.json"
+        path.write_text("old")
+        inode = path.stat().st_ino
+        atomic_write_text(path, "new ✓")
+        assert path.read_text(encoding="utf-8") == "new ✓"
+        assert path.stat().st_ino != inode
+        assert os.listdir(tmp_path) == ["a.json"]
+
+    def test_failed_write_keeps_old_file(self, tmp_path, monkeypatch):
+        path = tmp_path / "a.json"
+        path.write_text("old")
+
+        def boom(*_a):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(atomic_io.os, "replace", boom)
+        with pytest.raises(OSError):
+            atomic_write_text(path, "new")
+        assert path.read_text() == "old"
+        assert os.listdir(tmp_path) == ["a.json"]
+
+
+class TestLock:
+
+    def test_lock_files_kept_in_ultra_cache(self, tmp_path):
+        lp = lock_path(tmp_path / ".ultra" / "wiki" / "index.md")
+        assert lp.parent == tmp_path / ".ultra" / "cache" / "locks"
+        assert lp != lock_path(tmp_path / ".ultra" / "specs" / "index.md")
+        assert lock_path(tmp_path / "x.json") == tmp_path / ".x.json.lock"
+
+    def test_timeout_when_held(self, tmp_path):
+        target = tmp_path / ".ultra" / "relations.json"
+        with file_lock(target):
+            t0 = time.monotonic()
+            with pytest.raises(LockTimeout):
+                with file_lock(target, timeout=0.1):
+                    pass
+            assert time.monotonic() - t0 < 2
+        with file_lock(target, timeout=0.1):
+            pass
+
+    def test_shared_locks_coexist(self, tmp_path):
+        target = tmp_path / "a.json"
+        with file_lock(target, shared=True):
+            with file_lock(target, shared=True, timeout=0.1):
+                pass
+            with pytest.raises(LockTimeout):
+                with file_lock(target, timeout=0.05):
+                    pass
+
+
+class TestReadModifyWrite:
+
+    def test_update_text_missing_and_noop(self, tmp_path):
+        path = tmp_path / "t.md"
+        assert update_text(path, lambda t: None) is None
+        assert not path.exists()
+        assert update_text(path, lambda t: (t or "") + "a\n") == "a\n"
+        mtime = path.stat().st_mtime_ns
+        assert update_text(path, lambda t: t) == "a\n"
+        assert path.stat().st_mtime_ns == mtime
+
+    def test_retries_when_file_changes_underneath(self, tmp_path):
+        path = tmp_path / "t.md"
+        path.write_text("base\n")
+        calls = []
+
+        def fn(text):
+            calls.append(text)
+            if len(calls) == 1:  # another session writes while we compute
+                atomic_write_text(path, text + "other\n")
+            return text + "mine\n"
+
+        assert update_text(path, fn) == "base\nother\nmine\n"
+        assert calls == ["base\n", "base\nother\n"]
+
+    def test_last_attempt_runs_under_lock(self, tmp_path):
+        path = tmp_path / "t.md"
+        path.write_text("0")
+
+        def fn(text):
+            atomic_write_text(path, str(int(text) + 1))  # always conflicts
+            return text + "!"
+
+        # Attempts 1-2 conflict; the locked attempt wins on top of the others
+        assert update_text(path, fn, retries=3) == "2!"
+
+    def test_update_json_default_and_corrupt(self, tmp_path):
+        path = tmp_path / "index.json"
+        path.write_text("{torn")
+        out = update_json(path, lambda d: d["sessions"].append({"id": "s1"}) or d,
+                          default={"sessions": []})
+        assert out == {"sessions": [{"id": "s1"}]}
+        assert json.loads(path.read_text()) == out
+        assert update_json(path, lambda d: None) == out
+
+    def test_update_json_strict_keeps_corrupt_file(self, tmp_path):
+        path = tmp_path / "index.json"
+        torn = '{"sessions": [{"id": "a"},'
+        path.write_text(torn)
+        with pytest.raises(json.JSONDecodeError):
+            update_json(path, lambda d: d, default={"sessions": []}, strict=True)
+        assert path.read_text() == torn
+        path.unlink()
+        assert update_json(path, lambda d: d, default={"sessions": []}, strict=True) == {"sessions": []}
+
+    def test_parallel_processes_lose_nothing(self, tmp_path):
+        path = tmp_path / ".ultra" / "reviews" / "index.json"
+        path.parent.mkdir(parents=True)
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from atomic_io import update_json;"
+            "[update_json(sys.argv[2], lambda d, i=i: d.setdefault('k', []).append(f'{sys.argv[3]}-{i}') or d,"
+            " default={}, timeout=30) for i in range(40)]"
+        )
+        procs = [subprocess.Popen([sys.executable, "-c", code, str(HOOKS), str(path), str(w)])
+                 for w in range(4)]
+        assert all(p.wait(timeout=120) == 0 for p in procs)
+        assert len(json.loads(path.read_text())["k"]) == 160
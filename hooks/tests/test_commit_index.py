@@ -0,0 +1,194 @@
+"""Tests for commit_index.py — cached path → last commit map.
+
+Real git repos in tmp_path; the point is that lookups stop spawning git
+once the map matches HEAD, so the tests count git invocations.
+"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import commit_index
+from commit_index import CommitIndex, describe_last_commit, parse_log, relative_age
+from hook_utils import read_git_head
+
+
+def _git(repo: Path, *args):
+    return subprocess.run(["git", *args], cwd=repo, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    _git(path, "init", "-q", "-b", "main")
+    _git(path, "config", "user.email", "t@example.com")
+    _git(path, "config", "user.name", "Test")
+    return path
+
+
+def _commit(repo: Path, rel: str, msg: str, text: str = None) -> str:
+    (repo / ".git" / "info" / "exclude").write_text(".ultra/\n")
+    fp = repo / rel
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    fp.write_text(text if text is not None else msg + "\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", msg)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+def _count_git(monkeypatch):
+    calls = []
+    real = commit_index._git
+    monkeypatch.setattr(commit_index, "_git",
+                        lambda root, args, **kw: calls.append(args[0]) or real(root, args, **kw))
+    return calls
+
+
+class TestReadGitHead:
+
+    def test_branch_and_sha_without_git(self, tmp_path):
+        repo = _repo(tmp_path / "r")
+        sha = _commit(repo, "a.txt", "one")
+        assert read_git_head(repo) == ("main", sha)
+
+    def test_packed_refs_and_detached(self, tmp_path):
+        repo = _repo(tmp_path / "r")
+        sha = _commit(repo, "a.txt", "one")
+        _git(repo, "pack-refs", "--all")
+        assert read_git_head(repo) == ("main", sha)
+        _git(repo, "checkout", "-q", "--detach")
+        assert read_git_head(repo) == ("HEAD", sha)
+
+    def test_unborn_branch_and_non_repo(self, tmp_path):
+        assert read_git_head(_repo(tmp_path / "r")) == ("main", "")
+        assert read_git_head(tmp_path / "plain") == ("", "")
+
+
+class TestParseLog:
+
+    def test_newest_commit_wins(self):
+        out = ("\x00bbb\t200\tsecond\nsrc/a.py\n\n"
+               "\x00aaa\t100\tfirst\tTAB\nsrc/a.py\nsrc/b.py\n")
+        paths, commits = parse_log(out)
+        assert commits == 2
+        assert paths == {"src/a.py": ["bbb", 200, "second"],
+                         "src/b.py": ["aaa", 100, "first\tTAB"]}
+
+
+class TestRelativeAge:
+
+    def test_git_wording(self):
+        assert relative_age(1000, now=1001) == "1 second ago"
+        assert relative_age(0, now=5 * 60) == "5 minutes ago"
+        assert relative_age(0, now=3 * 86400) == "3 days ago"
+        assert relative_age(0, now=21 * 86400) == "3 weeks ago"
+        assert relative_age(0, now=800 * 86400) == "2 years ago"
+
+
+class TestCommitIndex:
+
+    def test_lookup_matches_git_log(self, tmp_path):
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "src/a.py", "add a")
+        _commit(repo, "src/b.py", "add b")
+        _commit(repo, "src/a.py", "touch a", text="changed\n")
+        branch, last = describe_last_commit(str(repo), "src/a.py")
+        assert branch == "main"
+        assert "touch a" in last and last.endswith("ago)")
+        assert "add b" in describe_last_commit(str(repo), "src/b.py")[1]
+        assert describe_last_commit(str(repo), "src/new.py")[1] == ""
+
+    def test_unchanged_head_runs_no_git(self, tmp_path, monkeypatch):
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "a.py", "add a")
+        describe_last_commit(str(repo), "a.py")
+        calls = _count_git(monkeypatch)
+        assert "add a" in describe_last_commit(str(repo), "a.py")[1]
+        assert calls == []
+
+    def test_new_commits_extend_incrementally(self, tmp_path, monkeypatch):
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "a.py", "add a")
+        describe_last_commit(str(repo), "a.py")
+        _commit(repo, "b.py", "add b")
+        rebuilds = []
+        monkeypatch.setattr(CommitIndex, "rebuild", lambda self, head: rebuilds.append(head))
+        assert "add b" in describe_last_commit(str(repo), "b.py")[1]
+        assert "add a" in describe_last_commit(str(repo), "a.py")[1]
+        assert rebuilds == []
+
+    def test_rewritten_history_rebuilds(self, tmp_path):
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "a.py", "add a")
+        _commit(repo, "b.py", "add b")
+        describe_last_commit(str(repo), "b.py")
+        _git(repo, "reset", "-q", "--hard", "HEAD~1")
+        _commit(repo, "a.py", "rewrite a", text="x\n")
+        assert describe_last_commit(str(repo), "b.py")[1] == ""
+        assert "rewrite a" in describe_last_commit(str(repo), "a.py")[1]
+
+    def test_incomplete_map_defers_to_worker(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(commit_index, "MAX_COMMITS", 1)
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "old.py", "add old")
+        _commit(repo, "new.py", "add new")
+        spawned = []
+        monkeypatch.setattr(commit_index, "_spawn_extend", spawned.append)
+        describe_last_commit(str(repo), "new.py")
+        calls = _count_git(monkeypatch)
+        # Older than the window, or never committed: no git in the hook
+        assert describe_last_commit(str(repo), "old.py")[1] is None
+        assert describe_last_commit(str(repo), "brand-new.py")[1] is None
+        assert calls == [] and spawned == [repo, repo]
+        index = CommitIndex(repo)
+        assert (index.complete, index.walked) == (False, 1)
+
+    def test_extend_worker_completes_map(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(commit_index, "MAX_COMMITS", 1)
+        monkeypatch.setattr(commit_index, "EXTEND_COMMITS", 1)
+        repo = _repo(tmp_path / "r")
+        for name in ("a.py", "b.py", "c.py"):
+            _commit(repo, name, f"add {name}")
+        _commit(repo, "a.py", "touch a", text="changed\n")
+        monkeypatch.setattr(commit_index, "_spawn_extend", lambda root: None)
+        describe_last_commit(str(repo), "a.py")
+        _commit(repo, "d.py", "add d")  # HEAD moves while history is walked
+        assert commit_index.extend_worker(repo) == 0
+        index = CommitIndex(repo)
+        assert (index.complete, index.walked) == (True, 5)
+        assert {p: e[2] for p, e in index.paths.items()} == {
+            "a.py": "touch a", "b.py": "add b.py", "c.py": "add c.py", "d.py": "add d"}
+        assert describe_last_commit(str(repo), "brand-new.py")[1] == ""
+
+    def test_no_time_left_defers_sync_to_worker(self, tmp_path, monkeypatch):
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "a.py", "add a")
+        describe_last_commit(str(repo), "a.py")
+        _commit(repo, "b.py", "add b")
+        spawned = []
+        monkeypatch.setattr(commit_index, "_spawn_extend", spawned.append)
+        calls = _count_git(monkeypatch)
+        past = time.monotonic() - 1
+        assert describe_last_commit(str(repo), "b.py", deadline=past)[1] is None
+        assert calls == [] and spawned == [repo]
+        assert commit_index.extend_worker(repo) == 0
+        assert "add b" in describe_last_commit(str(repo), "b.py", deadline=past)[1]
+
+    def test_timed_out_rebuild_keeps_partial_map(self, tmp_path, monkeypatch):
+        repo = _repo(tmp_path / "r")
+        _commit(repo, "old.py", "add old")
+        _commit(repo, "new.py", "add new")
+        log = subprocess.run(
+            ["git", "log", "--name-only", "--no-renames", "--format=%x00%h%x09%ct%x09%s"],
+            cwd=repo, capture_output=True).stdout
+        cut = log[:log.index(b"new.py") + len(b"new.py\n\n\x00ab")]  # mid-header of the next commit
+
+        def slow_log(*args, **kwargs):
+            raise subprocess.TimeoutExpired(args[0], kwargs["timeout"], output=cut)
+        monkeypatch.setattr(commit_index.subprocess, "run", slow_log)
+        index = CommitIndex(repo)
+        assert index.rebuild(read_git_head(repo)[1]) is True
+        assert index.complete is False
+        assert list(index.paths) == ["new.py"]
+        assert CommitIndex(repo).paths["new.py"][2] == "add new"
@@ -0,0 +1,173 @@
+"""Tests for coverage_index.py — edited lines → covering tests.
+
+Coverage fixtures are written in the real formats: a coverage.py data file
+(file/context/line_bits tables, numbits blobs) and an lcov tracefile.
+"""
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import coverage_index
+import post_edit_guard
+from coverage_index import (
+    CoverageIndex,
+    covering_tests,
+    lines_to_mask,
+    mask_to_numbits,
+    touched_lines,
+    touched_lines_from_patch,
+)
+
+
+def _git_repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    return path
+
+
+def _write_coveragepy(root: Path, rows):
+    """rows: [(rel_path, context, [lines])] → root/.coverage"""
+    db = root / ".coverage"
+    if db.exists():
+        db.unlink()
+    conn = sqlite3.connect(str(db))
+    conn.executescript(
+        "CREATE TABLE file (id INTEGER PRIMARY KEY, path TEXT UNIQUE);"
+        "CREATE TABLE context (id INTEGER PRIMARY KEY, context TEXT UNIQUE);"
+        "CREATE TABLE line_bits (file_id INTEGER, context_id INTEGER, numbits BLOB);"
+    )
+    files, contexts = {}, {}
+    for rel, ctx, lines in rows:
+        fid = files.setdefault(rel, len(files) + 1)
+        cid = contexts.setdefault(ctx, len(contexts) + 1)
+        conn.execute("INSERT OR IGNORE INTO file VALUES (?, ?)", (fid, str(root / rel)))
+        conn.execute("INSERT OR IGNORE INTO context VALUES (?, ?)", (cid, ctx))
+        conn.execute("INSERT INTO line_bits VALUES (?, ?, ?)",
+                     (fid, cid, mask_to_numbits(lines_to_mask(lines))))
+    conn.commit()
+    conn.close()
+    return db
+
+
+ROWS = [
+    ("src/calc.py", "", [1, 2, 3, 10, 11]),  # no dynamic context
+    ("src/calc.py", "tests/test_calc.py::test_add|run", [1, 2, 3]),
+    ("src/calc.py", "tests/test_calc.py::test_div|run", [1, 10, 11]),
+    ("src/calc.py", "tests/test_calc.py::test_div|setup", [1]),
+    ("src/other.py", "tests/test_other.py::test_x|run", [5]),
+]
+
+
+class TestTouchedLines:
+
+    def test_replacement_hunk_maps_to_old_lines(self):
+        hunk = {"oldStart": 9, "oldLines": 4, "newStart": 9, "newLines": 4,
+                "lines": [" a", "-b", "+B", " c", " d"]}
+        assert touched_lines_from_patch([hunk]) == {10, 11}
+
+    def test_pure_insertion_touches_neighbours(self):
+        hunk = {"oldStart": 3, "lines": [" a", "+new", " b"]}
+        assert touched_lines_from_patch([hunk]) == {3, 4}
+
+    def test_falls_back_to_new_string_location(self):
+        content = "one\ntwo\nthree\nfour\n"
+        assert touched_lines({"new_string": "three\nfour"}, {}, content) == {3, 4}
+
+
+class TestCoverageIndex:
+
+    def test_coveragepy_contexts_become_node_ids(self, tmp_path):
+        _write_coveragepy(tmp_path, ROWS)
+        idx = CoverageIndex(tmp_path)
+        assert idx.ensure() is True
+        assert idx.tests_covering("src/calc.py", {10}) == ["tests/test_calc.py::test_div"]
+        assert idx.tests_covering("src/calc.py", {1}) == [
+            "tests/test_calc.py::test_add", "tests/test_calc.py::test_div",
+        ]
+        assert idx.tests_covering("src/calc.py", {42}) == []
+
+    def test_lcov_test_names(self, tmp_path):
+        (tmp_path / "coverage").mkdir()
+        (tmp_path / "coverage" / "lcov.info").write_text(
+            "TN:adds numbers\nSF:src/math.ts\nDA:1,1\nDA:2,0\nend_of_record\n"
+            "TN:subtracts\nSF:src/math.ts\nDA:2,3\nend_of_record\n"
+            "TN:\nSF:src/math.ts\nDA:1,9\nend_of_record\n"
+        )
+        idx = CoverageIndex(tmp_path)
+        assert idx.ensure() is True
+        assert idx.kind == "lcov"
+        assert idx.tests_covering("src/math.ts", {2}) == ["subtracts"]
+        assert idx.tests_covering("src/math.ts", {1, 2}) == ["adds numbers", "subtracts"]
+
+    def test_no_coverage_data(self, tmp_path):
+        assert CoverageIndex(tmp_path).ensure() is False
+
+    def test_rebuilds_only_when_coverage_file_changes(self, tmp_path, monkeypatch):
+        _write_coveragepy(tmp_path, ROWS)
+        CoverageIndex(tmp_path).ensure()
+
+        builds = []
+        real_build = CoverageIndex.build
+        monkeypatch.setattr(CoverageIndex, "build",
+                            lambda self, *a: builds.append(a) or real_build(self, *a))
+        CoverageIndex(tmp_path).ensure()
+        assert builds == []
+
+        _write_coveragepy(tmp_path, [("src/calc.py", "tests/test_new.py::test_it|run", [10])])
+        idx = CoverageIndex(tmp_path)
+        idx.ensure()
+        assert len(builds) == 1
+        assert idx.tests_covering("src/calc.py", {10}) == ["tests/test_new.py::test_it"]
+
+    def test_covering_tests_entry_point(self, tmp_path):
+        _write_coveragepy(tmp_path, ROWS)
+        target = tmp_path / "src" / "calc.py"
+        assert covering_tests(str(tmp_path), str(target), {2}) == (
+            "coveragepy", ["tests/test_calc.py::test_add"],
+        )
+        assert covering_tests(str(tmp_path), str(target), set()) is None
+        assert (tmp_path / ".ultra" / "cache" / coverage_index.DB_NAME).exists()
+
+    def test_hook_deadline_defers_rebuild_to_worker(self, tmp_path, monkeypatch):
+        _write_coveragepy(tmp_path, ROWS)
+        target = tmp_path / "src" / "calc.py"
+        spawned = []
+        monkeypatch.setattr(coverage_index, "_spawn_build", spawned.append)
+        deadline = time.monotonic() + 5
+        assert covering_tests(str(tmp_path), str(target), {2}, deadline=deadline) is None
+        assert spawned == [tmp_path]
+        assert coverage_index.build_worker(tmp_path) == 0
+        assert covering_tests(str(tmp_path), str(target), {2}, deadline=deadline) == (
+            "coveragepy", ["tests/test_calc.py::test_add"],
+        )
+        assert spawned == [tmp_path]
+
+
+class TestHookIntegration:
+
+    def test_reminder_names_covering_node_ids(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        src = root / "src" / "calc.py"
+        src.parent.mkdir(parents=True)
+        src.write_text("\n".join(f"x{i} = {i}" for i in range(1, 13)) + "\n")
+        _write_coveragepy(root, ROWS)
+        monkeypatch.chdir(root)
+        patch = [{"oldStart": 10, "lines": ["-x10 = 10", "+x10 = 100"]}]
+        line = post_edit_guard.check_covering_tests(
+            str(src), {"file_path": str(src)}, {"structuredPatch": patch}, src.read_text()
+        )
+        assert line == "[Test] Run: pytest tests/test_calc.py::test_div (covers edited lines)"
+
+    def test_no_coverage_keeps_name_based_reminder(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        src = root / "src" / "calc.py"
+        src.parent.mkdir(parents=True)
+        src.write_text("x = 1\n")
+        monkeypatch.chdir(root)
+        monkeypatch.delenv("COVERAGE_FILE", raising=False)
+        assert post_edit_guard.check_covering_tests(
+            str(src), {"new_string": "x = 1"}, {}, src.read_text()
+        ) is None
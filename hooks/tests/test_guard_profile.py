@@ -0,0 +1,178 @@
+"""Tests for post_edit_guard profiling mode (guard_profile.py).
+
+ULTRA_GUARD_PROFILE=json|sarif: per-checker / per-rule timing, uncapped
+findings under .ultra/debug/, and the --profile-report session summary.
+The hook runs as a subprocess inside a real git repo, as Claude Code runs it.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import guard_profile
+from guard_profile import GuardProfile, format_report, load_runs, write_sarif
+
+HOOK = Path(__file__).parent.parent / "post_edit_guard.py"
+
+
+def _repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    return path
+
+
+def _run(repo, args, payload=None, fmt="json"):
+    env = dict(os.environ)
+    env.pop(guard_profile.PROFILE_ENV, None)
+    if fmt:
+        env[guard_profile.PROFILE_ENV] = fmt
+    proc = subprocess.run(
+        [sys.executable, str(HOOK), *args],
+        input=json.dumps(payload or {}), cwd=str(repo), env=env,
+        capture_output=True, text=True, timeout=30,
+    )
+    return proc.stdout, proc.stderr
+
+
+def _todo_file(repo: Path, n: int = 8) -> Path:
+    fp = repo / "src" / "many.ts"
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    fp.write_text("".join(f"// TODO: item {i}\n" for i in range(n)))
+    return fp
+
+
+def _edit(fp: Path, session="s1"):
+    return {"tool_name": "Edit", "tool_input": {"file_path": str(fp)}, "session_id": session}
+
+
+def _records(repo: Path):
+    log = repo / ".ultra" / "debug" / guard_profile.PROFILE_LOG
+    return [json.loads(line) for line in log.read_text().splitlines()]
+
+
+class TestProfileFormat:
+
+    def test_env_values(self, monkeypatch):
+        monkeypatch.setenv(guard_profile.PROFILE_ENV, "SARIF")
+        assert guard_profile.profile_format() == "sarif"
+        monkeypatch.setenv(guard_profile.PROFILE_ENV, "1")
+        assert guard_profile.profile_format() == "json"
+        monkeypatch.delenv(guard_profile.PROFILE_ENV)
+        assert guard_profile.profile_format() is None
+
+
+class TestHookProfiling:
+
+    def test_json_mode_records_timings_and_uncapped_findings(self, tmp_path):
+        repo = _repo(tmp_path / "repo")
+        fp = _todo_file(repo, n=8)
+        stdout, _stderr = _run(repo, [], _edit(fp))
+        # Hook output is unchanged: still capped to 5 + "+N more"
+        assert "+3 more blocks" in json.loads(stdout)["hookSpecificOutput"]["additionalContext"]
+
+        records = _records(repo)
+        run = records[0]
+        assert run["type"] == "run" and run["session_id"] == "s1"
+        assert {"code_quality", "security", "task_trace", "blast_radius"} <= set(run["checkers"])
+        assert run["rules"]["CQ_BLOCK/0"]["matches"] == 8
+        assert run["rules"]["SEC_CRITICAL/0"]["calls"] == 1
+        findings = [r for r in records if r["type"] == "finding"]
+        assert len([f for f in findings if f["rule"] == "CQ_BLOCK/0"]) == 8
+
+    def test_sarif_mode_replaces_results_per_file(self, tmp_path):
+        repo = _repo(tmp_path / "repo")
+        fp = _todo_file(repo, n=3)
+        _run(repo, [], _edit(fp), fmt="sarif")
+        fp.write_text("// TODO: only one left\n")
+        _run(repo, [], _edit(fp), fmt="sarif")
+
+        doc = json.loads((repo / ".ultra" / "debug" / guard_profile.SARIF_FILE).read_text())
+        assert doc["version"] == "2.1.0"
+        results = doc["runs"][0]["results"]
+        todo = [r for r in results if r["ruleId"] == "CQ_BLOCK/0"]
+        assert len(todo) == 1
+        loc = todo[0]["locations"][0]["physicalLocation"]
+        assert loc["artifactLocation"]["uri"] == "src/many.ts"
+        assert loc["region"]["startLine"] == 1
+        assert any(r["id"] == "CQ_BLOCK/0" for r in doc["runs"][0]["tool"]["driver"]["rules"])
+
+    def test_disabled_writes_nothing(self, tmp_path):
+        repo = _repo(tmp_path / "repo")
+        fp = _todo_file(repo)
+        _run(repo, [], _edit(fp), fmt=None)
+        assert not (repo / ".ultra" / "debug" / guard_profile.PROFILE_LOG).exists()
+
+    def test_profile_report_cli(self, tmp_path):
+        repo = _repo(tmp_path / "repo")
+        fp = _todo_file(repo)
+        _run(repo, [], _edit(fp, session="old"))
+        _run(repo, [], _edit(fp, session="new"))
+        _run(repo, [], _edit(fp, session="new"))
+        stdout, _stderr = _run(repo, ["--profile-report", "--top", "3"], fmt=None)
+        assert "session new: 2 run(s)" in stdout
+        assert "Top 3 rules by total time:" in stdout
+        assert "Checkers by total time:" in stdout
+
+
+class TestReport:
+
+    def test_ranks_rules_by_total_time(self):
+        runs = [
+            {"session_id": "s", "total_ms": 5, "checkers": {"security": 3.0},
+             "rules": {"A/0": {"ms": 1.0, "calls": 1, "matches": 0},
+                       "B/0": {"ms": 4.0, "calls": 1, "matches": 2}}},
+            {"session_id": "s", "total_ms": 5, "checkers": {"security": 2.0},
+             "rules": {"A/0": {"ms": 1.5, "calls": 1, "matches": 1}}},
+        ]
+        lines = format_report(runs, top=1).splitlines()
+        rule_lines = [ln for ln in lines if ln.strip().startswith(("A/0", "B/0"))]
+        assert len(rule_lines) == 1 and rule_lines[0].strip().startswith("B/0")
+        assert any("security" in ln and "5.00" in ln for ln in lines)
+
+    def test_load_runs_defaults_to_latest_session(self, tmp_path):
+        for sid in ("a", "b", "b"):
+            p = GuardProfile("json", sid)
+            p.flush(tmp_path, "/x.py")
+        log = tmp_path / guard_profile.PROFILE_LOG
+        assert [r["session_id"] for r in load_runs(log)] == ["b", "b"]
+        assert len(load_runs(log, "a")) == 1
+
+    def test_parallel_write_sarif_keeps_every_file(self, tmp_path):
+        sarif = tmp_path / "out.sarif"
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from guard_profile import write_sarif;"
+            "f = {'rule': 'R/0', 'level': 'warning', 'line': 1, 'message': 'm'};"
+            "[write_sarif(sys.argv[2], f'{sys.argv[3]}-{i}.py', [f]) for i in range(15)]"
+        )
+        hooks = str(Path(__file__).parent.parent)
+        procs = [subprocess.Popen([sys.executable, "-c", code, hooks, str(sarif), str(w)])
+                 for w in range(4)]
+        assert all(p.wait(timeout=120) == 0 for p in procs)
+        assert len(json.loads(sarif.read_text())["runs"][0]["results"]) == 60
+
+    def test_log_rotates_only_past_byte_limit(self, tmp_path, monkeypatch):
+        log = tmp_path / guard_profile.PROFILE_LOG
+        monkeypatch.setattr(guard_profile, "MAX_LOG_LINES", 5)
+        log.write_text("x\n" * 10)
+        guard_profile._rotate(log)
+        assert log.read_text().count("\n") == 10
+        monkeypatch.setattr(guard_profile, "MAX_LOG_BYTES", 8)
+        guard_profile._rotate(log)
+        assert log.read_text() == "x\n" * 2
+        monkeypatch.setattr(guard_profile, "MAX_LOG_BYTES", 1000)
+        log.write_text("x\n" * 600)
+        guard_profile._rotate(log)
+        assert log.read_text() == "x\n" * 5
+
+    def test_write_sarif_keeps_other_files(self, tmp_path):
+        sarif = tmp_path / "out.sarif"
+        f1 = {"rule": "R/0", "level": "warning", "line": 2, "message": "m", "code": "x"}
+        write_sarif(sarif, str(tmp_path / "a.py"), [f1], str(tmp_path))
+        write_sarif(sarif, str(tmp_path / "b.py"), [f1], str(tmp_path))
+        write_sarif(sarif, str(tmp_path / "a.py"), [], str(tmp_path))
+        results = json.loads(sarif.read_text())["runs"][0]["results"]
+        uris = [r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] for r in results]
+        assert uris == ["b.py"]
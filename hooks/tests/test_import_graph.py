@@ -0,0 +1,230 @@
+"""Tests for import_graph.py — incremental reverse import index (blast radius).
+
+Real git repos in tmp_path: the graph lists files through `git ls-files`, so
+faking git would only test the fake. Parsers are tested on plain strings.
+"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import import_graph
+from import_graph import (
+    ImportGraph,
+    import_impact,
+    parse_go_imports,
+    parse_js_imports,
+    parse_python_imports,
+)
+
+
+def _git_repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    return path
+
+
+def _write(root: Path, rel: str, text: str) -> Path:
+    fp = root / rel
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    fp.write_text(text)
+    return fp
+
+
+class TestParsers:
+
+    def test_python_absolute_and_from_imports(self):
+        keys = parse_python_imports("import os\nfrom pkg.sub import mod, other\n", "app/main.py")
+        assert {"py:os", "py:pkg.sub", "py:pkg.sub.mod", "py:pkg.sub.other"} <= keys
+
+    def test_python_relative_imports_are_absolutized(self):
+        keys = parse_python_imports("from . import sibling\nfrom ..core import db\n", "src/pkg/api/views.py")
+        assert "py:src.pkg.api.sibling" in keys
+        assert "py:src.pkg.core.db" in keys
+
+    def test_python_syntax_error_falls_back_to_regex(self):
+        keys = parse_python_imports("import foo\nfrom bar.baz import x\ndef broken(:\n", "a.py")
+        assert {"py:foo", "py:bar.baz"} <= keys
+
+    def test_js_import_forms(self):
+        src = (
+            "import a from './a';\n"
+            "import { b } from '../lib/b.js';\n"
+            "import type { T } from './types';\n"
+            "export * from './reexport';\n"
+            "const c = require('./c');\n"
+            "const d = await import('./d');\n"
+            "import React from 'react';\n"
+            "import {\n  x,\n  y,\n} from './multi';\n"
+        )
+        keys = parse_js_imports(src, "src/app/main.ts")
+        assert keys == {
+            "js:src/app/a", "js:src/lib/b", "js:src/app/types", "js:src/app/reexport",
+            "js:src/app/c", "js:src/app/d", "js:src/app/multi",
+        }
+
+    def test_js_ignores_paths_escaping_repo(self):
+        assert parse_js_imports("import x from '../../x';", "src/a.ts") == set()
+
+    def test_go_single_and_block_imports(self):
+        src = 'package main\n\nimport "fmt"\nimport (\n\t"example.com/m/pkg/util"\n\tlog "github.com/x/log"\n)\n'
+        assert parse_go_imports(src) == {
+            "go:fmt", "go:example.com/m/pkg/util", "go:github.com/x/log",
+        }
+
+
+class TestImportGraph:
+
+    def _graph(self, root):
+        g = ImportGraph(root)
+        g.sweep(budget_s=None)
+        return g
+
+    def test_package_qualified_python_dependents(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/shop/__init__.py", "")
+        _write(root, "src/shop/pricing.py", "RATE = 1\n")
+        _write(root, "src/shop/cart.py", "from shop.pricing import RATE\n")
+        _write(root, "src/shop/api/views.py", "from ..pricing import RATE\n")
+        _write(root, "scripts/report.py", "import shop.pricing\n")
+        _write(root, "other/pricing_user.py", "import pricing\n")  # different module
+        g = self._graph(root)
+        assert g.dependents("src/shop/pricing.py") == [
+            "scripts/report.py", "src/shop/api/views.py", "src/shop/cart.py",
+        ]
+        g.close()
+
+    def test_sibling_script_imports(self, tmp_path):
+        # hooks/-style flat scripts: `from hook_utils import x` next to hook_utils.py
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "hooks/hook_utils.py", "X = 1\n")
+        _write(root, "hooks/guard.py", "from hook_utils import X\n")
+        _write(root, "tools/hook_utils.py", "Y = 1\n")
+        g = self._graph(root)
+        assert g.dependents("hooks/hook_utils.py") == ["hooks/guard.py"]
+        # Same module name elsewhere is not on guard.py's sys.path
+        assert g.dependents("tools/hook_utils.py") == []
+        g.close()
+
+    def test_js_relative_and_index_resolution(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/lib/index.ts", "export const x = 1;\n")
+        _write(root, "src/lib/math.ts", "export const add = 1;\n")
+        _write(root, "src/app.ts", "import { x } from './lib';\nimport { add } from './lib/math.js';\n")
+        _write(root, "src/cli.js", "const m = require('./lib/math');\n")
+        g = self._graph(root)
+        assert g.dependents("src/lib/index.ts") == ["src/app.ts"]
+        assert g.dependents("src/lib/math.ts") == ["src/app.ts", "src/cli.js"]
+        g.close()
+
+    def test_go_package_dependents(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "go.mod", "module example.com/m\n\ngo 1.22\n")
+        _write(root, "pkg/util/strings.go", "package util\n")
+        _write(root, "cmd/main.go", 'package main\n\nimport (\n\t"example.com/m/pkg/util"\n)\n')
+        g = self._graph(root)
+        assert g.dependents("pkg/util/strings.go") == ["cmd/main.go"]
+        g.close()
+
+    def test_transitive_count(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "a.py", "")
+        _write(root, "b.py", "import a\n")
+        _write(root, "c.py", "import b\n")
+        _write(root, "d.py", "import c\nimport a\n")
+        g = self._graph(root)
+        direct, transitive, finished = g.fan_in("a.py")
+        assert direct == ["b.py", "d.py"]
+        assert transitive == 3 and finished
+        g.close()
+
+    def test_refresh_reparses_only_changed_files(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "a.py", "")
+        b = _write(root, "b.py", "")
+        g = self._graph(root)
+        assert g.dependents("a.py") == []
+
+        parsed = []
+        real_parse = import_graph.parse_imports
+        monkeypatch.setattr(import_graph, "parse_imports",
+                            lambda src, rel: parsed.append(rel) or real_parse(src, rel))
+        b.write_text("import a\n")
+        g.refresh(touched=["b.py"])
+        assert parsed == ["b.py"]
+        assert g.dependents("a.py") == ["b.py"]
+        g.close()
+
+    def test_deleted_file_edges_are_dropped(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "a.py", "")
+        b = _write(root, "b.py", "import a\n")
+        g = self._graph(root)
+        assert g.dependents("a.py") == ["b.py"]
+        b.unlink()
+        g.refresh(touched=["b.py"])
+        assert g.dependents("a.py") == []
+        g.close()
+
+    def test_budgeted_sweep_resumes(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        for i in range(200):
+            _write(root, f"m{i}.py", "import base\n")
+        _write(root, "base.py", "")
+        g = ImportGraph(root)
+        assert g.sweep(budget_s=-1) is False  # deadline already passed
+        assert g.refresh() is True  # next refresh finishes the pending sweep
+        assert len(g.dependents("base.py")) == 200
+        g.close()
+
+
+    def test_unknown_listing_drops_nothing(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "a.py", "")
+        _write(root, "b.py", "import a\n")
+        g = self._graph(root)
+        monkeypatch.setattr(import_graph, "load_tracked_files", lambda *a, **kw: ("", []))
+        assert g.sweep(budget_s=None) is False
+        assert g.dependents("a.py") == ["b.py"]
+        g.close()
+
+    def test_fan_in_past_deadline_is_not_memoized(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "a.py", "")
+        _write(root, "b.py", "import a\n")
+        _write(root, "c.py", "import b\n")
+        g = self._graph(root)
+        assert g.fan_in("a.py", deadline=time.monotonic() - 1) == (["b.py"], 0, False)
+        assert g.fan_in("a.py") == (["b.py"], 2, True)
+        assert g.fan_in("a.py", deadline=time.monotonic() - 1) == (["b.py"], 2, True)
+        g.close()
+
+
+class TestImportImpact:
+
+    def test_returns_relative_dependents(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        target = _write(root, "core.py", "")
+        _write(root, "user.py", "import core\n")
+        direct, transitive, complete = import_impact(str(root), str(target))
+        assert direct == ["user.py"]
+        assert transitive == 1
+        assert complete is True
+        assert (root / ".ultra" / "cache" / import_graph.DB_NAME).exists()
+
+    def test_no_time_left_skips_sweep(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        target = _write(root, "core.py", "")
+        _write(root, "user.py", "import core\n")
+        listed = []
+        monkeypatch.setattr(import_graph, "load_tracked_files",
+                            lambda *a, **kw: listed.append(kw) or ("", []))
+        direct, _transitive, complete = import_impact(
+            str(root), str(target), deadline=time.monotonic() - 1)
+        assert (direct, complete, listed) == ([], False, [])
+
+    def test_non_code_file_is_ignored(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        md = _write(root, "README.md", "# hi\n")
+        assert import_impact(str(root), str(md)) is None
@@ -17,6 +17,7 @@ from mid_workflow_recall import (
     SOURCE_EXTENSIONS,
     MAX_INJECTIONS,
     _looks_like_symbol_query,
+    handle_grep_advisory,
 )
 
 
@@ -64,3 +65,23 @@ class TestSymbolQueryHeuristic:
         assert not _looks_like_symbol_query("TODO")
         assert not _looks_like_symbol_query("error.*timeout")
         assert not _looks_like_symbol_query("foo bar")
+
+
+class TestKnowledgeGrepAdvisory:
+    """Grep scoped to .ultra/ knowledge → pointer to ultra_search.py."""
+
+    def test_points_at_ultra_search(self, capsys):
+        handle_grep_advisory({"pattern": "token.*refresh", "path": ".ultra/specs"}, "")
+        err = capsys.readouterr().err
+        assert 'ultra_search.py "token refresh"' in err
+
+    def test_absolute_and_research_paths(self, capsys):
+        handle_grep_advisory({"pattern": "cache", "path": "/repo/.ultra"}, "")
+        handle_grep_advisory({"pattern": "cache", "path": "docs/research"}, "")
+        assert capsys.readouterr().err.count("ultra_search.py") == 2
+
+    def test_other_paths_keep_symbol_routing(self, capsys):
+        handle_grep_advisory({"pattern": "error.*timeout", "path": "src"}, "")
+        handle_grep_advisory({"pattern": "getUserById", "path": "src"}, "")
+        err = capsys.readouterr().err
+        assert "ultra_search" not in err and "query_graph" in err
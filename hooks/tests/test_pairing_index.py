@@ -0,0 +1,141 @@
+"""Tests for pairing_index.py — source → test pairing from the tracked file list.
+
+Real git repos in tmp_path: the index is built from `git ls-files`. Naming
+rules are post_edit_guard._TEST_PATTERNS, the same table the hook passes in.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import hook_utils
+import post_edit_guard
+from pairing_index import PairingIndex, dirs_match, find_test_files, pairing_keys
+
+PATTERNS = post_edit_guard._TEST_PATTERNS
+
+
+def _git_repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    return path
+
+
+def _write(root: Path, rel: str, text: str = "") -> Path:
+    fp = root / rel
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    fp.write_text(text)
+    return fp
+
+
+def _lookup(root: Path, rel: str):
+    return find_test_files(str(root), str(root / rel), PATTERNS)
+
+
+class TestNamingAndDirs:
+
+    def test_pairing_keys_per_convention(self):
+        assert pairing_keys("tests/test_bar.py", PATTERNS) == [".py:bar"]
+        assert pairing_keys("pkg/bar_test.go", PATTERNS) == [".go:bar"]
+        assert pairing_keys("src/Bar.spec.ts", PATTERNS) == [".ts:Bar"]
+        assert pairing_keys("src/test/java/x/BarTest.java", PATTERNS) == [".java:Bar"]
+        assert pairing_keys("src/bar.py", PATTERNS) == []
+
+    def test_dirs_match_drops_neutral_dirs(self):
+        assert dirs_match("src/foo/bar.py", "tests/unit/foo/test_bar.py")
+        assert dirs_match("lib/bar.py", "tests/test_bar.py")
+        assert dirs_match("src/main/java/x/Bar.java", "src/test/java/x/BarTest.java")
+        assert not dirs_match("src/foo/bar.py", "tests/other/test_bar.py")
+
+
+class TestFindTestFiles:
+
+    def test_deeply_mirrored_python_test(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/foo/bar.py")
+        _write(root, "tests/unit/foo/test_bar.py")
+        assert _lookup(root, "src/foo/bar.py") == ["tests/unit/foo/test_bar.py"]
+
+    def test_returns_every_match(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/api/client.ts")
+        _write(root, "src/api/client.test.ts")
+        _write(root, "src/api/__tests__/client.spec.ts")
+        _write(root, "src/other/client.test.ts")  # same stem, unrelated dir
+        assert _lookup(root, "src/api/client.ts") == [
+            "src/api/__tests__/client.spec.ts", "src/api/client.test.ts",
+        ]
+
+    def test_no_match_is_empty_list(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/lonely.py")
+        assert _lookup(root, "src/lonely.py") == []
+
+    def test_outside_repo_returns_none(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        stray = _write(tmp_path, "elsewhere/x.py")
+        assert find_test_files(str(root), str(stray), PATTERNS) is None
+
+    def test_index_is_persisted(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/a.py")
+        _write(root, "tests/test_a.py")
+        _lookup(root, "src/a.py")
+        assert (root / ".ultra" / "cache" / "test-index.json").exists()
+
+
+class TestIncrementalRefresh:
+
+    def test_added_and_removed_tests_are_patched(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(hook_utils, "TRACKED_FILES_TTL_S", 0)
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/a.py")
+        old = _write(root, "tests/test_a.py")
+        assert _lookup(root, "src/a.py") == ["tests/test_a.py"]
+
+        old.unlink()
+        _write(root, "tests/unit/test_a.py")
+        assert _lookup(root, "src/a.py") == ["tests/unit/test_a.py"]
+
+    def test_unchanged_listing_skips_rebuild(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/a.py")
+        _write(root, "tests/test_a.py")
+        PairingIndex(root, PATTERNS).refresh()
+
+        calls = []
+        monkeypatch.setattr(PairingIndex, "_add", lambda self, rel: calls.append(rel))
+        PairingIndex(root, PATTERNS).refresh()
+        assert calls == []
+
+    def test_just_written_test_is_noted(self, tmp_path):
+        root = _git_repo(tmp_path / "repo")
+        _write(root, "src/a.py")
+        _lookup(root, "src/a.py")  # index + cached listing taken before the test exists
+        _write(root, "tests/test_a.py")
+        _lookup(root, "tests/test_a.py")
+        assert PairingIndex(root, PATTERNS).tests_for("src/a.py") == ["tests/test_a.py"]
+
+
+class TestHookIntegration:
+
+    def test_tdd_check_finds_mirrored_test(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        src = _write(root, "src/foo/bar.py")
+        _write(root, "tests/unit/foo/test_bar.py")
+        monkeypatch.chdir(root)
+        post_edit_guard._paired_tests_cache.clear()
+        assert post_edit_guard.check_test_file_exists(str(src)) is None
+
+    def test_reminder_lists_all_tests(self, tmp_path, monkeypatch):
+        root = _git_repo(tmp_path / "repo")
+        src = _write(root, "src/foo/bar.py")
+        _write(root, "tests/unit/foo/test_bar.py")
+        _write(root, "tests/integration/foo/test_bar.py")
+        monkeypatch.chdir(root)
+        post_edit_guard._paired_tests_cache.clear()
+        tests = post_edit_guard.check_test_reminder(str(src))
+        line = post_edit_guard.format_test_reminder(tests)
+        assert line == (
+            "[Test] Run: pytest tests/integration/foo/test_bar.py tests/unit/foo/test_bar.py"
+        )
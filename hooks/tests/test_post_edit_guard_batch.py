@@ -0,0 +1,194 @@
+"""Tests for post_edit_guard.py subagent batch mode.
+
+Inside a subagent (hook input carries agent_id) with ULTRA_SUBAGENT_BATCH_SCAN=1
+an edit only runs the SEC_CRITICAL scan and records the path; SubagentStop
+scans every recorded file and emits one aggregated advisory. Real files,
+real subprocess — the hook is exercised the way Claude Code runs it.
+"""
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import post_edit_guard
+from post_edit_guard import (
+    format_batch_advisory,
+    pop_batched_edits,
+    record_batched_edit,
+    scan_file,
+    scan_files_parallel,
+)
+
+HOOK = Path(__file__).parent.parent / "post_edit_guard.py"
+
+
+def _agent_id():
+    return f"test-agent-{uuid.uuid4().hex[:12]}"
+
+
+def _run(args, payload, cwd, batch=True):
+    env = dict(os.environ)
+    if batch:
+        env[post_edit_guard.BATCH_ENV] = "1"
+    else:
+        env.pop(post_edit_guard.BATCH_ENV, None)
+    proc = subprocess.run(
+        [sys.executable, str(HOOK), *args],
+        input=json.dumps(payload), cwd=str(cwd), env=env,
+        capture_output=True, text=True, timeout=30,
+    )
+    return proc.stdout, proc.stderr, proc.returncode
+
+
+def _write_todo_files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        fp = tmp_path / f"mod_{i}.ts"
+        fp.write_text(f"// TODO: finish module {i}\nexport const v{i} = {i};\n")
+        paths.append(str(fp))
+    return paths
+
+
+class TestLedger:
+    """record_batched_edit / pop_batched_edits round trip."""
+
+    def test_pop_returns_recorded_paths_deduplicated(self):
+        aid = _agent_id()
+        record_batched_edit(aid, "/tmp/a.ts")
+        record_batched_edit(aid, "/tmp/b.ts")
+        record_batched_edit(aid, "/tmp/a.ts")
+        assert pop_batched_edits(aid) == ["/tmp/a.ts", "/tmp/b.ts"]
+
+    def test_pop_clears_ledger(self):
+        aid = _agent_id()
+        record_batched_edit(aid, "/tmp/a.ts")
+        pop_batched_edits(aid)
+        assert pop_batched_edits(aid) == []
+
+    def test_pop_unknown_agent_is_empty(self):
+        assert pop_batched_edits(_agent_id()) == []
+
+    def test_agent_id_is_sanitized_in_ledger_name(self):
+        path = post_edit_guard._batch_ledger_path("../../etc/passwd")
+        assert "/" not in os.path.basename(path)
+        assert os.path.dirname(path) == os.path.dirname(post_edit_guard._batch_ledger_path("x"))
+
+
+class TestParallelScan:
+    """scan_files_parallel matches a serial scan_file, in input order."""
+
+    def test_matches_serial_results(self, tmp_path):
+        paths = _write_todo_files(tmp_path, 6)
+        parallel = scan_files_parallel(paths)
+        assert [p for p, _, _ in parallel] == paths
+        for path, issues, has_blocks in parallel:
+            assert (issues, has_blocks) == scan_file(path)
+            assert any("TODO" in i for i in issues)
+
+    def test_unreadable_paths_yield_no_issues(self, tmp_path):
+        missing = str(tmp_path / "gone.ts")
+        assert scan_files_parallel([missing]) == [(missing, [], False)]
+
+
+class TestFormatBatchAdvisory:
+
+    def test_empty_when_nothing_flagged(self):
+        assert format_batch_advisory("coder", [("/x/a.ts", [], False)]) == ""
+
+    def test_groups_issues_per_file(self):
+        results = [
+            ("/x/a.ts", ["[CQ:ADVISORY] a.ts:1 TODO comment"], False),
+            ("/x/b.ts", [], False),
+            ("/x/c.ts", ["[SEC:CRIT] c.ts:2 Hardcoded API key"], True),
+        ]
+        text = format_batch_advisory("coder", results)
+        assert text.startswith("[Batch Scan] subagent coder edited 3 file(s); 2 with advisories")
+        assert "1 with SEC:CRIT" in text
+        assert "a.ts:1 TODO" in text
+        assert "c.ts:2 Hardcoded" in text
+        assert "b.ts" not in text
+
+    def test_caps_output_length(self):
+        results = [(f"/x/f{i}.ts", [f"[CQ:ADVISORY] f{i}.ts:1 TODO"] * 5, False) for i in range(30)]
+        lines = format_batch_advisory("coder", results).split("\n")
+        assert len(lines) == post_edit_guard.BATCH_MAX_LINES + 1
+        assert "more lines" in lines[-1]
+
+
+class TestHookBatchMode:
+    """End-to-end: PostToolUse defers, SubagentStop aggregates."""
+
+    def test_subagent_edit_is_deferred(self, tmp_path):
+        aid = _agent_id()
+        (fp,) = _write_todo_files(tmp_path, 1)
+        payload = {"tool_name": "Edit", "tool_input": {"file_path": fp}, "agent_id": aid}
+        stdout, _stderr, code = _run([], payload, tmp_path)
+        assert code == 0
+        assert json.loads(stdout) == {}
+        assert pop_batched_edits(aid) == [fp]
+
+    def test_without_env_subagent_edit_is_scanned_inline(self, tmp_path):
+        aid = _agent_id()
+        (fp,) = _write_todo_files(tmp_path, 1)
+        payload = {"tool_name": "Edit", "tool_input": {"file_path": fp}, "agent_id": aid}
+        stdout, _stderr, _code = _run([], payload, tmp_path, batch=False)
+        assert "TODO" in json.loads(stdout)["hookSpecificOutput"]["additionalContext"]
+        assert pop_batched_edits(aid) == []
+
+    def test_critical_secret_still_blocks_immediately(self, tmp_path):
+        aid = _agent_id()
+        fp = tmp_path / "client.ts"
+        fp.write_text('const key = "sk-abcdefghijklmnopqrstuvwxyz123456";\n')
+        payload = {"tool_name": "Write", "tool_input": {"file_path": str(fp)}, "agent_id": aid}
+        stdout, _stderr, _code = _run([], payload, tmp_path)
+        result = json.loads(stdout)
+        assert result["decision"] == "block"
+        assert "SEC:CRIT" in result["reason"]
+        assert pop_batched_edits(aid) == []
+
+    def test_subagent_stop_emits_one_aggregated_advisory(self, tmp_path):
+        aid = _agent_id()
+        paths = _write_todo_files(tmp_path, 5)
+        for fp in paths:
+            payload = {"tool_name": "Edit", "tool_input": {"file_path": fp}, "agent_id": aid}
+            _run([], payload, tmp_path)
+
+        stop = {"agent_id": aid, "agent_type": "coder", "hook_event_name": "SubagentStop"}
+        stdout, stderr, code = _run(["--subagent-stop"], stop, tmp_path)
+        assert code == 0
+        out = json.loads(stdout)["hookSpecificOutput"]
+        assert out["hookEventName"] == "SubagentStop"
+        context = out["additionalContext"]
+        assert "edited 5 file(s); 5 with advisories" in context
+        for i in range(5):
+            assert f"mod_{i}.ts" in context
+        assert "[Batch Scan]" in stderr
+        # Ledger consumed — a second stop is a no-op
+        stdout, _stderr, _code = _run(["--subagent-stop"], stop, tmp_path)
+        assert json.loads(stdout) == {}
+
+    def test_subagent_stop_journals_progress(self, tmp_path):
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        tasks = tmp_path / ".ultra" / "tasks" / "tasks.json"
+        tasks.parent.mkdir(parents=True)
+        tasks.write_text(json.dumps({"tasks": [{"id": "1", "title": "T", "status": "in_progress"}]}))
+        aid = _agent_id()
+        paths = _write_todo_files(tmp_path, 2)
+        for fp in paths:
+            _run([], {"tool_name": "Edit", "tool_input": {"file_path": fp}, "agent_id": aid,
+                      "session_id": "sess-sub"}, tmp_path)
+        stop = {"agent_id": aid, "agent_type": "coder", "session_id": "sess-sub"}
+        _stdout, _stderr, code = _run(["--subagent-stop"], stop, tmp_path)
+        assert code == 0
+        journal = tmp_path / ".ultra" / "tasks" / "progress" / "task-1.jsonl"
+        events = [json.loads(line) for line in journal.read_text().splitlines()]
+        assert sorted(e["file"] for e in events) == ["mod_0.ts", "mod_1.ts"]
+        assert all(e["adv"] for e in events)
+
+    def test_subagent_stop_without_ledger_is_silent(self, tmp_path):
+        stdout, _stderr, code = _run(["--subagent-stop"], {"agent_id": _agent_id()}, tmp_path)
+        assert code == 0
+        assert json.loads(stdout) == {}
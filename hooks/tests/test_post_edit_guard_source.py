@@ -0,0 +1,112 @@
+"""Tests for post_edit_guard.py byte-level scanning.
+
+read_source sniffs the first 8KB for binaries before reading the rest;
+SourceText maps byte offsets to lines without decoding the whole file.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import post_edit_guard
+from post_edit_guard import (
+    SNIFF_BYTES,
+    SourceText,
+    check_mocks,
+    check_scope_reduction,
+    check_silent_catches,
+    read_source,
+    scan_file,
+)
+
+
+class TestReadSource:
+
+    def test_returns_bytes(self, tmp_path):
+        fp = tmp_path / "a.ts"
+        fp.write_text("const a = 1;\n")
+        assert read_source(str(fp)) == b"const a = 1;\n"
+
+    def test_rejects_nul_in_head(self, tmp_path):
+        fp = tmp_path / "blob.js"
+        fp.write_bytes(b"\x7fELF\x00\x00\x01" + b"x" * 100)
+        assert read_source(str(fp)) is None
+
+    def test_rejects_invalid_utf8_head(self, tmp_path):
+        fp = tmp_path / "latin1.py"
+        fp.write_bytes("caf\xe9 = 1\n".encode("latin-1"))
+        assert read_source(str(fp)) is None
+
+    def test_multibyte_char_across_sniff_boundary(self, tmp_path):
+        fp = tmp_path / "wide.py"
+        data = b"#" * (SNIFF_BYTES - 1) + "é".encode("utf-8") + b"\n# TODO: later\n"
+        fp.write_bytes(data)
+        assert read_source(str(fp)) == data
+
+    def test_missing_and_oversized(self, tmp_path, monkeypatch):
+        assert read_source(str(tmp_path / "gone.py")) is None
+        fp = tmp_path / "big.py"
+        fp.write_text("x = 1\n" * 10)
+        monkeypatch.setattr(post_edit_guard, "MAX_SCAN_BYTES", 10)
+        assert read_source(str(fp)) is None
+
+
+class TestSourceText:
+
+    def test_line_numbers_and_lines(self):
+        src = SourceText(b"one\ntwo\r\nthree")
+        assert src.line_count() == 3
+        assert [src.line_number(p) for p in (0, 3, 4, 9, 13)] == [1, 1, 2, 3, 3]
+        assert src.line(2) == "two\r"
+        assert src.line(3) == "three"
+        assert src.line(4) == ""
+
+    def test_head_decodes_only_leading_lines(self):
+        src = SourceText("a\nb\nc\n".encode())
+        assert src.head(2) == "a\nb\n"
+        assert src.head(10) == "a\nb\nc\n"
+
+    def test_invalid_bytes_are_replaced_in_snippets(self):
+        src = SourceText(b"ok\nbad \xff line\n")
+        assert src.line(2) == "bad � line"
+
+
+class TestNonAsciiSource:
+    """Bytes patterns: keywords match ASCII, identifiers may be non-ASCII."""
+
+    def test_scope_phrase_is_not_cut_inside_a_character(self):
+        src = SourceText('msg = "v1 ééééééééé later"\n'.encode())
+        assert [w["rule"] for w in check_scope_reduction("/p/src/a.py", src)] == ["SCOPE/3"]
+
+    def test_silent_catch_with_non_ascii_names(self):
+        src = SourceText("try:\n    x()\nexcept Fehler_Ä as é:\n    pass\n".encode())
+        assert check_silent_catches("/p/src/a.py", src) == [(3, "except Fehler_Ä as é:")]
+
+    def test_mock_class_with_non_ascii_name(self):
+        src = SourceText("class MockÄpfel {}\n".encode())
+        assert [v["rule"] for v in check_mocks("/p/tests/a.test.ts", src)] == ["MOCK/8"]
+
+    def test_keyword_next_to_cjk_text_matches(self):
+        src = SourceText("# 这是placeholder实现\n".encode())
+        assert [w["rule"] for w in check_scope_reduction("/p/src/a.py", src)] == ["SCOPE/2"]
+
+
+class TestScanFile:
+
+    def test_finding_deep_in_file_reports_right_line(self, tmp_path):
+        fp = tmp_path / "deep.ts"
+        fp.write_text("const x = 1;\n" * 5000 + "// TODO: finish\n")
+        issues, has_blocks = scan_file(str(fp))
+        assert any("deep.ts:5001 TODO" in i for i in issues)
+        assert has_blocks is False
+
+    def test_str_content_is_accepted(self, tmp_path):
+        fp = tmp_path / "s.ts"
+        content = 'const key = "sk-abcdefghijklmnopqrstuvwxyz123456";\n'
+        issues, has_blocks = scan_file(str(fp), content)
+        assert has_blocks is True
+        assert any("s.ts:1 Hardcoded OpenAI API key" in i for i in issues)
+
+    def test_binary_with_code_extension_yields_nothing(self, tmp_path):
+        fp = tmp_path / "bundle.js"
+        fp.write_bytes(b"// TODO: x\n\x00\x01\x02")
+        assert scan_file(str(fp)) == ([], False)
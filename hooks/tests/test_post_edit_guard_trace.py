@@ -4,7 +4,7 @@ Verifies file→task reverse lookup via relations.json produces meaningful
 stderr lines (task id + title + first AC bullets). monkeypatch is used to
 fix get_git_toplevel — we are not testing git, only the lookup logic.
 
-Phase 5C tests use a real `git init` so _git_short returns real branch /
+Phase 5C tests use a real `git init` so commit_index reads real branch /
 commit data — those tests verify the no-task fallback path.
 """
 import json
@@ -0,0 +1,170 @@
+"""Tests for progress_journal.py — append-only progress events + snapshots.
+
+Appends must never lose concurrent writers' events, snapshots keep the
+progress.json shape readers already parse, and the full advisory history
+stays available from the journal.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import hook_utils
+import progress_journal
+from progress_journal import (
+    append_event, compact, has_tail, journal_path, load_progress, snapshot_path,
+)
+
+SCRIPT = Path(__file__).parent.parent / "progress_journal.py"
+
+
+def _snapshot(root: Path, tid="1") -> dict:
+    return json.loads(snapshot_path(root, tid).read_text(encoding="utf-8"))
+
+
+class TestAppendAndLoad:
+
+    def test_events_fold_into_snapshot(self, tmp_path):
+        append_event(tmp_path, "1", file="src/a.ts")
+        append_event(tmp_path, "1", file="src/b.ts", advisories=["missing test"])
+        append_event(tmp_path, "1", file="src/a.ts", scores={"tests_written": 40})
+        assert not snapshot_path(tmp_path, "1").exists()
+        assert has_tail(tmp_path, "1")
+
+        progress = load_progress(tmp_path, "1")
+        assert progress["files_touched"] == ["src/a.ts", "src/b.ts"]
+        assert [a["msg"] for a in progress["advisories"]] == ["missing test"]
+        assert progress["advisories"][0]["file"] == "src/b.ts"
+        assert progress["evidence_score"]["tests_written"] == 40
+        assert progress["evidence_score"]["tests_passed"] == 0
+        # Compacted on read: snapshot persisted, no tail left
+        assert _snapshot(tmp_path)["journal_offset"] == journal_path(tmp_path, "1").stat().st_size
+        assert not has_tail(tmp_path, "1")
+        append_event(tmp_path, "1", file="src/c.ts")
+        assert has_tail(tmp_path, "1")
+        assert load_progress(tmp_path, "1")["files_touched"][-1] == "src/c.ts"
+
+    def test_no_progress(self, tmp_path):
+        assert load_progress(tmp_path, "1") is None
+        assert not has_tail(tmp_path, "1")
+
+    def test_legacy_snapshot_kept(self, tmp_path):
+        path = snapshot_path(tmp_path, "1")
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps({"files_touched": ["old.py"], "advisories": [
+            {"at": "2026-01-01", "file": "old.py", "msg": "legacy"}]}))
+        assert load_progress(tmp_path, "1")["files_touched"] == ["old.py"]
+        append_event(tmp_path, "1", file="new.py")
+        progress = load_progress(tmp_path, "1")
+        assert progress["files_touched"] == ["old.py", "new.py"]
+        assert progress["advisories_total"] == 1
+
+    def test_torn_last_line_waits(self, tmp_path):
+        append_event(tmp_path, "1", file="a.py")
+        with open(journal_path(tmp_path, "1"), "ab") as f:
+            f.write(b'{"at": "x", "file": "b.p')
+        assert load_progress(tmp_path, "1")["files_touched"] == ["a.py"]
+        with open(journal_path(tmp_path, "1"), "ab") as f:
+            f.write(b'y"}\n')
+        assert load_progress(tmp_path, "1")["files_touched"] == ["a.py", "b.py"]
+
+    def test_truncated_journal_rebuilds(self, tmp_path):
+        for name in ("a.py", "b.py", "c.py"):
+            append_event(tmp_path, "1", file=name)
+        load_progress(tmp_path, "1")
+        journal_path(tmp_path, "1").write_text('{"at": "x", "file": "z.py"}\n')
+        assert load_progress(tmp_path, "1")["files_touched"] == ["z.py"]
+
+
+class TestAdvisoryHistory:
+
+    def test_snapshot_capped_history_complete(self, tmp_path):
+        cap = hook_utils.MAX_ADVISORIES_PER_TASK
+        for i in range(cap + 30):
+            append_event(tmp_path, "1", file="a.py", advisories=[f"adv {i}"])
+        progress = load_progress(tmp_path, "1")
+        assert len(progress["advisories"]) == cap
+        assert progress["advisories"][-1]["msg"] == f"adv {cap + 29}"
+        assert progress["advisories_total"] == cap + 30
+        full = load_progress(tmp_path, "1", full_history=True)
+        assert [a["msg"] for a in full["advisories"]] == [f"adv {i}" for i in range(cap + 30)]
+
+    def test_cli_advisories(self, tmp_path):
+        append_event(tmp_path, "7", advisories=["one", "two"])
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPT), "7", "--advisories", "--root", str(tmp_path)],
+            capture_output=True, text=True, timeout=30,
+        )
+        assert proc.returncode == 0
+        assert [a["msg"] for a in json.loads(proc.stdout)] == ["one", "two"]
+
+
+class TestCompaction:
+
+    def test_compacts_at_byte_boundary(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(progress_journal, "COMPACT_BYTES", 256)
+        for i in range(10):
+            append_event(tmp_path, "1", file=f"src/file_{i}.ts")
+        snap = _snapshot(tmp_path)
+        assert 0 < snap["journal_offset"] <= journal_path(tmp_path, "1").stat().st_size
+        assert len(snap["files_touched"]) >= 3
+
+    def test_compact_is_idempotent(self, tmp_path):
+        append_event(tmp_path, "1", file="a.py", advisories=["x"])
+        assert compact(tmp_path, "1") and compact(tmp_path, "1")
+        assert _snapshot(tmp_path)["advisories_total"] == 1
+
+    def test_snapshot_carries_journal_mtime(self, tmp_path):
+        append_event(tmp_path, "1", file="a.py")
+        journal = journal_path(tmp_path, "1")
+        os.utime(journal, ns=(1_000_000_000, 1_000_000_000))
+        assert compact(tmp_path, "1")
+        assert (tmp_path / ".ultra" / "tasks" / "progress" / "task-1.json").stat().st_mtime_ns \
+            == journal.stat().st_mtime_ns
+        assert not list(journal.parent.glob("*.tmp"))
+
+
+class TestConcurrency:
+
+    def test_parallel_writers_lose_nothing(self, tmp_path):
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from progress_journal import append_event;"
+            "[append_event(sys.argv[2], '1', file=f'w{sys.argv[3]}/{i}.py',"
+            " advisories=[f'{sys.argv[3]}-{i}']) for i in range(150)]"
+        )
+        procs = [subprocess.Popen([sys.executable, "-c", code, str(SCRIPT.parent),
+                                   str(tmp_path), str(w)]) for w in range(4)]
+        assert all(p.wait(timeout=60) == 0 for p in procs)
+        progress = load_progress(tmp_path, "1")
+        assert len(progress["files_touched"]) == 600
+        assert progress["advisories_total"] == 600
+
+
+class TestIntegration:
+
+    def test_relations_sync_sees_journal_only_edits(self, tmp_path):
+        from relations_sync import sync_relations
+        tasks_data = {"tasks": [{"id": "1", "title": "A", "status": "in_progress"}]}
+        tasks = tmp_path / ".ultra" / "tasks" / "tasks.json"
+        tasks.parent.mkdir(parents=True)
+        tasks.write_text(json.dumps(tasks_data))
+        append_event(tmp_path, "1", file="src/a.ts")
+        assert "src/a.ts" in sync_relations(tmp_path).rel["files"]
+        append_event(tmp_path, "1", file="src/b.ts")
+        assert set(sync_relations(tmp_path).rel["files"]) == {"src/a.ts", "src/b.ts"}
+
+    def test_update_task_progress_appends(self, tmp_path, monkeypatch):
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        tasks = tmp_path / ".ultra" / "tasks" / "tasks.json"
+        tasks.parent.mkdir(parents=True)
+        tasks.write_text(json.dumps({"tasks": [{"id": "3", "status": "in_progress"}]}))
+        monkeypatch.chdir(tmp_path)
+        hook_utils.update_task_progress(str(tmp_path / "src" / "x.py"), advisories=["warn"])
+        hook_utils.update_task_progress(str(tmp_path / "src" / "x.py"))
+        assert journal_path(tmp_path, "3").read_text().count("\n") == 2
+        progress = hook_utils.load_task_progress("3")
+        assert progress["files_touched"] == ["src/x.py"]
+        assert hook_utils.get_distance_to_done("3").startswith("0/6 evidence dimensions")
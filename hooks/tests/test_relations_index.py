@@ -0,0 +1,117 @@
+"""Tests for relations_index.py — indexed file → task sidecar.
+
+relations_sync writes .ultra/cache/relations.db next to relations.json;
+post_edit_guard's check_task_trace reads owners, titles and AC bullets from
+it with one keyed lookup, falling back to the JSON when the sidecar is stale.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import post_edit_guard
+from post_edit_guard import check_task_trace
+from relations_index import is_current, lookup_owners, write_index
+
+HOOK_DIR = Path(__file__).parent.parent
+
+
+def _rel(files: dict) -> dict:
+    return {
+        "tasks": {
+            "1": {"title": "Auth", "status": "in_progress", "context_file": "contexts/task-1.md"},
+            "2": {"title": "Pool", "status": "pending", "context_file": ""},
+        },
+        "files": files,
+    }
+
+
+def _publish(root: Path, rel: dict) -> None:
+    path = root / ".ultra" / "relations.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(rel), encoding="utf-8")
+
+
+class TestSidecar:
+
+    def test_round_trip(self, tmp_path):
+        rel = _rel({"src/a.ts": {"tasks": ["1", "2"], "from": ["target_files"]}})
+        _publish(tmp_path, rel)
+        assert write_index(tmp_path, rel, {"1": ["- AC one"]}) is True
+        assert is_current(tmp_path)
+        found = lookup_owners(tmp_path, "src/a.ts")
+        assert found["from"] == ["target_files"]
+        assert [(t["id"], t["title"], t["status"], t["ac"]) for t in found["tasks"]] == [
+            ("1", "Auth", "in_progress", ["- AC one"]),
+            ("2", "Pool", "pending", []),
+        ]
+        assert lookup_owners(tmp_path, "src/other.ts") == {}
+
+    def test_stale_when_relations_json_changes(self, tmp_path):
+        rel = _rel({"src/a.ts": {"tasks": ["1"], "from": ["target_files"]}})
+        _publish(tmp_path, rel)
+        write_index(tmp_path, rel, {})
+        _publish(tmp_path, _rel({}) | {"note": "hand edited"})
+        assert is_current(tmp_path) is False
+        assert lookup_owners(tmp_path, "src/a.ts") is None
+
+    def test_missing_sidecar(self, tmp_path):
+        assert lookup_owners(tmp_path, "src/a.ts") is None
+
+    def test_patch_only_given_paths(self, tmp_path):
+        rel = _rel({
+            "src/a.ts": {"tasks": ["1"], "from": ["target_files"]},
+            "src/b.ts": {"tasks": ["2"], "from": ["target_files"]},
+        })
+        _publish(tmp_path, rel)
+        write_index(tmp_path, rel, {})
+        del rel["files"]["src/a.ts"]
+        rel["files"]["src/c.ts"] = {"tasks": ["1"], "from": ["files_touched"]}
+        _publish(tmp_path, rel)
+        write_index(tmp_path, rel, {}, paths={"src/a.ts", "src/c.ts"})
+        assert lookup_owners(tmp_path, "src/a.ts") == {}
+        assert lookup_owners(tmp_path, "src/b.ts")["tasks"][0]["id"] == "2"
+        assert lookup_owners(tmp_path, "src/c.ts")["from"] == ["files_touched"]
+
+
+class TestTraceUsesSidecar:
+
+    def _project(self, repo: Path) -> None:
+        subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+        ultra = repo / ".ultra" / "tasks"
+        (ultra / "contexts").mkdir(parents=True)
+        (ultra / "contexts" / "task-1.md").write_text(
+            "**Target Files**:\n- `src/auth.ts`\n\n"
+            "## Acceptance Criteria\n- Login returns a token\n- Bad password is rejected\n"
+        )
+        (ultra / "tasks.json").write_text(json.dumps({"tasks": [{
+            "id": "1", "title": "Auth", "status": "in_progress",
+            "context_file": "contexts/task-1.md",
+        }]}))
+        subprocess.run(
+            [sys.executable, str(HOOK_DIR / "relations_sync.py")],
+            input=json.dumps({"tool_input": {"file_path": str(ultra / "tasks.json")}}),
+            cwd=repo, capture_output=True, text=True, timeout=30, check=True,
+        )
+
+    def test_ac_served_from_sidecar(self, tmp_path, monkeypatch):
+        self._project(tmp_path)
+        assert (tmp_path / ".ultra" / "cache" / "relations.db").exists()
+        monkeypatch.setattr(post_edit_guard, "get_git_toplevel", lambda: str(tmp_path))
+        # Context file gone: AC can only come from the sidecar
+        (tmp_path / ".ultra" / "tasks" / "contexts" / "task-1.md").unlink()
+        lines = check_task_trace(str(tmp_path / "src" / "auth.ts"))
+        assert lines[0] == "[Trace] [target_files] auth.ts → task-1 (in_progress): Auth"
+        assert lines[1:] == ["    AC: - Login returns a token", "    AC: - Bad password is rejected"]
+
+    def test_falls_back_to_json_when_sidecar_stale(self, tmp_path, monkeypatch):
+        self._project(tmp_path)
+        monkeypatch.setattr(post_edit_guard, "get_git_toplevel", lambda: str(tmp_path))
+        rel_path = tmp_path / ".ultra" / "relations.json"
+        rel = json.loads(rel_path.read_text())
+        rel["tasks"]["1"]["title"] = "Auth (edited)"
+        rel_path.write_text(json.dumps(rel))
+        lines = check_task_trace(str(tmp_path / "src" / "auth.ts"))
+        assert lines[0].endswith("Auth (edited)")
+        assert "    AC: - Login returns a token" in lines
@@ -0,0 +1,131 @@
+"""Tests for relations_sync.py debounced rebuilds.
+
+Burst writes under .ultra/ coalesce: the first edit after idle syncs at once,
+later ones only mark the index dirty and a single-flight worker syncs once
+writes go quiet. Real git repo, hook run as a subprocess like Claude Code.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import post_edit_guard
+import relations_sync
+from relations_index import PENDING_NAME, relations_pending
+
+HOOK = Path(__file__).parent.parent / "relations_sync.py"
+
+
+def _repo(root: Path, n: int = 1) -> Path:
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    _write_tasks(root, n)
+    return root
+
+
+def _write_tasks(root: Path, n: int) -> Path:
+    tasks_dir = root / ".ultra" / "tasks"
+    tasks_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [{"id": str(i), "title": f"T{i}", "status": "pending"} for i in range(1, n + 1)]
+    path = tasks_dir / "tasks.json"
+    path.write_text(json.dumps({"tasks": tasks}))
+    return path
+
+
+def _hook(root: Path, path: Path, quiet_ms: int = 1000):
+    env = dict(os.environ, ULTRA_RELATIONS_QUIET_MS=str(quiet_ms),
+               ULTRA_RELATIONS_MAX_STALE_MS="5000")
+    subprocess.run(
+        [sys.executable, str(HOOK)],
+        input=json.dumps({"tool_input": {"file_path": str(path)}}),
+        cwd=root, env=env, capture_output=True, text=True, timeout=30, check=True,
+    )
+
+
+def _task_ids(root: Path) -> list:
+    return sorted(json.loads((root / ".ultra" / "relations.json").read_text())["tasks"])
+
+
+def _wait_clean(root: Path, timeout: float = 10.0) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        if not relations_pending(root):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestDebounce:
+
+    def test_first_edit_syncs_immediately(self, tmp_path):
+        root = _repo(tmp_path)
+        _hook(root, root / ".ultra" / "tasks" / "tasks.json")
+        assert _task_ids(root) == ["1"]
+        assert not relations_pending(root)
+
+    def test_burst_coalesces_into_trailing_sync(self, tmp_path):
+        root = _repo(tmp_path)
+        _hook(root, root / ".ultra" / "tasks" / "tasks.json")
+        for n in (2, 3, 4):
+            _hook(root, _write_tasks(root, n))
+        # Burst arrived inside the quiet window: deferred, not yet synced
+        assert relations_pending(root)
+        assert _task_ids(root) == ["1"]
+        assert _wait_clean(root)
+        assert _task_ids(root) == ["1", "2", "3", "4"]
+
+    def test_quiet_zero_disables_debounce(self, tmp_path):
+        root = _repo(tmp_path)
+        _hook(root, root / ".ultra" / "tasks" / "tasks.json", quiet_ms=0)
+        _hook(root, _write_tasks(root, 2), quiet_ms=0)
+        assert _task_ids(root) == ["1", "2"]
+        assert not relations_pending(root)
+
+
+class TestWorker:
+
+    def test_single_flight(self, tmp_path):
+        root = _repo(tmp_path)
+        cache = root / ".ultra" / "cache"
+        cache.mkdir(parents=True)
+        relations_sync.mark_dirty(cache)
+        fd = relations_sync._try_lock(cache / relations_sync.WORKER_LOCK)
+        try:
+            # Lock held by "another worker": this one leaves the batch alone
+            assert relations_sync.rebuild_worker(root) == 0
+            assert (cache / PENDING_NAME).exists()
+            assert not (root / ".ultra" / "relations.json").exists()
+        finally:
+            relations_sync._unlock(fd)
+
+    def test_worker_drains_marker(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ULTRA_RELATIONS_QUIET_MS", "1")
+        root = _repo(tmp_path, n=2)
+        cache = root / ".ultra" / "cache"
+        cache.mkdir(parents=True)
+        pending = relations_sync.mark_dirty(cache)
+        assert pending["requests"] == 1
+        assert relations_sync.mark_dirty(cache)["first"] == pending["first"]
+        assert relations_sync.rebuild_worker(root) == 0
+        assert not relations_pending(root)
+        assert _task_ids(root) == ["1", "2"]
+
+    def test_newer_request_keeps_marker(self, tmp_path):
+        cache = tmp_path / "cache"
+        cache.mkdir()
+        seen = relations_sync.mark_dirty(cache)
+        relations_sync.mark_dirty(cache)
+        assert relations_sync._clear_if_unchanged(cache, seen) is False
+        assert (cache / PENDING_NAME).exists()
+
+
+def test_trace_notes_pending_rebuild(tmp_path, monkeypatch):
+    root = _repo(tmp_path)
+    _hook(root, root / ".ultra" / "tasks" / "tasks.json")
+    relations_sync.mark_dirty(root / ".ultra" / "cache")
+    monkeypatch.setattr(post_edit_guard, "get_git_toplevel", lambda: str(root))
+    lines = post_edit_guard.check_task_trace(str(root / "src" / "x.ts"))
+    assert lines[0].startswith("[Trace] (no task) x.ts")
+    assert lines[-1].startswith("[Trace] relations index rebuild pending")
@@ -9,7 +9,7 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from relations_sync import parse_target_files, index_files_to_tasks
+from relations_sync import files_entry, files_index_from_contrib, parse_target_files, sync_relations
 
 
 class TestParseTargetFiles:
@@ -87,7 +87,7 @@ class TestParseTargetFiles:
         assert parse_target_files(ctx) == ["src/foo.ts"]
 
 
-class TestIndexFilesToTasks:
+class TestFilesIndex:
     """Build code→task reverse index from contexts + progress.json."""
 
     def _make_ctx(self, root: Path, task_id: str, target_files: list) -> None:
@@ -110,15 +110,22 @@ class TestIndexFilesToTasks:
             "files_touched": touched,
         }))
 
+    def _index(self, root: Path, tasks_data: dict) -> dict:
+        tasks = root / ".ultra" / "tasks" / "tasks.json"
+        tasks.parent.mkdir(parents=True, exist_ok=True)
+        tasks.write_text(json.dumps(tasks_data))
+        synced = sync_relations(root)
+        return {**synced.rel["files"], **synced.cold}
+
     def test_empty_tasks_yields_empty_index(self, tmp_path):
-        assert index_files_to_tasks({"tasks": []}, tmp_path) == {}
+        assert self._index(tmp_path, {"tasks": []}) == {}
 
     def test_indexes_target_files_for_single_task(self, tmp_path):
         self._make_ctx(tmp_path, "1", ["src/auth.ts", "src/db.ts"])
         tasks_data = {
             "tasks": [{"id": "1", "title": "Auth", "context_file": "contexts/task-1.md"}]
         }
-        result = index_files_to_tasks(tasks_data, tmp_path)
+        result = self._index(tmp_path, tasks_data)
         assert result["src/auth.ts"]["tasks"] == ["1"]
         assert result["src/auth.ts"]["from"] == ["target_files"]
         assert result["src/db.ts"]["tasks"] == ["1"]
@@ -132,7 +139,7 @@ class TestIndexFilesToTasks:
                 {"id": "2", "context_file": "contexts/task-2.md"},
             ]
         }
-        result = index_files_to_tasks(tasks_data, tmp_path)
+        result = self._index(tmp_path, tasks_data)
         assert sorted(result["src/shared.ts"]["tasks"]) == ["1", "2"]
 
     def test_includes_files_touched_from_progress(self, tmp_path):
@@ -141,7 +148,7 @@ class TestIndexFilesToTasks:
         tasks_data = {
             "tasks": [{"id": "1", "context_file": "contexts/task-1.md"}]
         }
-        result = index_files_to_tasks(tasks_data, tmp_path)
+        result = self._index(tmp_path, tasks_data)
         assert "src/planned.ts" in result
         assert "src/actual.ts" in result
         assert result["src/actual.ts"]["from"] == ["files_touched"]
@@ -152,17 +159,24 @@ class TestIndexFilesToTasks:
         tasks_data = {
             "tasks": [{"id": "1", "context_file": "contexts/task-1.md"}]
         }
-        result = index_files_to_tasks(tasks_data, tmp_path)
+        result = self._index(tmp_path, tasks_data)
         assert sorted(result["src/file.ts"]["from"]) == ["files_touched", "target_files"]
 
     def test_skips_task_without_id(self, tmp_path):
         tasks_data = {"tasks": [{"title": "no id", "context_file": "x.md"}]}
-        assert index_files_to_tasks(tasks_data, tmp_path) == {}
+        assert self._index(tmp_path, tasks_data) == {}
 
     def test_handles_numeric_id(self, tmp_path):
         self._make_ctx(tmp_path, "5", ["src/foo.ts"])
         tasks_data = {
             "tasks": [{"id": 5, "context_file": "contexts/task-5.md"}]
         }
-        result = index_files_to_tasks(tasks_data, tmp_path)
+        result = self._index(tmp_path, tasks_data)
         assert result["src/foo.ts"]["tasks"] == ["5"]
+
+    def test_single_entry_matches_full_index(self):
+        contrib = {"1": [["src/a.ts", "src/b.ts"], []], "2": [["src/a.ts"], ["src/a.ts"], True]}
+        full = files_index_from_contrib(contrib)
+        assert full["src/a.ts"] == {"tasks": ["1", "2"], "from": ["target_files", "files_touched"]}
+        assert all(files_entry(rel, contrib) == entry for rel, entry in full.items())
+        assert files_entry("src/none.ts", contrib) is None
@@ -0,0 +1,158 @@
+"""Tests for relations_sync.py incremental sync (source manifest).
+
+Each scenario edits real .ultra fixtures between syncs and checks the patched
+result against a from-scratch build, plus which sources were actually re-read.
+"""
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import relations_sync
+from relations_sync import spec_anchors_from_text, sync_relations
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _project(root: Path, n: int = 3) -> Path:
+    ultra = root / ".ultra"
+    _write(ultra / "specs" / "product.md", "# Product\n## Login\n## Logout\n")
+    tasks = []
+    for i in range(1, n + 1):
+        tasks.append({
+            "id": str(i), "title": f"Task {i}", "status": "pending",
+            "trace_to": ["specs/product.md#login"],
+            "context_file": f"contexts/task-{i}.md",
+        })
+        _write(ultra / "tasks" / "contexts" / f"task-{i}.md",
+               f"**Target Files**:\n- `src/shared.ts`\n- `src/t{i}.ts`\n")
+    _write(ultra / "tasks" / "tasks.json", json.dumps({"tasks": tasks}))
+    return root
+
+
+def _persist(root: Path, rel: dict) -> None:
+    (root / ".ultra" / "relations.json").write_text(json.dumps(rel), encoding="utf-8")
+
+
+def _sync(root: Path):
+    synced = sync_relations(root)
+    rel, changed = synced.rel, synced.changed
+    if changed:
+        _persist(root, rel)
+    return rel, changed
+
+
+def _full(root: Path) -> dict:
+    """Files index (both tiers) of a from-scratch sync of a copy of root's sources."""
+    with tempfile.TemporaryDirectory() as fresh:
+        shutil.copytree(root / ".ultra", Path(fresh) / ".ultra",
+                        ignore=shutil.ignore_patterns("cache", "relations*"))
+        synced = sync_relations(Path(fresh))
+    return {**synced.rel["files"], **synced.cold}
+
+
+def _spy(monkeypatch):
+    """Record which context files get (re)parsed."""
+    parsed = []
+    real = relations_sync.parse_target_text
+
+    def spy(text):
+        parsed.append(text)
+        return real(text)
+
+    monkeypatch.setattr(relations_sync, "parse_target_text", spy)
+    monkeypatch.setattr(relations_sync, "RACY_WINDOW_NS", -10**18)
+    return parsed
+
+
+class TestIncrementalSync:
+
+    def test_first_sync_matches_full_build(self, tmp_path):
+        root = _project(tmp_path)
+        rel, changed = _sync(root)
+        assert changed is True
+        assert rel["files"] == _full(root)
+        assert rel["files"]["src/shared.ts"]["tasks"] == ["1", "2", "3"]
+        assert rel["specs"]["specs/product.md#login"]["referenced_by"] == ["1", "2", "3"]
+        assert (root / ".ultra" / "cache" / relations_sync.MANIFEST_NAME).exists()
+
+    def test_unchanged_sources_are_not_reread(self, tmp_path, monkeypatch):
+        root = _project(tmp_path)
+        _sync(root)
+        parsed = _spy(monkeypatch)
+        _rel, changed = _sync(root)
+        assert changed is False
+        assert parsed == []
+
+    def test_only_edited_context_is_reparsed_and_patched(self, tmp_path, monkeypatch):
+        root = _project(tmp_path)
+        _sync(root)
+        parsed = _spy(monkeypatch)
+        _write(root / ".ultra" / "tasks" / "contexts" / "task-2.md",
+               "**Target Files**:\n- `src/new.ts`\n")
+        rel, changed = _sync(root)
+        assert changed is True
+        assert len(parsed) == 1
+        assert rel["files"] == _full(root)
+        assert "src/t2.ts" not in rel["files"]
+        assert rel["files"]["src/shared.ts"]["tasks"] == ["1", "3"]
+        assert rel["files"]["src/new.ts"]["tasks"] == ["2"]
+
+    def test_touch_without_content_change_skips_parse(self, tmp_path, monkeypatch):
+        root = _project(tmp_path)
+        _sync(root)
+        parsed = _spy(monkeypatch)
+        ctx = root / ".ultra" / "tasks" / "contexts" / "task-1.md"
+        ctx.write_text(ctx.read_text())
+        _rel, changed = _sync(root)
+        assert changed is False
+        assert parsed == []
+
+    def test_progress_file_added(self, tmp_path):
+        root = _project(tmp_path)
+        _sync(root)
+        _write(root / ".ultra" / "tasks" / "progress" / "task-3.json",
+               json.dumps({"files_touched": ["./src/extra.ts", "src/shared.ts"]}))
+        rel, _changed = _sync(root)
+        assert rel["files"] == _full(root)
+        assert rel["files"]["src/extra.ts"] == {"tasks": ["3"], "from": ["files_touched"]}
+        assert rel["files"]["src/shared.ts"]["from"] == ["target_files", "files_touched"]
+
+    def test_task_removed_releases_its_paths(self, tmp_path):
+        root = _project(tmp_path)
+        _sync(root)
+        tasks_path = root / ".ultra" / "tasks" / "tasks.json"
+        data = json.loads(tasks_path.read_text())
+        data["tasks"] = [t for t in data["tasks"] if t["id"] != "3"]
+        tasks_path.write_text(json.dumps(data))
+        rel, _changed = _sync(root)
+        assert rel["files"] == _full(root)
+        assert "src/t3.ts" not in rel["files"]
+        assert "3" not in rel["tasks"]
+
+    def test_spec_edit_updates_anchors_and_advisories(self, tmp_path):
+        root = _project(tmp_path)
+        _sync(root)
+        _write(root / ".ultra" / "specs" / "product.md", "# Product\n## Sign In\n")
+        rel, _changed = _sync(root)
+        expected = spec_anchors_from_text("# Product\n## Sign In\n", "specs/product.md",
+                                          ".ultra/specs/product.md")
+        assert set(rel["specs"]) == set(expected)
+        assert {a["task"] for a in rel["advisories"]} == {"1", "2", "3"}
+
+    def test_deleted_relations_json_forces_full_rebuild(self, tmp_path):
+        root = _project(tmp_path)
+        _sync(root)
+        (root / ".ultra" / "relations.json").unlink()
+        rel, changed = _sync(root)
+        assert changed is True
+        assert rel["files"] == _full(root)
+
+    def test_missing_tasks_json_returns_none(self, tmp_path):
+        (tmp_path / ".ultra").mkdir()
+        assert sync_relations(tmp_path) is None
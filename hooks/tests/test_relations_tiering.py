@@ -0,0 +1,204 @@
+"""Tests for hot/cold tiering of the relations index.
+
+Files owned only by long-completed tasks move from relations.json to
+.ultra/relations-archive.json.gz (and the sidecar's cold_files table);
+readers consult the cold tier only on a hot miss.
+"""
+import gzip
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import post_edit_guard
+import relations_sync
+from post_edit_guard import _owners_from_relations_json, check_task_trace
+from relations_index import ARCHIVE_NAME, load_cold_files, lookup_owners
+from relations_sync import is_cold, run_sync, sync_relations
+from wiki_generator import WikiModel
+
+OLD = "2020-01-01T00:00:00Z"
+DAY = 86400
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _project(root: Path, statuses=("completed", "pending")) -> Path:
+    ultra = root / ".ultra"
+    tasks = []
+    for i, status in enumerate(statuses, start=1):
+        tasks.append({"id": str(i), "title": f"Task {i}", "status": status,
+                      "context_file": f"contexts/task-{i}.md"})
+        _write(ultra / "tasks" / "contexts" / f"task-{i}.md",
+               f"**Target Files**:\n- `src/shared.ts`\n- `src/t{i}.ts`\n\n"
+               f"## Acceptance Criteria\n- AC of {i}\n")
+    _write(ultra / "tasks" / "tasks.json", json.dumps({"tasks": tasks}))
+    return root
+
+
+def _progress(root: Path, tid: str, last: str, touched=()) -> None:
+    _write(root / ".ultra" / "tasks" / "progress" / f"task-{tid}.json",
+           json.dumps({"last_updated": last, "files_touched": list(touched)}))
+
+
+def _set_status(root: Path, tid: str, status: str) -> None:
+    path = root / ".ultra" / "tasks" / "tasks.json"
+    data = json.loads(path.read_text())
+    for t in data["tasks"]:
+        if t["id"] == tid:
+            t["status"] = status
+    path.write_text(json.dumps(data))
+
+
+def _hot(root: Path) -> dict:
+    return json.loads((root / ".ultra" / "relations.json").read_text())["files"]
+
+
+def _full(root: Path) -> dict:
+    """Files index (both tiers) of a from-scratch sync of a copy of root's sources."""
+    with tempfile.TemporaryDirectory() as fresh:
+        shutil.copytree(root / ".ultra", Path(fresh) / ".ultra",
+                        ignore=shutil.ignore_patterns("cache", "relations*"))
+        synced = sync_relations(Path(fresh))
+    return {**synced.rel["files"], **synced.cold}
+
+
+class TestIsCold:
+
+    def test_only_completed_and_idle(self):
+        now = 1_800_000_000.0
+        assert is_cold("completed", OLD, 0, now, 30)
+        assert not is_cold("pending", OLD, 0, now, 30)
+        assert not is_cold("completed", OLD, 0, now, 0)
+        assert not is_cold("completed", "", 0, now, 30)
+
+    def test_falls_back_to_context_mtime(self):
+        now = 1_800_000_000.0
+        assert is_cold("completed", "", int((now - 40 * DAY) * 1e9), now, 30)
+        assert not is_cold("completed", "", int((now - 2 * DAY) * 1e9), now, 30)
+        assert is_cold("completed", "not a date", int((now - 40 * DAY) * 1e9), now, 30)
+
+    def test_bad_env_uses_default(self, monkeypatch):
+        monkeypatch.setenv("ULTRA_RELATIONS_COLD_DAYS", "bogus")
+        assert relations_sync.cold_days() == 30.0
+
+
+class TestTiering:
+
+    def test_completed_only_paths_go_cold(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD, ["src/old.ts"])
+        run_sync(root)
+
+        hot, cold = _hot(root), load_cold_files(root)
+        assert set(hot) == {"src/shared.ts", "src/t2.ts"}
+        assert set(cold) == {"src/t1.ts", "src/old.ts"}
+        assert {**hot, **cold} == _full(root)
+        # Shared with a pending task → stays hot with both owners
+        assert hot["src/shared.ts"]["tasks"] == ["1", "2"]
+
+    def test_recent_completion_stays_hot(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", "2999-01-01T00:00:00Z")
+        run_sync(root)
+        assert "src/t1.ts" in _hot(root)
+        assert not (root / ".ultra" / ARCHIVE_NAME).exists()
+
+    def test_disabled_by_env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ULTRA_RELATIONS_COLD_DAYS", "0")
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        assert _hot(root) == _full(root)
+        assert load_cold_files(root) == {}
+
+    def test_aging_into_cold_is_patched(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", "2999-01-01T00:00:00Z")
+        run_sync(root)
+        _progress(root, "1", OLD)
+        synced = sync_relations(root)
+        assert synced.paths == {"src/shared.ts", "src/t1.ts"}
+        assert set(synced.cold) == {"src/t1.ts"}
+        run_sync(root)
+        assert {**_hot(root), **load_cold_files(root)} == _full(root)
+
+    def test_reopened_task_returns_to_hot(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        assert "src/t1.ts" in load_cold_files(root)
+        _set_status(root, "1", "in_progress")
+        run_sync(root)
+        assert _hot(root) == _full(root)
+        assert not (root / ".ultra" / ARCHIVE_NAME).exists()
+
+    def test_archive_is_deterministic_gzip(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        path = root / ".ultra" / ARCHIVE_NAME
+        first = path.read_bytes()
+        with gzip.open(path, "rb") as f:
+            assert json.loads(f.read())["version"] == 1
+        path.unlink()
+        (root / ".ultra" / "relations.json").unlink()
+        run_sync(root)
+        assert path.read_bytes() == first
+
+    def test_lost_archive_forces_full_rebuild(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        (root / ".ultra" / ARCHIVE_NAME).unlink()
+        _write(root / ".ultra" / "tasks" / "contexts" / "task-2.md",
+               "**Target Files**:\n- `src/t2b.ts`\n")
+        run_sync(root)
+        assert "src/t1.ts" in load_cold_files(root)
+
+
+class TestColdLookup:
+
+    def test_sidecar_falls_back_to_cold_tier(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        hot = lookup_owners(root, "src/shared.ts")
+        assert "tier" not in hot and [t["id"] for t in hot["tasks"]] == ["1", "2"]
+        cold = lookup_owners(root, "src/t1.ts")
+        assert cold["tier"] == "cold"
+        assert cold["tasks"][0]["status"] == "completed"
+        assert cold["tasks"][0]["ac"] == ["- AC of 1"]
+        assert lookup_owners(root, "src/none.ts") == {}
+
+    def test_legacy_json_path_reads_archive(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        found = _owners_from_relations_json(root, "src/t1.ts")
+        assert found["tier"] == "cold" and found["tasks"][0]["id"] == "1"
+        assert "tier" not in _owners_from_relations_json(root, "src/t2.ts")
+
+    def test_trace_marks_archived_owner(self, tmp_path, monkeypatch):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        monkeypatch.setattr(post_edit_guard, "get_git_toplevel", lambda: str(root))
+        lines = check_task_trace(str(root / "src" / "t1.ts"))
+        assert "task-1 (completed, archived): Task 1" in lines[0]
+
+
+class TestWikiModel:
+
+    def test_archived_files_still_listed_per_task(self, tmp_path):
+        root = _project(tmp_path)
+        _progress(root, "1", OLD)
+        run_sync(root)
+        rel = json.loads((root / ".ultra" / "relations.json").read_text())
+        assert WikiModel(rel, root).files_for_task("1") == ["src/shared.ts", "src/t1.ts"]
+        assert WikiModel(rel).files_for_task("1") == ["src/shared.ts"]
@@ -0,0 +1,121 @@
+"""Tests for relations_sync.py --watch and fs_watch.py.
+
+Out-of-band changes (git checkout, manual edits, progress rewrites) reach
+relations.json within a second. Both the inotify and the polling backend
+run against real directories.
+"""
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import relations_sync
+from fs_watch import InotifyWatcher, PollWatcher, open_watcher
+
+HOOK = Path(__file__).parent.parent / "relations_sync.py"
+BACKENDS = [pytest.param(True, id="poll"),
+            pytest.param(False, id="inotify",
+                         marks=pytest.mark.skipif(not sys.platform.startswith("linux"),
+                                                  reason="inotify is Linux-only"))]
+
+
+def _project(root: Path) -> Path:
+    tasks = root / ".ultra" / "tasks"
+    (tasks / "contexts").mkdir(parents=True)
+    (tasks / "contexts" / "task-1.md").write_text("**Target Files**:\n- `src/a.ts`\n")
+    (tasks / "tasks.json").write_text(json.dumps({"tasks": [
+        {"id": "1", "title": "A", "status": "pending", "context_file": "contexts/task-1.md"},
+    ]}))
+    return root
+
+
+def _files(root: Path) -> dict:
+    try:
+        return json.loads((root / ".ultra" / "relations.json").read_text())["files"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _eventually(pred, timeout: float = 5.0) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def watching(tmp_path, request):
+    root = _project(tmp_path)
+    stop = threading.Event()
+    thread = threading.Thread(target=relations_sync.watch,
+                              args=(root,), kwargs={"stop": stop, "force_poll": request.param},
+                              daemon=True)
+    thread.start()
+    assert _eventually(lambda: "src/a.ts" in _files(root))
+    yield root
+    stop.set()
+    thread.join(timeout=5)
+
+
+class TestWatch:
+
+    @pytest.mark.parametrize("watching", BACKENDS, indirect=True)
+    def test_progress_rewrite_reaches_index(self, watching):
+        root = watching
+        progress = root / ".ultra" / "tasks" / "progress"
+        progress.mkdir()  # directory created after the watch started
+        (progress / "task-1.json").write_text(json.dumps({"files_touched": ["src/b.ts"]}))
+        assert _eventually(lambda: "src/b.ts" in _files(root))
+
+    @pytest.mark.parametrize("watching", BACKENDS, indirect=True)
+    def test_atomic_replace_of_context(self, watching):
+        root = watching
+        ctx = root / ".ultra" / "tasks" / "contexts" / "task-1.md"
+        tmp = ctx.with_name("task-1.md.123.tmp")
+        tmp.write_text("**Target Files**:\n- `src/c.ts`\n")
+        tmp.replace(ctx)
+        assert _eventually(lambda: "src/c.ts" in _files(root) and "src/a.ts" not in _files(root))
+
+    def test_second_watcher_refused(self, tmp_path):
+        root = _project(tmp_path)
+        cache = root / ".ultra" / "cache"
+        cache.mkdir()
+        fd = relations_sync._try_lock(cache / relations_sync.WATCH_LOCK)
+        try:
+            assert relations_sync.watch(root, stop=threading.Event()) == 1
+        finally:
+            relations_sync._unlock(fd)
+
+    def test_cli_requires_root_outside_git(self, tmp_path):
+        proc = subprocess.run([sys.executable, str(HOOK), "--watch"], cwd=tmp_path,
+                              capture_output=True, text=True, timeout=10)
+        assert proc.returncode == 2
+        assert "usage" in proc.stderr
+
+
+class TestFsWatch:
+
+    @pytest.mark.parametrize("force_poll", [True, False])
+    def test_ignores_temp_files(self, tmp_path, force_poll):
+        watcher = open_watcher([tmp_path], force_poll=force_poll)
+        try:
+            (tmp_path / "x.json.42.tmp").write_text("{}")
+            assert watcher.wait(0.4) is False
+            (tmp_path / "x.json").write_text("{}")
+            assert watcher.wait(1.0) is True
+        finally:
+            watcher.close()
+
+    def test_backend_selection(self, tmp_path):
+        assert isinstance(open_watcher([tmp_path], force_poll=True), PollWatcher)
+        if sys.platform.startswith("linux"):
+            w = open_watcher([tmp_path])
+            assert isinstance(w, InotifyWatcher)
+            w.close()
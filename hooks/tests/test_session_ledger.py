@@ -0,0 +1,153 @@
+"""Tests for session_ledger.py — per-session edit ledger for Stop / PreCompact.
+
+Stop and PreCompact must report only the files this session edited (and
+are still dirty), and fall back to the full-tree git scan when the session
+has no ledger. Real git repos; ledgers go to a per-test temp dir.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import pre_compact_context
+import pre_stop_check
+import session_trail
+from session_ledger import (
+    MAX_LEDGER_AGE_S,
+    edited_paths,
+    ledger_path,
+    parse_porcelain_z,
+    record_edit,
+    session_status,
+)
+
+HOOKS = Path(__file__).parent.parent
+
+
+@pytest.fixture(autouse=True)
+def _ledger_tmp(tmp_path, monkeypatch):
+    tmp = tmp_path / "tmp"
+    tmp.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp))
+    monkeypatch.setenv("TMPDIR", str(tmp))
+
+
+def _git(repo: Path, *args) -> str:
+    return subprocess.run(["git", *args], cwd=repo, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    for name in ("a.py", "b.py", "c.py", "notes.txt"):
+        (repo / name).write_text("x = 1\n")
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+    return repo
+
+
+def _commit(repo: Path, *paths) -> None:
+    _git(repo, "add", *paths)
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "wip")
+
+
+class TestLedger:
+
+    def test_record_and_read(self, tmp_path):
+        assert edited_paths("s1") is None
+        record_edit("s1", str(tmp_path / "a.py"))
+        record_edit("s1", str(tmp_path / "b.py"))
+        record_edit("s1", str(tmp_path / "a.py"))
+        record_edit("", str(tmp_path / "c.py"))
+        assert edited_paths("s1") == [str(tmp_path / "a.py"), str(tmp_path / "b.py")]
+        assert oct(os.stat(ledger_path("s1")).st_mode & 0o777) == "0o600"
+        assert "/" not in os.path.basename(ledger_path("../evil"))
+
+    def test_new_ledger_prunes_idle_ones(self, tmp_path):
+        record_edit("old", str(tmp_path / "a.py"))
+        record_edit("recent", str(tmp_path / "a.py"))
+        idle = os.stat(ledger_path("old")).st_mtime - MAX_LEDGER_AGE_S - 60
+        os.utime(ledger_path("old"), (idle, idle))
+        record_edit("recent", str(tmp_path / "b.py"))  # existing ledger: no scan
+        assert os.path.exists(ledger_path("old"))
+        record_edit("new", str(tmp_path / "a.py"))
+        assert not os.path.exists(ledger_path("old"))
+        assert edited_paths("recent") == [str(tmp_path / "a.py"), str(tmp_path / "b.py")]
+        assert edited_paths("new") == [str(tmp_path / "a.py")]
+
+    def test_parse_porcelain_z(self):
+        out = " M a.py\0R  new.py\0old.py\0?? n.txt\0"
+        assert parse_porcelain_z(out) == [(" M", "a.py"), ("R ", "new.py"), ("??", "n.txt")]
+
+
+class TestSessionStatus:
+
+    def test_only_this_sessions_dirty_files(self, tmp_path):
+        repo = _repo(tmp_path)
+        for name in ("a.py", "b.py", "c.py"):
+            (repo / name).write_text("x = 2\n")
+        record_edit("mine", str(repo / "a.py"))
+        record_edit("mine", str(repo / "c.py"))
+        record_edit("mine", str(tmp_path / "elsewhere.py"))
+        record_edit("theirs", str(repo / "b.py"))
+        _commit(repo, "c.py")  # committed since: no longer dirty
+        assert session_status(repo, "mine") == [(" M", "a.py")]
+        assert session_status(repo, "nobody") is None
+
+    def test_deleted_and_new_files(self, tmp_path):
+        repo = _repo(tmp_path)
+        (repo / "a.py").unlink()
+        (repo / "new.py").write_text("y = 1\n")
+        record_edit("s", str(repo / "a.py"))
+        record_edit("s", str(repo / "new.py"))
+        assert session_status(repo, "s") == [(" D", "a.py"), ("??", "new.py")]
+
+
+class TestHooks:
+
+    def test_pre_stop_scoped_to_session(self, tmp_path, monkeypatch):
+        repo = _repo(tmp_path)
+        (repo / "a.py").write_text("x = 2\n")
+        (repo / "b.py").write_text("x = 2\n")
+        record_edit("mine", str(repo / "a.py"))
+        monkeypatch.chdir(repo)
+        assert pre_stop_check.get_changed_source_files("mine") == ["a.py"]
+        assert sorted(pre_stop_check.get_changed_source_files("no-ledger")) == ["a.py", "b.py"]
+        assert sorted(pre_stop_check.get_changed_source_files()) == ["a.py", "b.py"]
+
+    def test_orphan_facts_scoped_to_session(self, tmp_path):
+        repo = _repo(tmp_path)
+        (repo / "a.py").write_text("x = 2\n")
+        (repo / "notes.txt").write_text("changed\n")
+        (repo / "b.py").write_text("x = 2\n")
+        record_edit("mine", str(repo / "a.py"))
+        record_edit("mine", str(repo / "notes.txt"))
+        assert session_trail.collect_orphan_facts(repo, "mine")["dirty_files"] == ["a.py"]
+        assert sorted(session_trail.collect_orphan_facts(repo)["dirty_files"]) == ["a.py", "b.py"]
+
+    def test_pre_compact_modified_files(self, tmp_path, monkeypatch):
+        repo = _repo(tmp_path)
+        (repo / "a.py").write_text("x = 2\n")
+        (repo / "b.py").write_text("x = 2\n")
+        record_edit("mine", str(repo / "b.py"))
+        monkeypatch.chdir(repo)
+        assert pre_compact_context.get_git_context("mine")["status"] == " M b.py"
+        assert pre_compact_context.get_git_context()["status"].count("\n") == 1
+
+    def test_post_edit_guard_records_edits(self, tmp_path):
+        repo = _repo(tmp_path)
+        for name in ("a.py", "notes.txt"):
+            payload = {"session_id": "sess-x", "tool_name": "Edit",
+                       "tool_input": {"file_path": str(repo / name)}}
+            proc = subprocess.run([sys.executable, str(HOOKS / "post_edit_guard.py")],
+                                  input=json.dumps(payload), cwd=repo, capture_output=True,
+                                  text=True, timeout=60, env=dict(os.environ))
+            assert proc.returncode == 0
+        assert edited_paths("sess-x") == [str(repo / "a.py"), str(repo / "notes.txt")]
@@ -0,0 +1,163 @@
+"""Tests for shared_cache.py — content-addressed caches shared by worktrees.
+
+A linked worktree must find what the main checkout already computed (parsed
+imports, scan advisories, URL verdicts) under the common git dir, while keys
+stay content-addressed so a changed file or checker never hits a stale entry.
+Worktrees are real `git worktree add` checkouts.
+"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import import_graph
+import post_edit_guard
+import subagent_verify
+from hook_utils import get_shared_cache_dir
+from import_graph import ImportGraph
+from shared_cache import SharedCache, cached, content_key, open_shared
+
+
+def _git(repo: Path, *args) -> str:
+    return subprocess.run(["git", *args], cwd=repo, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _repo_with_worktree(tmp_path: Path, files: dict) -> tuple:
+    main = tmp_path / "main"
+    main.mkdir()
+    _git(main, "init", "-q")
+    for rel, text in files.items():
+        (main / rel).parent.mkdir(parents=True, exist_ok=True)
+        (main / rel).write_text(text)
+    _git(main, "add", "-A")
+    _git(main, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q",
+         "--allow-empty", "-m", "init")
+    wt = tmp_path / "wt"
+    _git(main, "worktree", "add", "-q", "-b", "feature", str(wt))
+    return main, wt
+
+
+class TestStore:
+
+    def test_buffered_until_commit(self, tmp_path):
+        with SharedCache(tmp_path, db_path=tmp_path / "s.db") as a:
+            a.put("ns", "k", {"v": [1, 2]})
+            assert a.get("ns", "k") == {"v": [1, 2]}
+            with SharedCache(tmp_path, db_path=tmp_path / "s.db") as b:
+                assert b.get("ns", "k") is None
+                assert a.commit()
+                assert b.get("ns", "k") == {"v": [1, 2]}
+                assert b.get("other", "k") is None
+
+    def test_ttl_and_prune(self, tmp_path):
+        with SharedCache(tmp_path, db_path=tmp_path / "s.db") as cache:
+            for i in range(5):
+                cache.put("url", f"u{i}", True)
+                cache.commit()
+                time.sleep(0.01)
+            assert cache.get("url", "u0", max_age_s=3600) is True
+            assert cache.get("url", "u0", max_age_s=0) is None
+            assert cache.prune("url", keep=2) == 3
+            assert [cache.get("url", f"u{i}") for i in range(5)] == [None] * 3 + [True, True]
+
+    def test_disabled_and_unusable(self, tmp_path, monkeypatch):
+        calls = []
+        compute = lambda: calls.append(1) or "x"
+        (tmp_path / ".git").mkdir()
+        assert cached(tmp_path, "ns", "k", compute) == "x"
+        assert cached(tmp_path, "ns", "k", compute) == "x" and len(calls) == 1
+        monkeypatch.setenv("ULTRA_SHARED_CACHE", "0")
+        assert open_shared(tmp_path) is None
+        assert cached(tmp_path, "ns", "k", compute) == "x" and len(calls) == 2
+
+    def test_keys_separate_parts(self):
+        assert content_key("ab", "c") != content_key("a", "bc")
+        assert content_key(b"x") == content_key("x")
+
+
+class TestWorktrees:
+
+    def test_one_cache_for_all_worktrees(self, tmp_path):
+        main, wt = _repo_with_worktree(tmp_path, {})
+        assert get_shared_cache_dir(wt) == get_shared_cache_dir(main) == main / ".git" / "ultra" / "cache"
+        with SharedCache(main) as cache:
+            cache.put("ns", "k", 1)
+        with SharedCache(wt) as cache:
+            assert cache.get("ns", "k") == 1
+
+    def test_import_graph_worktree_starts_warm(self, tmp_path, monkeypatch):
+        files = {f"pkg/m{i}.py": f"from pkg import util\nimport pkg.m{i + 1}\n" for i in range(10)}
+        files["pkg/__init__.py"] = ""
+        files["pkg/util.py"] = "import os\n"
+        main, wt = _repo_with_worktree(tmp_path, files)
+        g = ImportGraph(main)
+        g.sweep(budget_s=None)
+        expected = g.dependents("pkg/util.py")
+        g.close()
+        assert len(expected) == 10
+
+        def no_parse(*_args):
+            raise AssertionError("worktree re-parsed a file the main checkout parsed")
+
+        monkeypatch.setattr(import_graph, "parse_imports", no_parse)
+        g = ImportGraph(wt)
+        g.sweep(budget_s=None)
+        assert g.dependents("pkg/util.py") == expected
+        g.close()
+        assert not (wt / ".ultra" / "cache" / "shared.db").exists()
+
+    def test_changed_content_is_reparsed(self, tmp_path):
+        main, wt = _repo_with_worktree(tmp_path, {"a.py": "import b\n", "b.py": "", "c.py": ""})
+        g = ImportGraph(main)
+        g.sweep(budget_s=None)
+        g.close()
+        (wt / "a.py").write_text("import c\n")
+        g = ImportGraph(wt)
+        g.sweep(budget_s=None)
+        assert g.dependents("c.py") == ["a.py"]
+        assert g.dependents("b.py") == []
+        g.close()
+
+
+class TestScanCache:
+
+    SRC = "def f():\n    # TODO: later\n    password = 'hunter2hunter2'\n"
+
+    def test_scan_reused_across_worktrees(self, tmp_path, monkeypatch):
+        main, wt = _repo_with_worktree(tmp_path, {"src/app.py": self.SRC})
+        first = post_edit_guard.scan_file(str(main / "src" / "app.py"))
+        assert first[0]
+
+        calls = []
+        real = post_edit_guard.check_security
+        monkeypatch.setattr(post_edit_guard, "check_security",
+                            lambda *a: calls.append(a[0]) or real(*a))
+        assert post_edit_guard.scan_file(str(wt / "src" / "app.py")) == first
+        assert calls == []
+        # Same bytes, different path class (a test file): checked afresh
+        (wt / "tests").mkdir()
+        (wt / "tests" / "app.py").write_text(self.SRC)
+        post_edit_guard.scan_file(str(wt / "tests" / "app.py"))
+        (wt / "src" / "app.py").write_text(self.SRC + "x = 1\n")
+        post_edit_guard.scan_file(str(wt / "src" / "app.py"))
+        assert len(calls) == 2
+
+
+class TestUrlCache:
+
+    def test_verdicts_shared_and_budget_spent_on_misses(self, tmp_path, monkeypatch):
+        main, wt = _repo_with_worktree(tmp_path, {})
+        fetched = []
+        verdicts = {"https://ok.test": True, "https://gone.test": False, "https://flaky.test": None}
+        monkeypatch.setattr(subagent_verify, "verify_url",
+                            lambda u: fetched.append(u) or verdicts.get(u, True))
+        urls = list(verdicts)
+        assert subagent_verify.verify_urls(urls, main) == [True, False, None]
+        assert subagent_verify.verify_urls(urls, wt) == [True, False, None]
+        assert fetched == urls + ["https://flaky.test"]
+
+        monkeypatch.setattr(subagent_verify, "URL_BUDGET_PER_RUN", 1)
+        fresh = [f"https://n{i}.test" for i in range(3)]
+        assert subagent_verify.verify_urls(urls[:2] + fresh, wt) == [True, False, True, None, None]
@@ -0,0 +1,177 @@
+"""Tests for status_engine.py — deterministic /ultra-status phases.
+
+Stats, risk detection, workflow routing (incl. stale test report) and the
+input-keyed cache, on temp projects inside real git repos.
+"""
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import status_engine
+from status_engine import compute_status, get_status, render
+
+SCRIPT = Path(__file__).parent.parent / "status_engine.py"
+NOW = datetime(2026, 6, 10, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _git(repo: Path, *args) -> str:
+    return subprocess.run(["git", *args], cwd=repo, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    _git(path, "init", "-q")
+    _git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q",
+         "--allow-empty", "-m", "init")
+    return path
+
+
+def _write(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+
+
+def _project(root: Path, tasks: list, created="2026-06-01 09:00:00") -> Path:
+    _write(root / ".ultra" / "specs" / "product.md", "# Product\n## Login\n")
+    _write(root / ".ultra" / "tasks" / "tasks.json", {"created": created, "tasks": tasks})
+    return root
+
+
+def _t(tid, status="pending", deps=(), **extra):
+    return {"id": tid, "title": f"Task {tid}", "status": status, "priority": "P1",
+            "complexity": 3, "estimated_days": 1, "dependencies": list(deps), **extra}
+
+
+class TestStats:
+
+    def test_counts_velocity_and_eta(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [
+            _t("1", "completed"), _t("2", "completed"), _t("3", "in_progress"), _t("4")])
+        stats = compute_status(root, now=NOW)["stats"]
+        assert stats["by_status"] == {"completed": 2, "in_progress": 1, "pending": 1}
+        assert stats["completion_pct"] == 50.0
+        # 2 done in ~9.1 days → 0.22/day → 2 remaining ≈ 9.1 days
+        assert stats["velocity_per_day"] == 0.22
+        assert stats["eta_days"] == 9.1
+
+
+class TestRisks:
+
+    def _kinds(self, report):
+        return [r["kind"] for r in report["risks"]]
+
+    def test_stalled_and_overdue(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [
+            _t("1", "in_progress", started_at="2026-06-01T00:00:00Z", estimated_days=2)])
+        _write(root / ".ultra" / "tasks" / "progress" / "task-1.json",
+               {"last_updated": "2026-06-05T00:00:00+00:00"})
+        report = compute_status(root, now=NOW)
+        assert self._kinds(report) == ["overdue", "stalled"]
+        assert "idle 5.5 days" in report["risks"][1]["message"]
+        assert report["level"] == "orange"
+
+    def test_cycle_is_red_and_first(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [
+            _t("1", deps=["2"]), _t("2", deps=["1"]), _t("3", "blocked")])
+        report = compute_status(root, now=NOW)
+        assert self._kinds(report) == ["cycle", "blocked"]
+        assert report["level"] == "red"
+
+    def test_complexity_spike_and_failing_tests(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [
+            _t("1", complexity=8), _t("2", complexity=9), _t("3")])
+        _write(root / ".ultra" / "test-report.json",
+               {"passed": False, "git_commit": _git(root, "rev-parse", "HEAD")[:7],
+                "blocking_issues": ["Coverage Gap: x"]})
+        kinds = self._kinds(compute_status(root, now=NOW))
+        assert kinds == ["tests_failing", "complexity_spike"]
+
+
+class TestRouting:
+
+    def _route(self, root):
+        return compute_status(root, now=NOW)["route"]
+
+    def test_table_rows(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        assert self._route(root)["command"] == "ultra-init"
+        (root / ".ultra").mkdir()
+        assert self._route(root)["command"] == "ultra-research"
+        _write(root / ".ultra" / "specs" / "product.md", "[NEEDS CLARIFICATION] auth")
+        assert self._route(root)["command"] == "ultra-research"
+        _project(root, [])
+        assert self._route(root)["command"] == "ultra-plan"
+        _project(root, [_t("1", "completed"), _t("2")])
+        assert self._route(root)["command"] == "ultra-dev"
+        _project(root, [_t("1", "completed")])
+        assert self._route(root)["command"] == "ultra-test"
+
+    def test_stale_and_fresh_test_report(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [_t("1", "completed")])
+        head = _git(root, "rev-parse", "HEAD")
+        _write(root / ".ultra" / "test-report.json", {"passed": True, "git_commit": head[:7]})
+        assert self._route(root)["command"] == "ultra-deliver"
+        _write(root / ".ultra" / "test-report.json", {"passed": True, "git_commit": "0000000"})
+        route = self._route(root)
+        assert route["command"] == "ultra-test" and "stale" in route["reason"]
+        _write(root / ".ultra" / "test-report.json", {"passed": False, "git_commit": head,
+                                                       "blocking_issues": ["gap"]})
+        route = self._route(root)
+        assert route["command"] == "ultra-dev" and route["blocking_issues"] == ["gap"]
+        _write(root / ".ultra" / "delivery-report.json", {"version": "1.0.0", "git_commit": head})
+        assert self._route(root)["command"] == "done"
+
+
+class TestCache:
+
+    def test_repeat_call_is_cached_until_input_changes(self, tmp_path, monkeypatch):
+        root = _project(_repo(tmp_path / "r"), [_t("1"), _t("2", deps=["1"])])
+        first = get_status(root, now=NOW)
+        assert first["cached"] is False
+        calls = []
+        real = status_engine.compute_status
+        monkeypatch.setattr(status_engine, "compute_status",
+                            lambda *a, **k: calls.append(1) or real(*a, **k))
+        again = get_status(root, now=NOW)
+        assert again["cached"] is True and calls == []
+        assert again["next"] == first["next"]
+
+        _project(root, [_t("1", "completed"), _t("2", deps=["1"])])
+        assert get_status(root, now=NOW)["next"][0]["id"] == "2" and calls == [1]
+        # Next day: re-evaluated (stalled/overdue are day-granular)
+        get_status(root, now=NOW + 86400)
+        assert calls == [1, 1]
+
+    def test_uncommitted_changes_checked_every_call(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [_t("1")])
+        (root / "a.txt").write_text("x")
+        _git(root, "add", "a.txt")
+        _git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "a")
+        assert get_status(root, now=NOW)["git_dirty"] is False
+        (root / "a.txt").write_text("y")
+        report = get_status(root, now=NOW)
+        assert report["cached"] is True and report["git_dirty"] is True
+        assert report["risks"][-1]["kind"] == "uncommitted"
+
+
+class TestRenderAndCli:
+
+    def test_render_summary(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [_t("1", "completed"), _t("2", deps=["1"])])
+        text = render(compute_status(root, now=NOW))
+        assert "50.0% — 1/2 tasks" in text
+        assert "📈 Next: #2 Task 2 (P1, critical)" in text
+        assert "**/ultra-dev** — Develop the next task" in text
+
+    def test_cli_json(self, tmp_path):
+        root = _project(_repo(tmp_path / "r"), [_t("1")])
+        proc = subprocess.run([sys.executable, str(SCRIPT), "--json", "--root", str(root)],
+                              capture_output=True, text=True, timeout=30)
+        data = json.loads(proc.stdout)
+        assert proc.returncode == 0
+        assert data["route"]["command"] == "ultra-dev"
+        assert data["next"][0]["id"] == "1"
@@ -0,0 +1,173 @@
+"""Tests for task_binding.py — per-session / per-worktree active tasks.
+
+Parallel agents each move their own task to in_progress; every hook must
+then resolve the caller's task, not the first in_progress one. Worktree
+cases use real `git worktree add` checkouts sharing one common dir.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import hook_utils
+from hook_utils import get_git_common_dir
+from progress_journal import load_progress
+from task_binding import bind, bindings_path, load_bindings, observe, resolve_active_task, start
+
+HOOKS = Path(__file__).parent.parent
+
+
+def _git(repo: Path, *args) -> str:
+    return subprocess.run(["git", *args], cwd=repo, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _repo(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    _git(path, "init", "-q")
+    _git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q",
+         "--allow-empty", "-m", "init")
+    return path
+
+
+def _tasks(root: Path, statuses: dict) -> None:
+    path = root / ".ultra" / "tasks" / "tasks.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"tasks": [
+        {"id": tid, "title": f"Task {tid}", "status": st} for tid, st in statuses.items()]}))
+
+
+def _active(root: Path, session_id: str = ""):
+    task = resolve_active_task(root, session_id)
+    return task and task["id"]
+
+
+class TestSessions:
+
+    def test_each_session_gets_its_own_task(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"1": "in_progress", "2": "pending"})
+        assert observe(root, "sess-a") == ["1"]
+        _tasks(root, {"1": "in_progress", "2": "in_progress"})
+        assert observe(root, "sess-b") == ["2"]
+        assert _active(root, "sess-a") == "1"
+        assert _active(root, "sess-b") == "2"
+        # Unknown session in this worktree: the task last bound here
+        assert _active(root, "sess-c") == "2"
+        assert observe(root, "sess-b") == []
+
+    def test_finished_task_unbound(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"1": "in_progress", "2": "in_progress"})
+        observe(root, "sess-a")
+        bind(root, "2", "sess-b")
+        _tasks(root, {"1": "in_progress", "2": "completed"})
+        observe(root, "sess-b")
+        doc = load_bindings(root)
+        assert "sess-b" not in doc["sessions"]
+        assert _active(root, "sess-b") == "1"
+
+    def test_unbound_project_keeps_first_in_progress(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"1": "pending", "2": "in_progress", "3": "in_progress"})
+        assert _active(root) == "2"
+        assert not bindings_path(root).exists()
+
+
+class TestWorktrees:
+
+    def test_bindings_shared_across_worktrees(self, tmp_path):
+        main = _repo(tmp_path / "main")
+        wt = tmp_path / "wt"
+        _git(main, "worktree", "add", "-q", "-b", "feature", str(wt))
+        assert get_git_common_dir(wt) == get_git_common_dir(main) == main / ".git"
+        assert bindings_path(wt) == bindings_path(main)
+
+        _tasks(main, {"1": "in_progress", "2": "pending"})
+        observe(main, "sess-main")
+        _tasks(wt, {"1": "pending", "2": "in_progress"})
+        observe(wt, "sess-wt")
+        # After a merge both worktrees see both tasks in progress
+        _tasks(main, {"1": "in_progress", "2": "in_progress"})
+        _tasks(wt, {"1": "in_progress", "2": "in_progress"})
+        assert _active(main) == "1" and _active(wt) == "2"
+        assert _active(wt, "sess-main") == "2"  # binding is for another worktree
+        assert _active(main, "fresh") == "1"
+
+    def test_claimed_elsewhere_is_skipped(self, tmp_path):
+        main = _repo(tmp_path / "main")
+        wt = tmp_path / "wt"
+        _git(main, "worktree", "add", "-q", "-b", "feature", str(wt))
+        bind(main, "1", "sess-main")
+        _tasks(wt, {"1": "in_progress", "2": "in_progress"})
+        assert _active(wt, "new-session") == "2"
+
+
+class TestHooks:
+
+    def test_relations_hook_records_binding(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"1": "in_progress"})
+        env = {**os.environ, "ULTRA_RELATIONS_QUIET_MS": "0"}
+        payload = {"session_id": "sess-x", "tool_name": "Edit", "tool_input": {
+            "file_path": str(root / ".ultra" / "tasks" / "tasks.json")}}
+        proc = subprocess.run([sys.executable, str(HOOKS / "relations_sync.py")],
+                              input=json.dumps(payload), cwd=root, env=env,
+                              capture_output=True, text=True, timeout=60)
+        assert proc.returncode == 0
+        assert load_bindings(root)["sessions"]["sess-x"]["task"] == "1"
+
+    def test_progress_credited_to_session_task(self, tmp_path, monkeypatch):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"1": "in_progress", "2": "in_progress"})
+        bind(root, "1", "sess-a")
+        bind(root, "2", "sess-b")
+        monkeypatch.chdir(root)
+        hook_utils.update_task_progress(str(root / "a.py"), session_id="sess-a")
+        hook_utils.update_task_progress(str(root / "b.py"), session_id="sess-b")
+        assert load_progress(root, "1")["files_touched"] == ["a.py"]
+        assert load_progress(root, "2")["files_touched"] == ["b.py"]
+
+    def test_cli_bind_and_show(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        proc = subprocess.run(
+            [sys.executable, str(HOOKS / "task_binding.py"), "bind", "7",
+             "--session", "s1", "--root", str(root)],
+            capture_output=True, text=True, timeout=30,
+        )
+        assert proc.returncode == 0
+        assert json.loads(proc.stdout)["sessions"]["s1"]["task"] == "7"
+
+    def test_start_writes_tasks_json_and_binds(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"1": "in_progress", "2": "pending"})
+        tasks_json = root / ".ultra" / "tasks" / "tasks.json"
+        doc = json.loads(tasks_json.read_text())
+        tasks_json.write_text(json.dumps(dict(doc, version="7")))
+        assert observe(root, "sess-a") == ["1"]
+        task = start(root, "2", "sess-b")
+        assert task["status"] == "in_progress" and task["started_at"]
+        doc = json.loads(tasks_json.read_text())
+        assert doc["version"] == "7"
+        assert [t["status"] for t in doc["tasks"]] == ["in_progress", "in_progress"]
+        assert _active(root, "sess-b") == "2"
+        # Another session's next tasks.json edit must not claim it
+        assert observe(root, "sess-a") == []
+        assert _active(root, "sess-a") == "1"
+        # Resuming keeps the original start time
+        assert start(root, "2", "sess-c")["started_at"] == task["started_at"]
+        assert start(root, "nope", "sess-c") is None
+
+    def test_cli_start(self, tmp_path):
+        root = _repo(tmp_path / "r")
+        _tasks(root, {"3": "pending"})
+        proc = subprocess.run(
+            [sys.executable, str(HOOKS / "task_binding.py"), "start", "3",
+             "--session", "s1", "--root", str(root)],
+            capture_output=True, text=True, timeout=30,
+        )
+        assert proc.returncode == 0
+        assert json.loads(proc.stdout)["sessions"]["s1"]["task"] == "3"
+        assert _active(root, "s1") == "3"
@@ -0,0 +1,130 @@
+"""Tests for task_scheduler.py — dependency DAG, waves, critical path, picks.
+
+Graphs are small tasks.json lists; the CLI runs as a subprocess against a
+temp project, as /ultra-dev and /ultra-status call it.
+"""
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from task_scheduler import TaskGraph, schedule
+
+SCRIPT = Path(__file__).parent.parent / "task_scheduler.py"
+
+
+def _t(tid, deps=(), status="pending", priority="P1", days=1, **extra):
+    return {"id": tid, "title": f"Task {tid}", "status": status, "priority": priority,
+            "dependencies": list(deps), "estimated_days": days, **extra}
+
+
+class TestWavesAndReady:
+
+    def test_diamond(self):
+        tasks = [_t("1"), _t("2", ["1"]), _t("3", ["1"]), _t("4", ["2", "3"])]
+        r = schedule(tasks)
+        assert r["waves"] == [["1"], ["2", "3"], ["4"]]
+        assert r["ready"] == ["1"]
+
+    def test_completed_dependencies_release_tasks(self):
+        tasks = [_t("1", status="completed"), _t("2", ["1"]), _t("3", ["1"]), _t("4", ["2", "3"])]
+        r = schedule(tasks, workers=2)
+        assert r["waves"] == [["2", "3"], ["4"]]
+        assert [n["id"] for n in r["next"]] == ["2", "3"]
+        assert r["counts"] == {"total": 4, "completed": 1, "pending": 3}
+
+    def test_in_progress_and_blocked_are_not_ready(self):
+        tasks = [_t("1", status="in_progress"), _t("2", ["1"]), _t("3", status="blocked"), _t("4")]
+        r = schedule(tasks, workers=3)
+        assert r["waves"][0] == ["1", "3", "4"]
+        assert r["ready"] == ["4"]
+        assert r["in_progress"] == ["1"]
+
+    def test_int_ids_and_missing_dependencies(self):
+        tasks = [_t(1), _t(2, [1, 99])]
+        r = schedule(tasks)
+        assert r["waves"] == [["1"], ["2"]]
+        assert r["missing"] == {"2": ["99"]}
+
+
+class TestRanking:
+
+    def test_critical_path_weighted_by_days(self):
+        tasks = [_t("a", days=1), _t("b", ["a"], days=5), _t("c", days=2), _t("d", ["c"], days=1)]
+        r = schedule(tasks)
+        assert r["critical_path"] == {"tasks": ["a", "b"], "days": 6.0}
+        assert r["next"][0]["id"] == "a" and r["next"][0]["critical"] is True
+
+    def test_priority_then_tail_then_unblocks(self):
+        tasks = [_t("1", priority="P2"), _t("2", priority="P0"), _t("3", priority="P1"),
+                 _t("4", priority="P1"), _t("5", ["4"], days=0.5), _t("x", days=9)]
+        r = schedule(tasks)
+        # x alone is the critical path; then P0 before P1s; 4 unblocks 5
+        assert r["ready"] == ["x", "2", "4", "3", "1"]
+
+    def test_file_conflicts_deferred(self):
+        tasks = [_t("1"), _t("2"), _t("3"), _t("4", status="in_progress")]
+        files = {"1": ["src/a.ts"], "2": ["src/a.ts", "src/b.ts"], "3": ["src/c.ts"],
+                 "4": ["src/c.ts"]}
+        r = schedule(tasks, workers=3, files_by_task=files)
+        assert [n["id"] for n in r["next"]] == ["1"]
+        assert r["deferred"] == [{"id": "2", "conflicts_with": ["1"]},
+                                 {"id": "3", "conflicts_with": ["4"]}]
+
+
+class TestCycles:
+
+    def test_cycle_reported_as_chain(self):
+        tasks = [_t("1"), _t("2", ["1", "4"]), _t("3", ["2"]), _t("4", ["3"]), _t("5", ["4"])]
+        r = schedule(tasks)
+        assert r["cycles"] == [["2", "4", "3", "2"]]
+        assert r["blocked_by_cycle"] == ["2", "3", "4", "5"]
+        assert r["waves"] == [["1"]]
+
+    def test_self_dependency(self):
+        g = TaskGraph([_t("1", ["1"])])
+        _order, stuck = g.topo_order()
+        assert g.cycles(stuck) == [["1", "1"]]
+
+    def test_acyclic_has_no_cycles(self):
+        assert schedule([_t("1"), _t("2", ["1"])])["cycles"] == []
+
+
+class TestScale:
+
+    def test_thousands_of_tasks_fast(self):
+        tasks = [_t(str(i), [str(i - 1), str(i // 2)] if i else [], days=1 + i % 3)
+                 for i in range(3000)]
+        start = time.perf_counter()
+        r = schedule(tasks, workers=4)
+        assert (time.perf_counter() - start) < 1.0
+        assert r["ready"] == ["0"] and len(r["waves"]) == 3000
+
+
+class TestCli:
+
+    def test_json_output(self, tmp_path):
+        ultra = tmp_path / ".ultra"
+        (ultra / "tasks").mkdir(parents=True)
+        (ultra / "tasks" / "tasks.json").write_text(json.dumps(
+            {"tasks": [_t("1"), _t("2"), _t("3", ["1"])]}))
+        (ultra / "relations.json").write_text(json.dumps({"files": {
+            "src/a.ts": {"tasks": ["1", "2"], "from": ["target_files"]},
+        }}))
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPT), "--workers", "2", "--root", str(tmp_path)],
+            capture_output=True, text=True, timeout=30,
+        )
+        r = json.loads(proc.stdout)
+        assert proc.returncode == 0
+        assert [n["id"] for n in r["next"]] == ["1"]
+        assert r["deferred"] == [{"id": "2", "conflicts_with": ["1"]}]
+
+    def test_missing_tasks_json(self, tmp_path):
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPT), "--root", str(tmp_path)],
+            capture_output=True, text=True, timeout=30,
+        )
+        assert proc.returncode == 1 and json.loads(proc.stdout) == {}
@@ -0,0 +1,150 @@
+"""Tests for task_store.py — SQLite mirror of tasks.json.
+
+The store must answer the active task from an indexed row, pick up hand
+edits to tasks.json (even same-size ones within one mtime tick), export
+update_task() changes back to tasks.json, and fall back to parsing the
+JSON whenever the db is disabled or unusable.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import hook_utils
+import task_store
+from task_store import TaskStore, find_active_task
+
+
+def _tasks_path(root: Path) -> Path:
+    return root / ".ultra" / "tasks" / "tasks.json"
+
+
+def _write(root: Path, doc) -> Path:
+    path = _tasks_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc), encoding="utf-8")
+    return path
+
+
+def _t(tid, status="pending", **extra):
+    return {"id": tid, "title": f"Task {tid}", "status": status, **extra}
+
+
+class TestLookup:
+
+    def test_active_task_from_store(self, tmp_path):
+        _write(tmp_path, {"tasks": [_t("1", "completed"), _t("2", "in_progress"),
+                                    _t("3", "in_progress")]})
+        assert find_active_task(tmp_path)["id"] == "2"
+        assert (tmp_path / ".ultra" / "tasks.db").exists()
+        with TaskStore(tmp_path) as store:
+            assert [t["id"] for t in store.by_status("in_progress")] == ["2", "3"]
+            assert store.get("1")["status"] == "completed"
+            assert store.get("9") is None
+
+    def test_no_tasks_json(self, tmp_path):
+        assert find_active_task(tmp_path) is None
+        assert not (tmp_path / ".ultra" / "tasks.db").exists()
+
+    def test_int_ids_and_list_document(self, tmp_path):
+        _write(tmp_path, [_t(7, "in_progress")])
+        assert find_active_task(tmp_path)["id"] == 7
+
+
+class TestJsonToStore:
+
+    def test_hand_edit_reimported(self, tmp_path):
+        path = _write(tmp_path, {"tasks": [_t("1", "in_progress"), _t("2")]})
+        assert find_active_task(tmp_path)["id"] == "1"
+        _write(tmp_path, {"tasks": [_t("1", "completed"), _t("2", "in_progress")]})
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert find_active_task(tmp_path)["id"] == "2"
+
+    def test_same_size_edit_in_racy_window(self, tmp_path):
+        path = _write(tmp_path, {"tasks": [_t("1", "in_progress"), _t("2", "pending__")]})
+        st = path.stat()
+        assert find_active_task(tmp_path)["id"] == "1"
+        # Same size, same mtime: only the content hash can tell
+        _write(tmp_path, {"tasks": [_t("1", "pending__"), _t("2", "in_progress")]})
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert path.stat().st_size == st.st_size
+        assert find_active_task(tmp_path)["id"] == "2"
+
+    def test_unchanged_file_not_reimported(self, tmp_path):
+        path = _write(tmp_path, {"tasks": [_t("1", "in_progress")]})
+        old = path.stat().st_mtime_ns - 10_000_000_000
+        os.utime(path, ns=(old, old))
+        with TaskStore(tmp_path) as store:
+            assert store.sync() is True
+            assert store.sync() is False
+
+
+class TestStoreToJson:
+
+    def test_update_exports_and_keeps_extras(self, tmp_path):
+        path = _write(tmp_path, {"version": "4.4", "created": "2026-01-01",
+                                 "tasks": [_t("1", "in_progress"), _t("2"), _t("3")]})
+        with TaskStore(tmp_path) as store:
+            updated = store.update_task("1", status="completed", completed_at="2026-02-01")
+            assert updated["status"] == "completed"
+            store.update_task("3", status="in_progress")
+            assert store.update_task("nope", status="completed") is None
+        doc = json.loads(path.read_text(encoding="utf-8"))
+        assert list(doc) == ["version", "created", "tasks"]
+        assert [(t["id"], t["status"]) for t in doc["tasks"]] == [
+            ("1", "completed"), ("2", "pending"), ("3", "in_progress")]
+        assert doc["tasks"][0]["completed_at"] == "2026-02-01"
+        assert find_active_task(tmp_path)["id"] == "3"
+
+    def test_update_sees_unsynced_hand_edit(self, tmp_path):
+        path = _write(tmp_path, {"tasks": [_t("1"), _t("2")]})
+        find_active_task(tmp_path)
+        _write(tmp_path, {"tasks": [_t("1", title="Renamed"), _t("2"), _t("3")]})
+        with TaskStore(tmp_path) as store:
+            store.update_task("2", status="in_progress")
+        doc = json.loads(path.read_text(encoding="utf-8"))
+        assert doc["tasks"][0]["title"] == "Renamed" and len(doc["tasks"]) == 3
+
+    def test_invalid_json_never_overwritten(self, tmp_path):
+        path = _tasks_path(tmp_path)
+        path.parent.mkdir(parents=True)
+        path.write_text('{"tasks": [', encoding="utf-8")
+        with TaskStore(tmp_path) as store:
+            assert store.update_task("1", status="completed") is None
+        assert path.read_text(encoding="utf-8") == '{"tasks": ['
+
+
+class TestFallback:
+
+    def test_disabled_store(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ULTRA_TASK_STORE", "0")
+        _write(tmp_path, {"tasks": [_t("1", "in_progress")]})
+        assert find_active_task(tmp_path)["id"] == "1"
+        assert not (tmp_path / ".ultra" / "tasks.db").exists()
+
+    def test_corrupt_db_falls_back(self, tmp_path):
+        _write(tmp_path, {"tasks": [_t("1", "in_progress")]})
+        (tmp_path / ".ultra" / "tasks.db").write_bytes(b"not a database" * 100)
+        assert find_active_task(tmp_path)["id"] == "1"
+
+    def test_store_error_falls_back(self, tmp_path, monkeypatch):
+        _write(tmp_path, {"tasks": [_t("1", "in_progress")]})
+
+        def boom(*_args):
+            raise task_store.sqlite3.OperationalError("database is locked")
+
+        monkeypatch.setattr(TaskStore, "by_status", boom)
+        assert find_active_task(tmp_path)["id"] == "1"
+
+
+class TestIntegration:
+
+    def test_get_active_task_uses_store(self, tmp_path, monkeypatch):
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        _write(tmp_path, {"tasks": [_t("1"), _t("2", "in_progress")]})
+        monkeypatch.chdir(tmp_path)
+        assert hook_utils.get_active_task()["id"] == "2"
+        assert (tmp_path / ".ultra" / "tasks.db").exists()
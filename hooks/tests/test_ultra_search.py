@@ -0,0 +1,172 @@
+"""Tests for ultra_search.py — BM25 index over .ultra knowledge artifacts.
+
+Section splitting and anchors, ranking, incremental refresh (only changed
+files re-tokenized) and the CLI, against real files in a temp project.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import ultra_search
+from ultra_search import search, split_sections, tokenize, update_index
+
+SCRIPT = Path(__file__).parent.parent / "ultra_search.py"
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _project(root: Path) -> Path:
+    ultra = root / ".ultra"
+    _write(ultra / "specs" / "product.md",
+           "# Product\nIntro text.\n\n## Login\nUsers sign in with email and password.\n"
+           "Lockout after five failed attempts.\n\n## Billing\nInvoices are monthly.\n")
+    _write(ultra / "tasks" / "contexts" / "task-1.md",
+           "# Task 1: Auth\n\n## Acceptance Criteria\n- Login rate limit enforced\n\n"
+           "## Session Trail\n- 2026-05-01 [sid:abc] touched src/auth.ts (token refresh)\n")
+    _write(ultra / "sessions" / "orphan-trail.md",
+           "# Orphan Trail\n- 2026-05-02 [sid:def]; branch:main; 1 files (cache.ts)\n")
+    _write(ultra / "docs" / "research" / "round-1.md",
+           "# Research\n## Token refresh strategies\nSliding refresh tokens rotate on use.\n")
+    _write(ultra / "reviews" / "20260501-x" / "SUMMARY.md",
+           "# Review Summary\n## P1\n- Missing rate limit on login endpoint\n")
+    _write(ultra / "reviews" / "20260501-x" / "review-code.json", '{"login": 1}')
+    return root
+
+
+class TestTokenize:
+
+    def test_words_stopwords_and_identifiers(self):
+        assert tokenize("The Login_flow is in task-3 (a)") == ["login", "flow", "task", "3"]
+
+    def test_cjk_bigrams(self):
+        assert tokenize("用户登录") == ["用户", "户登", "登录"]
+        assert tokenize("登") == ["登"]
+
+
+class TestSplitSections:
+
+    def test_sections_anchors_and_lines(self):
+        text = "intro\n# Title\nbody\n## Dup\na\n## Dup\nb\n"
+        got = [(a, h, s, e) for a, h, s, e, _b in split_sections(text)]
+        assert got == [
+            ("", "", 1, 1),
+            ("title", "# Title", 2, 3),
+            ("dup", "## Dup", 4, 5),
+            ("dup-1", "## Dup", 6, 8),
+        ]
+
+    def test_headings_in_code_fences_ignored(self):
+        text = "# Real\n```\n# not a heading\n```\n"
+        sections = split_sections(text)
+        assert [s[0] for s in sections] == ["real"]
+        assert "# not a heading" in sections[0][4]
+
+
+class TestSearch:
+
+    def test_ranks_sections_with_anchors(self, tmp_path):
+        root = _project(tmp_path)
+        hits = search(root, "lockout failed attempts")
+        assert hits[0]["ref"] == ".ultra/specs/product.md#login"
+        assert hits[0]["line"] == 4
+        assert hits[0]["snippet"] == "Lockout after five failed attempts."
+
+    def test_covers_all_artifact_kinds(self, tmp_path):
+        root = _project(tmp_path)
+        refs = {h["ref"] for h in search(root, "rate limit login", limit=20)}
+        assert ".ultra/tasks/contexts/task-1.md#acceptance-criteria" in refs
+        assert ".ultra/reviews/20260501-x/SUMMARY.md#p1" in refs
+        assert not any(r.endswith(".json") for r in refs)
+        assert search(root, "sliding")[0]["path"] == ".ultra/docs/research/round-1.md"
+        assert search(root, "cache")[0]["path"] == ".ultra/sessions/orphan-trail.md"
+        assert search(root, "token refresh")[0]["anchor"] == "token-refresh-strategies"
+
+    def test_heading_terms_weigh_more(self, tmp_path):
+        root = tmp_path
+        _write(root / ".ultra" / "specs" / "a.md",
+               "## Caching\nLayer.\n\n## Other\nWe mention caching once here.\n")
+        assert search(root, "caching")[0]["anchor"] == "caching"
+
+    def test_no_match_and_empty_query(self, tmp_path):
+        root = _project(tmp_path)
+        assert search(root, "zzzunknown") == []
+        assert search(root, "the of") == []
+
+
+class TestIncremental:
+
+    def test_only_changed_files_reindexed(self, tmp_path, monkeypatch):
+        root = _project(tmp_path)
+        assert update_index(root) == 5
+        assert update_index(root) == 0  # racy files re-hashed, not re-tokenized
+        indexed = []
+        real = ultra_search._index_doc
+        monkeypatch.setattr(ultra_search, "_index_doc",
+                            lambda conn, rel, text: (indexed.append(rel), real(conn, rel, text)))
+        update_index(root)
+        assert indexed == []
+
+        _write(root / ".ultra" / "specs" / "product.md", "## Login\nPasskeys only.\n")
+        update_index(root)
+        assert indexed == [".ultra/specs/product.md"]
+        assert search(root, "passkeys")[0]["ref"] == ".ultra/specs/product.md#login"
+        assert search(root, "invoices") == []
+
+    def test_deleted_file_dropped(self, tmp_path):
+        root = _project(tmp_path)
+        update_index(root)
+        (root / ".ultra" / "docs" / "research" / "round-1.md").unlink()
+        assert update_index(root) == 1
+        assert search(root, "sliding") == []
+
+    def test_rebuild_and_deleted_db(self, tmp_path):
+        root = _project(tmp_path)
+        update_index(root)
+        (root / ".ultra" / "cache" / ultra_search.DB_NAME).unlink()
+        assert search(root, "lockout")[0]["anchor"] == "login"
+        assert update_index(root, rebuild=True) == 5
+
+    def test_relations_sync_refreshes_existing_index_only(self, tmp_path):
+        import relations_sync
+        root = _project(tmp_path)
+        _write(root / ".ultra" / "tasks" / "tasks.json", json.dumps({"tasks": []}))
+        relations_sync.run_sync(root)
+        assert not (root / ".ultra" / "cache" / ultra_search.DB_NAME).exists()
+        update_index(root)
+        _write(root / ".ultra" / "specs" / "product.md", "## Login\nPasskeys only.\n")
+        relations_sync.run_sync(root)
+        assert search(root, "passkeys", refresh=False)[0]["anchor"] == "login"
+
+
+class TestCli:
+
+    def _run(self, root, *args):
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPT), *args, "--root", str(root)],
+            capture_output=True, text=True, timeout=30,
+        )
+        return proc.returncode, proc.stdout, proc.stderr
+
+    def test_text_output(self, tmp_path):
+        root = _project(tmp_path)
+        code, out, _err = self._run(root, "lockout")
+        assert code == 0
+        assert '1 hit(s) for "lockout"' in out.splitlines()[0]
+        assert ".ultra/specs/product.md#login:4  ## Login" in out
+
+    def test_json_output_and_limit(self, tmp_path):
+        root = _project(tmp_path)
+        code, out, _err = self._run(root, "login", "--json", "--limit", "2")
+        data = json.loads(out)
+        assert code == 0 and data["query"] == "login"
+        assert len(data["hits"]) == 2
+        assert data["hits"][0]["score"] >= data["hits"][1]["score"]
+
+    def test_usage_without_query(self, tmp_path):
+        code, _out, err = self._run(tmp_path)
+        assert code == 2 and "usage" in err
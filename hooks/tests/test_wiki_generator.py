@@ -8,10 +8,13 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
+import wiki_generator
 from wiki_generator import (
+    WikiModel,
     build_index_md,
     build_log_md,
     generate_wiki,
+    invert_files_index,
 )
 
 
@@ -302,6 +305,140 @@ class TestRecentActivity:
         assert "## Recent Activity" not in md
 
 
+class TestWikiModel:
+    """One-pass loader shared by index.md and log.md."""
+
+    def test_invert_files_index_sorted_per_task(self):
+        files = {
+            "src/b.ts": {"tasks": ["1", "2"]},
+            "src/a.ts": {"tasks": ["1"]},
+            "src/c.ts": {"tasks": []},
+        }
+        assert invert_files_index(files) == {"1": ["src/a.ts", "src/b.ts"], "2": ["src/b.ts"]}
+
+    def test_progress_read_once_and_shared(self, tmp_path):
+        prog = tmp_path / ".ultra" / "tasks" / "progress"
+        prog.mkdir(parents=True)
+        (prog / "task-1.json").write_text(json.dumps({
+            "last_updated": "2026-01-02T00:00:00+00:00",
+            "files_touched": ["src/a.ts"],
+            "advisories": [{"msg": "x"}],
+        }))
+        (prog / "task-2.json").write_text("{not json")
+        rel = {"tasks": {"1": {"title": "A", "status": "pending"},
+                         "2": {"title": "B", "status": "pending"}}}
+        model = WikiModel(rel, tmp_path)
+        assert model.progress == {"1": ("2026-01-02T00:00:00+00:00", ["src/a.ts"], 1)}
+        # Renders use the loaded model, not the files on disk
+        (prog / "task-1.json").unlink()
+        md = build_log_md(rel, tmp_path, model)
+        assert "## 2026-01-02" in md
+        assert "- Advisories: 1" in md
+
+
+class TestIncrementalRender:
+    """Unchanged files are not rewritten; changed inputs reach the output."""
+
+    def _project(self, root: Path, title: str = "A", synced: str = "t1") -> None:
+        ultra = root / ".ultra"
+        ultra.mkdir(exist_ok=True)
+        (ultra / "relations.json").write_text(json.dumps({
+            "last_synced": synced,
+            "tasks": {"1": {"title": title, "status": "pending"},
+                      "2": {"title": "B", "status": "completed"}},
+            "files": {"src/a.ts": {"tasks": ["1"]}},
+            "specs": {"specs/p.md#x": {"referenced_by": ["1"]}},
+        }))
+
+    def test_changed_task_is_rewritten_without_section_cache(self, tmp_path):
+        self._project(tmp_path)
+        assert generate_wiki(tmp_path)
+        self._project(tmp_path, title="A renamed")
+        assert generate_wiki(tmp_path)
+        assert "task-1: A renamed" in (tmp_path / ".ultra" / "wiki" / "index.md").read_text()
+        assert not (tmp_path / ".ultra" / "cache" / "wiki-sections.json").exists()
+
+    def test_unchanged_output_is_not_rewritten(self, tmp_path):
+        self._project(tmp_path)
+        assert generate_wiki(tmp_path)
+        index = tmp_path / ".ultra" / "wiki" / "index.md"
+        before = index.stat().st_mtime_ns
+        # Only the sync stamp moved: nothing visible changed
+        self._project(tmp_path, synced="t2")
+        assert generate_wiki(tmp_path)
+        assert index.stat().st_mtime_ns == before
+        assert "Last synced: t1" in index.read_text()
+
+        self._project(tmp_path, title="A2", synced="t3")
+        assert generate_wiki(tmp_path)
+        text = index.read_text()
+        assert "task-1: A2" in text and "Last synced: t3" in text
+
+
+class TestShardedWiki:
+    """Above the shard threshold: compact index + per-status/month/spec pages."""
+
+    def _project(self, root: Path, n: int = 7) -> dict:
+        ultra = root / ".ultra"
+        (ultra / "tasks" / "progress").mkdir(parents=True)
+        tasks = {str(i): {"title": f"T{i}", "status": "pending" if i % 2 else "completed"}
+                 for i in range(1, n + 1)}
+        rel = {
+            "last_synced": "t1",
+            "tasks": tasks,
+            "files": {"src/a.ts": {"tasks": ["1"]}},
+            "specs": {"specs/product.md#login": {"referenced_by": ["1"]},
+                      "specs/product.md#logout": {"referenced_by": []},
+                      "specs/ops.md#deploy": {"referenced_by": ["2"]}},
+        }
+        (ultra / "relations.json").write_text(json.dumps(rel))
+        (ultra / "tasks" / "progress" / "task-1.json").write_text(json.dumps(
+            {"last_updated": "2026-03-04T00:00:00+00:00", "files_touched": ["src/a.ts"]}))
+        return rel
+
+    def test_layout(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ULTRA_WIKI_SHARD_THRESHOLD", "5")
+        monkeypatch.setattr(wiki_generator, "WIKI_PAGE_SIZE", 2)
+        self._project(tmp_path)
+        assert generate_wiki(tmp_path)
+        wiki = tmp_path / ".ultra" / "wiki"
+        index = (wiki / "index.md").read_text()
+        assert "| Pending Tasks (`pending`) | 4 | [1](status/pending.md) [2](status/pending-2.md) |" in index
+        assert "| [product.md](specs/product.md) | 2 | 1 | 1 |" in index
+        assert "### task-" not in index
+        page2 = (wiki / "status" / "pending-2.md").read_text()
+        assert page2.startswith("# Pending Tasks (page 2/2)")
+        assert "[prev](pending.md)" in page2 and "### task-5: T5" in page2
+        assert "### task-1 (pending) — T1" in (wiki / "log" / "2026-03.md").read_text()
+        assert "[1](log/untracked.md)" in (wiki / "log.md").read_text()
+        assert "`specs/ops.md#deploy` | task-2" in (wiki / "specs" / "ops.md").read_text()
+
+    def test_only_changed_shards_rewritten(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ULTRA_WIKI_SHARD_THRESHOLD", "5")
+        rel = self._project(tmp_path)
+        generate_wiki(tmp_path)
+        wiki = tmp_path / ".ultra" / "wiki"
+        completed = wiki / "status" / "completed.md"
+        pending = wiki / "status" / "pending.md"
+        before = completed.stat().st_mtime_ns, pending.stat().st_mtime_ns
+        rel["tasks"]["3"]["title"] = "T3 renamed"
+        (tmp_path / ".ultra" / "relations.json").write_text(json.dumps(rel))
+        generate_wiki(tmp_path)
+        assert completed.stat().st_mtime_ns == before[0]
+        assert pending.stat().st_mtime_ns != before[1]
+        assert "T3 renamed" in pending.read_text()
+
+    def test_small_project_drops_shards(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ULTRA_WIKI_SHARD_THRESHOLD", "5")
+        self._project(tmp_path)
+        generate_wiki(tmp_path)
+        monkeypatch.setenv("ULTRA_WIKI_SHARD_THRESHOLD", "500")
+        generate_wiki(tmp_path)
+        wiki = tmp_path / ".ultra" / "wiki"
+        assert not list((wiki / "status").glob("*.md"))
+        assert "### task-3: T3" in (wiki / "index.md").read_text()
+
+
 class TestRelationsSyncIntegratesWiki:
     """relations_sync.py must invoke generate_wiki at the end of its run."""
 
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Ultra Search — BM25 full-text index over .ultra knowledge artifacts.
+
+Recalling project knowledge used to mean Grep over every spec, task context,
+Session Trail, orphan trail, research report and review summary: megabytes of
+markdown re-read per query. This keeps an inverted index of those files at
+markdown-section granularity and ranks hits with BM25.
+
+Indexed (paths relative to the project root):
+  .ultra/specs/**/*.md               specs
+  .ultra/tasks/contexts/*.md         task contexts (incl. ## Session Trail)
+  .ultra/sessions/orphan-trail.md    sessions with no active task
+  .ultra/docs/research/**/*.md       /ultra-research reports
+  docs/research/**/*.md
+  .ultra/reviews/*/SUMMARY.md        /ultra-review summaries
+
+Storage: .ultra/cache/search-index.db (derived — safe to delete)
+  docs(path, mtime_ns, size, sha1)     one row per indexed file
+  sections(id, path, anchor, heading, line, end_line, length)
+  postings(term, section_id, tf)       PK (term, section_id)
+  meta(key, value)                     version, written_ns
+
+Incremental like relations_sync's source manifest: a file is re-read only
+when its (mtime_ns, size) changed, and re-tokenized only when its sha1
+changed. The CLI builds the index on first use and refreshes it before every
+query, so results never lag the files on disk; relations_sync keeps an
+existing index warm after each sync (it never pays for a cold build inside
+the hook's time budget).
+
+CLI:
+  python3 hooks/ultra_search.py "query" [--limit N] [--json] [--root PATH] [--rebuild]
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_utils import get_cache_dir, get_git_toplevel, slugify_heading
+
+DB_NAME = "search-index.db"
+INDEX_VERSION = "1"
+SOURCES = (
+    (".ultra/specs", "**/*.md"),
+    (".ultra/tasks/contexts", "*.md"),
+    (".ultra/sessions", "orphan-trail.md"),
+    (".ultra/docs/research", "**/*.md"),
+    ("docs/research", "**/*.md"),
+    (".ultra/reviews", "*/SUMMARY.md"),
+)
+K1 = 1.2
+B = 0.75
+HEADING_WEIGHT = 2
+SNIPPET_MAX = 160
+RACY_WINDOW_NS = 2_000_000_000
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this "
+    "to was were will with".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS docs (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY, path TEXT NOT NULL, anchor TEXT, heading TEXT,
+    line INTEGER, end_line INTEGER, length INTEGER
+);
+CREATE INDEX IF NOT EXISTS sections_path ON sections(path);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL, section_id INTEGER NOT NULL, tf INTEGER NOT NULL,
+    PRIMARY KEY (term, section_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_section ON postings(section_id);
+"""
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]+")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word tokens; CJK runs become overlapping bigrams."""
+    out = []
+    for m in _WORD_RE.finditer(text.lower()):
+        tok = m.group()
+        if tok[0] >= "\u3040":
+            if len(tok) == 1:
+                out.append(tok)
+            else:
+                out.extend(tok[i:i + 2] for i in range(len(tok) - 1))
+        elif tok not in STOPWORDS and (len(tok) > 1 or tok.isdigit()):
+            out.append(tok)
+    return out
+
+
+def split_sections(text: str) -> list:
+    """Markdown → [(anchor, heading, line, end_line, body)], 1-based lines.
+
+    Text before the first heading is a section with anchor "". Headings in
+    code fences are ignored; repeated anchors get GitHub's -1, -2 suffixes.
+    """
+    lines = text.split("\n")
+    sections = []
+    seen: dict = {}
+    anchor, heading, start = "", "", 1
+    body: list = []
+    in_fence = False
+
+    def close(end: int) -> None:
+        if heading or any(ln.strip() for ln in body):
+            sections.append((anchor, heading, start, end, "\n".join(body)))
+
+    for i, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+        m = None if in_fence else _HEADING_RE.match(stripped)
+        if m is None:
+            body.append(line)
+            continue
+        close(i - 1)
+        heading = stripped
+        slug = slugify_heading(stripped)
+        n = seen.get(slug, 0)
+        seen[slug] = n + 1
+        anchor = f"{slug}-{n}" if n else slug
+        start, body = i, []
+    close(len(lines))
+    return sections
+
+
+def _source_files(root: Path) -> dict:
+    """{root-relative posix path: Path} of every indexable file."""
+    found = {}
+    for base, pattern in SOURCES:
+        base_dir = root / base
+        if not base_dir.is_dir():
+            continue
+        for path in base_dir.glob(pattern):
+            if path.is_file():
+                found[path.relative_to(root).as_posix()] = path
+    return found
+
+
+def _db_path(root: Path):
+    try:
+        return get_cache_dir(Path(root)) / DB_NAME
+    except OSError:
+        return None
+
+
+def _meta(conn, key: str) -> str:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else ""
+
+
+def _drop_doc(conn, rel: str) -> None:
+    conn.execute(
+        "DELETE FROM postings WHERE section_id IN (SELECT id FROM sections WHERE path = ?)",
+        (rel,),
+    )
+    conn.execute("DELETE FROM sections WHERE path = ?", (rel,))
+
+
+def _index_doc(conn, rel: str, text: str) -> None:
+    _drop_doc(conn, rel)
+    for anchor, heading, line, end_line, body in split_sections(text):
+        terms: dict = {}
+        for tok in tokenize(body):
+            terms[tok] = terms.get(tok, 0) + 1
+        for tok in tokenize(heading):
+            terms[tok] = terms.get(tok, 0) + HEADING_WEIGHT
+        length = sum(terms.values())
+        if not length:
+            continue
+        cur = conn.execute(
+            "INSERT INTO sections (path, anchor, heading, line, end_line, length) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (rel, anchor, heading, line, end_line, length),
+        )
+        sid = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?)",
+            ((tok, sid, tf) for tok, tf in terms.items()),
+        )
+
+
+def _connect(path: Path):
+    conn = sqlite3.connect(str(path), timeout=2)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def update_index(root: Path, rebuild: bool = False, create: bool = True) -> int:
+    """Bring the index up to date with the files on disk.
+
+    Returns the number of files (re)indexed or dropped, -1 on error. With
+    create=False a missing index is left missing (returns 0). Never raises.
+    """
+    root = Path(root)
+    path = _db_path(root)
+    if path is None:
+        return -1
+    if not create and not path.exists():
+        return 0
+    try:
+        conn = _connect(path)
+        try:
+            if rebuild or _meta(conn, "version") != INDEX_VERSION:
+                with conn:
+                    for table in ("postings", "sections", "docs", "meta"):
+                        conn.execute(f"DELETE FROM {table}")
+            written_ns = int(_meta(conn, "written_ns") or 0)
+            known = {row[0]: row[1:] for row in conn.execute(
+                "SELECT path, mtime_ns, size, sha1 FROM docs")}
+            files = _source_files(root)
+            touched = 0
+            with conn:
+                for rel in set(known) - set(files):
+                    _drop_doc(conn, rel)
+                    conn.execute("DELETE FROM docs WHERE path = ?", (rel,))
+                    touched += 1
+                for rel, fp in files.items():
+                    try:
+                        st = fp.stat()
+                    except OSError:
+                        continue
+                    old = known.get(rel)
+                    racy = st.st_mtime_ns >= written_ns - RACY_WINDOW_NS
+                    if old and old[:2] == (st.st_mtime_ns, st.st_size) and not racy:
+                        continue
+                    try:
+                        data = fp.read_bytes()
+                    except OSError:
+                        continue
+                    sha1 = hashlib.sha1(data).hexdigest()
+                    if not old or old[2] != sha1:
+                        _index_doc(conn, rel, data.decode("utf-8", errors="replace"))
+                        touched += 1
+                    conn.execute(
+                        "INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?)",
+                        (rel, st.st_mtime_ns, st.st_size, sha1),
+                    )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("version", INDEX_VERSION), ("written_ns", str(time.time_ns()))],
+                )
+            return touched
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return -1
+
+
+def _snippet(lines: list, start: int, end: int, terms: set) -> str:
+    """First body line of the section mentioning a query term (else the first)."""
+    first = ""
+    for ln in lines[start:end]:
+        text = ln.strip()
+        if not text or text.startswith("```"):
+            continue
+        if not first:
+            first = text
+        if terms & set(tokenize(text)):
+            return text[:SNIPPET_MAX]
+    return first[:SNIPPET_MAX]
+
+
+def search(root: Path, query: str, limit: int = 10, refresh: bool = True) -> list:
+    """Ranked section hits for `query`, best first.
+
+    Each hit: {"path", "anchor", "ref", "heading", "line", "score", "snippet"};
+    ref is "path#anchor" (just path for a file's preamble). [] on error.
+    """
+    root = Path(root)
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    if refresh:
+        update_index(root)
+    path = _db_path(root)
+    if path is None or not path.exists():
+        return []
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=2)
+        try:
+            n, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM sections").fetchone()
+            if not n:
+                return []
+            avgdl = total / n
+            scores: dict = {}
+            for term in terms:
+                rows = conn.execute(
+                    "SELECT p.section_id, p.tf, s.length FROM postings p "
+                    "JOIN sections s ON s.id = p.section_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+                for sid, tf, length in rows:
+                    norm = tf + K1 * (1 - B + B * length / avgdl)
+                    scores[sid] = scores.get(sid, 0.0) + idf * tf * (K1 + 1) / norm
+            top = heapq.nlargest(limit, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+            hits = []
+            file_lines: dict = {}
+            wanted = set(terms)
+            for sid, score in top:
+                rel, anchor, heading, line, end_line = conn.execute(
+                    "SELECT path, anchor, heading, line, end_line FROM sections WHERE id = ?",
+                    (sid,),
+                ).fetchone()
+                if rel not in file_lines:
+                    try:
+                        file_lines[rel] = (root / rel).read_text(
+                            encoding="utf-8", errors="replace").split("\n")
+                    except OSError:
+                        file_lines[rel] = []
+                body_start = line if heading else line - 1
+                hits.append({
+                    "path": rel,
+                    "anchor": anchor,
+                    "ref": f"{rel}#{anchor}" if anchor else rel,
+                    "heading": heading,
+                    "line": line,
+                    "score": round(score, 3),
+                    "snippet": _snippet(file_lines[rel], body_start, end_line, wanted),
+                })
+            return hits
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return []
+
+
+def format_hits(query: str, hits: list, elapsed_ms: float) -> str:
+    lines = [f'[Search] {len(hits)} hit(s) for "{query}" ({elapsed_ms:.1f} ms)']
+    for hit in hits:
+        heading = f"  {hit['heading']}" if hit["heading"] else ""
+        lines.append(f"  {hit['score']:7.3f}  {hit['ref']}:{hit['line']}{heading}")
+        if hit["snippet"]:
+            lines.append(f"           {hit['snippet']}")
+    return "\n".join(lines)
+
+
+def main(argv: list) -> int:
+    args = list(argv)
+    opts = {"--limit": "10", "--root": ""}
+    flags = set()
+    words = []
+    while args:
+        arg = args.pop(0)
+        if arg in opts and args:
+            opts[arg] = args.pop(0)
+        elif arg in ("--json", "--rebuild"):
+            flags.add(arg)
+        else:
+            words.append(arg)
+    root = opts["--root"] or get_git_toplevel()
+    query = " ".join(words).strip()
+    if not root or (not query and "--rebuild" not in flags):
+        print('usage: ultra_search.py "query" [--limit N] [--json] [--root PATH] [--rebuild]',
+              file=sys.stderr)
+        return 2
+    try:
+        limit = max(1, int(opts["--limit"]))
+    except ValueError:
+        limit = 10
+
+    start = time.perf_counter()
+    update_index(Path(root), rebuild="--rebuild" in flags)
+    hits = search(Path(root), query, limit=limit, refresh=False) if query else []
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if "--json" in flags:
+        print(json.dumps({"query": query, "hits": hits}, ensure_ascii=False))
+    elif query:
+        print(format_hits(query, hits, elapsed_ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -13,19 +13,56 @@ human-readable markdown files that summarize the project at a glance.
 Called from relations_sync.py at the end of its run, so wiki freshness
 tracks the same trigger as the relations index — no extra hook to wire.
 
-Idempotent: regenerates the files in full each call. Best-effort: silent
-on any error so it can never break a hook.
+Idempotent and quiet on disk: a file is written only when its content
+differs from what is on disk, ignoring the "Last synced:" stamp — an
+unchanged wiki is not touched (no watcher wake-ups, no diff noise).
+Sections are re-rendered on every run: rendering is linear and cheaper than
+hashing, persisting and reloading every section (measured with
+bench_wiki_generator.py), so only whole shards are skipped by input hash.
+Best-effort: silent on any error so it can never break a hook.
+
+Sharded layout: at ULTRA_WIKI_SHARD_THRESHOLD tasks (default 500) a single
+index.md stops fitting in an agent's context. index.md and log.md then
+become compact link pages with counts, and the detail moves to shards:
+
+  status/<status>[-N].md   task blocks per status, WIKI_PAGE_SIZE per page
+  log/<YYYY-MM>[-N].md     log entries per month of last_updated
+  specs/<spec file>        coverage table for one spec file's sections
+
+A shard is rendered only when the hash of its inputs differs from the one in
+.ultra/cache/wiki-shards.json; shards no longer produced are deleted.
+
+Loading is one pass (WikiModel): the files index is inverted into a
+task → files map once, each progress/task-*.json is read once and shared by
+index.md and log.md, orphan-trail.md is parsed once. Rendering is then
+linear in project size. Timings on a synthetic 5k-task / 100k-file project:
+`python3 hooks/tests/bench_wiki_generator.py`.
 
 PHILOSOPHY: this is the Karpathy "compounding artifact" expressed as
 markdown that humans can read and grep — the structural facts already
 live in JSON; this layer makes them legible.
 """
 
+import hashlib
 import json
+import os
 import re
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from atomic_io import atomic_write_text
+
+try:
+    from progress_journal import load_progress
+except Exception:  # pragma: no cover — fall back to the snapshot file
+    load_progress = None
+
+try:
+    from relations_index import load_cold_files
+except Exception:  # pragma: no cover — archived files are optional context
+    def load_cold_files(_root) -> dict:  # type: ignore[no-redef]
+        return {}
+
 # Orphan trail bullets follow the shape produced by session_trail.build_orphan_line:
 #   - 2026-04-30T08:30Z [sid:abcdef12]; branch:main; 3 files (a.ts, b.ts, c.ts); last commit: ...
 ORPHAN_BULLET_RE = re.compile(
@@ -34,6 +71,16 @@ ORPHAN_BULLET_RE = re.compile(
 )
 RECENT_DAYS = 30
 RECENT_MAX_ENTRIES = 20
+SYNC_STAMP_PREFIX = "Last synced: "
+SHARD_STATE_NAME = "wiki-shards.json"
+SHARD_DIRS = ("status", "log", "specs")
+WIKI_PAGE_SIZE = 200
+STATUS_SECTIONS = (
+    ("in_progress", "Active Tasks"),
+    ("pending", "Pending Tasks"),
+    ("completed", "Completed Tasks"),
+    ("blocked", "Blocked Tasks"),
+)
 
 
 def _load_relations(root: Path) -> dict:
@@ -46,13 +93,6 @@ def _load_relations(root: Path) -> dict:
         return {}
 
 
-def _files_for_task(task_id: str, files_index: dict) -> list:
-    return sorted(
-        path for path, entry in files_index.items()
-        if str(task_id) in (entry.get("tasks") or [])
-    )
-
-
 def parse_orphan_trail(root: Path) -> list:
     """Parse .ultra/sessions/orphan-trail.md into (timestamp, summary) pairs.
 
@@ -75,7 +115,87 @@ def parse_orphan_trail(root: Path) -> list:
     return entries
 
 
-def _collect_recent_activity(rel_data: dict, root: Path) -> list:
+def invert_files_index(files_index: dict) -> dict:
+    """{task_id: sorted [paths]} from relations.json's path → tasks index."""
+    by_task: dict = {}
+    for path, entry in files_index.items():
+        for tid in entry.get("tasks") or []:
+            if isinstance(tid, str):
+                by_task.setdefault(tid, []).append(path)
+    for paths in by_task.values():
+        paths.sort()
+    return by_task
+
+
+class WikiModel:
+    """Everything the wiki renders, loaded in one pass over project state.
+
+    progress maps task id → (last_updated, files_touched, advisory count)
+    for tasks that have a readable progress file. Without a root only the
+    relations data is used (no progress, no orphan trail, no archived files).
+    """
+
+    def __init__(self, rel_data: dict, root: Path | None = None):
+        self.rel = rel_data
+        self.tasks = rel_data.get("tasks") or {}
+        files = rel_data.get("files") or {}
+        if root is not None:
+            cold = load_cold_files(root)
+            if cold:
+                files = {**cold, **files}
+        self.files_by_task = invert_files_index(files)
+        self.progress: dict = {}
+        self.orphans: list = []
+        if root is not None:
+            self._load_progress(root)
+            self.orphans = parse_orphan_trail(root)
+
+    def _load_progress(self, root: Path) -> None:
+        prog_dir = root / ".ultra" / "tasks" / "progress"
+        try:
+            names = {e.name for e in os.scandir(prog_dir) if e.name.startswith("task-")}
+        except OSError:
+            return
+        for tid in self.tasks:
+            name = f"task-{tid}.json"
+            if name not in names and f"{name}l" not in names:
+                continue
+            if load_progress is not None:
+                p = load_progress(root, tid)
+            else:
+                try:
+                    p = json.loads((prog_dir / name).read_text(encoding="utf-8"))
+                except (json.JSONDecodeError, OSError):
+                    continue
+            if not isinstance(p, dict):
+                continue
+            self.progress[tid] = (
+                p.get("last_updated") or "",
+                p.get("files_touched") or [],
+                p.get("advisories_total") or len(p.get("advisories") or []),
+            )
+
+    def files_for_task(self, tid) -> list:
+        return self.files_by_task.get(str(tid), [])
+
+
+def _without_stamp(text: str) -> str:
+    return "\n".join(ln for ln in text.split("\n") if not ln.startswith(SYNC_STAMP_PREFIX))
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Write text unless the file already holds it (sync stamp aside). True if written."""
+    try:
+        current = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        current = None
+    if current is not None and _without_stamp(current) == _without_stamp(text):
+        return False
+    atomic_write_text(path, text)
+    return True
+
+
+def _collect_recent_activity(model: WikiModel) -> list:
     """Merge task progress + orphan trail into time-sorted activity entries.
 
     Each entry is (timestamp_iso, source_label, detail_str). Filtered to the
@@ -85,27 +205,16 @@ def _collect_recent_activity(rel_data: dict, root: Path) -> list:
 
     activities: list = []
 
-    tasks = rel_data.get("tasks") or {}
-    for tid, t in tasks.items():
-        prog_path = root / ".ultra" / "tasks" / "progress" / f"task-{tid}.json"
-        if not prog_path.exists():
-            continue
-        try:
-            p = json.loads(prog_path.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
-            continue
-        last = p.get("last_updated") or ""
+    for tid, (last, files, adv_n) in model.progress.items():
         if not last or last < cutoff:
             continue
-        files = p.get("files_touched") or []
-        adv_n = len(p.get("advisories") or [])
-        status = t.get("status") or "?"
+        status = model.tasks[tid].get("status") or "?"
         detail_parts = [f"{len(files)} files"]
         if adv_n:
             detail_parts.append(f"{adv_n} advisories")
         activities.append((last, f"task-{tid} ({status})", "; ".join(detail_parts)))
 
-    for ts, summary in parse_orphan_trail(root):
+    for ts, summary in model.orphans:
         # Convert "2026-04-30T08:30Z" to comparable ISO. Append :00 seconds
         # if missing so lexicographic compare against cutoff stays correct.
         ts_norm = ts.replace("Z", ":00+00:00") if ts.endswith("Z") and len(ts) == 17 else ts
@@ -117,11 +226,16 @@ def _collect_recent_activity(rel_data: dict, root: Path) -> list:
     return activities[:RECENT_MAX_ENTRIES]
 
 
-def _build_recent_activity_section(rel_data: dict, root: Path) -> list:
+def _build_recent_activity_section(rel_data: dict, root: Path,
+                                   model: WikiModel | None = None) -> list:
     """Markdown lines for the Recent Activity section. Empty if no entries."""
-    entries = _collect_recent_activity(rel_data, root)
+    entries = _collect_recent_activity(model or WikiModel(rel_data, root))
     if not entries:
         return []
+    return _render_recent_activity(entries)
+
+
+def _render_recent_activity(entries: list) -> list:
     lines = [f"## Recent Activity (last {RECENT_DAYS} days)", ""]
     lines.append("| Date | Source | Detail |")
     lines.append("|------|--------|--------|")
@@ -134,12 +248,12 @@ def _build_recent_activity_section(rel_data: dict, root: Path) -> list:
     return lines
 
 
-def _render_task_block(tid: str, task: dict, files_index: dict) -> list:
+def _render_task_block(tid: str, task: dict, model: WikiModel) -> list:
     title = task.get("title") or "?"
     status = task.get("status") or "?"
     trace = task.get("trace_to") or []
     ctx = task.get("context_file") or ""
-    files = _files_for_task(tid, files_index)
+    files = model.files_for_task(tid)
 
     lines = [f"### task-{tid}: {title} ({status})"]
     if trace:
@@ -154,11 +268,35 @@ def _render_task_block(tid: str, task: dict, files_index: dict) -> list:
     return lines
 
 
-def build_index_md(rel_data: dict, root: Path | None = None) -> str:
+def _render_spec_coverage(specs: dict) -> list:
+    lines = ["## Spec Coverage", ""]
+    lines.append("| Spec section | Tasks |")
+    lines.append("|--------------|-------|")
+    for anchor, meta in sorted(specs.items()):
+        refs = meta.get("referenced_by") or []
+        tasks_str = ", ".join(f"task-{tid}" for tid in refs) if refs else "_(unreferenced)_"
+        lines.append(f"| `{anchor}` | {tasks_str} |")
+    lines.append("")
+    return lines
+
+
+def _render_advisories(advisories: list) -> list:
+    lines = ["## Advisories", ""]
+    for adv in advisories[:20]:
+        atype = adv.get("type") or "?"
+        tid = adv.get("task") or "?"
+        ref = adv.get("ref") or "?"
+        lines.append(f"- **{atype}** task-{tid}: `{ref}`")
+    lines.append("")
+    return lines
+
+
+def build_index_md(rel_data: dict, root: Path | None = None,
+                   model: WikiModel | None = None) -> str:
     """Render the wiki index. If root is given, include Recent Activity table
     derived from progress.json + orphan-trail.md."""
-    tasks = rel_data.get("tasks") or {}
-    files_index = rel_data.get("files") or {}
+    model = model or WikiModel(rel_data, root)
+    tasks = model.tasks
 
     buckets = {
         "in_progress": [],
@@ -180,90 +318,69 @@ def build_index_md(rel_data: dict, root: Path | None = None) -> str:
         "",
         "_Auto-generated from `.ultra/relations.json`. Do not edit manually._",
         "",
-        f"Last synced: {rel_data.get('last_synced', '?')}",
+        f"{SYNC_STAMP_PREFIX}{rel_data.get('last_synced', '?')}",
         "",
     ]
 
-    for status_key, label in [
-        ("in_progress", "Active Tasks"),
-        ("pending", "Pending Tasks"),
-        ("completed", "Completed Tasks"),
-        ("blocked", "Blocked Tasks"),
-    ]:
+    for status_key, label in STATUS_SECTIONS:
         bucket = buckets[status_key]
         if not bucket:
             continue
         parts.append(f"## {label}")
         parts.append("")
         for tid, t in sorted(bucket, key=lambda x: str(x[0])):
-            parts.extend(_render_task_block(tid, t, files_index))
+            parts.extend(_render_task_block(tid, t, model))
             parts.append("")
 
     if other:
         parts.append("## Other")
         parts.append("")
         for tid, t in sorted(other, key=lambda x: str(x[0])):
-            parts.extend(_render_task_block(tid, t, files_index))
+            parts.extend(_render_task_block(tid, t, model))
             parts.append("")
 
     # Phase 5B: Recent Activity (cross-task + orphan sessions)
     if root is not None:
-        recent = _build_recent_activity_section(rel_data, root)
+        recent = _build_recent_activity_section(rel_data, root, model)
         parts.extend(recent)
 
     specs = rel_data.get("specs") or {}
     if specs:
-        parts.append("## Spec Coverage")
-        parts.append("")
-        parts.append("| Spec section | Tasks |")
-        parts.append("|--------------|-------|")
-        for anchor, meta in sorted(specs.items()):
-            refs = meta.get("referenced_by") or []
-            tasks_str = ", ".join(f"task-{tid}" for tid in refs) if refs else "_(unreferenced)_"
-            parts.append(f"| `{anchor}` | {tasks_str} |")
-        parts.append("")
+        parts.extend(_render_spec_coverage(specs))
 
     advisories = rel_data.get("advisories") or []
     if advisories:
-        parts.append("## Advisories")
-        parts.append("")
-        for adv in advisories[:20]:
-            atype = adv.get("type") or "?"
-            tid = adv.get("task") or "?"
-            ref = adv.get("ref") or "?"
-            parts.append(f"- **{atype}** task-{tid}: `{ref}`")
-        parts.append("")
+        parts.extend(_render_advisories(advisories))
 
     return "\n".join(parts).rstrip() + "\n"
 
 
-def build_log_md(rel_data: dict, root: Path) -> str:
-    tasks = rel_data.get("tasks") or {}
+def _render_log_entry(tid: str, t: dict, last: str, files: list, adv_count: int) -> list:
+    title = t.get("title") or "?"
+    status = t.get("status") or "?"
+    lines = [f"### task-{tid} ({status}) — {title}"]
+    if files:
+        sample = ", ".join(Path(f).name for f in files[:3])
+        more = f", +{len(files) - 3}" if len(files) > 3 else ""
+        lines.append(f"- Files touched: {sample}{more} ({len(files)})")
+    if adv_count:
+        lines.append(f"- Advisories: {adv_count}")
+    if last:
+        lines.append(f"- Last updated: {last}")
+    lines.append("")
+    return lines
 
-    entries = []
-    for tid, t in tasks.items():
-        prog_path = root / ".ultra" / "tasks" / "progress" / f"task-{tid}.json"
-        last = ""
-        files: list = []
-        adv_count = 0
-        if prog_path.exists():
-            try:
-                p = json.loads(prog_path.read_text(encoding="utf-8"))
-                last = p.get("last_updated") or ""
-                files = p.get("files_touched") or []
-                adv_count = len(p.get("advisories") or [])
-            except (json.JSONDecodeError, OSError):
-                pass
-        entries.append((last, str(tid), t, files, adv_count))
 
-    entries.sort(key=lambda x: x[0] or "", reverse=True)
+def build_log_md(rel_data: dict, root: Path, model: WikiModel | None = None) -> str:
+    model = model or WikiModel(rel_data, root)
+    entries = _log_entries(model)
 
     parts = [
         "# Project Wiki — Log",
         "",
         "_Auto-generated chronological view of task progress (newest first)._",
         "",
-        f"Last synced: {rel_data.get('last_synced', '?')}",
+        f"{SYNC_STAMP_PREFIX}{rel_data.get('last_synced', '?')}",
         "",
     ]
 
@@ -271,6 +388,22 @@ def build_log_md(rel_data: dict, root: Path) -> str:
         parts.append("_(no tasks yet)_")
         return "\n".join(parts) + "\n"
 
+    parts.extend(_log_lines(entries))
+    return "\n".join(parts).rstrip() + "\n"
+
+
+def _log_entries(model: WikiModel) -> list:
+    """(last_updated, tid, task, files_touched, advisory count), newest first."""
+    entries = []
+    for tid, t in model.tasks.items():
+        last, files, adv_count = model.progress.get(tid, ("", [], 0))
+        entries.append((last, str(tid), t, files, adv_count))
+    entries.sort(key=lambda x: x[0] or "", reverse=True)
+    return entries
+
+
+def _log_lines(entries: list) -> list:
+    parts: list = []
     last_date = None
     for last, tid, t, files, adv_count in entries:
         date = last[:10] if last else "untracked"
@@ -279,20 +412,224 @@ def build_log_md(rel_data: dict, root: Path) -> str:
             parts.append("")
             last_date = date
 
-        title = t.get("title") or "?"
-        status = t.get("status") or "?"
-        parts.append(f"### task-{tid} ({status}) — {title}")
-        if files:
-            sample = ", ".join(Path(f).name for f in files[:3])
-            more = f", +{len(files) - 3}" if len(files) > 3 else ""
-            parts.append(f"- Files touched: {sample}{more} ({len(files)})")
-        if adv_count:
-            parts.append(f"- Advisories: {adv_count}")
-        if last:
-            parts.append(f"- Last updated: {last}")
+        parts.extend(_render_log_entry(tid, t, last, files, adv_count))
+    return parts
+
+
+# -- Sharded Layout --
+
+def shard_threshold() -> int:
+    try:
+        return max(1, int(os.environ.get("ULTRA_WIKI_SHARD_THRESHOLD", "500")))
+    except ValueError:
+        return 500
+
+
+def _pages(name: str, items: list) -> list:
+    """Split items into (relpath, page_items) pages: name.md, name-2.md, ..."""
+    chunks = [items[i:i + WIKI_PAGE_SIZE] for i in range(0, len(items), WIKI_PAGE_SIZE)] or [[]]
+    return [(f"{name}.md" if n == 0 else f"{name}-{n + 1}.md", chunk)
+            for n, chunk in enumerate(chunks)]
+
+
+def _page_links(pages: list) -> str:
+    return " ".join(f"[{n}]({rel})" for n, (rel, _items) in enumerate(pages, 1))
+
+
+def _page_header(title: str, rel: str, pages: list) -> list:
+    idx = [p[0] for p in pages].index(rel)
+    depth = rel.count("/")
+    up = "../" * depth
+    nav = [f"[index]({up}index.md)"]
+    if idx > 0:
+        nav.append(f"[prev]({Path(pages[idx - 1][0]).name})")
+    if idx + 1 < len(pages):
+        nav.append(f"[next]({Path(pages[idx + 1][0]).name})")
+    suffix = f" (page {idx + 1}/{len(pages)})" if len(pages) > 1 else ""
+    return [f"# {title}{suffix}", "", " · ".join(nav), ""]
+
+
+def _spec_file(anchor: str) -> str:
+    file_part = anchor.split("#", 1)[0]
+    return Path(file_part).name or "other.md"
+
+
+def build_shards(rel_data: dict, model: WikiModel) -> dict:
+    """Plan the sharded wiki: {relpath: (inputs, render_fn)} incl. index.md and log.md.
+
+    inputs is what the page is a pure function of; render_fn() → markdown.
+    """
+    shards: dict = {}
+    tasks = model.tasks
+
+    # Tasks by status
+    buckets: dict = {key: [] for key, _label in STATUS_SECTIONS}
+    buckets["other"] = []
+    for tid, t in tasks.items():
+        buckets.get(t.get("status") or "", buckets["other"]).append((tid, t))
+    labels = dict(STATUS_SECTIONS, other="Other")
+    status_rows = []
+    for key, bucket in buckets.items():
+        if not bucket:
+            continue
+        bucket.sort(key=lambda x: str(x[0]))
+        pages = _pages(f"status/{key}", bucket)
+        status_rows.append((labels[key], key, len(bucket), pages))
+        for rel, chunk in pages:
+            inputs = ["status", key, rel, len(pages),
+                      [[tid, t, len(model.files_for_task(tid)), model.files_for_task(tid)[:5]]
+                       for tid, t in chunk]]
+
+            def render(key=key, rel=rel, chunk=chunk, pages=pages):
+                parts = _page_header(labels[key], rel, pages)
+                for tid, t in chunk:
+                    parts.extend(_render_task_block(tid, t, model))
+                    parts.append("")
+                return "\n".join(parts).rstrip() + "\n"
+            shards[rel] = (inputs, render)
+
+    # Log by month
+    months: dict = {}
+    for entry in _log_entries(model):
+        month = entry[0][:7] if entry[0] else "untracked"
+        months.setdefault(month, []).append(entry)
+    month_rows = []
+    for month, entries in months.items():
+        pages = _pages(f"log/{month}", entries)
+        month_rows.append((month, len(entries), pages))
+        for rel, chunk in pages:
+            inputs = ["log", rel, len(pages),
+                      [[e[1], e[2].get("title"), e[2].get("status"), e[0], e[3][:3], len(e[3]), e[4]]
+                       for e in chunk]]
+
+            def render(month=month, rel=rel, chunk=chunk, pages=pages):
+                parts = _page_header(f"Log — {month}", rel, pages)
+                parts.extend(_log_lines(chunk))
+                return "\n".join(parts).rstrip() + "\n"
+            shards[rel] = (inputs, render)
+
+    # Spec coverage per spec file
+    by_file: dict = {}
+    for anchor, meta in (rel_data.get("specs") or {}).items():
+        by_file.setdefault(_spec_file(anchor), {})[anchor] = meta
+    spec_rows = []
+    for fname, specs in sorted(by_file.items()):
+        rel = f"specs/{fname}"
+        referenced = sum(1 for m in specs.values() if m.get("referenced_by"))
+        spec_rows.append((fname, rel, len(specs), referenced))
+
+        def render(fname=fname, rel=rel, specs=specs):
+            parts = _page_header(f"Spec Coverage — {fname}", rel, [(rel, None)])
+            parts.extend(_render_spec_coverage(specs)[2:])
+            return "\n".join(parts).rstrip() + "\n"
+        shards[rel] = (["specs", specs], render)
+
+    def render_index():
+        parts = [
+            "# Project Wiki — Index",
+            "",
+            "_Auto-generated from `.ultra/relations.json`. Do not edit manually._",
+            f"_Sharded: {len(tasks)} tasks. Open only the page you need._",
+            "",
+            f"{SYNC_STAMP_PREFIX}{rel_data.get('last_synced', '?')}",
+            "",
+            "## Tasks by Status",
+            "",
+            "| Status | Tasks | Pages |",
+            "|--------|-------|-------|",
+        ]
+        for label, key, count, pages in status_rows:
+            parts.append(f"| {label} (`{key}`) | {count} | {_page_links(pages)} |")
         parts.append("")
+        parts.extend(_build_recent_activity_section(rel_data, None, model))
+        if spec_rows:
+            parts += ["## Spec Coverage", "",
+                      "| Spec file | Sections | Referenced | Unreferenced |",
+                      "|-----------|----------|------------|--------------|"]
+            for fname, rel, total, referenced in spec_rows:
+                parts.append(f"| [{fname}]({rel}) | {total} | {referenced} | {total - referenced} |")
+            parts.append("")
+        advisories = rel_data.get("advisories") or []
+        if advisories:
+            lines = _render_advisories(advisories)
+            lines[0] = f"## Advisories ({len(advisories)})"
+            parts.extend(lines)
+        return "\n".join(parts).rstrip() + "\n"
+
+    def render_log():
+        parts = [
+            "# Project Wiki — Log",
+            "",
+            "_Auto-generated chronological view of task progress (newest first)._",
+            "",
+            f"{SYNC_STAMP_PREFIX}{rel_data.get('last_synced', '?')}",
+            "",
+        ]
+        if not month_rows:
+            parts.append("_(no tasks yet)_")
+            return "\n".join(parts) + "\n"
+        parts += ["| Month | Tasks | Pages |", "|-------|-------|-------|"]
+        for month, count, pages in month_rows:
+            parts.append(f"| {month} | {count} | {_page_links(pages)} |")
+        return "\n".join(parts).rstrip() + "\n"
+
+    # Top-level pages change on every sync stamp; always rendered (cheap)
+    shards["index.md"] = (None, render_index)
+    shards["log.md"] = (None, render_log)
+    return shards
+
+
+def _load_shard_state(root: Path) -> dict:
+    try:
+        data = json.loads((root / ".ultra" / "cache" / SHARD_STATE_NAME).read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return {}
+    return data.get("shards") or {} if isinstance(data, dict) else {}
 
-    return "\n".join(parts).rstrip() + "\n"
+
+def _save_shard_state(root: Path, state: dict) -> None:
+    path = root / ".ultra" / "cache" / SHARD_STATE_NAME
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, json.dumps({"version": 1, "shards": state}))
+    except OSError:
+        pass
+
+
+def _remove_stale_shards(wiki_dir: Path, keep: set) -> None:
+    for sub in SHARD_DIRS:
+        d = wiki_dir / sub
+        if not d.is_dir():
+            continue
+        for f in d.glob("*.md"):
+            if f"{sub}/{f.name}" not in keep:
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+
+
+def write_sharded_wiki(root: Path, rel_data: dict, model: WikiModel) -> int:
+    """Render + write shards whose inputs changed. Returns pages rendered."""
+    wiki_dir = root / ".ultra" / "wiki"
+    previous = _load_shard_state(root)
+    state: dict = {}
+    rendered = 0
+    for rel, (inputs, render) in build_shards(rel_data, model).items():
+        path = wiki_dir / rel
+        digest = None
+        if inputs is not None:
+            blob = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+            digest = hashlib.sha1(blob.encode("utf-8")).hexdigest()
+            state[rel] = digest
+            if previous.get(rel) == digest and path.exists():
+                continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(path, render())
+        rendered += 1
+    _remove_stale_shards(wiki_dir, set(state))
+    _save_shard_state(root, state)
+    return rendered
 
 
 def generate_wiki(root: Path) -> bool:
@@ -311,9 +648,14 @@ def generate_wiki(root: Path) -> bool:
     except OSError:
         return False
 
+    model = WikiModel(rel_data, root)
     try:
-        (wiki_dir / "index.md").write_text(build_index_md(rel_data, root), encoding="utf-8")
-        (wiki_dir / "log.md").write_text(build_log_md(rel_data, root), encoding="utf-8")
+        if len(model.tasks) >= shard_threshold():
+            write_sharded_wiki(root, rel_data, model)
+        else:
+            write_if_changed(wiki_dir / "index.md", build_index_md(rel_data, root, model))
+            write_if_changed(wiki_dir / "log.md", build_log_md(rel_data, root, model))
+            _remove_stale_shards(wiki_dir, set())
     except OSError:
         return False
     return True
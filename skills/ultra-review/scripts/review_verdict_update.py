@@ -19,6 +19,18 @@ import json
 import sys
 from pathlib import Path
 
+# Shared atomic/locked writes from ~/.claude/hooks (parallel review sessions
+# update the same index.json). Plain writes if the hooks are not installed.
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "hooks"))
+try:
+    from atomic_io import LockTimeout, atomic_write_text, update_json
+except ImportError:  # pragma: no cover
+    LockTimeout = OSError
+    update_json = None
+
+    def atomic_write_text(path, text):
+        Path(path).write_text(text, encoding="utf-8")
+
 
 def recalculate_verdict(data: dict) -> str:
     """Recalculate verdict from finding counts."""
@@ -68,7 +80,7 @@ def main():
         sys.exit(0)
 
     data["verdict"] = new_verdict
-    summary_file.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    atomic_write_text(summary_file, json.dumps(data, indent=2, ensure_ascii=False) + "\n")
     print(f"SUMMARY.json: {old_verdict} → {new_verdict}")
 
     # Update index.json
@@ -76,20 +88,28 @@ def main():
     index_file = reviews_dir / "index.json"
     session_id = session_path.name
 
+    def update_entry(index_data):
+        for entry in index_data.get("sessions", []):
+            if entry.get("id") == session_id:
+                entry["verdict"] = new_verdict
+                # Update P0/P1 counts from summary
+                by_sev = data.get("summary", {}).get("by_severity", {})
+                entry["p0"] = by_sev.get("P0", 0)
+                entry["p1"] = by_sev.get("P1", 0)
+                break
+        return index_data
+
     if index_file.exists():
         try:
-            index_data = json.loads(index_file.read_text(encoding="utf-8"))
-            for entry in index_data.get("sessions", []):
-                if entry.get("id") == session_id:
-                    entry["verdict"] = new_verdict
-                    # Update P0/P1 counts from summary
-                    by_sev = data.get("summary", {}).get("by_severity", {})
-                    entry["p0"] = by_sev.get("P0", 0)
-                    entry["p1"] = by_sev.get("P1", 0)
-                    break
-            index_file.write_text(json.dumps(index_data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            if update_json is not None:
+                # Locked read-modify-write: concurrent sessions keep each other's entries.
+                # strict: a corrupt index.json is reported, never reset to the default.
+                update_json(index_file, update_entry, default={"sessions": []}, strict=True)
+            else:
+                index_data = update_entry(json.loads(index_file.read_text(encoding="utf-8")))
+                atomic_write_text(index_file, json.dumps(index_data, indent=2, ensure_ascii=False) + "\n")
             print(f"index.json: updated session {session_id}")
-        except (json.JSONDecodeError, OSError) as e:
+        except (json.JSONDecodeError, OSError, LockTimeout) as e:
             print(f"Warning: failed to update index.json: {e}", file=sys.stderr)
 
     sys.exit(0)